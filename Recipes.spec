@@ -8,7 +8,7 @@ a = Analysis(['src/python/Main.py'],
              pathex=[],
              binaries=[],
              datas=[('src/python/resources', 'resources')],
-             hiddenimports=[],
+             hiddenimports=['resources_rc'],
              hookspath=[],
              hooksconfig={},
              runtime_hooks=[],
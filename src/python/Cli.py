@@ -0,0 +1,441 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+#
+# Copyright 2022 Denis Meyer
+#
+# This file is part of Rezepte.
+#
+
+"""Command-line interface
+
+Works on the cookbook without starting the GUI. Recipes are processed one at a time and results are
+written as soon as they are available, so the commands can be used in shell pipelines.
+
+Recipe paths are taken from the arguments (files or folders), from stdin ("-", one path per line)
+or, if none are given, from the cookbook folder.
+"""
+
+import argparse
+import json
+import logging
+import os
+import shutil
+import sys
+
+from classes.Exceptions import JsonProcessingError
+from lib.AppConfig import app_conf_get
+from lib.UnitConversion import SYSTEMS, convert_files, load_densities
+from lib.Utils import init_conf, iter_recipe_paths, load_json_recipe, rebase_recipe_images, validate_recipe_json
+
+_BASEDIR = os.path.dirname(os.path.abspath(__file__))
+
+def _iter_paths(args):
+    """Yields the recipe paths to process
+
+    :param args: The parsed arguments
+    """
+    if not args.paths:
+        yield from iter_recipe_paths(args.folder)
+        return
+    for path in args.paths:
+        if path == '-':
+            for line in sys.stdin:
+                line = line.rstrip('\n')
+                if line:
+                    yield line
+        elif os.path.isdir(path):
+            yield from iter_recipe_paths(path)
+        else:
+            yield path
+
+def _load(path):
+    """Loads a recipe, reporting errors on stderr
+
+    :param path: The recipe path
+    :return: The recipe or None
+    """
+    try:
+        return load_json_recipe(path)
+    except (FileNotFoundError, JsonProcessingError) as ex:
+        print(f'{path}: {ex}', file=sys.stderr)
+        return None
+
+def _get_output_path(path, args, suffix):
+    """Returns the output path of a recipe, mirroring the folder structure below the cookbook folder
+
+    :param path: The recipe path
+    :param args: The parsed arguments
+    :param suffix: The output suffix
+    """
+    folder = os.path.abspath(args.folder)
+    abspath = os.path.abspath(path)
+    if os.path.commonpath([folder, abspath]) == folder:
+        relpath = os.path.relpath(abspath, folder)
+    else:
+        relpath = os.path.basename(abspath)
+    output_path = os.path.join(args.output, os.path.splitext(relpath)[0] + suffix)
+    os.makedirs(os.path.dirname(output_path), exist_ok=True)
+    return output_path
+
+def _cmd_list(args):
+    """Lists recipes
+
+    :param args: The parsed arguments
+    """
+    for path in _iter_paths(args):
+        if args.json:
+            recipe = _load(path)
+            if recipe:
+                print(json.dumps({'path': path, 'name': recipe.name, 'ingredients': len(recipe.ingredients), 'steps': len(recipe.steps)}, ensure_ascii=False))
+        else:
+            print(path)
+    return 0
+
+def _cmd_search(args):
+    """Searches recipes
+
+    :param args: The parsed arguments
+    """
+    term = args.term.casefold()
+    fields = set(args.fields.split(','))
+    for path in _iter_paths(args):
+        recipe = _load(path)
+        if not recipe:
+            continue
+        texts = []
+        if 'name' in fields:
+            texts.append(recipe.name)
+        if 'ingredients' in fields:
+            texts.extend(ingredient.name or '' for ingredient in recipe.ingredients)
+        if 'steps' in fields:
+            texts.extend(recipe.steps)
+        if 'information' in fields:
+            texts.append(recipe.information)
+        if any(term in text.casefold() for text in texts):
+            if args.json:
+                print(json.dumps({'path': path, 'name': recipe.name}, ensure_ascii=False))
+            else:
+                print(path)
+    return 0
+
+def _cmd_validate(args):
+    """Validates recipes
+
+    :param args: The parsed arguments
+    """
+    nr_valid = 0
+    nr_invalid = 0
+    for path in _iter_paths(args):
+        try:
+            with open(path, 'r', encoding='utf-8') as file_json:
+                errors = validate_recipe_json(json.load(file_json))
+        except (OSError, ValueError) as ex:
+            errors = [str(ex)]
+        if errors:
+            nr_invalid += 1
+            for error in errors:
+                print(f'{path}: {error}')
+        else:
+            nr_valid += 1
+            if args.verbose:
+                print(f'{path}: OK')
+    print(f'{nr_valid} valid, {nr_invalid} invalid', file=sys.stderr)
+    return 1 if nr_invalid else 0
+
+def _cmd_export(args):
+    """Exports recipes as PDF or JSON
+
+    :param args: The parsed arguments
+    """
+    if args.format == 'pdf':
+        if args.output == '-':
+            print('PDF export needs an output folder (--output)', file=sys.stderr)
+            return 2
+        from i18n.I18n import I18n
+        from lib.RecipePDF import export_recipe_pdf
+        i18n = I18n(_BASEDIR, lang=args.lang or app_conf_get('language.main'))
+
+    nr_failed = 0
+    for path in _iter_paths(args):
+        recipe = _load(path)
+        if not recipe:
+            nr_failed += 1
+            continue
+        try:
+            if args.format == 'pdf':
+                output_path = _get_output_path(path, args, '.pdf')
+                export_recipe_pdf(recipe, i18n, os.path.dirname(output_path), os.path.splitext(os.path.basename(output_path))[0])
+                print(output_path)
+            elif args.output == '-':
+                print(json.dumps(dict(recipe.as_obj(), path=path), ensure_ascii=False))
+            else:
+                output_path = _get_output_path(path, args, '.json')
+                with open(output_path, 'w', encoding='utf-8') as file_json:
+                    json.dump(recipe.as_obj(), file_json)
+                print(output_path)
+        except BrokenPipeError:
+            raise
+        except Exception as ex:
+            nr_failed += 1
+            print(f'{path}: Export failed: {ex}', file=sys.stderr)
+    return 1 if nr_failed else 0
+
+def _cmd_move(args):
+    """Moves a recipe or folder
+
+    :param args: The parsed arguments
+    """
+    source = os.path.abspath(args.source)
+    destination = os.path.abspath(args.destination)
+    if not os.path.isdir(destination):
+        print(f'Destination is not a folder: "{args.destination}"', file=sys.stderr)
+        return 2
+    if os.path.isdir(source) and os.path.commonpath([source, destination]) == source:
+        print(f'Cannot move "{args.source}" into itself', file=sys.stderr)
+        return 2
+    if os.path.dirname(source) == destination:
+        logging.info('Same folder, not moving')
+        return 0
+    try:
+        moved = shutil.move(source, destination)
+    except (OSError, shutil.Error) as ex:
+        print(f'Failed to move "{args.source}" to "{args.destination}": {ex}', file=sys.stderr)
+        return 1
+    # Relative photo paths point from the recipe files to the photos
+    rebase_recipe_images(source, moved)
+    print(moved)
+    return 0
+
+def _cmd_convert(args):
+    """Converts the ingredient units of recipes in place
+
+    :param args: The parsed arguments
+    """
+    from i18n.I18n import I18n
+    i18n = I18n(_BASEDIR, lang=args.lang or app_conf_get('language.main'))
+    decimal_separator = i18n.translate('GUI.NUMBER.DECIMAL_SEPARATOR', '.')
+    densities = None if args.no_densities else load_densities(_BASEDIR)
+
+    nr_recipes = 0
+    nr_ingredients = 0
+    nr_failed = 0
+    for path, nr_converted, error in convert_files(_iter_paths(args), args.to, densities, decimal_separator, args.workers, args.dry_run):
+        if error:
+            nr_failed += 1
+            print(f'{path}: {error}', file=sys.stderr)
+        elif nr_converted:
+            nr_recipes += 1
+            nr_ingredients += nr_converted
+            print(path)
+    print(f'{nr_ingredients} ingredients in {nr_recipes} recipes {"to convert" if args.dry_run else "converted"}, {nr_failed} failed', file=sys.stderr)
+    return 1 if nr_failed else 0
+
+def _get_index(args):
+    """Returns the recipe index, the stored one unless disabled
+
+    :param args: The parsed arguments
+    """
+    from lib.RecipeIndex import RecipeIndex
+    return RecipeIndex(app_conf_get('index.file') if app_conf_get('index.persist', True) and not args.no_index else None)
+
+def _save_index(index):
+    """Saves the recipe index, reporting errors
+
+    :param index: The RecipeIndex
+    """
+    try:
+        index.save()
+    except OSError as ex:
+        logging.error('Failed to save recipe index to "%s": %s', index.index_file, ex)
+
+def _cmd_nutrition(args):
+    """Prints the nutrition values of recipes, cached in the recipe index
+
+    :param args: The parsed arguments
+    """
+    from lib.Nutrition import NUTRIENTS, load_nutrient_table
+    index = _get_index(args)
+    entries = index.get_nutrition(_iter_paths(args), load_nutrient_table(_BASEDIR), load_densities(_BASEDIR))
+    for entry in entries:
+        nutrition = entry.nutrition.per_serving(entry.servings) if args.per_serving else entry.nutrition
+        if nutrition is None:
+            print(f'{entry.path}: No servings set', file=sys.stderr)
+            continue
+        values = {nutrient: round(getattr(nutrition, nutrient), 1) for nutrient in NUTRIENTS}
+        if args.json:
+            print(json.dumps(dict(path=entry.path, name=entry.name, servings=entry.servings, missing=nutrition.nr_missing, **values), ensure_ascii=False))
+        else:
+            print('\t'.join([entry.path] + [str(value) for value in values.values()] + [f'{nutrition.nr_missing}/{nutrition.nr_ingredients}']))
+    _save_index(index)
+    return 0
+
+def _cmd_duplicates(args):
+    """Prints groups of near-duplicate recipes
+
+    :param args: The parsed arguments
+    """
+    from lib.Duplicates import find_duplicates
+    index = _get_index(args)
+    entries = index.get_all(_iter_paths(args))
+    clusters = find_duplicates(entries, args.threshold if args.threshold is not None else app_conf_get('duplicates.threshold', 0.8))
+    for cluster in clusters:
+        if args.json:
+            print(json.dumps(cluster.as_obj(), ensure_ascii=False))
+        else:
+            print(f'# {len(cluster.entries)} recipes, {cluster.similarity:.0%} similar')
+            for entry in cluster.entries:
+                print(entry.path)
+            print()
+    print(f'{len(clusters)} groups of near-duplicates in {len(entries)} recipes', file=sys.stderr)
+    _save_index(index)
+    return 0
+
+def _cmd_spellings(args):
+    """Prints the ingredients written in several ways
+
+    :param args: The parsed arguments
+    """
+    from lib.IngredientSpellings import get_spelling_groups
+    index = _get_index(args)
+    entries = index.get_all(_iter_paths(args))
+    groups = get_spelling_groups(entries)
+    for group in groups:
+        if args.json:
+            print(json.dumps(group.as_obj(), ensure_ascii=False))
+        else:
+            print('\t'.join(f'{spelling} ({len(paths)})' for spelling, paths in group.spellings.items()))
+    print(f'{len(groups)} ingredients written in several ways in {len(entries)} recipes', file=sys.stderr)
+    _save_index(index)
+    return 0
+
+def _cmd_merge_spellings(args):
+    """Renames the ingredients written in one of the spellings in place
+
+    :param args: The parsed arguments
+    """
+    from lib.IngredientSpellings import merge_spellings
+    spellings = {' '.join(spelling.split()) for spelling in args.spelling}
+    index = _get_index(args)
+    # Only the recipes using one of the spellings are rewritten
+    paths = [entry.path for entry in index.get_all(_iter_paths(args))
+             if any(' '.join(name.split()) in spellings for _quantity, name, _key in entry.ingredients)]
+    nr_recipes = 0
+    nr_ingredients = 0
+    nr_failed = 0
+    for path, nr_renamed, error in merge_spellings(paths, spellings, args.into, args.dry_run):
+        if error:
+            nr_failed += 1
+            print(f'{path}: {error}', file=sys.stderr)
+        elif nr_renamed:
+            nr_recipes += 1
+            nr_ingredients += nr_renamed
+            print(path)
+    print(f'{nr_ingredients} ingredients in {nr_recipes} recipes {"to rename" if args.dry_run else "renamed"}, {nr_failed} failed', file=sys.stderr)
+    if not args.dry_run:
+        index.get_all(paths)
+    _save_index(index)
+    return 1 if nr_failed else 0
+
+def _get_parser():
+    """Returns the argument parser"""
+    parser = argparse.ArgumentParser(prog='recipes', description='Cookbook operations without the GUI')
+    parser.add_argument('--folder', help='Cookbook folder, defaults to the configured one')
+    parser.add_argument('-v', '--verbose', action='store_true', help='Verbose output and logging')
+    subparsers = parser.add_subparsers(dest='command', required=True)
+
+    def add_paths(subparser):
+        subparser.add_argument('paths', nargs='*', help='Recipe files or folders, "-" reads paths from stdin')
+
+    parser_list = subparsers.add_parser('list', help='List recipes')
+    parser_list.add_argument('--json', action='store_true', help='Print JSON lines with name and sizes')
+    add_paths(parser_list)
+    parser_list.set_defaults(func=_cmd_list)
+
+    parser_search = subparsers.add_parser('search', help='Search recipes (case-insensitive)')
+    parser_search.add_argument('term', help='Search term')
+    parser_search.add_argument('--fields', default='name,ingredients,steps,information', help='Comma-separated fields to search')
+    parser_search.add_argument('--json', action='store_true', help='Print JSON lines')
+    add_paths(parser_search)
+    parser_search.set_defaults(func=_cmd_search)
+
+    parser_validate = subparsers.add_parser('validate', help='Validate recipe files')
+    add_paths(parser_validate)
+    parser_validate.set_defaults(func=_cmd_validate)
+
+    parser_export = subparsers.add_parser('export', help='Export recipes as PDF or JSON')
+    parser_export.add_argument('--format', choices=['json', 'pdf'], default='json', help='Export format')
+    parser_export.add_argument('-o', '--output', default='-', help='Output folder, "-" prints JSON lines to stdout')
+    parser_export.add_argument('--lang', help='Language of the PDF headings')
+    add_paths(parser_export)
+    parser_export.set_defaults(func=_cmd_export)
+
+    parser_convert = subparsers.add_parser('convert', help='Convert ingredient units in place (metric or US customary)')
+    parser_convert.add_argument('--to', choices=SYSTEMS, required=True, help='Target unit system')
+    parser_convert.add_argument('--workers', type=int, help='Number of worker processes, defaults to the number of CPUs')
+    parser_convert.add_argument('--dry-run', action='store_true', help='Only print the recipes that would change')
+    parser_convert.add_argument('--no-densities', action='store_true', help='Do not convert between volume and mass')
+    parser_convert.add_argument('--lang', help='Language of the decimal separator')
+    add_paths(parser_convert)
+    parser_convert.set_defaults(func=_cmd_convert)
+
+    parser_nutrition = subparsers.add_parser('nutrition', help='Print kcal, protein, fat and carbohydrates (g) of recipes')
+    parser_nutrition.add_argument('--per-serving', action='store_true', help='Values per serving, recipes without servings are skipped')
+    parser_nutrition.add_argument('--json', action='store_true', help='Print JSON lines')
+    parser_nutrition.add_argument('--no-index', action='store_true', help='Do not read or update the stored recipe index')
+    add_paths(parser_nutrition)
+    parser_nutrition.set_defaults(func=_cmd_nutrition)
+
+    parser_duplicates = subparsers.add_parser('duplicates', help='Find groups of near-duplicate recipes')
+    parser_duplicates.add_argument('--threshold', type=float, help='Minimum similarity (0-1) of ingredients and steps, defaults to the configured one')
+    parser_duplicates.add_argument('--json', action='store_true', help='Print JSON lines, one per group')
+    parser_duplicates.add_argument('--no-index', action='store_true', help='Do not read or update the stored recipe index')
+    add_paths(parser_duplicates)
+    parser_duplicates.set_defaults(func=_cmd_duplicates)
+
+    parser_spellings = subparsers.add_parser('spellings', help='List ingredients written in several ways ("Ei", "Eier", "eggs")')
+    parser_spellings.add_argument('--json', action='store_true', help='Print JSON lines, one per ingredient')
+    parser_spellings.add_argument('--no-index', action='store_true', help='Do not read or update the stored recipe index')
+    add_paths(parser_spellings)
+    parser_spellings.set_defaults(func=_cmd_spellings)
+
+    parser_merge_spellings = subparsers.add_parser('merge-spellings', help='Rename ingredients written in one of the spellings in place')
+    parser_merge_spellings.add_argument('--into', required=True, help='The new ingredient name')
+    parser_merge_spellings.add_argument('--spelling', required=True, action='append', help='An ingredient name to replace, can be repeated')
+    parser_merge_spellings.add_argument('--dry-run', action='store_true', help='Only print the recipes that would be changed')
+    parser_merge_spellings.add_argument('--no-index', action='store_true', help='Do not read or update the stored recipe index')
+    add_paths(parser_merge_spellings)
+    parser_merge_spellings.set_defaults(func=_cmd_merge_spellings)
+
+    parser_move = subparsers.add_parser('move', help='Move a recipe or folder into another folder')
+    parser_move.add_argument('source', help='Recipe file or folder')
+    parser_move.add_argument('destination', help='Destination folder')
+    parser_move.set_defaults(func=_cmd_move)
+
+    return parser
+
+def main(argv=None):
+    """Main
+
+    :param argv: The arguments
+    """
+    args = _get_parser().parse_args(argv)
+
+    logging.basicConfig(level=logging.INFO if args.verbose else logging.WARNING,
+                        format=app_conf_get('logging.format'),
+                        datefmt=app_conf_get('logging.datefmt'),
+                        stream=sys.stderr)
+
+    init_conf(save_defaults=False)
+    if not args.folder:
+        args.folder = app_conf_get('recipes.folder')
+
+    try:
+        return args.func(args)
+    except BrokenPipeError:
+        # Output closed early, e.g. piped into head
+        devnull = os.open(os.devnull, os.O_WRONLY)
+        os.dup2(devnull, sys.stdout.fileno())
+        return 1
+
+if __name__ == '__main__':
+    sys.exit(main())
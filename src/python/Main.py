@@ -8,36 +8,34 @@
 
 """Main"""
 
+# Imported first, the startup profile is measured from here
+from lib.StartupProfiler import enable_startup_profiling, startup_phase
+
 import os
-import logging
+import sys
 
-from lib.AppConfig import app_conf_get, get_loglevel
-from gui.MainGui import MainGUI
+from lib.AppConfig import app_conf_set
+from lib.LogConfig import init_logging
 
-def _initialize_logger():
-    """Initializes the logger"""
-    if app_conf_get('logging.log_to_file'):
-        _basedir = os.path.dirname(app_conf_get('logging.logfile'))
+if __name__ == '__main__':
+    print(f'Current working directory: {os.getcwd()}')
 
-        if not os.path.exists(_basedir):
-            os.makedirs(_basedir)
+    if '--profile-startup' in sys.argv or os.environ.get('RECIPES_PROFILE_STARTUP'):
+        enable_startup_profiling()
 
-    _lvl = get_loglevel()
+    if '--metrics' in sys.argv or os.environ.get('RECIPES_METRICS'):
+        app_conf_set('metrics.enabled', True)
 
-    logging.basicConfig(level=_lvl,
-                        format=app_conf_get('logging.format'),
-                        datefmt=app_conf_get('logging.datefmt'))
+    if '--trace' in sys.argv or os.environ.get('RECIPES_TRACE'):
+        app_conf_set('tracing.enabled', True)
 
-    if app_conf_get('logging.log_to_file'):
-        handler_file = logging.FileHandler(app_conf_get('logging.logfile'), mode='w', encoding=None, delay=False)
-        handler_file.setLevel(_lvl)
-        handler_file.setFormatter(logging.Formatter(fmt=app_conf_get('logging.format'), datefmt=app_conf_get('logging.datefmt')))
-        logging.getLogger().addHandler(handler_file)
+    if '--detect-stalls' in sys.argv or os.environ.get('RECIPES_DETECT_STALLS'):
+        app_conf_set('stalls.detect', True)
 
-if __name__ == '__main__':
-    print(f'Current working directory: {os.getcwd()}')
+    init_logging()
 
-    _initialize_logger()
+    with startup_phase('imports'):
+        from gui.MainGui import MainGUI
 
     basedir = os.path.dirname(__file__)
 
@@ -0,0 +1,365 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+#
+# Copyright 2022 Denis Meyer
+#
+# This file is part of Rezepte.
+#
+
+"""Benchmark suite
+
+Runs the benchmarks against a synthetic (or an existing) cookbook and writes the results as JSON,
+so they can be compared between releases.
+
+Usage (from src/python):
+    python -m benchmark.Benchmarks --recipes 5000 --output bench.json
+    python -m benchmark.Benchmarks --recipes 5000 --compare bench.json
+"""
+
+import argparse
+import json
+import logging
+import os
+import platform
+import statistics
+import sys
+import tempfile
+import time
+
+from benchmark.SyntheticCookbook import add_arguments, generate_from_args
+from classes.Recipe import Recipe
+from i18n.I18n import I18n
+from lib.AppConfig import app_conf_get
+from lib.QuantityParser import parse_quantity
+from lib.RecipeIndex import RecipeIndex
+from lib.RecipePaths import RecipePaths
+from lib.RecipeSimilarity import RecipeSimilarity
+from lib.Duplicates import find_duplicates
+from lib.Nutrition import compute_nutrition, load_nutrient_table
+from lib.ShoppingList import aggregate_shopping_list
+from lib.IngredientNames import load_ingredient_dictionary, normalize_name
+from lib.UnitConversion import convert_quantities, load_densities
+from lib.Utils import iter_recipe_paths, load_i18n, load_json_recipe, save_recipe
+
+_BASEDIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+_CASES = []
+
+def benchmark(name):
+    """Registers a benchmark case
+
+    The case is called with the context dict and returns the number of processed items,
+    or a string with the reason if it has to be skipped.
+
+    :param name: The case name
+    """
+    def decorator(func):
+        _CASES.append((name, func))
+        return func
+    return decorator
+
+@benchmark('scan.listdir')
+def _scan_listdir(context):
+    """Scans the cookbook like Widget._load_project_structure (os.listdir/os.path.isdir per entry)"""
+    suffix = app_conf_get('suffix.recipe', '.json')
+
+    def scan(startpath):
+        nr_items = 0
+        for filename in os.listdir(startpath):
+            path_info = os.path.join(startpath, filename)
+            if os.path.isdir(path_info):
+                nr_items += 1 + scan(path_info)
+            elif path_info.endswith(suffix):
+                nr_items += 1
+        return nr_items
+
+    return scan(context['folder'])
+
+@benchmark('scan.scandir')
+def _scan_scandir(context):
+    """Scans the cookbook with Utils.iter_recipe_paths"""
+    return sum(1 for _path in iter_recipe_paths(context['folder']))
+
+@benchmark('recipe.load_json')
+def _load_json(context):
+    """Loads all recipes with Utils.load_json_recipe"""
+    for path in context['paths']:
+        load_json_recipe(path)
+    return len(context['paths'])
+
+@benchmark('recipe.construct')
+def _construct(context):
+    """Constructs Recipe objects from already parsed JSON"""
+    for dict_json in context['jsons']:
+        Recipe(**dict_json)
+    return len(context['jsons'])
+
+@benchmark('recipe.save')
+def _save(context):
+    """Saves recipes with Utils.save_recipe (overwriting existing files)"""
+    recipes = context['recipes'][:context['save_limit']]
+    for i, recipe in enumerate(recipes):
+        save_recipe(recipe, os.path.join(context['tmpdir'], f'save-{i}.json'))
+    return len(recipes)
+
+@benchmark('pdf.export')
+def _pdf_export(context):
+    """Exports recipes as PDF"""
+    try:
+        from lib.RecipePDF import export_recipe_pdf
+    except ImportError as ex:
+        return f'fpdf not available: {ex}'
+    recipes = context['recipes'][:context['pdf_limit']]
+    for i, recipe in enumerate(recipes):
+        export_recipe_pdf(recipe, context['i18n'], context['tmpdir'], f'export-{i}')
+    return len(recipes)
+
+@benchmark('i18n.translate')
+def _translate(context):
+    """Looks up translations"""
+    i18n = context['i18n']
+    keys = context['i18n_keys']
+    nr_lookups = context['translate_lookups']
+    nr_keys = len(keys)
+    for i in range(nr_lookups):
+        i18n.translate(keys[i % nr_keys])
+    return nr_lookups
+
+@benchmark('quantity.parse')
+def _parse_quantities(context):
+    """Parses all ingredient quantities, starting with an empty parser cache"""
+    parse_quantity.cache_clear()
+    nr_items = 0
+    for dict_json in context['jsons']:
+        for ingredient in dict_json.get('ingredients', []):
+            parse_quantity(ingredient.get('quantity'))
+            nr_items += 1
+    return nr_items
+
+@benchmark('index.build')
+def _index_build(context):
+    """Indexes all recipes into an empty (in-memory) RecipeIndex"""
+    return len(RecipeIndex().get_all(context['paths']))
+
+@benchmark('shopping_list.aggregate')
+def _shopping_list(context):
+    """Sums up the ingredients of all recipes from the warm RecipeIndex (including the modification checks)"""
+    entries = context['index'].get_all(context['paths'])
+    aggregate_shopping_list(entries)
+    return len(entries)
+
+@benchmark('nutrition.compute')
+def _nutrition(context):
+    """Computes the nutrition values of all recipes of the warm RecipeIndex in one batch"""
+    entries = context['index'].get_all(context['paths'])
+    compute_nutrition([entry.ingredients for entry in entries], load_nutrient_table(_BASEDIR), load_densities(_BASEDIR))
+    return len(entries)
+
+@benchmark('duplicates.find')
+def _duplicates(context):
+    """Finds near-duplicates among all recipes of the warm RecipeIndex"""
+    entries = context['index'].get_all(context['paths'])
+    find_duplicates(entries)
+    return len(entries)
+
+@benchmark('similar.build')
+def _similar_build(context):
+    """Builds the TF-IDF matrix of all recipes of the warm RecipeIndex"""
+    entries = context['index'].get_all(context['paths'])
+    context['similarity'] = RecipeSimilarity()
+    context['similarity'].update_entries(entries)
+    return len(entries)
+
+@benchmark('similar.query')
+def _similar_query(context):
+    """Finds the 10 most similar recipes of 100 recipes, the first query after a changed recipe"""
+    if 'similarity' not in context:
+        _similar_build(context)
+    model = context['similarity']
+    entries = context['index'].get_all(context['paths'][:100])
+    for entry in entries:
+        model.update_entries([entry])
+        model.most_similar([key for _quantity, _name, key in entry.ingredients], entry.steps, exclude=entry.path)
+    return len(entries)
+
+@benchmark('ingredients.normalize')
+def _normalize_ingredients(context):
+    """Matches all ingredient names against the ingredient dictionary, bypassing the cache of normalize_name"""
+    dictionary = load_ingredient_dictionary()
+    nr_items = 0
+    for dict_json in context['jsons']:
+        for ingredient in dict_json.get('ingredients', []):
+            dictionary.normalize(ingredient.get('name'))
+            nr_items += 1
+    return nr_items
+
+@benchmark('units.convert')
+def _convert_units(context):
+    """Converts the ingredient quantities of all recipes to US units (without writing)"""
+    densities = load_densities(_BASEDIR)
+    nr_items = 0
+    for dict_json in context['jsons']:
+        ingredients = dict_json.get('ingredients', [])
+        convert_quantities([(parse_quantity(ingredient.get('quantity')), normalize_name(ingredient.get('name'))) for ingredient in ingredients], 'us', densities)
+        nr_items += len(ingredients)
+    return nr_items
+
+@benchmark('quickopen.build')
+def _quickopen_build(context):
+    """Lists all recipe paths in a RecipePaths and builds its fuzzy matcher"""
+    context['recipe_paths'] = RecipePaths()
+    context['recipe_paths'].set_paths(context['folder'], context['paths'])
+    context['recipe_paths'].prepare()
+    return len(context['paths'])
+
+@benchmark('quickopen.type')
+def _quickopen_type(context):
+    """Types and deletes the names of 20 recipes character by character into the quick-open search"""
+    if 'recipe_paths' not in context:
+        _quickopen_build(context)
+    recipe_paths = context['recipe_paths']
+    nr_keystrokes = 0
+    for path in context['paths'][::max(1, len(context['paths']) // 20)][:20]:
+        name = os.path.basename(path)[:-len(recipe_paths.suffix)]
+        queries = [name[:i] for i in range(1, len(name) + 1)]
+        for query in queries + queries[::-1]:
+            recipe_paths.search(query)
+            nr_keystrokes += 1
+    return nr_keystrokes
+
+def _run_case(func, context, repeat):
+    """Runs a case repeatedly
+
+    :param func: The case
+    :param context: The context
+    :param repeat: The number of runs
+    """
+    runs = []
+    nr_items = 0
+    for _run in range(repeat):
+        start = time.perf_counter()
+        nr_items = func(context)
+        duration = time.perf_counter() - start
+        if isinstance(nr_items, str):
+            return {'skipped': nr_items}
+        runs.append(duration)
+    median = statistics.median(runs)
+    return {
+        'items': nr_items,
+        'runs_s': runs,
+        'min_s': min(runs),
+        'median_s': median,
+        'mean_s': statistics.mean(runs),
+        'per_item_us': (median / nr_items * 1e6) if nr_items else 0.0
+    }
+
+def _create_context(folder, args, tmpdir):
+    """Creates the benchmark context
+
+    :param folder: The cookbook folder
+    :param args: The parsed arguments
+    :param tmpdir: A temporary directory for written files
+    """
+    paths = list(iter_recipe_paths(folder))
+    jsons = []
+    for path in paths:
+        with open(path, 'r', encoding='utf-8') as file_json:
+            jsons.append(json.load(file_json))
+    i18n = I18n(_BASEDIR, lang='de')
+    index = RecipeIndex()
+    index.get_all(paths)
+    return {
+        'folder': folder,
+        'paths': paths,
+        'jsons': jsons,
+        'recipes': [Recipe(**dict_json) for dict_json in jsons],
+        'tmpdir': tmpdir,
+        'save_limit': args.save_limit,
+        'pdf_limit': args.pdf_limit,
+        'i18n': i18n,
+        'i18n_keys': list(load_i18n(_BASEDIR, i18n.language_main).keys()),
+        'translate_lookups': args.translate_lookups,
+        'index': index
+    }
+
+def _compare(results, baseline_file, threshold=0.1):
+    """Prints the change of the per-item times compared to a previous result file
+
+    :param results: The results
+    :param baseline_file: The previous result file
+    :param threshold: Relative slowdown that is reported as regression
+    :return: The number of regressions
+    """
+    with open(baseline_file, 'r', encoding='utf-8') as jsonfile:
+        baseline = json.load(jsonfile)
+    print(f'Compared to {baseline_file} (version {baseline.get("version")}, {baseline.get("timestamp")}):')
+    nr_regressions = 0
+    for name, result in results['results'].items():
+        old = baseline['results'].get(name)
+        if 'median_s' not in result or not old or 'median_s' not in old:
+            continue
+        ratio = result['per_item_us'] / old['per_item_us'] if old['per_item_us'] else 1.0
+        flag = ''
+        if ratio > 1.0 + threshold:
+            flag = '  <-- regression'
+            nr_regressions += 1
+        print(f'  {name:<24} {old["per_item_us"]:10.2f} us -> {result["per_item_us"]:10.2f} us per item ({ratio:5.2f}x){flag}')
+    return nr_regressions
+
+def main():
+    """Main"""
+    parser = argparse.ArgumentParser(description='Runs the benchmark suite')
+    parser.add_argument('--cookbook', help='Use an existing cookbook instead of generating one')
+    parser.add_argument('--repeat', type=int, default=5, help='Runs per case')
+    parser.add_argument('--only', default='', help='Comma-separated case name prefixes to run')
+    parser.add_argument('--save-limit', type=int, default=1000, help='Maximum number of recipes saved per run')
+    parser.add_argument('--pdf-limit', type=int, default=20, help='Maximum number of recipes exported as PDF per run')
+    parser.add_argument('--translate-lookups', type=int, default=100000, help='Number of translation lookups per run')
+    parser.add_argument('--output', help='Write the results as JSON to this file')
+    parser.add_argument('--compare', help='Compare with a previous result file')
+    add_arguments(parser)
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.WARNING)
+
+    prefixes = [prefix for prefix in args.only.split(',') if prefix]
+
+    with tempfile.TemporaryDirectory(prefix='recipes-benchmark-') as tmpdir:
+        folder = args.cookbook
+        if not folder:
+            folder = os.path.join(tmpdir, 'cookbook')
+            generate_from_args(folder, args)
+        outdir = os.path.join(tmpdir, 'out')
+        os.makedirs(outdir)
+
+        context = _create_context(folder, args, outdir)
+        results = {
+            'version': app_conf_get('version'),
+            'build': app_conf_get('build'),
+            'python': platform.python_version(),
+            'platform': platform.platform(),
+            'timestamp': time.strftime('%Y-%m-%dT%H:%M:%S'),
+            'cookbook': args.cookbook or {key: getattr(args, key) for key in ['recipes', 'depth', 'fanout', 'ingredients', 'steps', 'words', 'umlauts', 'seed']},
+            'repeat': args.repeat,
+            'results': {}
+        }
+        for name, func in _CASES:
+            if prefixes and not any(name.startswith(prefix) for prefix in prefixes):
+                continue
+            result = _run_case(func, context, args.repeat)
+            results['results'][name] = result
+            if 'skipped' in result:
+                print(f'{name:<24} skipped: {result["skipped"]}')
+            else:
+                print(f'{name:<24} {result["median_s"] * 1000.0:10.2f} ms median, {result["items"]:8d} items, {result["per_item_us"]:10.2f} us per item')
+
+    if args.output:
+        with open(args.output, 'w', encoding='utf-8') as jsonfile:
+            json.dump(results, jsonfile, indent=4)
+
+    if args.compare and _compare(results, args.compare):
+        return 1
+    return 0
+
+if __name__ == '__main__':
+    sys.exit(main())
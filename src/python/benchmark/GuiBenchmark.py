@@ -0,0 +1,334 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+#
+# Copyright 2022 Denis Meyer
+#
+# This file is part of Rezepte.
+#
+
+"""GUI responsiveness benchmark
+
+Runs MainWindow, Widget and RecipeWindow on the offscreen Qt platform against a generated cookbook and
+scripts user operations (refresh, open, editing rows, drag-reordering, export). Every scripted step is
+run from the event loop, while a probe timer measures how late the event loop gets to it (event-loop
+latency). Windows report the time from creation to their first paint event.
+
+Usage (from src/python):
+    python -m benchmark.GuiBenchmark --recipes 5000 --rows 1000 --output gui.json
+"""
+
+import os
+os.environ.setdefault('QT_QPA_PLATFORM', 'offscreen')
+
+import argparse
+import json
+import logging
+import platform
+import random
+import statistics
+import sys
+import tempfile
+import time
+
+from PyQt5.QtCore import Qt, QEvent, QObject, QTimer
+from PyQt5.QtWidgets import QApplication
+
+from benchmark.SyntheticCookbook import add_arguments, generate_from_args, generate_recipe
+from gui.components.MainWindow import MainWindow
+from i18n.I18n import I18n
+from lib.AppConfig import app_conf_get, app_conf_set
+from lib.ImageCache import ImageCache
+from lib.RecipeIndex import RecipeIndex
+from lib.Utils import iter_recipe_paths, save_recipe
+
+_BASEDIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+def _percentiles(values):
+    """Returns the nearest-rank percentiles of a list of values
+
+    :param values: The values
+    """
+    if not values:
+        return {'count': 0}
+    values = sorted(values)
+    def rank(percent):
+        return values[min(len(values) - 1, int(round(percent / 100.0 * (len(values) - 1))))]
+    return {
+        'count': len(values),
+        'p50': rank(50),
+        'p90': rank(90),
+        'p99': rank(99),
+        'max': values[-1],
+        'mean': statistics.mean(values)
+    }
+
+class _LatencyProbe(QObject):
+    """Fires a short timer continuously and records how late it fires (ms) per operation"""
+
+    def __init__(self, interval_ms=5):
+        """Initializes the probe
+
+        :param interval_ms: The timer interval
+        """
+        super(_LatencyProbe, self).__init__()
+
+        self.interval_ms = interval_ms
+        self.operation = None
+        self.samples = {}
+        self._last = None
+        self._timer = QTimer(self)
+        self._timer.setTimerType(Qt.PreciseTimer)
+        self._timer.setInterval(interval_ms)
+        self._timer.timeout.connect(self._on_timeout)
+
+    def start(self):
+        """Starts probing"""
+        self._last = time.perf_counter()
+        self._timer.start()
+
+    def stop(self):
+        """Stops probing"""
+        self._timer.stop()
+
+    def _on_timeout(self):
+        """Records the lateness of the timer"""
+        now = time.perf_counter()
+        late_ms = max(0.0, (now - self._last) * 1000.0 - self.interval_ms)
+        self._last = now
+        if self.operation:
+            self.samples.setdefault(self.operation, []).append(late_ms)
+
+class _FirstPaint(QObject):
+    """Records the time of the first paint event of a widget"""
+
+    def __init__(self, widget, start):
+        """Initializes the event filter
+
+        :param widget: The widget
+        :param start: The perf_counter start time
+        """
+        super(_FirstPaint, self).__init__()
+
+        self.start = start
+        self.elapsed_ms = None
+        self._widget = widget
+        widget.installEventFilter(self)
+
+    # @override
+    def eventFilter(self, obj, event):
+        """eventFilter
+
+        :param obj: The object
+        :param event: The event
+        """
+        if event.type() == QEvent.Paint and self.elapsed_ms is None:
+            self.elapsed_ms = (time.perf_counter() - self.start) * 1000.0
+            self._widget.removeEventFilter(self)
+        return False
+
+class GuiBenchmark():
+    """Runs the scripted operations step by step from the event loop"""
+
+    def __init__(self, app, args, folder, tmpdir):
+        """Initializes the benchmark
+
+        :param app: The QApplication
+        :param args: The parsed arguments
+        :param folder: The cookbook folder
+        :param tmpdir: A temporary directory for exports
+        """
+        self.app = app
+        self.args = args
+        self.folder = folder
+        self.tmpdir = tmpdir
+        self.i18n = I18n(_BASEDIR, lang='de')
+        self.image_cache = ImageCache(_BASEDIR)
+        self.probe = _LatencyProbe(args.probe_interval)
+        self.main_window = None
+        self.recipe_window = None
+        self.large_recipe_path = None
+        self.results = {}
+        self._steps = None
+        self._operation = None
+        self._step_times = []
+        self._operation_start = 0.0
+
+    def run(self):
+        """Runs all operations and returns the results"""
+        self._steps = self._script()
+        self.probe.start()
+        QTimer.singleShot(0, self._next_step)
+        self.app.exec_()
+        self.probe.stop()
+        return self.results
+
+    def _next_step(self):
+        """Runs the next scripted step and schedules the one after"""
+        start = time.perf_counter()
+        try:
+            operation = next(self._steps)
+        except StopIteration:
+            self._finish_operation()
+            self.app.quit()
+            return
+        except Exception:
+            logging.exception('Benchmark step failed')
+            self.app.quit()
+            return
+        if operation != self._operation:
+            self._finish_operation()
+            self._operation = operation
+            self._operation_start = start
+            self._step_times = []
+            self.probe.operation = operation
+        self._step_times.append((time.perf_counter() - start) * 1000.0)
+        # Let the event loop process paints, layouts and the probe before the next step
+        QTimer.singleShot(0, self._next_step)
+
+    def _finish_operation(self):
+        """Stores the results of the current operation"""
+        if not self._operation:
+            return
+        result = self.results.setdefault(self._operation, {})
+        result['steps'] = len(self._step_times)
+        result['total_ms'] = (time.perf_counter() - self._operation_start) * 1000.0
+        result['step_ms'] = _percentiles(self._step_times)
+        result['latency_ms'] = _percentiles(self.probe.samples.get(self._operation, []))
+        print(f'{self._operation:<20} {result["total_ms"]:10.1f} ms total, step p50 {result["step_ms"].get("p50", 0):8.2f} ms, latency p99 {result["latency_ms"].get("p99", 0):8.2f} ms, max {result["latency_ms"].get("max", 0):8.2f} ms')
+        self._operation = None
+
+    def _wait_for_paint(self, operation, first_paint, timeout_s=5.0):
+        """Yields until the widget has been painted
+
+        :param operation: The operation name
+        :param first_paint: The _FirstPaint filter
+        :param timeout_s: Timeout
+        """
+        while first_paint.elapsed_ms is None and time.perf_counter() - first_paint.start < timeout_s:
+            yield operation
+        self.results.setdefault(operation, {})['first_paint_ms'] = first_paint.elapsed_ms
+
+    def _script(self):
+        """The scripted operations, yields the operation name after every step"""
+        operation = 'main_window.open'
+        start = time.perf_counter()
+        self.main_window = MainWindow(i18n=self.i18n, image_cache=self.image_cache, recipe_index=RecipeIndex())
+        first_paint = _FirstPaint(self.main_window, start)
+        self.main_window.init_ui()
+        self.main_window.show()
+        yield operation
+        yield from self._wait_for_paint(operation, first_paint)
+
+        widget = self.main_window.widget
+        self.results['main_window.open']['tree_items'] = widget._tree_model.get_nr_recipes()
+        for _i in range(self.args.refreshes):
+            widget._refresh_view()
+            yield 'tree.refresh'
+
+        operation = 'tree.scroll'
+        scrollbar = widget._treeview.verticalScrollBar()
+        for value in range(scrollbar.minimum(), scrollbar.maximum() + 1, max(1, scrollbar.pageStep())):
+            scrollbar.setValue(value)
+            yield operation
+
+        operation = 'tree.drag_reorder'
+        paths = sorted(iter_recipe_paths(widget.current_folder, widget.recipe_suffix))
+        folders = sorted({os.path.dirname(path) for path in paths})
+        for i in range(min(self.args.tree_moves, len(paths))):
+            path = paths[i]
+            destination = folders[(folders.index(os.path.dirname(path)) + 1) % len(folders)]
+            widget._dropped(path, destination)
+            yield operation
+
+        operation = 'recipe.open'
+        index = widget._get_tree_index(self.large_recipe_path)
+        start = time.perf_counter()
+        widget._on_item_double_clicked(index)
+        self.recipe_window = widget.recipe_windows[self.large_recipe_path]
+        first_paint = _FirstPaint(self.recipe_window, start)
+        yield operation
+        yield from self._wait_for_paint(operation, first_paint)
+        self.results[operation]['rows'] = self.recipe_window.model_ingredients.rowCount()
+
+        operation = 'recipe.edit_rows'
+        model = self.recipe_window.model_ingredients
+        for row in range(min(self.args.rows, model.rowCount())):
+            model.setData(model.index(row, 2), f'bearbeitet {row}', Qt.EditRole)
+            yield operation
+
+        operation = 'recipe.drag_reorder'
+        nr_rows = model.rowCount()
+        for i in range(self.args.moves):
+            self.recipe_window._ingredients_dropped(nr_rows - 1 - (i % nr_rows), i % nr_rows)
+            yield operation
+
+        operation = 'recipe.export'
+        try:
+            from lib.RecipePDF import export_recipe_pdf
+        except ImportError as ex:
+            self.results[operation] = {'skipped': f'fpdf not available: {ex}'}
+        else:
+            for i in range(self.args.exports):
+                export_recipe_pdf(self.recipe_window.recipe, self.i18n, self.tmpdir, f'export-{i}')
+                yield operation
+
+        operation = 'recipe.save'
+        self.recipe_window._save()
+        yield operation
+
+        operation = 'recipe.close'
+        self.recipe_window._close()
+        yield operation
+
+def main():
+    """Main"""
+    parser = argparse.ArgumentParser(description='Measures GUI responsiveness on the offscreen Qt platform')
+    parser.add_argument('--cookbook', help='Copy of an existing cookbook to use instead of generating one (files are moved and modified)')
+    parser.add_argument('--rows', type=int, default=1000, help='Ingredient rows of the opened recipe (and rows edited)')
+    parser.add_argument('--refreshes', type=int, default=3, help='Number of tree refreshes')
+    parser.add_argument('--tree-moves', type=int, default=5, help='Number of recipes dragged to another folder')
+    parser.add_argument('--moves', type=int, default=100, help='Number of ingredient rows dragged')
+    parser.add_argument('--exports', type=int, default=3, help='Number of PDF exports')
+    parser.add_argument('--probe-interval', type=int, default=5, help='Latency probe interval in ms')
+    parser.add_argument('--output', help='Write the results as JSON to this file')
+    add_arguments(parser)
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.WARNING)
+
+    app = QApplication(sys.argv[:1])
+
+    with tempfile.TemporaryDirectory(prefix='recipes-gui-benchmark-') as tmpdir:
+        folder = args.cookbook
+        if not folder:
+            folder = os.path.join(tmpdir, 'cookbook')
+            generate_from_args(folder, args)
+        app_conf_set('recipes.folder', folder)
+        app_conf_set('thumbnails.folder', os.path.join(tmpdir, 'thumbnails'))
+        outdir = os.path.join(tmpdir, 'out')
+        os.makedirs(outdir)
+
+        benchmark = GuiBenchmark(app, args, folder, outdir)
+        large_recipe = generate_recipe(random.Random(args.seed), nr_ingredients=args.rows, nr_steps=args.steps)
+        benchmark.large_recipe_path = os.path.join(folder, 'Großes Rezept.json')
+        save_recipe(large_recipe, benchmark.large_recipe_path)
+
+        results = {
+            'version': app_conf_get('version'),
+            'build': app_conf_get('build'),
+            'python': platform.python_version(),
+            'platform': platform.platform(),
+            'qt_platform': os.environ.get('QT_QPA_PLATFORM'),
+            'timestamp': time.strftime('%Y-%m-%dT%H:%M:%S'),
+            'cookbook': args.cookbook or {key: getattr(args, key) for key in ['recipes', 'depth', 'fanout', 'ingredients', 'steps', 'words', 'umlauts', 'seed']},
+            'rows': args.rows,
+            'probe_interval_ms': args.probe_interval,
+            'results': benchmark.run()
+        }
+
+    if args.output:
+        with open(args.output, 'w', encoding='utf-8') as jsonfile:
+            json.dump(results, jsonfile, indent=4)
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,117 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+#
+# Copyright 2022 Denis Meyer
+#
+# This file is part of Rezepte.
+#
+
+"""Startup benchmark: icon loading from single files vs. the Qt resource bundle
+
+Every run starts a fresh interpreter, so module imports and resource registration are measured cold
+(the OS file cache stays warm).
+
+Usage (from src/python): python -m benchmark.StartupBenchmark [--runs 10] [--output startup.json]
+"""
+
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+import time
+
+_BASEDIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+_MODES = ['files', 'bundle']
+
+def _run_child(mode):
+    """Loads all startup icons once and prints the timings as JSON
+
+    :param mode: 'files' or 'bundle'
+    """
+    os.environ.setdefault('QT_QPA_PLATFORM', 'offscreen')
+
+    timings = {}
+    start = time.perf_counter()
+
+    from PyQt5.QtWidgets import QApplication
+    from gui.data import IconDefinitions
+    from gui.data.Icon import Icon
+    from lib.ImageCache import ImageCache
+    from lib.ImageUtils import register_resources
+    timings['import_ms'] = (time.perf_counter() - start) * 1000.0
+
+    app = QApplication(sys.argv[:1])
+
+    step = time.perf_counter()
+    registered = register_resources() if mode == 'bundle' else False
+    timings['register_ms'] = (time.perf_counter() - step) * 1000.0
+
+    step = time.perf_counter()
+    image_cache = ImageCache(_BASEDIR)
+    icons = [icdef for icdef in vars(IconDefinitions).values() if isinstance(icdef, Icon)]
+    icons += [IconDefinitions.get_flag(lang) for lang in ['de', 'en']]
+    for icdef in icons:
+        icon = image_cache.get_or_load_icon(icdef)
+        if icon:
+            # QIcon reads the file lazily, render it like the first paint would
+            icon.pixmap(16, 16)
+    for key, name in [('img.logo_app', 'logo-app.png'), ('img.logo_app-de', 'logo-app-de.png'), ('img.logo_app-en', 'logo-app-en.png')]:
+        image_cache.get_or_load_pixmap(key, name)
+    timings['icons_ms'] = (time.perf_counter() - step) * 1000.0
+
+    timings['total_ms'] = (time.perf_counter() - start) * 1000.0
+    timings['bundle_registered'] = registered
+    timings['icon_count'] = len(icons)
+
+    del app
+    print(json.dumps(timings))
+
+def _run(runs):
+    """Runs the benchmark in fresh processes, alternating the modes
+
+    :param runs: The number of runs per mode
+    """
+    results = {mode: [] for mode in _MODES}
+    for _run_nr in range(runs):
+        for mode in _MODES:
+            output = subprocess.run([sys.executable, '-m', 'benchmark.StartupBenchmark', '--child', mode],
+                                    cwd=_BASEDIR, check=True, capture_output=True, text=True).stdout
+            results[mode].append(json.loads(output.strip().splitlines()[-1]))
+
+    summary = {}
+    for mode, mode_results in results.items():
+        summary[mode] = {
+            'bundle_registered': all(r['bundle_registered'] for r in mode_results) if mode == 'bundle' else False,
+            'icon_count': mode_results[0]['icon_count']
+        }
+        for key in ['import_ms', 'register_ms', 'icons_ms', 'total_ms']:
+            values = [r[key] for r in mode_results]
+            summary[mode][key] = {'median': statistics.median(values), 'min': min(values), 'max': max(values)}
+    return summary
+
+def main():
+    """Main"""
+    parser = argparse.ArgumentParser(description='Compares cold icon loading from files and from the Qt resource bundle')
+    parser.add_argument('--runs', type=int, default=10, help='Number of fresh processes per mode')
+    parser.add_argument('--output', help='Write the results as JSON to this file')
+    parser.add_argument('--child', choices=_MODES, help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.child:
+        _run_child(args.child)
+        return
+
+    summary = _run(args.runs)
+    if not summary['bundle']['bundle_registered']:
+        print('Warning: Qt resource bundle not found, run "pyrcc5 resources/resources.qrc -o resources_rc.py" first')
+    for mode, values in summary.items():
+        print(f'{mode:>6}: icons {values["icons_ms"]["median"]:8.2f} ms, register {values["register_ms"]["median"]:8.2f} ms, total {values["total_ms"]["median"]:8.2f} ms (median of {args.runs})')
+
+    if args.output:
+        with open(args.output, 'w', encoding='utf-8') as jsonfile:
+            json.dump({'benchmark': 'startup', 'runs': args.runs, 'results': summary}, jsonfile, indent=4)
+
+if __name__ == '__main__':
+    main()
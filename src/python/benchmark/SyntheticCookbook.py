@@ -0,0 +1,133 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+#
+# Copyright 2022 Denis Meyer
+#
+# This file is part of Rezepte.
+#
+
+"""Synthetic cookbook generator
+
+Generates reproducible cookbooks (same parameters and seed, same files) for benchmarks.
+
+Usage (from src/python): python -m benchmark.SyntheticCookbook <folder> [--recipes 1000] [--depth 2] [--fanout 3]
+"""
+
+import argparse
+import os
+import random
+
+from classes.Recipe import Recipe
+from lib.Utils import save_recipe
+
+_NAMES = ['Mehl', 'Zucker', 'Butter', 'Eier', 'Milch', 'Salz', 'Pfeffer', 'Sahne', 'Hefe', 'Backpulver',
+          'Zwiebeln', 'Knoblauch', 'Tomaten', 'Kartoffeln', 'Reis', 'Nudeln', 'Olivenöl', 'Essig', 'Honig', 'Zimt',
+          'Flour', 'Sugar', 'Eggs', 'Milk', 'Salt', 'Onions', 'Garlic', 'Rice', 'Butter', 'Cream']
+_NAMES_UMLAUT = ['Äpfel', 'Möhren', 'Brötchen', 'Weißwein', 'Öl', 'Kürbis', 'Grieß', 'Rübenkraut', 'Schüttelbrot',
+                 'Räucherlachs', 'Gemüsebrühe', 'Süßkartoffeln', 'Gewürzgurken', 'Frühlingszwiebeln', 'Blätterteig']
+_QUANTITIES = ['125 g', '250 g', '1 kg', '1 1/2 kg', '1/2 Packung', '3', '2-3', '0,5 l', '200 ml', '2 EL', '1 TL',
+               '1 Prise', '1 Becher', '2 cups', '1 tbsp', '1/2 tsp', '1 Dose', 'Viel', '', '1 Bund', '2 Zehen']
+_ADDITIONS = ['', '', '', 'weich', 'gehackt', 'geschält, entkernt, geachtelt', 'zimmerwarm', 'fein gewürfelt', 'optional']
+_WORDS = ['den', 'die', 'das', 'mit', 'und', 'in', 'einer', 'Schüssel', 'Pfanne', 'Ofen', 'Minuten', 'backen',
+          'rühren', 'schneiden', 'würzen', 'köcheln', 'lassen', 'vorgeheizten', 'Grad', 'Teig', 'gießen', 'verrühren',
+          'Größe', 'Stücke', 'heben', 'Gemüse', 'anbraten', 'abschmecken', 'dünsten', 'glätten', 'bestreuen']
+_FOLDER_NAMES = ['Backen', 'Kochen', 'Süßspeisen', 'Getränke', 'Suppen', 'Salate', 'Frühstück', 'Brote', 'Soßen', 'Grillen']
+
+def _folders(folder, depth, fanout):
+    """Returns all folders of a complete tree with the given depth and fan-out
+
+    :param folder: The root folder
+    :param depth: The number of folder levels below the root
+    :param fanout: The number of sub folders per folder
+    """
+    folders = [folder]
+    level = [folder]
+    for _depth in range(depth):
+        next_level = []
+        for parent in level:
+            for i in range(fanout):
+                next_level.append(os.path.join(parent, f'{_FOLDER_NAMES[i % len(_FOLDER_NAMES)]} {i + 1}'))
+        folders.extend(next_level)
+        level = next_level
+    return folders
+
+def generate_recipe(rng, nr_ingredients=12, nr_steps=8, words_per_step=20, umlauts=0.3):
+    """Generates a recipe
+
+    :param rng: The random.Random instance
+    :param nr_ingredients: The number of ingredients
+    :param nr_steps: The number of steps
+    :param words_per_step: The number of words per step
+    :param umlauts: The share of ingredient names with umlauts
+    """
+    ingredients = []
+    for _i in range(nr_ingredients):
+        name = rng.choice(_NAMES_UMLAUT) if rng.random() < umlauts else rng.choice(_NAMES)
+        ingredients.append({'quantity': rng.choice(_QUANTITIES), 'name': name, 'addition': rng.choice(_ADDITIONS)})
+    steps = [' '.join(rng.choice(_WORDS) for _w in range(words_per_step)).capitalize() + '.' for _s in range(nr_steps)]
+    name = f'{rng.choice(_NAMES_UMLAUT)} mit {rng.choice(_NAMES)} {rng.randint(1, 999)}'
+    return Recipe(name=name, ingredients=ingredients, steps=steps, information=f'Quelle: Generator, Größe {nr_ingredients}/{nr_steps}')
+
+def generate_cookbook(folder, nr_recipes=1000, depth=2, fanout=3, nr_ingredients=12, nr_steps=8, words_per_step=20, umlauts=0.3, seed=42):
+    """Generates a cookbook, the recipes are distributed round-robin over all folders
+
+    :param folder: The cookbook folder
+    :param nr_recipes: The number of recipes
+    :param depth: The number of folder levels below the cookbook folder
+    :param fanout: The number of sub folders per folder
+    :param nr_ingredients: The number of ingredients per recipe
+    :param nr_steps: The number of steps per recipe
+    :param words_per_step: The number of words per step
+    :param umlauts: The share of ingredient names with umlauts
+    :param seed: The random seed
+    :return: The list of recipe paths
+    """
+    rng = random.Random(seed)
+    folders = _folders(folder, depth, fanout)
+    for _folder in folders:
+        os.makedirs(_folder, exist_ok=True)
+
+    paths = []
+    for i in range(nr_recipes):
+        recipe = generate_recipe(rng, nr_ingredients, nr_steps, words_per_step, umlauts)
+        path = os.path.join(folders[i % len(folders)], f'Rezept {i + 1:06d}.json')
+        save_recipe(recipe, path)
+        paths.append(path)
+    return paths
+
+def add_arguments(parser):
+    """Adds the generator arguments to an argument parser
+
+    :param parser: The argparse parser
+    """
+    parser.add_argument('--recipes', type=int, default=1000, help='Number of recipes')
+    parser.add_argument('--depth', type=int, default=2, help='Folder levels below the cookbook folder')
+    parser.add_argument('--fanout', type=int, default=3, help='Sub folders per folder')
+    parser.add_argument('--ingredients', type=int, default=12, help='Ingredients per recipe')
+    parser.add_argument('--steps', type=int, default=8, help='Steps per recipe')
+    parser.add_argument('--words', type=int, default=20, help='Words per step')
+    parser.add_argument('--umlauts', type=float, default=0.3, help='Share of ingredient names with umlauts')
+    parser.add_argument('--seed', type=int, default=42, help='Random seed')
+
+def generate_from_args(folder, args):
+    """Generates a cookbook from parsed arguments
+
+    :param folder: The cookbook folder
+    :param args: The parsed arguments (see add_arguments)
+    """
+    return generate_cookbook(folder, nr_recipes=args.recipes, depth=args.depth, fanout=args.fanout,
+                             nr_ingredients=args.ingredients, nr_steps=args.steps, words_per_step=args.words,
+                             umlauts=args.umlauts, seed=args.seed)
+
+def main():
+    """Main"""
+    parser = argparse.ArgumentParser(description='Generates a synthetic cookbook')
+    parser.add_argument('folder', help='Cookbook folder (created if missing)')
+    add_arguments(parser)
+    args = parser.parse_args()
+
+    paths = generate_from_args(args.folder, args)
+    print(f'Generated {len(paths)} recipes in "{args.folder}"')
+
+if __name__ == '__main__':
+    main()
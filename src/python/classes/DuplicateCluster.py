@@ -0,0 +1,32 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+#
+# Copyright 2022 Denis Meyer
+#
+# This file is part of Rezepte.
+#
+
+"""DuplicateCluster"""
+
+class DuplicateCluster():
+    """Group of near-duplicate recipes"""
+
+    def __init__(self, entries, similarity):
+        """Initializes the cluster
+
+        :param entries: The RecipeIndexEntry objects, sorted by path
+        :param similarity: The lowest estimated similarity (Jaccard, 0-1) of a recipe to the first one
+        """
+        self.entries = entries
+        self.similarity = similarity
+
+    def as_obj(self):
+        """Returns the cluster as object"""
+        return {
+            'similarity': self.similarity,
+            'recipes': [{'path': entry.path, 'name': entry.name} for entry in self.entries]
+        }
+
+    def __str__(self):
+        """to string"""
+        return f'DuplicateCluster[recipes={len(self.entries)}, similarity={self.similarity:.2f}]'
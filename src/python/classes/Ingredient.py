@@ -8,6 +8,8 @@
 
 """Ingredient"""
 
+from lib.QuantityParser import parse_quantity
+
 class Ingredient():
     """Ingredient"""
 
@@ -16,6 +18,7 @@ class Ingredient():
         self.quantity = None
         self.name = None
         self.addition = None
+        self._parsed_quantity = None
 
     def init_from_obj(self, obj):
         """Initializes the ingredient
@@ -37,6 +40,12 @@ class Ingredient():
         self.name = name
         self.addition = addition
 
+    def get_parsed_quantity(self):
+        """Returns the parsed quantity, kept alongside the quantity text until the text changes"""
+        if self._parsed_quantity is None or self._parsed_quantity.text != (self.quantity or ''):
+            self._parsed_quantity = parse_quantity(self.quantity)
+        return self._parsed_quantity
+
     def as_obj(self):
         """Returns the ingredient as object"""
         return {'quantity': self.quantity, 'name': self.name, 'addition': self.addition}
@@ -0,0 +1,64 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+#
+# Copyright 2022 Denis Meyer
+#
+# This file is part of Rezepte.
+#
+
+"""Nutrition"""
+
+class Nutrition():
+    """Nutrition values of a recipe (or of one serving)"""
+
+    __slots__ = ('kcal', 'protein', 'fat', 'carbs', 'nr_ingredients', 'nr_missing')
+
+    def __init__(self, kcal=0.0, protein=0.0, fat=0.0, carbs=0.0, nr_ingredients=0, nr_missing=0):
+        """Initializes the nutrition values
+
+        :param kcal: The energy in kcal
+        :param protein: The protein in g
+        :param fat: The fat in g
+        :param carbs: The carbohydrates in g
+        :param nr_ingredients: The number of ingredients
+        :param nr_missing: The number of ingredients that are not included (unknown ingredient or amount)
+        """
+        self.kcal = kcal
+        self.protein = protein
+        self.fat = fat
+        self.carbs = carbs
+        self.nr_ingredients = nr_ingredients
+        self.nr_missing = nr_missing
+
+    def per_serving(self, servings):
+        """Returns the values of one serving, None if the servings are not set
+
+        :param servings: The number of servings of the recipe
+        """
+        if not servings:
+            return None
+        return Nutrition(self.kcal / servings, self.protein / servings, self.fat / servings, self.carbs / servings,
+                         self.nr_ingredients, self.nr_missing)
+
+    @classmethod
+    def from_obj(cls, obj):
+        """Creates the nutrition values from their stored form
+
+        :param obj: The stored object
+        """
+        return cls(obj['kcal'], obj['protein'], obj['fat'], obj['carbs'], obj['nr_ingredients'], obj['nr_missing'])
+
+    def as_obj(self):
+        """Returns the nutrition values as object"""
+        return {
+            'kcal': self.kcal,
+            'protein': self.protein,
+            'fat': self.fat,
+            'carbs': self.carbs,
+            'nr_ingredients': self.nr_ingredients,
+            'nr_missing': self.nr_missing
+        }
+
+    def __str__(self):
+        """to string"""
+        return f'Nutrition[kcal={self.kcal:.0f}, protein={self.protein:.1f}, fat={self.fat:.1f}, carbs={self.carbs:.1f}, missing={self.nr_missing}/{self.nr_ingredients}]'
@@ -0,0 +1,66 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+#
+# Copyright 2022 Denis Meyer
+#
+# This file is part of Rezepte.
+#
+
+"""Quantity"""
+
+class Quantity():
+    """Parsed ingredient quantity, e.g. "1 1/2 kg" -> value 1.5, unit "kg"
+
+    Instances are shared by the parser cache and must not be modified.
+    """
+
+    __slots__ = ('text', 'value', 'value_max', 'unit', 'unit_text', 'remainder', 'prefix')
+
+    def __init__(self, text, value=None, value_max=None, unit=None, unit_text='', remainder='', prefix=''):
+        """Initializes the quantity
+
+        :param text: The original text
+        :param value: The numeric value (lower bound of a range) or None
+        :param value_max: The upper bound of a range or None
+        :param unit: The canonical unit, e.g. "g", "tbsp", or None
+        :param unit_text: The unit as written, e.g. "EL"
+        :param remainder: The text following the value and unit
+        :param prefix: The approximation preceding the value as written, e.g. "ca."
+        """
+        self.text = text
+        self.value = value
+        self.value_max = value_max
+        self.unit = unit
+        self.unit_text = unit_text
+        self.remainder = remainder
+        self.prefix = prefix
+
+    def has_value(self):
+        """Returns whether a numeric value has been parsed"""
+        return self.value is not None
+
+    def as_obj(self):
+        """Returns the quantity as object"""
+        return {
+            'text': self.text,
+            'value': self.value,
+            'value_max': self.value_max,
+            'unit': self.unit,
+            'unit_text': self.unit_text,
+            'remainder': self.remainder,
+            'prefix': self.prefix
+        }
+
+    def __eq__(self, other):
+        """Compares the parsed values"""
+        if not isinstance(other, Quantity):
+            return NotImplemented
+        return (self.value, self.value_max, self.unit, self.remainder) == (other.value, other.value_max, other.unit, other.remainder)
+
+    def __hash__(self):
+        """hash"""
+        return hash((self.value, self.value_max, self.unit, self.remainder))
+
+    def __str__(self):
+        """to string"""
+        return f'Quantity[text="{self.text}", value={self.value}, value_max={self.value_max}, unit={self.unit}, remainder="{self.remainder}", prefix="{self.prefix}"]'
@@ -11,6 +11,7 @@
 import logging
 
 from classes.Ingredient import Ingredient
+from lib.QuantityParser import scale_quantity
 
 class Recipe():
     """Recipe"""
@@ -32,6 +33,10 @@ class Recipe():
 
         self.information = args['information'] if 'information' in args else ''
 
+        self.image = args['image'] if 'image' in args else ''
+
+        self.servings = args['servings'] if 'servings' in args else 0
+
     def get_ingredients_obj(self):
         """Returns the ingredients as object"""
         return [d.as_obj() for d in self.ingredients]
@@ -44,7 +49,46 @@ class Recipe():
         """Returns the information as object"""
         return self.information
 
+    def get_image_obj(self):
+        """Returns the photo path as object"""
+        return self.image
+
+    def get_scale_factor(self, servings):
+        """Returns the factor scaling the recipe to the given number of servings, 1 if the servings are not set
+
+        :param servings: The number of servings
+        """
+        if not self.servings or not servings:
+            return 1.0
+        return servings / self.servings
+
+    def get_scaled_ingredients(self, factor, decimal_separator='.'):
+        """Returns copies of the ingredients with scaled quantities, computed from the cached parsed quantities
+
+        :param factor: The factor
+        :param decimal_separator: The decimal separator
+        """
+        if factor == 1:
+            return self.ingredients
+        lst = []
+        for ingredient in self.ingredients:
+            ing = Ingredient()
+            ing.init_from_attr(scale_quantity(ingredient.get_parsed_quantity(), factor, decimal_separator), ingredient.name, ingredient.addition)
+            lst.append(ing)
+        return lst
+
+    def as_obj(self):
+        """Returns the recipe as object"""
+        return {
+            'name': self.name,
+            'ingredients': self.get_ingredients_obj(),
+            'steps': self.get_steps_obj(),
+            'information': self.get_information_obj(),
+            'image': self.get_image_obj(),
+            'servings': self.servings
+        }
+
     def __str__(self):
         """to string"""
         ingredients = ', '.join(str(x) for x in self.ingredients)
-        return f'Recipe[name="{self.name}",\ningredients=[{ingredients}],\nsteps="{self.steps}",\ninformation={self.information}]'
+        return f'Recipe[name="{self.name}",\ningredients=[{ingredients}],\nsteps="{self.steps}",\ninformation={self.information},\nimage={self.image},\nservings={self.servings}]'
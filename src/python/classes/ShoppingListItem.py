@@ -0,0 +1,50 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+#
+# Copyright 2022 Denis Meyer
+#
+# This file is part of Rezepte.
+#
+
+"""ShoppingListItem"""
+
+class ShoppingListItem():
+    """Summed up ingredient of a shopping list"""
+
+    def __init__(self, name, key, group):
+        """Initializes the item
+
+        :param name: The ingredient name (as written in the first recipe)
+        :param key: The normalized name
+        :param group: The dimension ("mass", "volume", "count"), a not convertible unit or None for quantities without value
+        """
+        self.name = name
+        self.key = key
+        self.group = group
+        # Sum in the base unit of the dimension (or in the unit itself)
+        self.value = 0.0
+        self.value_max = 0.0
+        self.is_range = False
+        self.units = set()
+        self.unit_text = ''
+        # Approximation of any of the quantities as written, e.g. "ca."
+        self.prefix = ''
+        self.texts = []
+        self.recipes = set()
+
+    def as_obj(self):
+        """Returns the item as object"""
+        return {
+            'name': self.name,
+            'group': self.group,
+            'value': self.value,
+            'value_max': self.value_max if self.is_range else None,
+            'units': sorted(unit or '' for unit in self.units),
+            'prefix': self.prefix,
+            'texts': self.texts,
+            'recipes': sorted(self.recipes)
+        }
+
+    def __str__(self):
+        """to string"""
+        return f'ShoppingListItem[name={self.name}, group={self.group}, value={self.value}, value_max={self.value_max}, units={self.units}, texts={self.texts}]'
@@ -0,0 +1,45 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+#
+# Copyright 2022 Denis Meyer
+#
+# This file is part of Rezepte.
+#
+
+"""SpellingGroup"""
+
+class SpellingGroup():
+    """Different spellings of the same ingredient"""
+
+    def __init__(self, key, name):
+        """Initializes the group
+
+        :param key: The normalized name
+        :param name: The canonical name from the ingredient dictionary or None
+        """
+        self.key = key
+        self.name = name
+        # Spelling -> paths of the recipes using it
+        self.spellings = {}
+
+    def get_paths(self, spellings=None):
+        """Returns the paths of the recipes using any of the spellings
+
+        :param spellings: The spellings, defaults to all
+        """
+        paths = set()
+        for spelling in self.spellings if spellings is None else spellings:
+            paths.update(self.spellings.get(spelling, ()))
+        return sorted(paths)
+
+    def as_obj(self):
+        """Returns the group as object"""
+        return {
+            'key': self.key,
+            'name': self.name,
+            'spellings': {spelling: len(paths) for spelling, paths in self.spellings.items()}
+        }
+
+    def __str__(self):
+        """to string"""
+        return f'SpellingGroup[key={self.key}, name={self.name}, spellings={len(self.spellings)}]'
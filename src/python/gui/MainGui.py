@@ -11,14 +11,25 @@
 import logging
 import sys
 
-from PyQt5 import QtWidgets
+from PyQt5 import QtCore, QtWidgets
 
 from i18n.I18n import I18n
 from gui.components.MainWindow import MainWindow
+from gui.components.RecipeWindowManager import RecipeWindowManager
 
 from lib.ImageCache import ImageCache
-from lib.Utils import _load_conf_from_home_folder, save_conf, update_logging, verify_recipes_dir
-from lib.AppConfig import app_conf_get, app_conf_set, get_public_values
+from lib.RecipeCache import RecipeCache
+from lib.RecipePaths import RecipePaths
+from lib.RecipeIndex import RecipeIndex
+from lib.SimilarRecipes import SimilarRecipes
+from lib.Utils import init_conf, verify_recipes_dir
+from lib.LogConfig import update_logging
+from lib.ImageUtils import register_resources
+from lib.Metrics import enable_metrics, register_metrics_provider
+from lib.StallDetector import StallDetector
+from lib.Tracing import enable_tracing, is_tracing, write_trace
+from lib.AppConfig import app_conf_get
+from lib.StartupProfiler import enable_startup_profiling, is_startup_profiling, startup_phase, startup_value, startup_report
 
 class MainGUI():
     """Main GUI"""
@@ -32,37 +43,104 @@ class MainGUI():
 
         self.basedir = basedir
         self.main_window = None
+        self.stall_detector = None
+        self.similar_recipes = None
+        self.recipe_cache = None
+        self.window_manager = None
+        self.recipe_paths = None
 
         self._init()
 
     def _init(self):
         """Initializes the GUI"""
-        conf_loaded, conf = _load_conf_from_home_folder()
+        with startup_phase('config'):
+            init_conf()
+            verify_recipes_dir()
 
-        if conf_loaded:
-            for key, val in conf.items():
-                logging.debug('Overwriting config entry "%s": "%s"', key, val)
-                app_conf_set(key, val)
-        else:
-            save_conf(get_public_values())
+        if app_conf_get('startup.profile', False):
+            enable_startup_profiling()
 
-        verify_recipes_dir()
+        if app_conf_get('metrics.enabled', False):
+            enable_metrics()
+
+        if app_conf_get('tracing.enabled', False):
+            enable_tracing(app_conf_get('tracing.max_events', 1000000))
 
         update_logging(app_conf_get('logging.loglevel'), logtofile=app_conf_get('logging.log_to_file'))
 
+        with startup_phase('resources'):
+            if app_conf_get('resources.bundle', True):
+                register_resources()
+
         self.image_cache = ImageCache(self.basedir)
-        self.i18n = I18n(self.basedir, lang=app_conf_get('language.main'))
+        register_metrics_provider('image_cache', self.image_cache.get_metrics)
+        self.recipe_index = RecipeIndex(app_conf_get('index.file') if app_conf_get('index.persist', True) else None)
+        register_metrics_provider('recipe_index', self.recipe_index.get_metrics)
+        with startup_phase('i18n'):
+            self.i18n = I18n(self.basedir, lang=app_conf_get('language.main'))
 
     def run(self):
         """Initializes and shows the GUI"""
         logging.debug('Initializing AppContext GUI')
 
-        app = QtWidgets.QApplication(sys.argv)
-
-        self.main_window = MainWindow(i18n=self.i18n, image_cache=self.image_cache)
-        self.main_window.init_ui()
-        self.main_window.show()
+        with startup_phase('QApplication'):
+            app = QtWidgets.QApplication(sys.argv)
+
+        if app_conf_get('stalls.detect', False):
+            self.stall_detector = StallDetector(self.basedir,
+                                                threshold_ms=app_conf_get('stalls.threshold', 150),
+                                                interval_ms=app_conf_get('stalls.interval', 100))
+            self.stall_detector.start()
+
+        self.similar_recipes = SimilarRecipes(self.recipe_index)
+        register_metrics_provider('similar_recipes', self.similar_recipes.get_metrics)
+        self.recipe_cache = RecipeCache(recent_file=app_conf_get('recent.file'))
+        register_metrics_provider('recipe_cache', self.recipe_cache.get_metrics)
+        self.window_manager = RecipeWindowManager(self.i18n, self.image_cache, similar_recipes=self.similar_recipes)
+        register_metrics_provider('recipe_windows', self.window_manager.get_metrics)
+        self.recipe_paths = RecipePaths()
+        register_metrics_provider('recipe_paths', self.recipe_paths.get_metrics)
+
+        with startup_phase('main window'):
+            self.main_window = MainWindow(i18n=self.i18n, image_cache=self.image_cache, recipe_index=self.recipe_index,
+                                          similar_recipes=self.similar_recipes, recipe_cache=self.recipe_cache,
+                                          window_manager=self.window_manager, recipe_paths=self.recipe_paths)
+            self.main_window.init_ui()
+            self.main_window.show()
+
+        if app_conf_get('preload.enabled', True):
+            # Reads the recently opened recipes once the window is shown
+            QtCore.QTimer.singleShot(0, self.recipe_cache.warm)
+
+        if is_startup_profiling():
+            # Fires once the event loop has processed the pending (first) paint events
+            QtCore.QTimer.singleShot(0, self._report_startup)
 
         app.exec()
 
+        if self.stall_detector:
+            self.stall_detector.stop()
+            self.stall_detector.log_stats()
+
+        try:
+            self.recipe_index.save()
+        except OSError as ex:
+            logging.error('Failed to save recipe index to "%s": %s', self.recipe_index.index_file, ex)
+
+        try:
+            self.recipe_cache.save_recent()
+        except OSError as ex:
+            logging.error('Failed to save recently opened recipes to "%s": %s', self.recipe_cache.recent_file, ex)
+
+        if is_tracing():
+            try:
+                write_trace(app_conf_get('tracing.file'))
+            except OSError as ex:
+                logging.error('Failed to write trace to "%s": %s', app_conf_get('tracing.file'), ex)
+
         sys.exit(0)
+
+    def _report_startup(self):
+        """Logs the startup profile once the first window has been painted"""
+        startup_value('icon and image loading (accumulated)', sum(stats['load_time_ms'] for stats in self.image_cache.get_stats()))
+        startup_report('time to first window')
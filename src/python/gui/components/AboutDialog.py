@@ -12,7 +12,9 @@ import logging
 
 from PyQt5.QtCore import Qt
 from PyQt5.QtGui import QFont, QIcon
-from PyQt5.QtWidgets import QDialog, QDesktopWidget, QGridLayout, QLabel
+from PyQt5.QtWidgets import QDialog, QDesktopWidget, QGridLayout, QLabel, QTabWidget, QVBoxLayout, QWidget
+
+from gui.components.DiagnosticsWidget import DiagnosticsWidget
 
 from lib.AppConfig import app_conf_get
 
@@ -34,6 +36,7 @@ class AboutDialog(QDialog):
 
         self.font_label = QFont()
         self.grid = QGridLayout()
+        self.diagnostics = None
 
         self.setModal(True)
 
@@ -47,7 +50,7 @@ class AboutDialog(QDialog):
         if logo is not None:
             self.setWindowIcon(QIcon(logo))
 
-        self.resize(450, 250)
+        self.resize(640, 420)
 
         self.font_label.setBold(True)
         self.font_label.setPointSize(10)
@@ -103,7 +106,28 @@ class AboutDialog(QDialog):
         self.grid.addWidget(label_build, curr_gridid, 0)
         self.grid.addWidget(label_build_val, curr_gridid, 1, 1, 3)
 
-        self.setLayout(self.grid)
+        widget_about = QWidget()
+        widget_about.setLayout(self.grid)
+
+        self.diagnostics = DiagnosticsWidget(self.i18n)
+        self.diagnostics.init_ui()
+
+        tabs = QTabWidget()
+        tabs.addTab(widget_about, self.i18n.translate('GUI.ABOUT.TAB.ABOUT', 'About'))
+        tabs.addTab(self.diagnostics, self.i18n.translate('GUI.ABOUT.TAB.DIAGNOSTICS', 'Diagnostics'))
+        tabs.currentChanged.connect(self._tab_changed)
+
+        layout = QVBoxLayout()
+        layout.addWidget(tabs)
+        self.setLayout(layout)
+
+    def _tab_changed(self, index):
+        """Refreshes the diagnostics when their tab is shown
+
+        :param index: The tab index
+        """
+        if index == 1:
+            self.diagnostics.refresh()
 
     def _center(self):
         """Centers the window on the screen"""
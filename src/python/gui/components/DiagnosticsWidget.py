@@ -0,0 +1,148 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+#
+# Copyright 2022 Denis Meyer
+#
+# This file is part of Rezepte.
+#
+
+"""Diagnostics widget"""
+
+import logging
+import os
+import time
+
+from PyQt5.QtCore import Qt
+from PyQt5.QtWidgets import QWidget, QGridLayout, QCheckBox, QPushButton, QTableWidget, QTableWidgetItem, QHeaderView, QAbstractItemView, QFileDialog
+
+from lib.AppConfig import app_conf_get
+from lib.Metrics import enable_metrics, is_metrics_enabled, get_metrics, reset_metrics, export_metrics
+
+class _NumberItem(QTableWidgetItem):
+    """Table item sorting by its numeric value"""
+
+    def __init__(self, value, fmt='{:.2f}'):
+        """Initializes the item
+
+        :param value: The value (or None)
+        :param fmt: The display format
+        """
+        super(_NumberItem, self).__init__('' if value is None else fmt.format(value))
+
+        self.value = value if value is not None else float('-inf')
+        self.setTextAlignment(Qt.AlignRight | Qt.AlignVCenter)
+
+    # @override
+    def __lt__(self, other):
+        """Compares by value
+
+        :param other: The other item
+        """
+        if isinstance(other, _NumberItem):
+            return self.value < other.value
+        return super(_NumberItem, self).__lt__(other)
+
+class DiagnosticsWidget(QWidget):
+    """Shows the recorded metrics"""
+
+    def __init__(self, i18n):
+        """Initializes the widget
+
+        :param i18n: The I18n
+        """
+        super(DiagnosticsWidget, self).__init__()
+
+        logging.debug('Initializing DiagnosticsWidget')
+
+        self.i18n = i18n
+
+        self.checkbox_enabled = None
+        self.table = None
+
+    def init_ui(self):
+        """Initiates the UI"""
+        logging.debug('Initializing DiagnosticsWidget GUI')
+
+        self.checkbox_enabled = QCheckBox(self.i18n.translate('GUI.DIAGNOSTICS.ENABLED', 'Record metrics'))
+        self.checkbox_enabled.setChecked(is_metrics_enabled())
+        self.checkbox_enabled.stateChanged.connect(self._enabled_changed)
+
+        button_refresh = QPushButton(self.i18n.translate('GUI.DIAGNOSTICS.REFRESH', 'Refresh'))
+        button_refresh.clicked[bool].connect(self.refresh)
+        button_reset = QPushButton(self.i18n.translate('GUI.DIAGNOSTICS.RESET', 'Reset'))
+        button_reset.clicked[bool].connect(self._reset)
+        button_export = QPushButton(self.i18n.translate('GUI.DIAGNOSTICS.EXPORT', 'Export JSON'))
+        button_export.clicked[bool].connect(self._export)
+
+        headers = ['NAME', 'TYPE', 'COUNT', 'TOTAL', 'MEAN', 'P90', 'MAX']
+        defaults = ['Name', 'Type', 'Count', 'Total', 'Mean', 'p90', 'Max']
+        self.table = QTableWidget(0, len(headers))
+        self.table.setHorizontalHeaderLabels([self.i18n.translate(f'GUI.DIAGNOSTICS.HEADERS.{header}', default) for header, default in zip(headers, defaults)])
+        self.table.verticalHeader().setVisible(False)
+        self.table.setEditTriggers(QAbstractItemView.NoEditTriggers)
+        self.table.setSelectionBehavior(QAbstractItemView.SelectRows)
+        header_h = self.table.horizontalHeader()
+        header_h.setSectionResizeMode(0, QHeaderView.Stretch)
+        for i in range(1, len(headers)):
+            header_h.setSectionResizeMode(i, QHeaderView.ResizeToContents)
+
+        grid = QGridLayout()
+        grid.setSpacing(10)
+        grid.addWidget(self.checkbox_enabled, 0, 0, 1, 1)
+        grid.addWidget(button_refresh, 0, 1, 1, 1)
+        grid.addWidget(button_reset, 0, 2, 1, 1)
+        grid.addWidget(button_export, 0, 3, 1, 1)
+        grid.addWidget(self.table, 1, 0, 1, 4)
+        self.setLayout(grid)
+
+        self.refresh()
+
+    def refresh(self):
+        """Shows the current metrics"""
+        metrics = get_metrics()
+        rows = []
+        type_counter = self.i18n.translate('GUI.DIAGNOSTICS.TYPE.COUNTER', 'Counter')
+        type_timer = self.i18n.translate('GUI.DIAGNOSTICS.TYPE.TIMER', 'Timer (ms)')
+        type_histogram = self.i18n.translate('GUI.DIAGNOSTICS.TYPE.HISTOGRAM', 'Histogram')
+        type_gauge = self.i18n.translate('GUI.DIAGNOSTICS.TYPE.GAUGE', 'Value')
+        for name, value in metrics['counters'].items():
+            rows.append([name, type_counter, value, None, None, None, None])
+        for name, histogram in metrics['histograms'].items():
+            rows.append([name, type_timer if histogram['unit'] == 'ms' else type_histogram, histogram['count'],
+                         histogram['sum'], histogram['mean'], histogram['p90'], histogram['max']])
+        for name, value in metrics['gauges'].items():
+            rows.append([name, type_gauge, value, None, None, None, None])
+
+        self.table.setSortingEnabled(False)
+        self.table.setRowCount(len(rows))
+        for row, values in enumerate(rows):
+            self.table.setItem(row, 0, QTableWidgetItem(values[0]))
+            self.table.setItem(row, 1, QTableWidgetItem(values[1]))
+            self.table.setItem(row, 2, _NumberItem(values[2], '{:g}'))
+            for column in range(3, 7):
+                self.table.setItem(row, column, _NumberItem(values[column]))
+        self.table.setSortingEnabled(True)
+
+    def _enabled_changed(self, state):
+        """Enables or disables recording
+
+        :param state: The check state
+        """
+        enable_metrics(state == Qt.Checked)
+
+    def _reset(self):
+        """Removes the recorded metrics"""
+        reset_metrics()
+        self.refresh()
+
+    def _export(self):
+        """Exports the metrics as JSON"""
+        default_path = os.path.join(os.path.dirname(app_conf_get('recipes.folder')), 'metrics-' + time.strftime('%Y-%m-%d-%H-%M-%S') + '.json')
+        path, _filter = QFileDialog.getSaveFileName(self, self.i18n.translate('GUI.DIAGNOSTICS.EXPORT.DIALOG.SELECT', 'Export metrics'), default_path, 'JSON (*.json)')
+        if path:
+            try:
+                export_metrics(path)
+            except OSError as ex:
+                logging.error('Failed to export metrics to "%s": %s', path, ex)
+        else:
+            logging.debug('Cancelled exporting metrics')
@@ -0,0 +1,101 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+#
+# Copyright 2022 Denis Meyer
+#
+# This file is part of Rezepte.
+#
+
+"""Duplicates dialog"""
+
+import logging
+import os
+
+from PyQt5.QtCore import Qt
+from PyQt5.QtGui import QIcon
+from PyQt5.QtWidgets import QDialog, QDesktopWidget, QGridLayout, QLabel, QPushButton, QTreeWidget, QTreeWidgetItem, QHeaderView
+
+from lib.AppConfig import app_conf_get
+
+class DuplicatesDialog(QDialog):
+    """Shows groups of near-duplicate recipes"""
+
+    def __init__(self, i18n, image_cache, clusters, nr_recipes, select_cb):
+        """Initializes the dialog
+
+        :param i18n: The I18n
+        :param image_cache: The image cache
+        :param clusters: The DuplicateCluster objects
+        :param nr_recipes: The number of compared recipes
+        :param select_cb: Callback with the recipe path to select it in the recipe tree
+        """
+        super(DuplicatesDialog, self).__init__()
+
+        logging.debug('Initializing DuplicatesDialog')
+
+        self.i18n = i18n
+        self.image_cache = image_cache
+        self.clusters = clusters
+        self.nr_recipes = nr_recipes
+        self.select_cb = select_cb
+
+        self.tree = None
+
+    def init_ui(self):
+        """Initiates the UI"""
+        logging.debug('Initializing DuplicatesDialog GUI')
+
+        self.setWindowTitle(self.i18n.translate('GUI.DUPLICATES.TITLE', 'Duplicates'))
+
+        logo = self.image_cache.get_or_load_pixmap('img.logo_app', 'logo-app.png')
+        if logo is not None:
+            self.setWindowIcon(QIcon(logo))
+
+        label_info = QLabel(self.i18n.translate('GUI.DUPLICATES.INFO', '{} groups of near-duplicates in {} recipes').format(len(self.clusters), self.nr_recipes))
+        label_hint = QLabel(self.i18n.translate('GUI.DUPLICATES.HINT', 'Double-click a recipe to select it in the tree'))
+
+        folder = app_conf_get('recipes.folder')
+        self.tree = QTreeWidget()
+        self.tree.setColumnCount(2)
+        self.tree.setHeaderLabels([self.i18n.translate('GUI.DUPLICATES.HEADERS.NAME', 'Recipe'),
+                                   self.i18n.translate('GUI.DUPLICATES.HEADERS.PATH', 'Path')])
+        for cluster in self.clusters:
+            cluster_item = QTreeWidgetItem(self.tree, [self.i18n.translate('GUI.DUPLICATES.CLUSTER', '{} recipes, {} % similar')
+                                                       .format(len(cluster.entries), round(cluster.similarity * 100))])
+            for entry in cluster.entries:
+                relpath = os.path.relpath(entry.path, folder) if os.path.commonpath([folder, entry.path]) == folder else entry.path
+                item = QTreeWidgetItem(cluster_item, [entry.name, relpath])
+                item.setData(0, Qt.UserRole, entry.path)
+            cluster_item.setExpanded(True)
+        self.tree.header().setSectionResizeMode(0, QHeaderView.ResizeToContents)
+        self.tree.itemDoubleClicked.connect(self._on_item_double_clicked)
+
+        button_close = QPushButton(self.i18n.translate('GUI.DUPLICATES.CLOSE', 'Close'))
+        button_close.clicked[bool].connect(self.close)
+
+        grid = QGridLayout()
+        grid.setSpacing(10)
+        grid.addWidget(label_info, 0, 0, 1, 3)
+        grid.addWidget(self.tree, 1, 0, 1, 3)
+        grid.addWidget(label_hint, 2, 0, 1, 2)
+        grid.addWidget(button_close, 2, 2, 1, 1)
+        self.setLayout(grid)
+
+        self.resize(640, 640)
+        self._center()
+
+    def _on_item_double_clicked(self, item, _col):
+        """Selects the double-clicked recipe in the recipe tree
+
+        :param item: The item
+        :param _col: The column
+        """
+        path = item.data(0, Qt.UserRole)
+        if path:
+            self.select_cb(path)
+
+    def _center(self):
+        """Centers the window on the screen"""
+        screen = QDesktopWidget().screenGeometry()
+        self.move(int((screen.width() - self.geometry().width()) / 2),
+                  int((screen.height() - self.geometry().height()) / 2))
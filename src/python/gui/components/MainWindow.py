@@ -14,21 +14,26 @@ from PyQt5.QtCore import QCoreApplication
 from PyQt5.QtGui import QIcon
 from PyQt5.QtWidgets import QMainWindow, QDesktopWidget, QMenuBar, QAction, QFileDialog
 
-from gui.data.IconDefinitions import SELECT_RECIPE_DIR, ABOUT, QUIT, get_flag
+from gui.data.IconDefinitions import SELECT_RECIPE_DIR, ABOUT, QUIT, FILE, get_flag
 from gui.components.Widget import Widget
-from gui.components.AboutDialog import AboutDialog
  
 from lib.Utils import is_macos, save_conf
 from lib.AppConfig import app_conf_get, app_conf_set, get_public_values
+from lib.Tracing import traced
 
 class MainWindow(QMainWindow):
     """Main window GUI"""
 
-    def __init__(self, i18n, image_cache):
+    def __init__(self, i18n, image_cache, recipe_index, similar_recipes=None, recipe_cache=None, window_manager=None, recipe_paths=None):
         """Initializes the main window
 
         :param i18n: The i18n
         :param image_cache: The image cache
+        :param recipe_index: The RecipeIndex
+        :param similar_recipes: The SimilarRecipes, None to not show similar recipes
+        :param recipe_cache: The RecipeCache, None to read recipes when they are opened
+        :param window_manager: The RecipeWindowManager, None to let the widget use one of its own
+        :param recipe_paths: The RecipePaths, None to let the widget use one of its own
         """
         super(MainWindow, self).__init__()
 
@@ -36,9 +41,24 @@ class MainWindow(QMainWindow):
 
         self.i18n = i18n
         self.image_cache = image_cache
+        self.recipe_index = recipe_index
+        self.similar_recipes = similar_recipes
+        self.recipe_cache = recipe_cache
+        self.window_manager = window_manager
+        self.recipe_paths = recipe_paths
 
         self.statusbar = None
+        self.widget = None
 
+        self.menu_application = None
+        self.menu_language = None
+        self.menu_settings = None
+        self.action_about = None
+        self.action_quick_open = None
+        self.action_quit = None
+        self.action_settings_select_recipe_dir = None
+
+    @traced('MainWindow.init_ui')
     def init_ui(self):
         """Initiates application UI"""
         logging.debug('Initializing MainWindow GUI')
@@ -58,6 +78,8 @@ class MainWindow(QMainWindow):
 
         self._center()
 
+        self.i18n.add_language_changed_listener(self._on_language_changed)
+
     # @override
     def closeEvent(self, event):
         """Close Event
@@ -69,6 +91,8 @@ class MainWindow(QMainWindow):
     def _show_about_dialog(self):
         """Displays the about dialog"""
         logging.debug('Displaying AboutDialog')
+        # Imported on first use to keep it out of the startup path
+        from gui.components.AboutDialog import AboutDialog
         about = AboutDialog(i18n=self.i18n, image_cache=self.image_cache)
         about.init_ui()
         about.exec_()
@@ -82,6 +106,8 @@ class MainWindow(QMainWindow):
             logging.info('Selected recipe directory: "%s"', dirname)
             app_conf_set('recipes.folder', dirname)
             save_conf(get_public_values())
+            if self.similar_recipes:
+                self.similar_recipes.reset()
 
             self._reset_phases()
             self._init_menu()
@@ -89,9 +115,16 @@ class MainWindow(QMainWindow):
         else:
             logging.debug('Cancelled selecting output directory')
 
+    def _quick_open(self):
+        """Shows the quick-open dialog"""
+        logging.debug('Displaying QuickOpenDialog')
+        if self.widget:
+            self.widget.quick_open()
+
     def _quit_application(self):
         """Quits the application"""
         logging.info('Quitting')
+        self.image_cache.log_stats()
         QCoreApplication.exit(0)
 
     def _init_menu(self):
@@ -102,25 +135,33 @@ class MainWindow(QMainWindow):
 
         menu_bar.clear()
 
-        menu_application = menu_bar.addMenu(self.i18n.translate('GUI.MAIN.MENU.APPNAME', 'Recipes'))
+        self.menu_application = menu_bar.addMenu(self.i18n.translate('GUI.MAIN.MENU.APPNAME', 'Recipes'))
 
-        action_about = QAction(self.i18n.translate('GUI.MAIN.MENU.ITEM.ABOUT', 'About'), self)
-        action_about.setShortcut('Ctrl+A')
-        action_about.triggered.connect(self._show_about_dialog)
+        self.action_about = QAction(self.i18n.translate('GUI.MAIN.MENU.ITEM.ABOUT', 'About'), self)
+        self.action_about.setShortcut('Ctrl+A')
+        self.action_about.triggered.connect(self._show_about_dialog)
         icon = self.image_cache.get_or_load_icon(ABOUT)
-        action_about.setIcon(icon)
+        self.action_about.setIcon(icon)
+
+        self.action_quick_open = QAction(self.i18n.translate('GUI.MAIN.MENU.ITEM.QUICK_OPEN', 'Open recipe...'), self)
+        self.action_quick_open.setShortcut('Ctrl+P')
+        self.action_quick_open.triggered.connect(self._quick_open)
+        icon = self.image_cache.get_or_load_icon(FILE)
+        self.action_quick_open.setIcon(icon)
 
-        action_quit = QAction(self.i18n.translate('GUI.MAIN.MENU.ITEM.QUIT', 'Quit'), self)
-        action_quit.setShortcut('Ctrl+Q')
-        action_quit.triggered.connect(self._quit_application)
+        self.action_quit = QAction(self.i18n.translate('GUI.MAIN.MENU.ITEM.QUIT', 'Quit'), self)
+        self.action_quit.setShortcut('Ctrl+Q')
+        self.action_quit.triggered.connect(self._quit_application)
         icon = self.image_cache.get_or_load_icon(QUIT)
-        action_quit.setIcon(icon)
+        self.action_quit.setIcon(icon)
 
-        menu_application.addAction(action_about)
-        menu_application.addAction(action_quit)
+        self.menu_application.addAction(self.action_about)
+        self.menu_application.addAction(self.action_quick_open)
+        self.menu_application.addAction(self.action_quit)
 
+        self.menu_language = None
         if len(self.i18n.languages) > 1:
-            menu_language = menu_bar.addMenu(self.i18n.translate('GUI.MAIN.MENU.LANGUAGE', 'Language'))
+            self.menu_language = menu_bar.addMenu(self.i18n.translate('GUI.MAIN.MENU.LANGUAGE', 'Language'))
 
             for lang in self.i18n.languages:
                 action = QAction(lang, self)
@@ -128,17 +169,30 @@ class MainWindow(QMainWindow):
                 if flag:
                     action.setIcon(flag)
                 action.triggered.connect(self._action_change_language)
-                menu_language.addAction(action)
+                self.menu_language.addAction(action)
 
-        menu_settings = menu_bar.addMenu(self.i18n.translate('GUI.MAIN.MENU.SETTINGS', 'Settings'))
+        self.menu_settings = menu_bar.addMenu(self.i18n.translate('GUI.MAIN.MENU.SETTINGS', 'Settings'))
 
-        action_settings_select_recipe_dir = QAction(self.i18n.translate('GUI.MAIN.MENU.ITEM.SETTINGS.SELECT_RECIPE_DIR', 'Select Recipe Directory'), self)
-        action_settings_select_recipe_dir.setShortcut('Ctrl+O')
-        action_settings_select_recipe_dir.triggered.connect(self._select_recipe_dir)
+        self.action_settings_select_recipe_dir = QAction(self.i18n.translate('GUI.MAIN.MENU.ITEM.SETTINGS.SELECT_RECIPE_DIR', 'Select Recipe Directory'), self)
+        self.action_settings_select_recipe_dir.setShortcut('Ctrl+O')
+        self.action_settings_select_recipe_dir.triggered.connect(self._select_recipe_dir)
         icon = self.image_cache.get_or_load_icon(SELECT_RECIPE_DIR)
-        action_settings_select_recipe_dir.setIcon(icon)
+        self.action_settings_select_recipe_dir.setIcon(icon)
 
-        menu_settings.addAction(action_settings_select_recipe_dir)
+        self.menu_settings.addAction(self.action_settings_select_recipe_dir)
+
+    def _retranslate_menu(self):
+        """Re-labels the menu bar in the current language"""
+        logging.debug('Re-labeling the menu bar')
+
+        self.menu_application.setTitle(self.i18n.translate('GUI.MAIN.MENU.APPNAME', 'Recipes'))
+        self.action_about.setText(self.i18n.translate('GUI.MAIN.MENU.ITEM.ABOUT', 'About'))
+        self.action_quick_open.setText(self.i18n.translate('GUI.MAIN.MENU.ITEM.QUICK_OPEN', 'Open recipe...'))
+        self.action_quit.setText(self.i18n.translate('GUI.MAIN.MENU.ITEM.QUIT', 'Quit'))
+        if self.menu_language:
+            self.menu_language.setTitle(self.i18n.translate('GUI.MAIN.MENU.LANGUAGE', 'Language'))
+        self.menu_settings.setTitle(self.i18n.translate('GUI.MAIN.MENU.SETTINGS', 'Settings'))
+        self.action_settings_select_recipe_dir.setText(self.i18n.translate('GUI.MAIN.MENU.ITEM.SETTINGS.SELECT_RECIPE_DIR', 'Select Recipe Directory'))
 
     def _center(self):
         """Centers the window on the screen"""
@@ -157,14 +211,20 @@ class MainWindow(QMainWindow):
         if lang == self.i18n.language_main:
             return
 
-        self.i18n.change_language(lang)
         app_conf_set('language.main', lang)
         save_conf(get_public_values())
 
-        self._reset_phases()
-        self.setWindowTitle(self.i18n.translate('GUI.MAIN.WINDOW.TITLE'))
-        self._init_menu()
-        self._init_widgets()
+        self.i18n.change_language(lang)
+
+    def _on_language_changed(self, lang):
+        """Re-labels the window after the language changed
+
+        :param lang: The new language
+        """
+        logging.debug('Language changed to "%s", re-labeling', lang)
+        self.setWindowTitle(self.i18n.translate('GUI.MAIN.WINDOW.TITLE', 'Recipes'))
+        self._retranslate_menu()
+        self.show_message(self.i18n.translate('GUI.MAIN.LOG.TREEVIEW'))
 
     def _reset_phases(self):
         """Resets phases"""
@@ -178,11 +238,20 @@ class MainWindow(QMainWindow):
         """Initializes widgets"""
         logging.info('Initializing widgets')
 
-        widget = Widget(i18n=self.i18n,
-                        log=self.show_message,
-                        image_cache=self.image_cache)
-        widget.init_ui()
-        self.setCentralWidget(widget)
+        if self.widget:
+            self.i18n.remove_language_changed_listener(self.widget.retranslate_ui)
+
+        self.widget = Widget(i18n=self.i18n,
+                             log=self.show_message,
+                             image_cache=self.image_cache,
+                             recipe_index=self.recipe_index,
+                             similar_recipes=self.similar_recipes,
+                             recipe_cache=self.recipe_cache,
+                             window_manager=self.window_manager,
+                             recipe_paths=self.recipe_paths)
+        self.widget.init_ui()
+        self.i18n.add_language_changed_listener(self.widget.retranslate_ui)
+        self.setCentralWidget(self.widget)
 
         self.show_message(self.i18n.translate('GUI.MAIN.LOG.TREEVIEW'))
 
@@ -0,0 +1,176 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+#
+# Copyright 2022 Denis Meyer
+#
+# This file is part of Rezepte.
+#
+
+"""Quick-open dialog"""
+
+import logging
+import os
+
+from PyQt5.QtCore import Qt, QEvent, QTimer
+from PyQt5.QtGui import QIcon
+from PyQt5.QtWidgets import QApplication, QDialog, QDesktopWidget, QVBoxLayout, QLabel, QLineEdit, QTreeWidget, QTreeWidgetItem, QHeaderView
+
+from lib.Tracing import traced
+
+class QuickOpenDialog(QDialog):
+    """Finds a recipe by typing characters of its name or folders and opens it"""
+
+    def __init__(self, i18n, image_cache, recipe_paths, open_cb, recipe_cache=None, parent=None):
+        """Initializes the dialog
+
+        :param i18n: The I18n
+        :param image_cache: The image cache
+        :param recipe_paths: The RecipePaths
+        :param open_cb: Callback with the path of the recipe to open
+        :param recipe_cache: The RecipeCache with the recently opened recipes, None to not rank them higher
+        :param parent: The parent widget
+        """
+        super(QuickOpenDialog, self).__init__(parent)
+
+        logging.debug('Initializing QuickOpenDialog')
+
+        self.i18n = i18n
+        self.image_cache = image_cache
+        self.recipe_paths = recipe_paths
+        self.open_cb = open_cb
+        self.recipe_cache = recipe_cache
+
+        self.line_edit = None
+        self.tree = None
+        self.label_info = None
+        # Matches the whole paths ahead between keystrokes
+        self._advance_timer = None
+
+    def init_ui(self):
+        """Initiates the UI"""
+        logging.debug('Initializing QuickOpenDialog GUI')
+
+        self.setWindowTitle(self.i18n.translate('GUI.QUICK_OPEN.TITLE', 'Open recipe'))
+
+        logo = self.image_cache.get_or_load_pixmap('img.logo_app', 'logo-app.png')
+        if logo is not None:
+            self.setWindowIcon(QIcon(logo))
+
+        self.line_edit = QLineEdit()
+        self.line_edit.setPlaceholderText(self.i18n.translate('GUI.QUICK_OPEN.FILTER', 'Type characters of the recipe name or folders'))
+        self.line_edit.setClearButtonEnabled(True)
+        self.line_edit.textChanged.connect(self._update)
+        self.line_edit.installEventFilter(self)
+
+        self.tree = QTreeWidget()
+        self.tree.setColumnCount(2)
+        self.tree.setHeaderLabels([self.i18n.translate('GUI.QUICK_OPEN.HEADERS.NAME', 'Recipe'),
+                                   self.i18n.translate('GUI.QUICK_OPEN.HEADERS.FOLDER', 'Folder')])
+        self.tree.setRootIsDecorated(False)
+        self.tree.setUniformRowHeights(True)
+        self.tree.header().setSectionResizeMode(0, QHeaderView.Stretch)
+        self.tree.itemActivated.connect(self._open)
+
+        self.label_info = QLabel()
+
+        layout = QVBoxLayout()
+        layout.addWidget(self.line_edit)
+        layout.addWidget(self.tree)
+        layout.addWidget(self.label_info)
+        self.setLayout(layout)
+
+        self._advance_timer = QTimer(self)
+        self._advance_timer.setInterval(0)
+        self._advance_timer.timeout.connect(self._advance)
+
+        self.recipe_paths.scanned.connect(self._on_scanned)
+
+        self.resize(640, 480)
+        self._center()
+
+    def show_dialog(self):
+        """Shows the dialog with the previous query selected"""
+        self.recipe_paths.prepare()
+        self.line_edit.selectAll()
+        self.line_edit.setFocus()
+        self._update()
+        self.exec_()
+
+    # @override
+    def eventFilter(self, obj, event):
+        """Moves through the results with the arrow keys and opens the current one with enter while typing
+
+        :param obj: The object
+        :param event: The event
+        """
+        if obj is self.line_edit and event.type() == QEvent.KeyPress:
+            if event.key() in (Qt.Key_Up, Qt.Key_Down, Qt.Key_PageUp, Qt.Key_PageDown):
+                QApplication.sendEvent(self.tree, event)
+                return True
+            if event.key() in (Qt.Key_Return, Qt.Key_Enter):
+                self._open(self.tree.currentItem())
+                return True
+        return super(QuickOpenDialog, self).eventFilter(obj, event)
+
+    @traced('QuickOpenDialog._update')
+    def _update(self, *_args):
+        """Lists the recipes matching the query"""
+        recent = self.recipe_cache.get_recent() if self.recipe_cache else []
+        paths = self.recipe_paths.search(self.line_edit.text(), recent=recent)
+        folder = self.recipe_paths.get_folder()
+        suffix = self.recipe_paths.suffix
+        self.tree.setUpdatesEnabled(False)
+        self.tree.clear()
+        items = []
+        for path in paths:
+            name = os.path.basename(path)[:-len(suffix)]
+            item = QTreeWidgetItem([name, os.path.dirname(path)[len(folder):].lstrip(os.sep)])
+            item.setData(0, Qt.UserRole, path)
+            item.setToolTip(0, path)
+            items.append(item)
+        self.tree.addTopLevelItems(items)
+        if items:
+            self.tree.setCurrentItem(items[0])
+        self.tree.setUpdatesEnabled(True)
+        if self.recipe_paths.is_scanning():
+            self.label_info.setText(self.i18n.translate('GUI.QUICK_OPEN.SCANNING', 'Listing the recipes of the cookbook...'))
+        else:
+            self.label_info.setText(self.i18n.translate('GUI.QUICK_OPEN.INFO', '{} of {} recipes').format(len(paths), len(self.recipe_paths)))
+        self._advance_timer.start()
+
+    def _on_scanned(self):
+        """Lists the matching recipes again once the cookbook has been listed"""
+        if self.isVisible():
+            self._update()
+
+    def _advance(self):
+        """Matches the whole paths against one more character of the query"""
+        if not self.recipe_paths.advance():
+            self._advance_timer.stop()
+
+    def _open(self, item, *_args):
+        """Opens the recipe of an item and closes the dialog
+
+        :param item: The QTreeWidgetItem, may be None
+        """
+        if item is None:
+            return
+        path = item.data(0, Qt.UserRole)
+        logging.info('Quick-opening "%s"', path)
+        self.accept()
+        self.open_cb(path)
+
+    # @override
+    def done(self, result):
+        """Stops matching ahead when the dialog is closed
+
+        :param result: The result
+        """
+        self._advance_timer.stop()
+        super(QuickOpenDialog, self).done(result)
+
+    def _center(self):
+        """Centers the window on the screen"""
+        screen = QDesktopWidget().screenGeometry()
+        self.move(int((screen.width() - self.geometry().width()) / 2),
+                  int((screen.height() - self.geometry().height()) / 2))
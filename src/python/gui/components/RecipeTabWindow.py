@@ -0,0 +1,281 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+#
+# Copyright 2022 Denis Meyer
+#
+# This file is part of Rezepte.
+#
+
+"""Recipe tab window"""
+
+import logging
+
+from PyQt5.QtWidgets import QTabBar, QVBoxLayout, QWidget
+
+from gui.components.RecipeWindow import RecipeWindow
+from lib.Tracing import traced
+
+class _RecipeTab():
+    """The state of a recipe in a tab, kept while another tab is shown"""
+
+    def __init__(self, path_info, recipe, open_cb=None):
+        """Initializes the tab
+
+        :param path_info: The path info
+        :param recipe: The Recipe
+        :param open_cb: Callback with a recipe path to open another recipe
+        """
+        self.path_info = path_info
+        self.recipe = recipe
+        self.open_cb = open_cb
+        # Created when the tab is first shown
+        self.model_ingredients = None
+        self.model_steps = None
+        self.changed = False
+        self.image_changed = False
+        self.scale = None
+
+class RecipeTabWindow(RecipeWindow):
+    """Recipe window showing several recipes in tabs
+
+    The window has one set of editor widgets (tables, labels, panels) for the current tab. Switching tabs
+    shows the table models and the unsaved changes of the other recipe in them.
+    """
+
+    def __init__(self, i18n, image_cache, path_info, recipe, close_cb, similar_recipes=None, open_cb=None):
+        """Initializes the recipe tab window
+
+        :param i18n: The i18n
+        :param image_cache: The image cache
+        :param path_info: The path info of the first recipe
+        :param recipe: The first Recipe
+        :param close_cb: Callback with the recipe path when a recipe is closed, returns True to keep the window hidden for reuse
+        :param similar_recipes: The SimilarRecipes, None to not show similar recipes
+        :param open_cb: Callback with a recipe path to open another recipe
+        """
+        self.tab_bar = None
+        self._tabs = []
+        self._current = None
+
+        super(RecipeTabWindow, self).__init__(i18n, image_cache, path_info, recipe, close_cb, similar_recipes=similar_recipes, open_cb=open_cb)
+
+        logging.debug('Initializing RecipeTabWindow')
+
+    # The tab text marks unsaved changes, so every change of the flag updates it
+    def _get_changed(self):
+        """Returns whether the current recipe has unsaved changes"""
+        return self._dirty
+
+    def _set_changed(self, changed):
+        """Sets whether the current recipe has unsaved changes
+
+        :param changed: The flag
+        """
+        self._dirty = changed
+        if self._current is not None:
+            self._update_tab_text(self._current, self.recipe, changed)
+
+    _changed = property(_get_changed, _set_changed)
+
+    @traced('RecipeTabWindow.init_ui')
+    def init_ui(self):
+        """Initiates UI"""
+        super(RecipeTabWindow, self).init_ui()
+
+        self.tab_bar = QTabBar()
+        self.tab_bar.setTabsClosable(True)
+        self.tab_bar.setExpanding(False)
+        self.tab_bar.setDocumentMode(True)
+        self.tab_bar.currentChanged.connect(self._switch_tab)
+        self.tab_bar.tabCloseRequested.connect(self._close_tab)
+
+        container = QWidget()
+        layout = QVBoxLayout()
+        layout.setContentsMargins(0, 0, 0, 0)
+        layout.addWidget(self.tab_bar)
+        layout.addWidget(self.takeCentralWidget())
+        container.setLayout(layout)
+        self.setCentralWidget(container)
+
+        self._add_tab(_RecipeTab(self.path_info, self.recipe, self.open_cb))
+
+    def retranslate_ui(self, _lang=None):
+        """Re-labels the window in the current language
+
+        :param _lang: The new language
+        """
+        super(RecipeTabWindow, self).retranslate_ui(_lang)
+        for i, tab in enumerate(self._tabs):
+            if i == self._current:
+                self._update_tab_text(i, self.recipe, self._changed)
+            else:
+                self._update_tab_text(i, tab.recipe, tab.changed)
+
+    def add_recipe(self, path_info, recipe, open_cb=None):
+        """Shows a recipe in a new tab
+
+        :param path_info: The path info
+        :param recipe: The Recipe
+        :param open_cb: Callback with a recipe path to open another recipe
+        """
+        if self.select_recipe(path_info):
+            return
+        logging.debug('Adding tab for "%s"', path_info)
+        self._add_tab(_RecipeTab(path_info, recipe, open_cb))
+
+    def select_recipe(self, path_info):
+        """Shows the tab of a recipe
+
+        :param path_info: The path info
+        :return: True if the recipe has a tab, False else
+        """
+        for i, tab in enumerate(self._tabs):
+            if tab.path_info == path_info:
+                self.tab_bar.setCurrentIndex(i)
+                return True
+        return False
+
+    def get_nr_recipes(self):
+        """Returns the number of recipes in tabs"""
+        return len(self._tabs)
+
+    def load_recipe(self, path_info, recipe, open_cb=None):
+        """Shows another recipe as only tab of the initialized (closed) window
+
+        :param path_info: The path info
+        :param recipe: The Recipe
+        :param open_cb: Callback with a recipe path to open another recipe
+        """
+        self._current = None
+        self._tabs = []
+        self.tab_bar.blockSignals(True)
+        while self.tab_bar.count():
+            self.tab_bar.removeTab(0)
+        self.tab_bar.blockSignals(False)
+        super(RecipeTabWindow, self).load_recipe(path_info, recipe, open_cb=open_cb)
+        tab = _RecipeTab(path_info, recipe, open_cb)
+        self._store_tab(tab)
+        self._tabs.append(tab)
+        self._current = 0
+        self.tab_bar.blockSignals(True)
+        self.tab_bar.addTab('')
+        self.tab_bar.blockSignals(False)
+        self._update_tab_text(0, recipe, False)
+
+    def _add_tab(self, tab):
+        """Adds a tab and shows it
+
+        :param tab: The _RecipeTab
+        """
+        self._tabs.append(tab)
+        index = self.tab_bar.addTab('')
+        self._update_tab_text(index, tab.recipe, tab.changed)
+        if self._current is None:
+            # The first tab shows the recipe the widgets were initialized with
+            self._current = index
+            self._store_tab(tab)
+        else:
+            self.tab_bar.setCurrentIndex(index)
+
+    def _update_tab_text(self, index, recipe, changed):
+        """Shows the recipe name in a tab, marked if changed
+
+        :param index: The tab index
+        :param recipe: The Recipe
+        :param changed: Whether the recipe has unsaved changes
+        """
+        if self.tab_bar is None or index >= self.tab_bar.count():
+            return
+        name = recipe.name or self.i18n.translate('GUI.RECIPE.VIEW.EMPTY_WINDOW_TITLE', 'Unknown Recipe')
+        self.tab_bar.setTabText(index, f'* {name}' if changed else name)
+        self.tab_bar.setTabToolTip(index, self._tabs[index].path_info if index < len(self._tabs) else '')
+
+    def _store_tab(self, tab):
+        """Keeps the state of the current recipe in its tab
+
+        :param tab: The _RecipeTab
+        """
+        tab.path_info = self.path_info
+        tab.recipe = self.recipe
+        tab.open_cb = self.open_cb
+        tab.model_ingredients = self.model_ingredients
+        tab.model_steps = self.model_steps
+        tab.changed = self._changed
+        tab.image_changed = self._image_changed
+        tab.scale = self.slider_scale.value()
+
+    @traced('RecipeTabWindow._switch_tab')
+    def _switch_tab(self, index):
+        """Shows the recipe of another tab in the widgets
+
+        :param index: The tab index
+        """
+        if index < 0 or index == self._current:
+            return
+        if self._current is not None:
+            self._store_tab(self._tabs[self._current])
+        tab = self._tabs[index]
+        self._current = None
+        self.path_info = tab.path_info
+        self.recipe = tab.recipe
+        self.open_cb = tab.open_cb
+        self._changed = tab.changed
+        self._image_changed = tab.image_changed
+        self._show_recipe(tab.model_ingredients, tab.model_steps)
+        if tab.scale is not None and self.recipe.servings:
+            self.slider_scale.setValue(tab.scale)
+        self._current = index
+        self._update_tab_text(index, tab.recipe, tab.changed)
+
+    def _close_tab(self, index):
+        """Closes the recipe of a tab, asking first if it has unsaved changes
+
+        :param index: The tab index
+        """
+        if index == self._current:
+            self._store_tab(self._tabs[index])
+        tab = self._tabs[index]
+        if tab.changed and not self._close_yesno():
+            logging.info('Not closing without saving')
+            return
+        if len(self._tabs) == 1:
+            # Already asked, closes the window
+            self._changed = False
+            self.close()
+            return
+        logging.debug('Closing tab of "%s"', tab.path_info)
+        if self.close_cb:
+            self.close_cb(tab.path_info)
+        if index == self._current:
+            self._current = None
+        elif index < self._current:
+            self._current -= 1
+        del self._tabs[index]
+        self.tab_bar.removeTab(index)
+
+    def _close(self):
+        """Closes the current recipe, the window with the last one"""
+        if self._current is None:
+            self.close()
+        else:
+            self._close_tab(self._current)
+
+    # @override
+    def closeEvent(self, event):
+        """Window close event, closes all recipes
+
+        :param event: The event
+        """
+        logging.debug('Window close triggered')
+        if self._current is not None:
+            self._store_tab(self._tabs[self._current])
+        if any(tab.changed for tab in self._tabs) and not self._close_yesno():
+            logging.info('Not closing without saving')
+            event.ignore()
+            return
+        event.accept()
+        for tab in self._tabs:
+            if tab.path_info != self.path_info and self.close_cb:
+                self.close_cb(tab.path_info)
+        self._changed = False
+        self._closed()
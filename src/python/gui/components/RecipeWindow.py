@@ -9,12 +9,12 @@
 """Recipe window"""
 
 import logging
-import re
+import os
 
 from PyQt5.QtCore import Qt
-from PyQt5.QtCore import QCoreApplication, QUrl
+from PyQt5.QtCore import QCoreApplication, QObject, QRunnable, QThreadPool, QUrl, QTimer, pyqtSignal
 from PyQt5.QtGui import QFont, QDesktopServices, QIcon
-from PyQt5.QtWidgets import QMainWindow, QDesktopWidget, QMenuBar, QAction, QFileDialog, QInputDialog, QLineEdit, QLabel, QWidget, QSizePolicy, QGridLayout, QHeaderView, QPushButton, QAbstractItemView, QMessageBox
+from PyQt5.QtWidgets import QMainWindow, QDesktopWidget, QMenuBar, QAction, QFileDialog, QInputDialog, QLineEdit, QLabel, QWidget, QSizePolicy, QGridLayout, QHeaderView, QPushButton, QAbstractItemView, QMessageBox, QSpinBox, QSlider, QSplitter, QListWidget, QListWidgetItem, QVBoxLayout
 
 from gui.data.IconDefinitions import EDIT, QUIT
 from gui.components.view.IngredientsTableView import IngredientsTableView
@@ -23,20 +23,64 @@ from gui.components.model.IngredientsTableModel import IngredientsTableModel
 from gui.components.model.StepsTableModel import StepsTableModel
 
 from lib.AppConfig import app_conf_get
-from lib.Utils import save_recipe, is_macos
-from lib.RecipePDF import RecipePDF
+from lib.IngredientNames import normalize_name
+from lib.QuantityParser import format_value
+from lib.UnitConversion import load_densities
+from lib.Tracing import trace_span, traced
+from lib.Utils import save_recipe, is_macos, get_recipe_image_path, get_recipe_image_obj
+
+class _NutritionSignals(QObject):
+    """Signals of a nutrition task"""
+
+    done = pyqtSignal(int, object)
+
+class _NutritionTask(QRunnable):
+    """Computes the nutrition values of a recipe in a worker thread, importing numpy and loading the tables on first use"""
+
+    def __init__(self, signals, task_id, ingredients, basedir):
+        """Initializes the task
+
+        :param signals: The signals to report the Nutrition (None on failure) with
+        :param task_id: The number of the task, outdated once the ingredients change again
+        :param ingredients: List of (parsed Quantity, name, normalized name)
+        :param basedir: The base path
+        """
+        super(_NutritionTask, self).__init__()
+
+        self.signals = signals
+        self.task_id = task_id
+        self.ingredients = ingredients
+        self.basedir = basedir
+
+    def run(self):
+        """Runs the task"""
+        nutrition = None
+        try:
+            # Imported on first use, numpy is slow to import
+            from lib.Nutrition import compute_nutrition, load_nutrient_table
+            with trace_span('nutrition compute'):
+                nutrition = compute_nutrition([self.ingredients], load_nutrient_table(self.basedir), load_densities(self.basedir))[0]
+        except Exception as ex:
+            logging.error('Failed to compute the nutrition values: %s', ex)
+        try:
+            self.signals.done.emit(self.task_id, nutrition)
+        except RuntimeError:
+            # The window has been deleted without being closed, e.g. on quit
+            logging.debug('Dropping the nutrition values of a deleted window')
 
 class RecipeWindow(QMainWindow):
     """Recipe window GUI"""
 
-    def __init__(self, i18n, image_cache, path_info, recipe, close_cb):
+    def __init__(self, i18n, image_cache, path_info, recipe, close_cb, similar_recipes=None, open_cb=None):
         """Initializes the recipe window
 
         :param i18n: The i18n
         :param image_cache: The image cache
         :param path_info: The path info
         :param recipe: The Recipe
-        :param close_cb: Callback when the window closes
+        :param close_cb: Callback with the recipe path when the window closes, returns True to keep the window hidden for reuse
+        :param similar_recipes: The SimilarRecipes, None to not show similar recipes
+        :param open_cb: Callback with a recipe path to open another recipe
         """
         super(RecipeWindow, self).__init__()
 
@@ -47,29 +91,62 @@ class RecipeWindow(QMainWindow):
         self.path_info = path_info
         self.recipe = recipe
         self.close_cb = close_cb
+        self.similar_recipes = similar_recipes if app_conf_get('similar.enabled', True) else None
+        self.open_cb = open_cb
 
         self.menu_bar = None
+        self.menu_application = None
+        self.action_close = None
         self.statusbar = None
         self.label_header = None
         self.table_steps = None
         self.model_steps = None
         self.label_info_text = None
+        self.label_photo = None
+        self.button_select_photo = None
+        self.button_remove_photo = None
+        self.label_ingredients = None
+        self.label_steps = None
+        self.label_info = None
+        self.label_servings = None
+        self.spin_servings = None
+        self.label_scale = None
+        self.slider_scale = None
+        self.label_scale_value = None
+        self.label_nutrition = None
+        self._nutrition_timer = None
+        self._nutrition_pool = None
+        self._nutrition_signals = None
+        self._nutrition_id = 0
+        self.label_similar = None
+        self.list_similar = None
+        self._similar_timer = None
+        self.button_remove_ingredient = None
+        self.button_add_ingredient = None
+        self.button_remove_step = None
+        self.button_add_step = None
+        self.button_cancel = None
+        self.button_export = None
+        self.button_save = None
+        self.button_save_close = None
 
         self._changed = False
+        self._image_changed = False
 
         self.table_ingredients = None
         self.model_ingredients = None
 
+        # Deleted once closed, unless kept for reuse
+        self.setAttribute(Qt.WA_DeleteOnClose)
+
+    @traced('RecipeWindow.init_ui')
     def init_ui(self):
         """Initiates UI"""
         logging.debug('Initializing RecipeWindow GUI')
 
         self._init_menu()
 
-        if self.recipe.name:
-            self.setWindowTitle(self.recipe.name)
-        else:
-            self.setWindowTitle(self.i18n.translate('GUI.RECIPE.VIEW.EMPTY_WINDOW_TITLE', 'Unknown Recipe'))
+        self._update_window_title()
         self.statusbar = self.statusBar()
         if self.recipe.name:
             self.show_message(self.i18n.translate('GUI.RECIPE.LOG.RECIPE.OPENED').format(self.recipe.name))
@@ -84,6 +161,95 @@ class RecipeWindow(QMainWindow):
 
         self._center()
 
+        self.i18n.add_language_changed_listener(self.retranslate_ui)
+
+    @traced('RecipeWindow.load_recipe')
+    def load_recipe(self, path_info, recipe, open_cb=None):
+        """Shows another recipe in the initialized (closed) window
+
+        :param path_info: The path info
+        :param recipe: The Recipe
+        :param open_cb: Callback with a recipe path to open another recipe
+        """
+        logging.debug('Reusing RecipeWindow for "%s"', path_info)
+
+        self.path_info = path_info
+        self.recipe = recipe
+        self.open_cb = open_cb
+        self._changed = False
+        self._image_changed = False
+
+        self._show_recipe()
+        if self.similar_recipes:
+            self.similar_recipes.ready.connect(self._schedule_similar_update)
+        self.i18n.add_language_changed_listener(self.retranslate_ui)
+        self.show_message(self.i18n.translate('GUI.RECIPE.LOG.RECIPE.OPENED').format(self.recipe.name) if self.recipe.name else '')
+
+    def _show_recipe(self, model_ingredients=None, model_steps=None):
+        """Shows the recipe in the initialized widgets
+
+        :param model_ingredients: The IngredientsTableModel of the recipe, None to create it
+        :param model_steps: The StepsTableModel of the recipe, None to create it
+        """
+        self.label_header.setText(self.recipe.name)
+        self.spin_servings.blockSignals(True)
+        self.spin_servings.setValue(self.recipe.servings)
+        self.spin_servings.blockSignals(False)
+        self._init_models(model_ingredients, model_steps)
+        self.label_info_text.setText(self._get_short_recipe_information())
+        self._update_photo()
+        if self.similar_recipes:
+            self.list_similar.clear()
+
+        # Labels and computed values, the language may have changed in the meantime
+        self.retranslate_ui()
+
+    def _update_window_title(self):
+        """Updates the window title"""
+        if self.recipe.name:
+            self.setWindowTitle(self.recipe.name)
+        else:
+            self.setWindowTitle(self.i18n.translate('GUI.RECIPE.VIEW.EMPTY_WINDOW_TITLE', 'Unknown Recipe'))
+
+    def retranslate_ui(self, _lang=None):
+        """Re-labels the window in the current language
+
+        :param _lang: The new language
+        """
+        logging.debug('Re-labeling RecipeWindow')
+
+        self._update_window_title()
+
+        self.menu_application.setTitle(self.i18n.translate('GUI.RECIPE.MENU.RECIPE.NAME', 'Recipe'))
+        self.action_close.setText(self.i18n.translate('GUI.RECIPE.MENU.ITEM.CLOSE', 'Close'))
+
+        self.button_select_photo.setText(self.i18n.translate('GUI.RECIPE.VIEW.ACTIONS.PHOTO.SELECT', 'Select photo'))
+        self.button_remove_photo.setText(self.i18n.translate('GUI.RECIPE.VIEW.ACTIONS.PHOTO.REMOVE', 'Remove photo'))
+
+        self.label_ingredients.setText(self.i18n.translate('GUI.RECIPE.VIEW.HEADERS.INGREDIENTS', 'Ingredients'))
+        self.button_remove_ingredient.setText(self.i18n.translate('GUI.RECIPE.VIEW.ACTIONS.INGREDIENTS.REMOVE', '-'))
+        self.button_add_ingredient.setText(self.i18n.translate('GUI.RECIPE.VIEW.ACTIONS.INGREDIENTS.ADD', '+'))
+        self.model_ingredients.retranslate()
+
+        self.label_steps.setText(self.i18n.translate('GUI.RECIPE.VIEW.HEADERS.STEPS', 'Steps'))
+        self.button_remove_step.setText(self.i18n.translate('GUI.RECIPE.VIEW.ACTIONS.STEPS.REMOVE', '-'))
+        self.button_add_step.setText(self.i18n.translate('GUI.RECIPE.VIEW.ACTIONS.STEPS.ADD', '+'))
+
+        self.label_info.setText(self.i18n.translate('GUI.RECIPE.VIEW.HEADERS.INFO', 'Information'))
+
+        self.label_servings.setText(self.i18n.translate('GUI.RECIPE.VIEW.SERVINGS', 'Servings'))
+        self.label_scale.setText(self.i18n.translate('GUI.RECIPE.VIEW.SCALE', 'Scale to'))
+        self._scale_changed(self.slider_scale.value())
+        self._schedule_nutrition_update()
+        if self.similar_recipes:
+            self.label_similar.setText(self.i18n.translate('GUI.RECIPE.VIEW.HEADERS.SIMILAR', 'Similar recipes'))
+            self._schedule_similar_update()
+
+        self.button_cancel.setText(self.i18n.translate('GUI.RECIPE.VIEW.ACTIONS.CANCEL', 'Cancel'))
+        self.button_export.setText(self.i18n.translate('GUI.RECIPE.VIEW.ACTIONS.EXPORT', 'Export'))
+        self.button_save.setText(self.i18n.translate('GUI.RECIPE.VIEW.ACTIONS.SAVE', 'Save'))
+        self.button_save_close.setText(self.i18n.translate('GUI.RECIPE.VIEW.ACTIONS.SAVE_CLOSE', 'Save & Close'))
+
     def _init_menu(self):
         """Initializes the menu bar"""
         logging.debug('Initializing the menu bar')
@@ -92,22 +258,21 @@ class RecipeWindow(QMainWindow):
 
         self.menu_bar.clear()
 
-        menu_application = self.menu_bar.addMenu(self.i18n.translate('GUI.RECIPE.MENU.RECIPE.NAME', 'Recipe'))
+        self.menu_application = self.menu_bar.addMenu(self.i18n.translate('GUI.RECIPE.MENU.RECIPE.NAME', 'Recipe'))
 
-        action_close = QAction(self.i18n.translate('GUI.RECIPE.MENU.ITEM.CLOSE', 'Close'), self)
-        action_close.setShortcut('Ctrl+C')
-        action_close.triggered.connect(self._close)
+        self.action_close = QAction(self.i18n.translate('GUI.RECIPE.MENU.ITEM.CLOSE', 'Close'), self)
+        self.action_close.setShortcut('Ctrl+C')
+        self.action_close.triggered.connect(self._close)
         icon = self.image_cache.get_or_load_icon(QUIT)
-        action_close.setIcon(icon)
+        self.action_close.setIcon(icon)
 
-        menu_application.addAction(action_close)
+        self.menu_application.addAction(self.action_close)
 
     def _init_widgets(self):
         """Initializes widgets"""
         logging.debug('Initializing widgets')
 
-        widget = QWidget(self)
-        self.setCentralWidget(widget)
+        widget = QWidget()
 
         font_label_header = QFont()
         font_label_header.setBold(True)
@@ -134,52 +299,83 @@ class RecipeWindow(QMainWindow):
         button_edit_recipe_name.setIcon(icon)
         button_edit_recipe_name.clicked[bool].connect(self._edit_recipe_name)
 
+        self.label_photo = QLabel()
+        self.label_photo.setAlignment(Qt.AlignCenter)
+        self.image_cache.get_thumbnail_loader().thumbnail_loaded.connect(self._on_thumbnail_loaded)
+
+        self.button_select_photo = QPushButton(self.i18n.translate('GUI.RECIPE.VIEW.ACTIONS.PHOTO.SELECT', 'Select photo'))
+        self.button_select_photo.clicked[bool].connect(self._select_photo)
+        self.button_remove_photo = QPushButton(self.i18n.translate('GUI.RECIPE.VIEW.ACTIONS.PHOTO.REMOVE', 'Remove photo'))
+        self.button_remove_photo.clicked[bool].connect(self._remove_photo)
+
+        self.label_servings = QLabel(self.i18n.translate('GUI.RECIPE.VIEW.SERVINGS', 'Servings'))
+        self.spin_servings = QSpinBox()
+        self.spin_servings.setRange(0, app_conf_get('servings.max', 999))
+        self.spin_servings.setSpecialValueText('-')
+        self.spin_servings.setValue(self.recipe.servings)
+        self.spin_servings.valueChanged[int].connect(self._servings_changed)
+
+        self.label_scale = QLabel(self.i18n.translate('GUI.RECIPE.VIEW.SCALE', 'Scale to'))
+        self.slider_scale = QSlider(Qt.Horizontal)
+        self.label_scale_value = QLabel()
+        self.slider_scale.valueChanged[int].connect(self._scale_changed)
+
+        self.label_nutrition = QLabel()
+        self.label_nutrition.setFont(font_label_text)
+        self.label_nutrition.setAlignment(Qt.AlignLeft)
+        # Computed once the window is shown and after changes, coalescing several changes
+        self._nutrition_timer = QTimer(self)
+        self._nutrition_timer.setSingleShot(True)
+        self._nutrition_timer.setInterval(0)
+        self._nutrition_timer.timeout.connect(self._update_nutrition)
+        # Computed in the background, the first computation loads numpy and the tables
+        self._nutrition_pool = QThreadPool(self)
+        self._nutrition_pool.setMaxThreadCount(1)
+        self._nutrition_signals = _NutritionSignals(self)
+        self._nutrition_signals.done.connect(self._show_nutrition)
+
         label_ingredients_line = QWidget()
         label_ingredients_line.setFixedHeight(1)
         label_ingredients_line.setSizePolicy(QSizePolicy.Expanding, QSizePolicy.Fixed)
         label_ingredients_line.setStyleSheet(line_css)
 
-        label_ingredients = QLabel(self.i18n.translate('GUI.RECIPE.VIEW.HEADERS.INGREDIENTS', 'Ingredients'))
-        label_ingredients.setFont(font_label_info)
-        label_ingredients.setAlignment(Qt.AlignLeft)
+        self.label_ingredients = QLabel(self.i18n.translate('GUI.RECIPE.VIEW.HEADERS.INGREDIENTS', 'Ingredients'))
+        self.label_ingredients.setFont(font_label_info)
+        self.label_ingredients.setAlignment(Qt.AlignLeft)
 
-        button_remove_ingredient = QPushButton(self.i18n.translate('GUI.RECIPE.VIEW.ACTIONS.INGREDIENTS.REMOVE', '-'))
-        button_remove_ingredient.clicked[bool].connect(self._remove_ingredient)
-        button_add_ingredient = QPushButton(self.i18n.translate('GUI.RECIPE.VIEW.ACTIONS.INGREDIENTS.ADD', '+'))
-        button_add_ingredient.clicked[bool].connect(self._add_ingredient)
+        self.button_remove_ingredient = QPushButton(self.i18n.translate('GUI.RECIPE.VIEW.ACTIONS.INGREDIENTS.REMOVE', '-'))
+        self.button_remove_ingredient.clicked[bool].connect(self._remove_ingredient)
+        self.button_add_ingredient = QPushButton(self.i18n.translate('GUI.RECIPE.VIEW.ACTIONS.INGREDIENTS.ADD', '+'))
+        self.button_add_ingredient.clicked[bool].connect(self._add_ingredient)
 
         self.table_ingredients = IngredientsTableView(cb_dropped=self._ingredients_dropped)
-        self.model_ingredients = IngredientsTableModel(self.i18n, self.recipe.ingredients, cb_change=self._on_ingredients_changed)
-        self.table_ingredients.setModel(self.model_ingredients)
-        self._update_headers(self.table_ingredients, self.model_ingredients)
 
         label_steps_line = QWidget()
         label_steps_line.setFixedHeight(1)
         label_steps_line.setSizePolicy(QSizePolicy.Expanding, QSizePolicy.Fixed)
         label_steps_line.setStyleSheet(line_css)
 
-        label_steps = QLabel(self.i18n.translate('GUI.RECIPE.VIEW.HEADERS.STEPS', 'Steps'))
-        label_steps.setFont(font_label_info)
-        label_steps.setAlignment(Qt.AlignLeft)
+        self.label_steps = QLabel(self.i18n.translate('GUI.RECIPE.VIEW.HEADERS.STEPS', 'Steps'))
+        self.label_steps.setFont(font_label_info)
+        self.label_steps.setAlignment(Qt.AlignLeft)
 
-        button_remove_step = QPushButton(self.i18n.translate('GUI.RECIPE.VIEW.ACTIONS.STEPS.REMOVE', '-'))
-        button_remove_step.clicked[bool].connect(self._remove_step)
-        button_add_step = QPushButton(self.i18n.translate('GUI.RECIPE.VIEW.ACTIONS.STEPS.ADD', '+'))
-        button_add_step.clicked[bool].connect(self._add_step)
+        self.button_remove_step = QPushButton(self.i18n.translate('GUI.RECIPE.VIEW.ACTIONS.STEPS.REMOVE', '-'))
+        self.button_remove_step.clicked[bool].connect(self._remove_step)
+        self.button_add_step = QPushButton(self.i18n.translate('GUI.RECIPE.VIEW.ACTIONS.STEPS.ADD', '+'))
+        self.button_add_step.clicked[bool].connect(self._add_step)
 
         self.table_steps = StepsTableView(cb_dropped=self._steps_dropped)
-        self.model_steps = StepsTableModel(self.i18n, self.recipe.steps, cb_change=self._on_steps_changed)
-        self.table_steps.setModel(self.model_steps)
-        self._update_headers(self.table_steps, self.model_steps)
+
+        self._init_models()
 
         label_info_line = QWidget()
         label_info_line.setFixedHeight(1)
         label_info_line.setSizePolicy(QSizePolicy.Expanding, QSizePolicy.Fixed)
         label_info_line.setStyleSheet(line_css)
 
-        label_info = QLabel(self.i18n.translate('GUI.RECIPE.VIEW.HEADERS.INFO', 'Information'))
-        label_info.setFont(font_label_info)
-        label_info.setAlignment(Qt.AlignLeft)
+        self.label_info = QLabel(self.i18n.translate('GUI.RECIPE.VIEW.HEADERS.INFO', 'Information'))
+        self.label_info.setFont(font_label_info)
+        self.label_info.setAlignment(Qt.AlignLeft)
 
         button_edit_info = QPushButton()
         icon = self.image_cache.get_or_load_icon(EDIT)
@@ -190,14 +386,14 @@ class RecipeWindow(QMainWindow):
         self.label_info_text.setFont(font_label_text)
         self.label_info_text.setAlignment(Qt.AlignLeft)
 
-        button_cancel = QPushButton(self.i18n.translate('GUI.RECIPE.VIEW.ACTIONS.CANCEL', 'Cancel'))
-        button_cancel.clicked[bool].connect(self._close)
-        button_export = QPushButton(self.i18n.translate('GUI.RECIPE.VIEW.ACTIONS.EXPORT', 'Export'))
-        button_export.clicked[bool].connect(self._export)
-        button_save = QPushButton(self.i18n.translate('GUI.RECIPE.VIEW.ACTIONS.SAVE', 'Save'))
-        button_save.clicked[bool].connect(self._save)
-        button_save_close = QPushButton(self.i18n.translate('GUI.RECIPE.VIEW.ACTIONS.SAVE_CLOSE', 'Save & Close'))
-        button_save_close.clicked[bool].connect(self._save_close)
+        self.button_cancel = QPushButton(self.i18n.translate('GUI.RECIPE.VIEW.ACTIONS.CANCEL', 'Cancel'))
+        self.button_cancel.clicked[bool].connect(self._close)
+        self.button_export = QPushButton(self.i18n.translate('GUI.RECIPE.VIEW.ACTIONS.EXPORT', 'Export'))
+        self.button_export.clicked[bool].connect(self._export)
+        self.button_save = QPushButton(self.i18n.translate('GUI.RECIPE.VIEW.ACTIONS.SAVE', 'Save'))
+        self.button_save.clicked[bool].connect(self._save)
+        self.button_save_close = QPushButton(self.i18n.translate('GUI.RECIPE.VIEW.ACTIONS.SAVE_CLOSE', 'Save & Close'))
+        self.button_save_close.clicked[bool].connect(self._save_close)
 
         # Layout
 
@@ -213,10 +409,30 @@ class RecipeWindow(QMainWindow):
 
         curr_gridid += 1
         layout_grid.setRowStretch(curr_gridid, 0)
-        layout_grid.addWidget(label_ingredients, curr_gridid, 0, 1, 1)
+        layout_grid.addWidget(self.label_photo, curr_gridid, 0, 2, 8)
+        layout_grid.addWidget(self.button_select_photo, curr_gridid, 8, 1, 2)
+        layout_grid.addWidget(self.button_remove_photo, curr_gridid + 1, 8, 1, 2)
+
+        curr_gridid += 1
+
+        curr_gridid += 1
+        layout_grid.setRowStretch(curr_gridid, 0)
+        layout_grid.addWidget(self.label_servings, curr_gridid, 0, 1, 1)
+        layout_grid.addWidget(self.spin_servings, curr_gridid, 1, 1, 1)
+        layout_grid.addWidget(self.label_scale, curr_gridid, 2, 1, 1)
+        layout_grid.addWidget(self.slider_scale, curr_gridid, 3, 1, 6)
+        layout_grid.addWidget(self.label_scale_value, curr_gridid, 9, 1, 1)
+
+        curr_gridid += 1
+        layout_grid.setRowStretch(curr_gridid, 0)
+        layout_grid.addWidget(self.label_nutrition, curr_gridid, 0, 1, 10)
+
+        curr_gridid += 1
+        layout_grid.setRowStretch(curr_gridid, 0)
+        layout_grid.addWidget(self.label_ingredients, curr_gridid, 0, 1, 1)
         layout_grid.addWidget(label_ingredients_line, curr_gridid, 1, 1, 7)
-        layout_grid.addWidget(button_remove_ingredient, curr_gridid, 8, 1, 1)
-        layout_grid.addWidget(button_add_ingredient, curr_gridid, 9, 1, 1)
+        layout_grid.addWidget(self.button_remove_ingredient, curr_gridid, 8, 1, 1)
+        layout_grid.addWidget(self.button_add_ingredient, curr_gridid, 9, 1, 1)
 
         curr_gridid += 1
         layout_grid.setRowStretch(curr_gridid, 10)
@@ -224,10 +440,10 @@ class RecipeWindow(QMainWindow):
 
         curr_gridid += 10
         layout_grid.setRowStretch(curr_gridid, 0)
-        layout_grid.addWidget(label_steps, curr_gridid, 0, 1, 1)
+        layout_grid.addWidget(self.label_steps, curr_gridid, 0, 1, 1)
         layout_grid.addWidget(label_steps_line, curr_gridid, 1, 1, 7)
-        layout_grid.addWidget(button_remove_step, curr_gridid, 8, 1, 1)
-        layout_grid.addWidget(button_add_step, curr_gridid, 9, 1, 1)
+        layout_grid.addWidget(self.button_remove_step, curr_gridid, 8, 1, 1)
+        layout_grid.addWidget(self.button_add_step, curr_gridid, 9, 1, 1)
 
         curr_gridid += 1
         layout_grid.setRowStretch(curr_gridid, 10)
@@ -235,7 +451,7 @@ class RecipeWindow(QMainWindow):
 
         curr_gridid += 10
         layout_grid.setRowStretch(curr_gridid, 0)
-        layout_grid.addWidget(label_info, curr_gridid, 0, 1, 1)
+        layout_grid.addWidget(self.label_info, curr_gridid, 0, 1, 1)
         layout_grid.addWidget(label_info_line, curr_gridid, 1, 1, 8)
         layout_grid.addWidget(button_edit_info, curr_gridid, 9, 1, 1)
 
@@ -248,13 +464,231 @@ class RecipeWindow(QMainWindow):
 
         curr_gridid += 1
         layout_grid.setRowStretch(curr_gridid, 0)
-        layout_grid.addWidget(button_cancel, curr_gridid, 0, 1, 2)
-        layout_grid.addWidget(button_export, curr_gridid, 2, 1, 2)
-        layout_grid.addWidget(button_save, curr_gridid, 4, 1, 3)
-        layout_grid.addWidget(button_save_close, curr_gridid, 7, 1, 3)
+        layout_grid.addWidget(self.button_cancel, curr_gridid, 0, 1, 2)
+        layout_grid.addWidget(self.button_export, curr_gridid, 2, 1, 2)
+        layout_grid.addWidget(self.button_save, curr_gridid, 4, 1, 3)
+        layout_grid.addWidget(self.button_save_close, curr_gridid, 7, 1, 3)
 
         widget.setLayout(layout_grid)
 
+        if self.similar_recipes:
+            splitter = QSplitter(Qt.Horizontal)
+            splitter.addWidget(widget)
+            splitter.addWidget(self._init_similar_panel(font_label_info))
+            splitter.setStretchFactor(0, 3)
+            splitter.setStretchFactor(1, 1)
+            self.setCentralWidget(splitter)
+        else:
+            self.setCentralWidget(widget)
+
+        self._update_photo()
+        self._schedule_nutrition_update()
+        if self.similar_recipes:
+            self._schedule_similar_update()
+
+    def _init_models(self, model_ingredients=None, model_steps=None):
+        """Shows the table models of the recipe
+
+        :param model_ingredients: The IngredientsTableModel, None to create it
+        :param model_steps: The StepsTableModel, None to create it
+        """
+        with trace_span('ingredients table', rows=len(self.recipe.ingredients)):
+            if model_ingredients is None:
+                model_ingredients = IngredientsTableModel(self.i18n, self.recipe.ingredients, cb_change=self._on_ingredients_changed)
+            self.model_ingredients = model_ingredients
+            self.table_ingredients.setModel(self.model_ingredients)
+            self._update_headers(self.table_ingredients, self.model_ingredients)
+
+        self._update_scale_range()
+
+        with trace_span('steps table', rows=len(self.recipe.steps)):
+            if model_steps is None:
+                model_steps = StepsTableModel(self.i18n, self.recipe.steps, cb_change=self._on_steps_changed)
+            self.model_steps = model_steps
+            self.table_steps.setModel(self.model_steps)
+            self._update_headers(self.table_steps, self.model_steps)
+
+    def _init_similar_panel(self, font_label_info):
+        """Initializes the side panel listing similar recipes
+
+        :param font_label_info: The font of the panel header
+        :return: The panel
+        """
+        self.label_similar = QLabel(self.i18n.translate('GUI.RECIPE.VIEW.HEADERS.SIMILAR', 'Similar recipes'))
+        self.label_similar.setFont(font_label_info)
+        self.label_similar.setAlignment(Qt.AlignLeft)
+
+        self.list_similar = QListWidget()
+        self.list_similar.itemDoubleClicked.connect(self._on_similar_double_clicked)
+
+        # Queried after changes, coalescing the changes of a short period
+        self._similar_timer = QTimer(self)
+        self._similar_timer.setSingleShot(True)
+        self._similar_timer.setInterval(app_conf_get('similar.delay', 300))
+        self._similar_timer.timeout.connect(self._update_similar)
+        self.similar_recipes.ready.connect(self._schedule_similar_update)
+
+        panel = QWidget()
+        layout = QVBoxLayout()
+        layout.addWidget(self.label_similar)
+        layout.addWidget(self.list_similar)
+        panel.setLayout(layout)
+        return panel
+
+    def _update_photo(self):
+        """Shows the recipe photo, loading it in the background if not cached"""
+        self.button_remove_photo.setEnabled(bool(self.recipe.image))
+        if not self.recipe.image:
+            self.label_photo.clear()
+            return
+        image_path = get_recipe_image_path(self.recipe.image, self.path_info)
+        pixmap = self.image_cache.get_thumbnail_loader().request(self.path_info, app_conf_get('thumbnails.recipe.size', 240), image_path=image_path)
+        if pixmap:
+            self.label_photo.setPixmap(pixmap)
+
+    def _on_thumbnail_loaded(self, recipe_path, size):
+        """On thumbnail loaded
+
+        :param recipe_path: The recipe path
+        :param size: The thumbnail size
+        """
+        if recipe_path != self.path_info or size != app_conf_get('thumbnails.recipe.size', 240):
+            return
+        pixmap = self.image_cache.get_thumbnail_loader().get(recipe_path, size)
+        if pixmap and self.recipe.image:
+            self.label_photo.setPixmap(pixmap)
+        else:
+            self.label_photo.clear()
+
+    def _select_photo(self):
+        """Selects the recipe photo"""
+        logging.debug('Select photo')
+        filename, _filter = QFileDialog.getOpenFileName(self, self.i18n.translate('GUI.SELECT_PHOTO.DIALOG.SELECT', 'Select photo'), os.path.dirname(self.path_info), self.i18n.translate('GUI.SELECT_PHOTO.DIALOG.FILTER', 'Images') + ' (*.png *.jpg *.jpeg *.bmp *.gif *.webp)')
+        if filename:
+            logging.info('Selected photo "%s"', filename)
+            self._set_photo(get_recipe_image_obj(filename, self.path_info))
+        else:
+            logging.debug('Cancelled selecting photo')
+
+    def _remove_photo(self):
+        """Removes the recipe photo"""
+        logging.debug('Remove photo')
+        self._set_photo('')
+
+    def _set_photo(self, image):
+        """Sets the recipe photo
+
+        :param image: The photo path as stored in the recipe
+        """
+        if image == self.recipe.image:
+            return
+        self.recipe.image = image
+        self._changed = True
+        self._image_changed = True
+        self.image_cache.get_thumbnail_loader().invalidate(self.path_info)
+        self._update_photo()
+
+    def _update_scale_range(self):
+        """Resets the scale slider to the servings of the recipe, scaling is only possible if they are set"""
+        servings = self.recipe.servings
+        self.slider_scale.blockSignals(True)
+        self.slider_scale.setRange(1, max(servings * app_conf_get('servings.scale.max_factor', 4), 12))
+        self.slider_scale.setValue(max(servings, 1))
+        self.slider_scale.blockSignals(False)
+        self.slider_scale.setEnabled(servings > 0)
+        self._scale_changed(self.slider_scale.value())
+
+    def _servings_changed(self, servings):
+        """On servings changed
+
+        :param servings: The number of servings
+        """
+        logging.debug('Servings changed to %d', servings)
+        self.recipe.servings = servings
+        self._changed = True
+        self._update_scale_range()
+        self._schedule_nutrition_update()
+
+    def _scale_changed(self, servings):
+        """Shows the ingredients scaled to the given number of servings
+
+        :param servings: The number of servings
+        """
+        self.label_scale_value.setText(str(servings) if self.recipe.servings else '')
+        self.model_ingredients.set_scale(self.recipe.get_scale_factor(servings), self.i18n.translate('GUI.NUMBER.DECIMAL_SEPARATOR', '.'))
+
+    def _schedule_nutrition_update(self):
+        """Updates the nutrition values with the next event loop iteration"""
+        self._nutrition_timer.start()
+
+    @traced('RecipeWindow._update_nutrition')
+    def _update_nutrition(self):
+        """Computes the nutrition values of the current ingredients in the background"""
+        self._nutrition_id += 1
+        ingredients = [(ingredient.get_parsed_quantity(), ingredient.name, normalize_name(ingredient.name)) for ingredient in self.recipe.ingredients]
+        self._nutrition_pool.start(_NutritionTask(self._nutrition_signals, self._nutrition_id, ingredients, self.image_cache.basedir))
+
+    def _show_nutrition(self, task_id, nutrition):
+        """Shows the nutrition values per serving or, without servings, of the whole recipe
+
+        :param task_id: The number of the task
+        :param nutrition: The Nutrition of the whole recipe, None on failure
+        """
+        if task_id != self._nutrition_id or nutrition is None:
+            return
+        per_serving = nutrition.per_serving(self.recipe.servings)
+        if per_serving:
+            nutrition = per_serving
+            text = self.i18n.translate('GUI.RECIPE.VIEW.NUTRITION.SERVING', 'Per serving: {} kcal, {} g protein, {} g fat, {} g carbohydrates')
+        else:
+            text = self.i18n.translate('GUI.RECIPE.VIEW.NUTRITION.TOTAL', 'Whole recipe: {} kcal, {} g protein, {} g fat, {} g carbohydrates')
+        decimal_separator = self.i18n.translate('GUI.NUMBER.DECIMAL_SEPARATOR', '.')
+        text = text.format(round(nutrition.kcal), format_value(round(nutrition.protein, 1), decimal_separator),
+                           format_value(round(nutrition.fat, 1), decimal_separator), format_value(round(nutrition.carbs, 1), decimal_separator))
+        if nutrition.nr_missing:
+            text += ' (' + self.i18n.translate('GUI.RECIPE.VIEW.NUTRITION.MISSING', '{} of {} ingredients not included').format(nutrition.nr_missing, nutrition.nr_ingredients) + ')'
+        self.label_nutrition.setText(text)
+
+    def _schedule_similar_update(self):
+        """Updates the similar recipes after a short delay"""
+        if self._similar_timer is not None:
+            self._similar_timer.start()
+
+    @traced('RecipeWindow._update_similar')
+    def _update_similar(self):
+        """Lists the recipes most similar to the recipe, including unsaved changes"""
+        results = self.similar_recipes.find(self.path_info, self.recipe)
+        self.list_similar.clear()
+        if results is None:
+            texts = [self.i18n.translate('GUI.RECIPE.VIEW.SIMILAR.LOADING', 'Comparing recipes...')]
+        elif not results:
+            texts = [self.i18n.translate('GUI.RECIPE.VIEW.SIMILAR.NONE', 'No similar recipes')]
+        else:
+            texts = []
+        for text in texts:
+            item = QListWidgetItem(text)
+            item.setFlags(Qt.NoItemFlags)
+            self.list_similar.addItem(item)
+        for path, name, similarity in results or []:
+            item = QListWidgetItem(self.i18n.translate('GUI.RECIPE.VIEW.SIMILAR.ITEM', '{} ({} %)')
+                                   .format(name or os.path.basename(path), round(similarity * 100)))
+            item.setData(Qt.UserRole, path)
+            item.setToolTip(path)
+            self.list_similar.addItem(item)
+
+    def _on_similar_double_clicked(self, item):
+        """Opens the double-clicked similar recipe
+
+        :param item: The item
+        """
+        path = item.data(Qt.UserRole)
+        if path and self.open_cb:
+            self.open_cb(path)
+
+    def _get_export_servings(self):
+        """Returns the servings the recipe is scaled to, None if not scaled"""
+        return self.slider_scale.value() if self.recipe.servings else None
+
     def _ingredients_dropped(self, from_index, to_index):
         """On ingredients dropped
         :param from_index: From index
@@ -300,6 +734,8 @@ class RecipeWindow(QMainWindow):
 
         header_h = table.horizontalHeader()
         if header_h:
+            # Size the columns by the visible rows only, sizing by all rows dominates every change of large recipes
+            header_h.setResizeContentsPrecision(app_conf_get('table.resize.precision', 0))
             for i in range(0, max(0, len(model.headers_h))):
                 header_h.setSectionResizeMode(i, QHeaderView.ResizeToContents)
             header_h.setSectionResizeMode(max(0, len(model.headers_h) - 1), QHeaderView.Stretch)
@@ -318,26 +754,27 @@ class RecipeWindow(QMainWindow):
 
         return message_box.standardButton(message_box.clickedButton()) == QMessageBox.Yes
 
-    def _cancel(self, event=None):
-        """Cancels the change"""
+    def _cancel(self, event):
+        """Cancels the change, asks whether to close if something changed
+
+        :param event: The close event
+        """
         logging.debug('Cancel')
         if not self._changed:
             logging.info('Nothing changed, closing')
-            if event:
-                event.accept()
-            self._close()
+            event.accept()
+            self._closed()
         else:
             logging.info('Something changed, asking whether to close')
             if self._close_yesno():
                 logging.info('Closing without saving')
-                if event:
-                    event.accept()
-                self._close()
+                event.accept()
+                self._closed()
             else:
                 logging.info('Not closing without saving')
-                if event:
-                    event.ignore()
+                event.ignore()
 
+    @traced('RecipeWindow._save')
     def _save(self, close=False):
         """Saves the change"""
         logging.debug('Save')
@@ -350,6 +787,13 @@ class RecipeWindow(QMainWindow):
         logging.info('Saving recipe to "%s"', self.path_info)
         if save_recipe(self.recipe, self.path_info):
             self._changed = False
+            if self._image_changed:
+                self._image_changed = False
+                loader = self.image_cache.get_thumbnail_loader()
+                loader.invalidate(self.path_info)
+                loader.request(self.path_info, app_conf_get('thumbnails.tree.size', 24))
+            if self.similar_recipes:
+                self.similar_recipes.recipe_saved(self.path_info, self.recipe)
             self.show_message(self.i18n.translate('GUI.RECIPE.LOG.RECIPE.SAVED').format(self.recipe.name))
             if close:
                 self._close()
@@ -416,6 +860,8 @@ class RecipeWindow(QMainWindow):
         logging.debug('Ingredients changed')
         self._changed = True
         self.recipe.ingredients = lst
+        self._schedule_nutrition_update()
+        self._schedule_similar_update()
 
     def _on_steps_changed(self, lst):
         """On steps changed
@@ -424,6 +870,7 @@ class RecipeWindow(QMainWindow):
         logging.debug('Steps changed')
         self._changed = True
         self.recipe.steps = lst
+        self._schedule_similar_update()
 
     def _on_information_changed(self, info):
         """On information changed
@@ -449,144 +896,44 @@ class RecipeWindow(QMainWindow):
         return info
 
     def _close(self):
-        """Close window"""
+        """Close window, the close event asks first if something changed"""
         logging.debug('Closing window')
-        if self.close_cb:
-            self.close_cb(self.path_info)
         self.close()
 
+    def _closed(self):
+        """Releases the window once its close has been accepted, it is deleted unless kept hidden for reuse"""
+        self.i18n.remove_language_changed_listener(self.retranslate_ui)
+        if self._similar_timer is not None:
+            self._similar_timer.stop()
+            try:
+                self.similar_recipes.ready.disconnect(self._schedule_similar_update)
+            except TypeError:
+                # Already disconnected
+                pass
+        keep = self.close_cb(self.path_info) if self.close_cb else False
+        if not keep and self._nutrition_pool is not None:
+            # The result is posted through a child of the window
+            self._nutrition_pool.clear()
+            self._nutrition_pool.waitForDone()
+        # Checked by Qt after the close event
+        self.setAttribute(Qt.WA_DeleteOnClose, not keep)
+
+    @traced('RecipeWindow._export')
     def _export(self):
         """Export recipe"""
         logging.debug('Exporting')
         selected, dirname = self._select_export_dir()
         if selected:
             try:
-                pdf = RecipePDF(orientation='P', unit='mm', format='A4')
-                pdf.set_recipe(self.recipe)
-                line_height_base = pdf.font_size * 2.5
-                pdf.add_page()
-                self._add_ingredients(pdf)
-                pdf.add_page()
-                self._restore(pdf)
-                pdf.ln(line_height_base)
-                self._add_steps(pdf)
-                self._restore(pdf)
-                pdf.ln(line_height_base)
-                self._add_information(pdf)
-                self._restore(pdf)
-                pdf.ln(line_height_base)
-                outputname = '{}/{}.pdf'.format(dirname, self._clean_recipe_name(self.recipe.name))
-                logging.info('Saving pdf to "%s"', outputname)
-                pdf.output(outputname)
+                # Imported on first use, fpdf is slow to import and rarely needed
+                from lib.RecipePDF import export_recipe_pdf
+                export_recipe_pdf(self.recipe, self.i18n, dirname, servings=self._get_export_servings())
                 self.show_message(self.i18n.translate('GUI.RECIPE.LOG.RECIPE.EXPORTED').format(self.recipe.name))
                 self._open_export_folder(dirname)
             except Exception as ex:
                 logging.error('Failed to export recipe "%s" to "%s": %s', self.recipe.name, dirname, ex)
                 self.show_message(self.i18n.translate('GUI.RECIPE.LOG.RECIPE.EXPORTED.FAIL').format(self.recipe.name))
 
-    def _clean_recipe_name(self, rname):
-        return re.sub(r'\W+', '-', rname)
-
-    def _restore(self, pdf):
-        """Restores color and font
-
-        :param pdf: The PDF
-        """
-        pdf.set_fill_color(224, 235, 255)
-        pdf.set_text_color(0)
-        pdf.set_font()
-
-    def _add_ingredients(self, pdf, col_widths=(30, 100, 60)):
-        """Adds the ingredients
-
-        :param pdf: The PDF
-        :param col_widths: The column widths
-        """
-        logging.info('Adding ingredients')
-        pdf.set_font('helvetica', size=14)
-        pdf.cell(txt=self.i18n.translate('GUI.RECIPE.VIEW.HEADERS.INGREDIENTS', 'Zutaten'))
-        self._restore(pdf)
-        line_height_base = pdf.font_size * 2.5
-        pdf.ln(line_height_base)
-        pdf.set_font('helvetica', size=12)
-        pdf.set_fill_color(211,211,211)
-        pdf.set_line_width(0.3)
-        headings = [self.i18n.translate('GUI.RECIPE.HEADERS.INGREDIENTS.QUANTITY', 'Quantity'), self.i18n.translate('GUI.RECIPE.HEADERS.INGREDIENTS.NAME', 'Name'), self.i18n.translate('GUI.RECIPE.HEADERS.INGREDIENTS.ADDITION', 'Addition')]
-        for col_width, heading in zip(col_widths, headings):
-            pdf.cell(col_width, 7, heading, border=1, align="C")
-        pdf.ln()
-        fill = False
-        for _i, ingredient in enumerate(self.recipe.ingredients):
-            ingredient_quantity = self._get_none_safe(ingredient.quantity)
-            ingredient_name = self._get_none_safe(ingredient.name)
-            ingredient_addition = self._get_none_safe(ingredient.addition)
-            test_split_1 = pdf.multi_cell(col_widths[0], line_height_base, ingredient_quantity, border='LR', new_x='RIGHT', new_y='TOP', max_line_height=pdf.font_size, split_only=True)
-            test_split_2 = pdf.multi_cell(col_widths[1], line_height_base, ingredient_name, border='LR', new_x='RIGHT', new_y='TOP', max_line_height=pdf.font_size, split_only=True)
-            test_split_3 = pdf.multi_cell(col_widths[2], line_height_base, ingredient_addition, border='LR', new_x='RIGHT', new_y='TOP', max_line_height=pdf.font_size, split_only=True)
-            test_split_max = max(len(test_split_1), len(test_split_2), len(test_split_3))
-            line_height = pdf.font_size + pdf.font_size * test_split_max
-            pdf.multi_cell(col_widths[0], line_height, ingredient_quantity, border='LR', new_x='RIGHT', new_y='TOP', max_line_height=pdf.font_size, fill=fill)
-            pdf.multi_cell(col_widths[1], line_height, ingredient_name, border='LR', new_x='RIGHT', new_y='TOP', max_line_height=pdf.font_size, fill=fill)
-            pdf.multi_cell(col_widths[2], line_height, ingredient_addition, border='LR', new_x='RIGHT', new_y='TOP', max_line_height=pdf.font_size, fill=fill)
-            pdf.ln(line_height)
-            fill = not fill
-        pdf.cell(sum(col_widths), 0, '', border='T')
-
-    def _add_steps(self, pdf, col_widths=(10, 180)):
-        """Adds the steps
-
-        :param pdf: The PDF
-        :param col_widths: The column widths
-        """
-        logging.info('Adding steps')
-        pdf.set_font('helvetica', size=14)
-        pdf.cell(txt=self.i18n.translate('GUI.RECIPE.VIEW.HEADERS.STEPS', 'Schritte'))
-        line_height_base = pdf.font_size * 2
-        self._restore(pdf)
-        pdf.ln(line_height_base)
-        pdf.set_font('helvetica', size=12)
-        pdf.set_fill_color(211,211,211)
-        pdf.set_line_width(0.3)
-        headings = ['#', '']
-        for col_width, heading in zip(col_widths, headings):
-            pdf.cell(col_width, 7, heading, border=1, align="C")
-        pdf.ln()
-        fill = False
-        for i, step in enumerate(self.recipe.steps):
-            step_text = self._get_none_safe(step)
-            test_split = pdf.multi_cell(col_widths[1], line_height_base, step_text, border='LR', new_x='RIGHT', new_y='TOP', max_line_height=pdf.font_size, split_only=True)
-            line_height = pdf.font_size + pdf.font_size * len(test_split)
-            pdf.multi_cell(col_widths[0], line_height, f'{i + 1}', border='LR', new_x='RIGHT', new_y='TOP', max_line_height=pdf.font_size, fill=fill)
-            pdf.multi_cell(col_widths[1], line_height, step_text, border='LR', new_x='RIGHT', new_y='TOP', max_line_height=pdf.font_size, fill=fill)
-            pdf.ln(line_height)
-            fill = not fill
-        pdf.cell(sum(col_widths), 0, '', border='T')
-
-    def _add_information(self, pdf):
-        """Adds the steps
-
-        :param pdf: The PDF
-        """
-        logging.info('Adding information')
-        pdf.set_font('helvetica', size=14)
-        pdf.cell(txt=self.i18n.translate('GUI.RECIPE.VIEW.HEADERS.INFO', 'Information'))
-        line_height_base = pdf.font_size * 2
-        self._restore(pdf)
-        pdf.ln(line_height_base)
-        pdf.set_font('helvetica', size=12)
-        text = self._get_none_safe(self.recipe.information)
-        test_split = pdf.multi_cell(190, line_height_base, text, border='LR', new_x='RIGHT', new_y='TOP', max_line_height=pdf.font_size, split_only=True)
-        line_height = pdf.font_size + pdf.font_size * len(test_split)
-        pdf.multi_cell(190, line_height, text, border=0, new_x='RIGHT', new_y='TOP', max_line_height=pdf.font_size)
-        pdf.ln(line_height)
-
-    def _get_none_safe(self, obj):
-        """Returns an empty string if none
-
-        :param obj: The object
-        """
-        return obj if obj else ''
-
     def _select_export_dir(self):
         """Selects the export directory"""
         logging.info('Select export dir')
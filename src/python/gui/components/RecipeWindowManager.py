@@ -0,0 +1,139 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+#
+# Copyright 2022 Denis Meyer
+#
+# This file is part of Rezepte.
+#
+
+"""Recipe window manager"""
+
+import logging
+
+from PyQt5.QtCore import QObject
+
+from lib.AppConfig import app_conf_get
+from lib.Tracing import trace_span, traced
+from lib.Utils import get_memory_usage
+
+class RecipeWindowManager():
+    """Opens recipes in recipe windows
+
+    The window of an opened recipe is focused instead of opening a second one. Closed windows are kept
+    hidden (up to window.recipe.recycle) and show the next opened recipe, all other closed windows are deleted.
+    With window.recipe.tabs, recipes are opened in tabs of one window.
+    """
+
+    def __init__(self, i18n, image_cache, similar_recipes=None, max_hidden=None, tabs=None):
+        """Initializes the manager
+
+        :param i18n: The I18n
+        :param image_cache: The image cache
+        :param similar_recipes: The SimilarRecipes, None to not show similar recipes
+        :param max_hidden: The maximum number of hidden windows kept for reuse, defaults to window.recipe.recycle
+        :param tabs: Whether to open recipes in tabs of one window, defaults to window.recipe.tabs
+        """
+        logging.debug('Initializing RecipeWindowManager')
+
+        self.i18n = i18n
+        self.image_cache = image_cache
+        self.similar_recipes = similar_recipes
+        self.max_hidden = max_hidden if max_hidden is not None else app_conf_get('window.recipe.recycle', 2)
+        self.tabs = tabs if tabs is not None else app_conf_get('window.recipe.tabs', True)
+
+        # Recipe path -> RecipeWindow, the same RecipeTabWindow for all recipes in its tabs
+        self.windows = {}
+        self._hidden = []
+        self._created = 0
+        self._recycled = 0
+        self._deleted = 0
+
+    @traced('RecipeWindowManager.open')
+    def open(self, path_info, recipe, open_cb=None):
+        """Shows a recipe in a recipe window, focuses the window if the recipe is already opened
+
+        :param path_info: The recipe path
+        :param recipe: The Recipe
+        :param open_cb: Callback with a recipe path to open another recipe
+        :return: The RecipeWindow
+        """
+        if self.focus(path_info):
+            return self.windows[path_info]
+        window = next(iter(self.windows.values()), None) if self.tabs else None
+        if window is not None:
+            window.add_recipe(path_info, recipe, open_cb=open_cb)
+        elif self._hidden:
+            logging.debug('Reusing a hidden recipe window')
+            window = self._hidden.pop()
+            window.load_recipe(path_info, recipe, open_cb=open_cb)
+            self._recycled += 1
+        else:
+            logging.debug('Creating a recipe window')
+            # Imported on first use to keep the recipe editor (and fpdf) out of the startup path
+            with trace_span('import RecipeWindow'):
+                if self.tabs:
+                    from gui.components.RecipeTabWindow import RecipeTabWindow as RecipeWindow
+                else:
+                    from gui.components.RecipeWindow import RecipeWindow
+            window = RecipeWindow(self.i18n, self.image_cache, path_info, recipe, self._window_closed,
+                                  similar_recipes=self.similar_recipes, open_cb=open_cb)
+            window.init_ui()
+            self._created += 1
+        self.windows[path_info] = window
+        window.show()
+        return window
+
+    def focus(self, path_info):
+        """Raises and activates the window of a recipe
+
+        :param path_info: The recipe path
+        :return: True if the recipe is opened, False else
+        """
+        window = self.windows.get(path_info)
+        if window is None:
+            return False
+        logging.debug('Recipe window already exists, activating')
+        if self.tabs:
+            window.select_recipe(path_info)
+        if window.isMinimized():
+            window.showNormal()
+        window.raise_()
+        window.activateWindow()
+        return True
+
+    def get_metrics(self):
+        """Returns the window statistics as flat dict"""
+        windows = list({id(window): window for window in self.windows.values()}.values())
+        metrics = {
+            'open': len(windows),
+            'recipes': len(self.windows),
+            'hidden': len(self._hidden),
+            'created': self._created,
+            'recycled': self._recycled,
+            'deleted': self._deleted,
+            # Qt objects of the live windows, widgets, layouts, models and actions
+            'qobjects': sum(len(window.findChildren(QObject)) for window in windows + self._hidden)
+        }
+        memory = get_memory_usage()
+        if memory is not None:
+            metrics['process_memory_mb'] = memory / (1024.0 * 1024.0)
+        return metrics
+
+    def _window_closed(self, path_info):
+        """On recipe window close, keeps the window hidden for reuse or lets it be deleted
+
+        :param path_info: The recipe path
+        :return: True to keep the window, False to delete it
+        """
+        logging.debug('Recipe window "%s" closed', path_info)
+        window = self.windows.pop(path_info, None)
+        if window is None:
+            return False
+        if any(other is window for other in self.windows.values()):
+            # Only a tab closed
+            return True
+        if len(self._hidden) < self.max_hidden:
+            self._hidden.append(window)
+            return True
+        self._deleted += 1
+        return False
@@ -0,0 +1,140 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+#
+# Copyright 2022 Denis Meyer
+#
+# This file is part of Rezepte.
+#
+
+"""Shopping list dialog"""
+
+import logging
+import os
+
+from PyQt5.QtGui import QIcon
+from PyQt5.QtWidgets import QDialog, QDesktopWidget, QGridLayout, QLabel, QPushButton, QTableWidget, QTableWidgetItem, QHeaderView, QAbstractItemView, QFileDialog
+
+from lib.AppConfig import app_conf_get
+from lib.ShoppingList import format_item_quantity, write_shopping_list_text
+
+class ShoppingListDialog(QDialog):
+    """Shows the summed up ingredients of several recipes"""
+
+    def __init__(self, i18n, image_cache, items, nr_recipes):
+        """Initializes the dialog
+
+        :param i18n: The I18n
+        :param image_cache: The image cache
+        :param items: The ShoppingListItem objects
+        :param nr_recipes: The number of recipes
+        """
+        super(ShoppingListDialog, self).__init__()
+
+        logging.debug('Initializing ShoppingListDialog')
+
+        self.i18n = i18n
+        self.image_cache = image_cache
+        self.items = items
+        self.nr_recipes = nr_recipes
+
+        self.table = None
+        self.label_status = None
+
+    def init_ui(self):
+        """Initiates the UI"""
+        logging.debug('Initializing ShoppingListDialog GUI')
+
+        self.setWindowTitle(self.i18n.translate('GUI.SHOPPING_LIST.TITLE', 'Shopping list'))
+
+        logo = self.image_cache.get_or_load_pixmap('img.logo_app', 'logo-app.png')
+        if logo is not None:
+            self.setWindowIcon(QIcon(logo))
+
+        label_info = QLabel(self.i18n.translate('GUI.SHOPPING_LIST.INFO', '{} ingredients from {} recipes').format(len(self.items), self.nr_recipes))
+
+        decimal_separator = self.i18n.translate('GUI.NUMBER.DECIMAL_SEPARATOR', '.')
+        self.table = QTableWidget(len(self.items), 3)
+        self.table.setHorizontalHeaderLabels([self.i18n.translate('GUI.RECIPE.HEADERS.INGREDIENTS.QUANTITY', 'Quantity'),
+                                              self.i18n.translate('GUI.RECIPE.HEADERS.INGREDIENTS.NAME', 'Name'),
+                                              self.i18n.translate('GUI.SHOPPING_LIST.HEADERS.RECIPES', 'Recipes')])
+        self.table.verticalHeader().setVisible(False)
+        self.table.setEditTriggers(QAbstractItemView.NoEditTriggers)
+        self.table.setSelectionBehavior(QAbstractItemView.SelectRows)
+        for row, item in enumerate(self.items):
+            self.table.setItem(row, 0, QTableWidgetItem(format_item_quantity(item, decimal_separator)))
+            self.table.setItem(row, 1, QTableWidgetItem(item.name))
+            recipes = QTableWidgetItem(str(len(item.recipes)))
+            recipes.setToolTip('\n'.join(sorted(item.recipes)))
+            self.table.setItem(row, 2, recipes)
+        header_h = self.table.horizontalHeader()
+        header_h.setSectionResizeMode(0, QHeaderView.ResizeToContents)
+        header_h.setSectionResizeMode(1, QHeaderView.Stretch)
+        header_h.setSectionResizeMode(2, QHeaderView.ResizeToContents)
+
+        self.label_status = QLabel('')
+
+        button_export_pdf = QPushButton(self.i18n.translate('GUI.SHOPPING_LIST.EXPORT.PDF', 'Export PDF'))
+        button_export_pdf.clicked[bool].connect(self._export_pdf)
+        button_export_text = QPushButton(self.i18n.translate('GUI.SHOPPING_LIST.EXPORT.TEXT', 'Export text'))
+        button_export_text.clicked[bool].connect(self._export_text)
+        button_close = QPushButton(self.i18n.translate('GUI.SHOPPING_LIST.CLOSE', 'Close'))
+        button_close.clicked[bool].connect(self.close)
+
+        grid = QGridLayout()
+        grid.setSpacing(10)
+        grid.addWidget(label_info, 0, 0, 1, 3)
+        grid.addWidget(self.table, 1, 0, 1, 3)
+        grid.addWidget(self.label_status, 2, 0, 1, 3)
+        grid.addWidget(button_export_pdf, 3, 0, 1, 1)
+        grid.addWidget(button_export_text, 3, 1, 1, 1)
+        grid.addWidget(button_close, 3, 2, 1, 1)
+        self.setLayout(grid)
+
+        self.resize(560, 640)
+        self._center()
+
+    def _get_export_path(self, suffix, file_filter):
+        """Asks for the export file
+
+        :param suffix: The file suffix
+        :param file_filter: The file dialog filter
+        """
+        default_path = os.path.join(os.path.dirname(app_conf_get('recipes.folder')),
+                                    self.i18n.translate('GUI.SHOPPING_LIST.FILENAME', 'shopping-list') + suffix)
+        path, _filter = QFileDialog.getSaveFileName(self, self.i18n.translate('GUI.SHOPPING_LIST.EXPORT.DIALOG.SELECT', 'Export shopping list'), default_path, file_filter)
+        return path
+
+    def _export_pdf(self):
+        """Exports the shopping list as PDF"""
+        path = self._get_export_path('.pdf', 'PDF (*.pdf)')
+        if not path:
+            logging.debug('Cancelled exporting shopping list')
+            return
+        try:
+            # Imported on first use, fpdf is slow to import and rarely needed
+            from lib.RecipePDF import export_shopping_list_pdf
+            export_shopping_list_pdf(self.items, self.i18n, path)
+            self.label_status.setText(self.i18n.translate('GUI.SHOPPING_LIST.LOG.EXPORTED', 'Exported to "{}"').format(path))
+        except Exception as ex:
+            logging.error('Failed to export shopping list to "%s": %s', path, ex)
+            self.label_status.setText(self.i18n.translate('GUI.SHOPPING_LIST.LOG.EXPORTED.FAIL', 'Failed to export to "{}"').format(path))
+
+    def _export_text(self):
+        """Exports the shopping list as text file"""
+        path = self._get_export_path('.txt', self.i18n.translate('GUI.SHOPPING_LIST.FILTER.TEXT', 'Text') + ' (*.txt)')
+        if not path:
+            logging.debug('Cancelled exporting shopping list')
+            return
+        try:
+            write_shopping_list_text(self.items, path, self.i18n.translate('GUI.SHOPPING_LIST.TITLE', 'Shopping list'),
+                                     self.i18n.translate('GUI.NUMBER.DECIMAL_SEPARATOR', '.'))
+            self.label_status.setText(self.i18n.translate('GUI.SHOPPING_LIST.LOG.EXPORTED', 'Exported to "{}"').format(path))
+        except OSError as ex:
+            logging.error('Failed to export shopping list to "%s": %s', path, ex)
+            self.label_status.setText(self.i18n.translate('GUI.SHOPPING_LIST.LOG.EXPORTED.FAIL', 'Failed to export to "{}"').format(path))
+
+    def _center(self):
+        """Centers the window on the screen"""
+        screen = QDesktopWidget().screenGeometry()
+        self.move(int((screen.width() - self.geometry().width()) / 2),
+                  int((screen.height() - self.geometry().height()) / 2))
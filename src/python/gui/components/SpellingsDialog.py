@@ -0,0 +1,152 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+#
+# Copyright 2022 Denis Meyer
+#
+# This file is part of Rezepte.
+#
+
+"""Spellings dialog"""
+
+import logging
+
+from PyQt5.QtCore import Qt
+from PyQt5.QtGui import QIcon
+from PyQt5.QtWidgets import QDialog, QDesktopWidget, QGridLayout, QLabel, QPushButton, QTreeWidget, QTreeWidgetItem, QHeaderView, QComboBox, QMessageBox
+
+class SpellingsDialog(QDialog):
+    """Shows ingredients written in several ways and merges selected spellings"""
+
+    def __init__(self, i18n, image_cache, groups, nr_recipes, merge_cb):
+        """Initializes the dialog
+
+        :param i18n: The I18n
+        :param image_cache: The image cache
+        :param groups: The SpellingGroup objects
+        :param nr_recipes: The number of searched recipes
+        :param merge_cb: Callback with (spellings, new name, recipe paths) to rename the ingredients,
+                         returns the updated SpellingGroup objects
+        """
+        super(SpellingsDialog, self).__init__()
+
+        logging.debug('Initializing SpellingsDialog')
+
+        self.i18n = i18n
+        self.image_cache = image_cache
+        self.groups = groups
+        self.nr_recipes = nr_recipes
+        self.merge_cb = merge_cb
+
+        self.label_info = None
+        self.tree = None
+        self.combo_target = None
+        self.button_merge = None
+
+    def init_ui(self):
+        """Initiates the UI"""
+        logging.debug('Initializing SpellingsDialog GUI')
+
+        self.setWindowTitle(self.i18n.translate('GUI.SPELLINGS.TITLE', 'Ingredient spellings'))
+
+        logo = self.image_cache.get_or_load_pixmap('img.logo_app', 'logo-app.png')
+        if logo is not None:
+            self.setWindowIcon(QIcon(logo))
+
+        self.label_info = QLabel()
+        label_target = QLabel(self.i18n.translate('GUI.SPELLINGS.TARGET', 'Merge the checked spellings into'))
+
+        self.tree = QTreeWidget()
+        self.tree.setColumnCount(2)
+        self.tree.setHeaderLabels([self.i18n.translate('GUI.SPELLINGS.HEADERS.NAME', 'Spelling'),
+                                   self.i18n.translate('GUI.SPELLINGS.HEADERS.RECIPES', 'Recipes')])
+        self.tree.header().setSectionResizeMode(0, QHeaderView.Stretch)
+        self.tree.currentItemChanged.connect(self._on_current_item_changed)
+
+        self.combo_target = QComboBox()
+        self.combo_target.setEditable(True)
+
+        self.button_merge = QPushButton(self.i18n.translate('GUI.SPELLINGS.MERGE', 'Merge'))
+        self.button_merge.clicked[bool].connect(self._merge)
+
+        button_close = QPushButton(self.i18n.translate('GUI.SPELLINGS.CLOSE', 'Close'))
+        button_close.clicked[bool].connect(self.close)
+
+        grid = QGridLayout()
+        grid.setSpacing(10)
+        grid.addWidget(self.label_info, 0, 0, 1, 4)
+        grid.addWidget(self.tree, 1, 0, 1, 4)
+        grid.addWidget(label_target, 2, 0, 1, 1)
+        grid.addWidget(self.combo_target, 2, 1, 1, 2)
+        grid.addWidget(self.button_merge, 2, 3, 1, 1)
+        grid.addWidget(button_close, 3, 3, 1, 1)
+        self.setLayout(grid)
+
+        self._fill_tree()
+
+        self.resize(640, 640)
+        self._center()
+
+    def _fill_tree(self):
+        """Lists the groups, each with its checkable spellings"""
+        self.label_info.setText(self.i18n.translate('GUI.SPELLINGS.INFO', '{} ingredients written in several ways in {} recipes')
+                                .format(len(self.groups), self.nr_recipes))
+        self.tree.clear()
+        for i, group in enumerate(self.groups):
+            title = group.name or ' / '.join(list(group.spellings)[:2])
+            group_item = QTreeWidgetItem(self.tree, [title, str(len(group.get_paths()))])
+            group_item.setData(0, Qt.UserRole, i)
+            for spelling, paths in group.spellings.items():
+                item = QTreeWidgetItem(group_item, [spelling, str(len(paths))])
+                item.setData(0, Qt.UserRole, i)
+                item.setFlags(item.flags() | Qt.ItemIsUserCheckable)
+                item.setCheckState(0, Qt.Checked)
+            group_item.setExpanded(True)
+        self.combo_target.clear()
+        self.button_merge.setEnabled(False)
+
+    def _get_current_group(self):
+        """Returns the index of the group of the current item or None"""
+        item = self.tree.currentItem()
+        return item.data(0, Qt.UserRole) if item is not None else None
+
+    def _on_current_item_changed(self, _current, _previous):
+        """Offers the spellings of the current group as new name"""
+        i = self._get_current_group()
+        self.combo_target.clear()
+        self.button_merge.setEnabled(i is not None)
+        if i is None:
+            return
+        group = self.groups[i]
+        # The canonical name first, then the most used spellings
+        names = list(group.spellings)
+        if group.name:
+            names = [group.name] + [name for name in names if name != group.name]
+        self.combo_target.addItems(names)
+
+    def _merge(self):
+        """Merges the checked spellings of the current group into the entered name"""
+        i = self._get_current_group()
+        target = ' '.join(self.combo_target.currentText().split())
+        if i is None or not target:
+            return
+        group_item = self.tree.topLevelItem(i)
+        spellings = [group_item.child(j).text(0) for j in range(group_item.childCount()) if group_item.child(j).checkState(0) == Qt.Checked]
+        spellings = [spelling for spelling in spellings if spelling != target]
+        if not spellings:
+            return
+        paths = self.groups[i].get_paths(spellings)
+        msg = self.i18n.translate('GUI.SPELLINGS.CONFIRM.TEXT', 'Rename "{}" to "{}" in {} recipes?').format('", "'.join(spellings), target, len(paths))
+        message_box = QMessageBox(QMessageBox.Question, self.i18n.translate('GUI.SPELLINGS.CONFIRM', 'Merge spellings'), msg,
+                                  buttons=QMessageBox.Yes | QMessageBox.No)
+        message_box.exec_()
+        if message_box.standardButton(message_box.clickedButton()) != QMessageBox.Yes:
+            return
+        logging.info('Merging %s into "%s" in %d recipes', spellings, target, len(paths))
+        self.groups = self.merge_cb(spellings, target, paths)
+        self._fill_tree()
+
+    def _center(self):
+        """Centers the window on the screen"""
+        screen = QDesktopWidget().screenGeometry()
+        self.move(int((screen.width() - self.geometry().width()) / 2),
+                  int((screen.height() - self.geometry().height()) / 2))
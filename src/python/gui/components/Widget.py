@@ -12,28 +12,40 @@ import logging
 import os
 import shutil
 
-from PyQt5.QtCore import Qt, QSize, QUrl
+from PyQt5.QtCore import Qt, QPoint, QSize, QTimer, QUrl
 from PyQt5.QtGui import QFont, QIcon, QDesktopServices, QIcon
-from PyQt5.QtWidgets import QAbstractItemView, QMenu, QAction, QSizePolicy, QWidget, QGridLayout, QLabel, QTreeWidgetItem, QProgressBar, QPushButton, QMessageBox, QInputDialog, QLineEdit, QFileDialog, QDialog
+from PyQt5.QtWidgets import QAbstractItemView, QMenu, QAction, QSizePolicy, QWidget, QGridLayout, QLabel, QProgressBar, QPushButton, QMessageBox, QInputDialog, QLineEdit, QFileDialog, QDialog
 
 from gui.data.IconDefinitions import FOLDER, FILE, DELETE, EDIT, MOVE, CREATE_FOLDER, CREATE_FILE, OPEN_EXTERNAL
-from gui.components.TreeWidget import TreeWidget
-from gui.components.RecipeWindow import RecipeWindow
+from gui.components.model.RecipeTreeModel import PATH_ROLE, RecipeTreeModel, RecipeTreeFilterModel
+from gui.components.view.RecipeTreeView import RecipeTreeView
+from gui.components.RecipeWindowManager import RecipeWindowManager
 
 from lib.AppConfig import app_conf_get
-from lib.Utils import load_json_recipe, save_recipe
+from lib.Metrics import metrics_observe, metrics_timer
+from lib.StartupProfiler import startup_phase
+from lib.Tracing import trace_instant, trace_span, traced
+from lib.IngredientSpellings import get_spelling_groups, merge_spellings
+from lib.RecipePaths import RecipePaths
+from lib.ShoppingList import aggregate_shopping_list
+from lib.Utils import iter_recipe_paths, load_json_recipe, rebase_recipe_images, save_recipe
 from classes.Recipe import Recipe
 
 
 class Widget(QWidget):
     """Widget"""
 
-    def __init__(self, i18n, log, image_cache):
+    def __init__(self, i18n, log, image_cache, recipe_index, similar_recipes=None, recipe_cache=None, window_manager=None, recipe_paths=None):
         """Initializes the widget
 
         :param i18n: The I18n
         :param log: The (end user) message log
         :param image_cache: The image cache
+        :param recipe_index: The RecipeIndex
+        :param similar_recipes: The SimilarRecipes, None to not show similar recipes
+        :param recipe_cache: The RecipeCache, None to read recipes when they are opened
+        :param window_manager: The RecipeWindowManager, None to use one of its own
+        :param recipe_paths: The RecipePaths for the quick-open dialog, None to use one of its own
         """
         super(Widget, self).__init__()
 
@@ -42,18 +54,37 @@ class Widget(QWidget):
         self.i18n = i18n
         self.log = log
         self.image_cache = image_cache
+        self.recipe_index = recipe_index
+        self.similar_recipes = similar_recipes
+        self.recipe_cache = recipe_cache
+        self.window_manager = window_manager or RecipeWindowManager(i18n, image_cache, similar_recipes=similar_recipes)
 
         self.recipe_suffix = app_conf_get('suffix.recipe', '.json')
+        self.recipe_paths = recipe_paths or RecipePaths(self.recipe_suffix)
 
         self.components = []
-        self.recipe_windows = {}
+        # Recipe path -> RecipeWindow of the opened recipes
+        self.recipe_windows = self.window_manager.windows
         self.current_folder = app_conf_get('recipes.folder')
 
-        self._treewidget = None
+        self._treeview = None
+        self._tree_model = None
+        self._tree_filter_model = None
+        self._line_edit_filter = None
+        self._filter_timer = None
+        self._duplicates_dialog = None
+        self._quick_open_dialog = None
+        self._thumbnail_size = app_conf_get('thumbnails.tree.size', 24) if app_conf_get('thumbnails.tree', True) else 0
+        self._thumbnail_timer = None
+        self._preload_timer = None
+        self._preload_path = None
+        self.label_header = None
+        self.label_current_folder = None
         self.progressbar = QProgressBar()
         self.grid = QGridLayout()
         self.is_enabled = False
 
+    @traced('Widget.init_ui')
     def init_ui(self):
         """Initiates application UI"""
         logging.debug('Initializing MainWidget GUI')
@@ -79,9 +110,9 @@ class Widget(QWidget):
         line_1.setSizePolicy(QSizePolicy.Expanding, QSizePolicy.Fixed)
         line_1.setStyleSheet(line_css)
 
-        label_header = QLabel(self.i18n.translate('GUI.TREEVIEW.HEADER'))
-        label_header.setFont(font_label_header)
-        label_header.setAlignment(Qt.AlignCenter)
+        self.label_header = QLabel(self.i18n.translate('GUI.TREEVIEW.HEADER'))
+        self.label_header.setFont(font_label_header)
+        self.label_header.setAlignment(Qt.AlignCenter)
 
         line_2 = QWidget()
         line_2.setFixedHeight(1)
@@ -113,29 +144,59 @@ class Widget(QWidget):
         button_create_recipe.setIcon(icon)
         button_create_recipe.clicked[bool].connect(self._create_recipe)
 
-        self._treewidget = TreeWidget(self._dropped)
-        self._treewidget.setHeaderHidden(True)
-        self._treewidget.setContextMenuPolicy(Qt.CustomContextMenu)
-        self._treewidget.customContextMenuRequested.connect(self._open_menu)
-        self._treewidget.setSelectionMode(QAbstractItemView.SingleSelection)
-        self._treewidget.setDragEnabled(True)
-        self._treewidget.setAcceptDrops(True)
-        self._treewidget.setDropIndicatorShown(True)
-
-        #curr_folder = self._get_formatted_current_folder(show_slash=False)
-        #self._treewidget.setHeaderLabel(curr_folder)
-        self._treewidget.itemDoubleClicked.connect(self._on_item_double_clicked)
-        self.components.append(self._treewidget)
+        self._line_edit_filter = QLineEdit()
+        self._line_edit_filter.setPlaceholderText(self.i18n.translate('GUI.TREEVIEW.FILTER', 'Filter recipes'))
+        self._line_edit_filter.setClearButtonEnabled(True)
+        self._line_edit_filter.textChanged.connect(self._schedule_filter)
+        self._filter_timer = QTimer(self)
+        self._filter_timer.setSingleShot(True)
+        self._filter_timer.setInterval(app_conf_get('tree.filter.delay', 200))
+        self._filter_timer.timeout.connect(self._apply_filter)
+        self.components.append(self._line_edit_filter)
+
+        self._tree_model = RecipeTreeModel(self.current_folder, self.recipe_suffix,
+                                           folder_icon=self.image_cache.get_or_load_icon(FOLDER),
+                                           file_icon=self.image_cache.get_or_load_icon(FILE))
+        self._tree_filter_model = RecipeTreeFilterModel()
+        self._tree_filter_model.setSourceModel(self._tree_model)
+
+        self._treeview = RecipeTreeView(self._dropped)
+        self._treeview.setModel(self._tree_filter_model)
+        self._treeview.setContextMenuPolicy(Qt.CustomContextMenu)
+        self._treeview.customContextMenuRequested.connect(self._open_menu)
+        self._treeview.setSelectionMode(QAbstractItemView.ExtendedSelection)
+        self._treeview.setDragEnabled(True)
+        self._treeview.setAcceptDrops(True)
+        self._treeview.setDropIndicatorShown(True)
+
+        self._treeview.doubleClicked.connect(self._on_item_double_clicked)
+        self.components.append(self._treeview)
+
+        if self.recipe_cache and app_conf_get('preload.enabled', True):
+            self._preload_timer = QTimer(self)
+            self._preload_timer.setSingleShot(True)
+            self._preload_timer.setInterval(app_conf_get('preload.delay', 100))
+            self._preload_timer.timeout.connect(self._preload_hovered)
+            self._treeview.setMouseTracking(True)
+            self._treeview.entered.connect(self._schedule_preload)
+            self._treeview.selectionModel().currentChanged.connect(self._preload)
+
+        if self._thumbnail_size:
+            self._treeview.setIconSize(QSize(self._thumbnail_size, self._thumbnail_size))
+            self.image_cache.get_thumbnail_loader().thumbnail_loaded.connect(self._on_thumbnail_loaded)
+            self._thumbnail_timer = QTimer(self)
+            self._thumbnail_timer.setSingleShot(True)
+            self._thumbnail_timer.setInterval(50)
+            self._thumbnail_timer.timeout.connect(self._request_visible_thumbnails)
+            self._treeview.verticalScrollBar().valueChanged.connect(self._schedule_thumbnail_requests)
+            self._treeview.expanded.connect(self._schedule_thumbnail_requests)
+            self._treeview.collapsed.connect(self._schedule_thumbnail_requests)
 
         self.progressbar.setTextVisible(False)
 
-        try:
-            folder_name = os.path.basename(app_conf_get('recipes.folder'))
-        except:
-            folder_name = app_conf_get('recipes.folder')
-        label_current_folder = QLabel(self.i18n.translate('GUI.TREEVIEW.CURRENT_FOLDER').format(folder_name))
-        label_current_folder.setFont(font_label_info) # font_label_text
-        label_current_folder.setAlignment(Qt.AlignLeft)
+        self.label_current_folder = QLabel(self._get_current_folder_label())
+        self.label_current_folder.setFont(font_label_info) # font_label_text
+        self.label_current_folder.setAlignment(Qt.AlignLeft)
 
         button_open_recipe_folder = QPushButton()
         icon = self.image_cache.get_or_load_icon(OPEN_EXTERNAL)
@@ -151,7 +212,7 @@ class Widget(QWidget):
 
         curr_gridid = 0
         self.grid.addWidget(line_1, curr_gridid, 0, 1, 3)
-        self.grid.addWidget(label_header, curr_gridid, 3, 1, 1)
+        self.grid.addWidget(self.label_header, curr_gridid, 3, 1, 1)
         self.grid.addWidget(line_2, curr_gridid, 4, 1, 1)
         self.grid.addWidget(button_delete, curr_gridid, 5, 1, 1)
         self.grid.addWidget(button_edit, curr_gridid, 6, 1, 1)
@@ -160,10 +221,13 @@ class Widget(QWidget):
         self.grid.addWidget(button_create_recipe, curr_gridid, 9, 1, 1)
 
         curr_gridid += 1
-        self.grid.addWidget(self._treewidget, curr_gridid, 0, 12, 10)
+        self.grid.addWidget(self._line_edit_filter, curr_gridid, 0, 1, 10)
+
+        curr_gridid += 1
+        self.grid.addWidget(self._treeview, curr_gridid, 0, 12, 10)
         
         curr_gridid += 12
-        self.grid.addWidget(label_current_folder, curr_gridid, 0, 1, 1)
+        self.grid.addWidget(self.label_current_folder, curr_gridid, 0, 1, 1)
         self.grid.addWidget(button_open_recipe_folder, curr_gridid, 1, 1, 1)
 
         curr_gridid += 1
@@ -172,6 +236,94 @@ class Widget(QWidget):
         self.setLayout(self.grid)
         self._refresh_view()
         self._enable()
+        # All recipe paths for the quick-open dialog, kept up to date by the file operations
+        self.recipe_paths.scan(self.current_folder)
+
+    def retranslate_ui(self, _lang=None):
+        """Re-labels the widget in the current language
+
+        :param _lang: The new language
+        """
+        logging.debug('Re-labeling Widget')
+
+        self.label_header.setText(self.i18n.translate('GUI.TREEVIEW.HEADER'))
+        self._line_edit_filter.setPlaceholderText(self.i18n.translate('GUI.TREEVIEW.FILTER', 'Filter recipes'))
+        self.label_current_folder.setText(self._get_current_folder_label())
+
+    def _get_current_folder_label(self):
+        """Returns the translated label of the current recipe folder"""
+        try:
+            folder_name = os.path.basename(app_conf_get('recipes.folder'))
+        except:
+            folder_name = app_conf_get('recipes.folder')
+        return self.i18n.translate('GUI.TREEVIEW.CURRENT_FOLDER').format(folder_name)
+
+    def _schedule_thumbnail_requests(self, *_args):
+        """Requests the thumbnails of the visible recipes once scrolling/expanding settled"""
+        if self._thumbnail_timer:
+            self._thumbnail_timer.start()
+
+    def _request_visible_thumbnails(self):
+        """Requests the thumbnails of the recipes currently visible in the tree"""
+        loader = self.image_cache.get_thumbnail_loader()
+        viewport_height = self._treeview.viewport().height()
+        index = self._treeview.indexAt(QPoint(0, 0))
+        while index.isValid() and self._treeview.visualRect(index).top() < viewport_height:
+            path_info = index.data(PATH_ROLE)
+            if path_info.endswith(self.recipe_suffix):
+                pixmap = loader.request(path_info, self._thumbnail_size)
+                if pixmap:
+                    self._tree_model.set_thumbnail(path_info, pixmap)
+            index = self._treeview.indexBelow(index)
+
+    def _on_thumbnail_loaded(self, recipe_path, size):
+        """Sets a loaded thumbnail as icon of the recipe item
+
+        :param recipe_path: The recipe path
+        :param size: The thumbnail size
+        """
+        if size != self._thumbnail_size:
+            return
+        self._tree_model.set_thumbnail(recipe_path, self.image_cache.get_thumbnail_loader().get(recipe_path, size) or None)
+
+    def _schedule_preload(self, index):
+        """Reads the hovered recipe in the background once the mouse rests on it
+
+        :param index: The hovered index
+        """
+        self._preload_path = index.data(PATH_ROLE)
+        self._preload_timer.start()
+
+    def _preload_hovered(self):
+        """Reads the hovered recipe in the background"""
+        if self._preload_path and self._preload_path.endswith(self.recipe_suffix):
+            self.recipe_cache.request(self._preload_path)
+
+    def _preload(self, index, *_args):
+        """Reads the selected recipe in the background
+
+        :param index: The current index
+        """
+        path_info = index.data(PATH_ROLE) if index.isValid() else None
+        if path_info and path_info.endswith(self.recipe_suffix):
+            self.recipe_cache.request(path_info)
+
+    def _schedule_filter(self, *_args):
+        """Filters the tree once typing settled"""
+        self._filter_timer.start()
+
+    @traced('Widget._apply_filter')
+    def _apply_filter(self):
+        """Shows only the recipes whose names contain the filter text"""
+        text = self._line_edit_filter.text()
+        if text.strip() and not self._tree_model.is_fully_loaded():
+            # The filter searches the whole cookbook, not only the expanded folders
+            with metrics_timer('cookbook.scan'), trace_span('cookbook.scan'):
+                self._tree_model.fetch_all()
+        self._tree_filter_model.set_filter_text(text)
+        if self._tree_filter_model.get_filter_text():
+            self._treeview.expandAll()
+        self._schedule_thumbnail_requests()
 
     def _open_recipe_folder(self):
         """Opens the recipe folder in the native file explorer"""
@@ -212,7 +364,132 @@ class Widget(QWidget):
         menu.addAction(action_create_folder)
         menu.addAction(action_create_file)
 
-        menu.exec_(self._treewidget.viewport().mapToGlobal(position))
+        menu.addSeparator()
+        if self._treeview.selectionModel().hasSelection():
+            action_shopping_list = QAction(self.i18n.translate('GUI.TREEVIEW.MENU.RIGHTCLICK.SHOPPING_LIST', 'Shopping list'), self)
+            action_shopping_list.triggered.connect(self._shopping_list)
+            menu.addAction(action_shopping_list)
+
+        action_duplicates = QAction(self.i18n.translate('GUI.TREEVIEW.MENU.RIGHTCLICK.DUPLICATES', 'Find duplicates'), self)
+        action_duplicates.triggered.connect(self._find_duplicates)
+        menu.addAction(action_duplicates)
+
+        action_spellings = QAction(self.i18n.translate('GUI.TREEVIEW.MENU.RIGHTCLICK.SPELLINGS', 'Merge ingredient spellings'), self)
+        action_spellings.triggered.connect(self._show_spellings)
+        menu.addAction(action_spellings)
+
+        menu.exec_(self._treeview.viewport().mapToGlobal(position))
+
+    def _get_current_path(self):
+        """Returns the path of the current folder/recipe in the tree or None"""
+        index = self._treeview.currentIndex()
+        return index.data(PATH_ROLE) if index.isValid() else None
+
+    def _get_tree_index(self, path):
+        """Returns the index of a folder/recipe in the tree, invalid if not shown
+
+        :param path: The path
+        """
+        return self._tree_filter_model.mapFromSource(self._tree_model.find_index(path))
+
+    def _get_selected_recipe_paths(self):
+        """Returns the paths of the selected recipes and of all recipes in selected folders"""
+        paths = {}
+        for index in self._treeview.selectionModel().selectedIndexes():
+            path_info = index.data(PATH_ROLE)
+            if os.path.isdir(path_info):
+                for path in iter_recipe_paths(path_info, self.recipe_suffix):
+                    paths[path] = True
+            elif path_info.endswith(self.recipe_suffix):
+                paths[path_info] = True
+        return list(paths)
+
+    @traced('Widget._shopping_list')
+    def _shopping_list(self):
+        """Shows the summed up ingredients of the selected recipes"""
+        paths = self._get_selected_recipe_paths()
+        logging.info('Creating shopping list for %d recipes', len(paths))
+        if not paths:
+            return
+        entries = self.recipe_index.get_all(paths)
+        items = aggregate_shopping_list(entries)
+        from gui.components.ShoppingListDialog import ShoppingListDialog
+        dialog = ShoppingListDialog(self.i18n, self.image_cache, items, len(entries))
+        dialog.init_ui()
+        dialog.exec_()
+
+    @traced('Widget._find_duplicates')
+    def _find_duplicates(self):
+        """Shows the groups of near-duplicates among the selected recipes or, without selection, the whole cookbook"""
+        paths = self._get_selected_recipe_paths() or list(iter_recipe_paths(self.current_folder, self.recipe_suffix))
+        logging.info('Finding duplicates in %d recipes', len(paths))
+        entries = self.recipe_index.get_all(paths)
+        # Imported on first use, numpy is slow to import
+        from lib.Duplicates import find_duplicates
+        clusters = find_duplicates(entries, app_conf_get('duplicates.threshold', 0.8))
+        from gui.components.DuplicatesDialog import DuplicatesDialog
+        self._duplicates_dialog = DuplicatesDialog(self.i18n, self.image_cache, clusters, len(entries), self._select_recipe)
+        self._duplicates_dialog.init_ui()
+        self._duplicates_dialog.show()
+
+    @traced('Widget._show_spellings')
+    def _show_spellings(self):
+        """Shows the ingredients written in several ways in the selected recipes or, without selection, the whole cookbook"""
+        paths = self._get_selected_recipe_paths() or list(iter_recipe_paths(self.current_folder, self.recipe_suffix))
+        logging.info('Finding ingredient spellings in %d recipes', len(paths))
+        entries = self.recipe_index.get_all(paths)
+        from gui.components.SpellingsDialog import SpellingsDialog
+        dialog = SpellingsDialog(self.i18n, self.image_cache, get_spelling_groups(entries), len(entries),
+                                 lambda spellings, target, merge_paths: self._merge_spellings(spellings, target, merge_paths, paths))
+        dialog.init_ui()
+        dialog.exec_()
+
+    @traced('Widget._merge_spellings')
+    def _merge_spellings(self, spellings, target, merge_paths, paths):
+        """Renames ingredients in recipe files, recipes open in a recipe window are skipped
+
+        :param spellings: The names to replace
+        :param target: The new name
+        :param merge_paths: The paths of the recipes to rewrite
+        :param paths: The paths of all searched recipes
+        :return: The updated SpellingGroup objects of the searched recipes
+        """
+        opened = [path for path in merge_paths if path in self.recipe_windows]
+        for path in opened:
+            logging.warning('Not renaming ingredients of "%s", it is opened in a recipe window', path)
+        nr_recipes = 0
+        nr_failed = len(opened)
+        for _path, nr_renamed, error in merge_spellings([path for path in merge_paths if path not in self.recipe_windows], spellings, target):
+            if error:
+                nr_failed += 1
+            elif nr_renamed:
+                nr_recipes += 1
+        self.log(self.i18n.translate('GUI.TREEVIEW.LOG.SPELLINGS.MERGED', 'Renamed ingredients in {} recipes, {} failed').format(nr_recipes, nr_failed))
+        # Re-indexes the changed recipes
+        return get_spelling_groups(self.recipe_index.get_all(paths))
+
+    @traced('Widget.quick_open')
+    def quick_open(self):
+        """Shows the quick-open dialog to find a recipe by (some) characters of its name or folders"""
+        if self._quick_open_dialog is None:
+            from gui.components.QuickOpenDialog import QuickOpenDialog
+            self._quick_open_dialog = QuickOpenDialog(self.i18n, self.image_cache, self.recipe_paths, self._open_recipe,
+                                                      recipe_cache=self.recipe_cache, parent=self)
+            self._quick_open_dialog.init_ui()
+        self._quick_open_dialog.show_dialog()
+
+    def _select_recipe(self, path):
+        """Selects a recipe in the tree and scrolls to it
+
+        :param path: The recipe path
+        """
+        index = self._get_tree_index(path)
+        if not index.isValid():
+            logging.warning('Recipe "%s" is not in the tree', path)
+            return
+        self._treeview.setCurrentIndex(index)
+        self._treeview.scrollTo(index)
+        self.window().activateWindow()
 
     def _messagebox_delete_yesno(self, is_file, name):
         """Displays a message box with yes/no
@@ -258,11 +535,11 @@ class Widget(QWidget):
 
     def _dropped(self, source, destination):
         """On event dropped
-        :param source: Source item
-        :param destination: Destination item (may be None)
+        :param source: Source path
+        :param destination: Destination path (may be None)
         """
         if destination:
-            destination_path_info = destination['path_info']
+            destination_path_info = destination
         else:
             destination_path_info = app_conf_get('recipes.folder')
         if os.path.isdir(destination_path_info):
@@ -271,7 +548,7 @@ class Widget(QWidget):
             destination_folder = os.path.dirname(destination_path_info)
 
         is_dir = False
-        source_path_info = source['path_info']
+        source_path_info = source
         if os.path.isfile(source_path_info) and source_path_info.endswith(self.recipe_suffix):
             source_folder = os.path.dirname(source_path_info)
         elif os.path.isdir(source_path_info):
@@ -288,6 +565,7 @@ class Widget(QWidget):
                 logging.debug('Move "%s" to "%s"', source_path_info, destination_folder)
                 try:
                     shutil.move(source_path_info, destination_folder)
+                    self._moved(source_path_info, os.path.join(destination_folder, os.path.basename(source_path_info)))
                     self.log(self.i18n.translate(f'GUI.TREEVIEW.LOG.MOVE_{"DIRECTORY" if is_dir else "FILE"}').format(os.path.basename(source_path_info), os.path.basename(destination_folder)))
                     moved = True
                 except Exception as ex:
@@ -301,19 +579,41 @@ class Widget(QWidget):
             self._refresh_view(do_log=False)
             self._enable()
 
+    def _moved(self, source, destination):
+        """Updates the moved recipes: their photo paths, the thumbnails, the index and the recipe paths
+
+        :param source: The old path of the moved recipe or folder
+        :param destination: The new path
+        """
+        loader = self.image_cache.get_thumbnail_loader()
+        for old_path, new_path in rebase_recipe_images(source, destination, self.recipe_suffix):
+            loader.invalidate(old_path)
+            loader.invalidate(new_path)
+        # Also moves the rows of the similar recipes
+        self.recipe_index.move(source, destination)
+        self.recipe_paths.move(source, destination)
+
+    def _removed(self, path):
+        """Drops the deleted recipes from the index and the recipe paths
+
+        :param path: The path of the deleted recipe or folder
+        """
+        # Also removes the rows of the similar recipes
+        self.recipe_index.remove_all(path)
+        self.recipe_paths.remove(path)
+
     def _delete(self):
         """Deletes the selected folder/file"""
-        curr_item = self._treewidget.currentItem()
-        if curr_item:
-            data = curr_item.data(0, Qt.UserRole)
-            path_info = data['path_info']
-            filename = data['filename']
+        path_info = self._get_current_path()
+        if path_info:
+            filename = os.path.basename(path_info)
             deleted = False
             if os.path.isdir(path_info):
                 logging.info('Delete folder "%s"', path_info)
                 if self._messagebox_delete_yesno(False, filename):
                     try:
                         shutil.rmtree(path_info)
+                        self._removed(path_info)
                         self.log(self.i18n.translate('GUI.TREEVIEW.LOG.DELETE_DIRECTORY').format(filename))
                         deleted = True
                     except Exception as ex:
@@ -325,6 +625,7 @@ class Widget(QWidget):
                 if self._messagebox_delete_yesno(True, _filename):
                     try:
                         os.remove(path_info)
+                        self._removed(path_info)
                         self.log(self.i18n.translate('GUI.TREEVIEW.LOG.DELETE_FILE').format(_filename))
                         deleted = True
                     except Exception as ex:
@@ -339,11 +640,9 @@ class Widget(QWidget):
 
     def _edit(self):
         """Edits the selected folder/file"""
-        curr_item = self._treewidget.currentItem()
-        if curr_item:
-            data = curr_item.data(0, Qt.UserRole)
-            path_info = data['path_info']
-            filename = data['filename']
+        path_info = self._get_current_path()
+        if path_info:
+            filename = os.path.basename(path_info)
             edited = False
             logging.info('Move "%s"', path_info)
             if os.path.isdir(path_info):
@@ -354,6 +653,7 @@ class Widget(QWidget):
                     logging.info('Moving "%s" to "%s"', path_info, new_path)
                     try:
                         shutil.move(path_info, new_path)
+                        self._moved(path_info, new_path)
                         self.log(self.i18n.translate('GUI.TREEVIEW.LOG.EDIT_FOLDER.SUCCESS').format(filename, name))
                         edited = True
                     except Exception as ex:
@@ -369,6 +669,7 @@ class Widget(QWidget):
                     logging.info('Moving "%s" to "%s"', path_info, new_path)
                     try:
                         shutil.move(path_info, new_path)
+                        self._moved(path_info, new_path)
                         self.log(self.i18n.translate('GUI.TREEVIEW.LOG.EDIT_FILE.SUCCESS').format(_filename, name))
                         edited = True
                     except Exception as ex:
@@ -383,10 +684,8 @@ class Widget(QWidget):
 
     def _move(self):
         """Moves the selected file"""
-        curr_item = self._treewidget.currentItem()
-        if curr_item:
-            data = curr_item.data(0, Qt.UserRole)
-            path_info = data['path_info']
+        path_info = self._get_current_path()
+        if path_info:
             moved = False
             if os.path.isdir(path_info):
                 dirname = path_info
@@ -396,6 +695,7 @@ class Widget(QWidget):
                     logging.info('Moving folder "%s"', selected_folder)
                     try:
                         shutil.move(dirname, selected_folder)
+                        self._moved(dirname, os.path.join(selected_folder, os.path.basename(dirname)))
                         self.log(self.i18n.translate('GUI.TREEVIEW.LOG.MOVE_DIRECTORY').format(os.path.basename(dirname), os.path.basename(selected_folder)))
                         moved = True
                     except Exception as ex:
@@ -409,6 +709,7 @@ class Widget(QWidget):
                     logging.info('Moving file "%s"', selected_folder)
                     try:
                         shutil.move(path_info, selected_folder)
+                        self._moved(path_info, os.path.join(selected_folder, os.path.basename(path_info)))
                         self.log(self.i18n.translate('GUI.TREEVIEW.LOG.MOVE_FILE').format(os.path.basename(dirname), os.path.basename(selected_folder)))
                         moved = True
                     except Exception as ex:
@@ -421,12 +722,7 @@ class Widget(QWidget):
 
     def _create_folder(self):
         """Creates a new folder"""
-        curr_item = self._treewidget.currentItem()
-        if curr_item:
-            data = curr_item.data(0, Qt.UserRole)
-            path_info = data['path_info']
-        else:
-            path_info = self.current_folder
+        path_info = self._get_current_path() or self.current_folder
         dirname = path_info
         if os.path.isfile(path_info):
             dirname = os.path.dirname(path_info)
@@ -446,12 +742,7 @@ class Widget(QWidget):
 
     def _create_recipe(self):
         """Creates a new recipe"""
-        curr_item = self._treewidget.currentItem()
-        if curr_item:
-            data = curr_item.data(0, Qt.UserRole)
-            path_info = data['path_info']
-        else:
-            path_info = self.current_folder
+        path_info = self._get_current_path() or self.current_folder
         dirname = path_info
         if os.path.isfile(path_info):
             dirname = os.path.dirname(path_info)
@@ -464,6 +755,7 @@ class Widget(QWidget):
                 logging.info('Creating file "%s"', file)
                 recipe = Recipe()
                 if save_recipe(recipe, file):
+                    self.recipe_paths.add(file)
                     self.log(self.i18n.translate('GUI.TREEVIEW.LOG.CREATE_FILE.SUCCESS').format(filename))
                     logging.debug('Refreshing view')
                     self._refresh_view(do_log=False)
@@ -474,39 +766,36 @@ class Widget(QWidget):
                 self.log(self.i18n.translate('GUI.TREEVIEW.LOG.CREATE_FOLDER.FAIL.EXISTS').format(filename))
                 logging.error('File "%s" already exists', filename)
 
-    def _on_item_double_clicked(self, item, _col):
-        """When an item in the tree widget has been double-clicked
-        :param item: The item
-        :param _col: The column
+    @traced('Widget._on_item_double_clicked')
+    def _on_item_double_clicked(self, index):
+        """When an item in the tree view has been double-clicked
+        :param index: The index
+        """
+        path_info = index.data(PATH_ROLE)
+        trace_instant('double-click', path=path_info)
+        self._open_recipe(path_info)
+
+    @traced('Widget._open_recipe')
+    def _open_recipe(self, path_info):
+        """Opens a recipe in a recipe window or activates its window
+        :param path_info: The recipe path
         """
-        data = item.data(0, Qt.UserRole)
-        path_info = data['path_info']
-        if os.path.isfile(path_info) and path_info.endswith(self.recipe_suffix):
-            logging.info('Double-clicked "%s", loading recipe', path_info)
-            json_recipe = load_json_recipe(path_info)
+        if self.window_manager.focus(path_info):
+            if self.recipe_cache:
+                self.recipe_cache.add_recent(path_info)
+        elif os.path.isfile(path_info) and path_info.endswith(self.recipe_suffix):
+            logging.info('Opening "%s", loading recipe', path_info)
+            json_recipe = self.recipe_cache.load(path_info) if self.recipe_cache else load_json_recipe(path_info)
             if json_recipe:
-                if path_info in self.recipe_windows:
-                    logging.debug('Recipe window already exists, activating')
-                    self.recipe_windows[path_info].activateWindow()
-                else:
-                    logging.debug('Recipe window does not exist, creating new')
-                    recipe_window = RecipeWindow(self.i18n, self.image_cache, path_info, json_recipe, self._recipe_window_closed)
-                    self.recipe_windows[path_info] = recipe_window
-                    recipe_window.init_ui()
-                    recipe_window.show()
+                self.window_manager.open(path_info, json_recipe, open_cb=self._open_recipe)
+                if self.recipe_cache:
+                    self.recipe_cache.add_recent(path_info)
             else:
                 logging.error('Could not load recipe "%s"', path_info)
         else:
             logging.error('Does not appear to be a recipe: "%s"', path_info)
 
-    def _recipe_window_closed(self, id):
-        """On recipe window close
-        :param id: The ID of the window
-        """
-        logging.debug('Recipe window "%s" closed', id)
-        if id in self.recipe_windows:
-            del self.recipe_windows[id]
-
+    @traced('Widget._refresh_view')
     def _refresh_view(self, do_log=True):
         """Refreshes the view"""
         if do_log:
@@ -516,8 +805,12 @@ class Widget(QWidget):
         self.progressbar.setValue(0)
         self.progressbar.setMinimum(0)
         self.progressbar.setMaximum(0)
-        self._treewidget.clear()
-        self._load_project_structure(self.current_folder, self._treewidget)
+        if self._thumbnail_size:
+            self.image_cache.get_thumbnail_loader().cancel_pending()
+        with startup_phase('tree'), metrics_timer('cookbook.scan'), trace_span('cookbook.scan'):
+            self._load_project_structure(self.current_folder)
+        metrics_observe('cookbook.scan.recipes', self._tree_model.get_nr_recipes())
+        self._schedule_thumbnail_requests()
         self.progressbar.setMinimum(0)
         self.progressbar.setMaximum(100)
         self.progressbar.setValue(100)
@@ -527,35 +820,18 @@ class Widget(QWidget):
             self.log(self.i18n.translate('GUI.TREEVIEW.LOG.LOAD_COOKBOOK.DONE'))
         logging.info('Loaded cookbook')
 
-    def _load_project_structure(self, startpath, tree):
+    def _load_project_structure(self, startpath):
         """
-        Loads the project structure tree
-        :param startpath: Start path 
-        :param tree: Tree
+        Loads the project structure tree, lists the top level folders
+        :param startpath: Start path
         """
-        for filename in os.listdir(startpath):
-            path_info = os.path.join(startpath, filename)
-            data = {
-                'path_info': path_info,
-                'startpath': startpath,
-                'folder': os.path.basename(startpath),
-                'filename': filename
-            }
-            if os.path.isdir(path_info):
-                tw_item = QTreeWidgetItem(tree, [os.path.basename(filename)])
-                icon = self.image_cache.get_or_load_icon(FOLDER)
-                self._load_project_structure(path_info, tw_item)
-            else:
-                if path_info.endswith(self.recipe_suffix):
-                    tw_item = QTreeWidgetItem(tree, [os.path.basename(filename)[:-len(self.recipe_suffix)]])
-                    icon = self.image_cache.get_or_load_icon(FILE)
-            tw_item.setData(0, Qt.UserRole, data)
-            tw_item.setIcon(0, icon)
-
-        model = self._treewidget.model()
-        for row in range(model.rowCount()):
-            index = model.index(row, 0)
-            self._treewidget.expand(index)
+        self._tree_model.reset(startpath)
+        if self._tree_filter_model.get_filter_text():
+            self._tree_model.fetch_all()
+            self._treeview.expandAll()
+            return
+        for row in range(self._tree_filter_model.rowCount()):
+            self._treeview.expand(self._tree_filter_model.index(row, 0))
 
     def _get_formatted_current_folder(self, show_slash=False):
         """Returns the formatted current folder
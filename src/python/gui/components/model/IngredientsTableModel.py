@@ -15,6 +15,9 @@ from PyQt5.QtGui import QColor
 
 from classes.Ingredient import Ingredient
 from lib.Colors import COLOR_GRAY_LIGHT
+from lib.IngredientNames import load_ingredient_dictionary, normalize_name
+from lib.QuantityParser import parse_quantity, scale_quantity
+from lib.Tracing import traced
 
 class IngredientsTableModel(QAbstractTableModel):
     """IngredientsTableModel"""
@@ -30,11 +33,39 @@ class IngredientsTableModel(QAbstractTableModel):
 
         self.i18n = i18n
         self._data = self._ingredients_to_datalist(ingredients)
-        # 'Quantity', 'Name', 'Further Information'
-        self.headers_h = [self.i18n.translate('GUI.RECIPE.HEADERS.INGREDIENTS.QUANTITY', 'Quantity'), self.i18n.translate('GUI.RECIPE.HEADERS.INGREDIENTS.NAME', 'Name'), self.i18n.translate('GUI.RECIPE.HEADERS.INGREDIENTS.ADDITION', 'Addition')]
+        # Parsed quantities per row, scaling only formats these
+        self._quantities = [ingredient.get_parsed_quantity() for ingredient in ingredients]
+        # Normalized names per row, matched on every change of a name
+        self._keys = [normalize_name(ingredient.name) for ingredient in ingredients]
+        self._scale = 1.0
+        self._decimal_separator = '.'
+        self.headers_h = self._get_headers_h()
         self.headers_v = []
         self._cb_change = cb_change
 
+    def _get_headers_h(self):
+        """Returns the translated horizontal headers"""
+        # 'Quantity', 'Name', 'Further Information'
+        return [self.i18n.translate('GUI.RECIPE.HEADERS.INGREDIENTS.QUANTITY', 'Quantity'), self.i18n.translate('GUI.RECIPE.HEADERS.INGREDIENTS.NAME', 'Name'), self.i18n.translate('GUI.RECIPE.HEADERS.INGREDIENTS.ADDITION', 'Addition')]
+
+    def retranslate(self):
+        """Re-labels the headers in the current language"""
+        self.headers_h = self._get_headers_h()
+        self.headerDataChanged.emit(Qt.Horizontal, 0, len(self.headers_h) - 1)
+
+    def set_scale(self, factor, decimal_separator='.'):
+        """Shows the quantities scaled by the factor, the stored (and edited) quantities stay unscaled
+
+        :param factor: The factor
+        :param decimal_separator: The decimal separator of scaled values
+        """
+        if factor == self._scale and decimal_separator == self._decimal_separator:
+            return
+        self._scale = factor
+        self._decimal_separator = decimal_separator
+        if self._data:
+            self.dataChanged.emit(self.index(0, 0), self.index(len(self._data) - 1, 0), [Qt.DisplayRole])
+
     # @override
     def data(self, index, role=Qt.DisplayRole):
         """data
@@ -48,11 +79,19 @@ class IngredientsTableModel(QAbstractTableModel):
         if role == Qt.EditRole:
             return self._data[index.row()][index.column()]
         if role == Qt.DisplayRole:
+            if index.column() == 0 and self._scale != 1:
+                return scale_quantity(self._quantities[index.row()], self._scale, self._decimal_separator)
             return self._data[index.row()][index.column()]
+        if role == Qt.ToolTipRole and index.column() == 1:
+            name = load_ingredient_dictionary().get_name(self._keys[index.row()])
+            if name:
+                return self.i18n.translate('GUI.RECIPE.VIEW.INGREDIENT.RECOGNIZED', 'Recognized as "{}"').format(name)
+            return QVariant()
         else:
             return QVariant()
 
     # @override
+    @traced('IngredientsTableModel.setData')
     def setData(self, index, value, _role):
         """setData
 
@@ -74,6 +113,10 @@ class IngredientsTableModel(QAbstractTableModel):
 
             logging.debug('Data changed. [row=%d, column=%d, old="%s", new="%s"]', index.row(), index.column(), value_old, value)
             self._data[index.row()][index.column()] = value.strip()
+            if index.column() == 0:
+                self._quantities[index.row()] = parse_quantity(value.strip())
+            elif index.column() == 1:
+                self._keys[index.row()] = normalize_name(value.strip())
             if self._cb_change:
                 self._cb_change(self._datalist_to_ingredients())
         except Exception as ex:
@@ -140,6 +183,8 @@ class IngredientsTableModel(QAbstractTableModel):
         len_data = len(self._data)
         if from_index >= 0 and from_index < len_data and to_index >= 0 and to_index < len_data:
             self._data.insert(to_index, self._data.pop(from_index))
+            self._quantities.insert(to_index, self._quantities.pop(from_index))
+            self._keys.insert(to_index, self._keys.pop(from_index))
             self.layoutChanged.emit()
             if self._cb_change:
                 self._cb_change(self._datalist_to_ingredients())
@@ -153,6 +198,8 @@ class IngredientsTableModel(QAbstractTableModel):
         """
         logging.debug('Remove row #%d', row)
         self._data.pop(row)
+        self._quantities.pop(row)
+        self._keys.pop(row)
         self.layoutChanged.emit()
         if self._cb_change:
             self._cb_change(self._datalist_to_ingredients())
@@ -161,6 +208,8 @@ class IngredientsTableModel(QAbstractTableModel):
         """Adds a row"""
         logging.debug('Add row')
         self._data.append([None, '', None])
+        self._quantities.append(parse_quantity(None))
+        self._keys.append('')
         self.layoutChanged.emit()
 
     def _ingredients_to_datalist(self, ingredients):
@@ -0,0 +1,372 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+#
+# Copyright 2022 Denis Meyer
+#
+# This file is part of Rezepte.
+#
+
+"""RecipeTreeModel
+
+The folders and recipes of the cookbook as a tree model. Nodes are integers into flat arrays (parent,
+row, folder flag, interned name segment, child lists), so a node costs a few bytes instead of a
+QTreeWidgetItem with a dict. The paths are built from the segments on demand. A folder is listed when the
+view first expands it (canFetchMore/fetchMore), so opening a large cookbook only lists its top level.
+"""
+
+import logging
+import os
+import sys
+from array import array
+
+from PyQt5.QtCore import Qt, QModelIndex, QAbstractItemModel, QSortFilterProxyModel
+from PyQt5.QtGui import QIcon
+
+# The path of a node
+PATH_ROLE = Qt.UserRole
+
+# Whether a node is a folder
+FOLDER_ROLE = Qt.UserRole + 1
+
+# The node of the cookbook folder itself, never shown
+_ROOT = 0
+
+class RecipeTreeModel(QAbstractItemModel):
+    """Lazily loaded tree of the folders and recipes of the cookbook"""
+
+    def __init__(self, folder, suffix, folder_icon=None, file_icon=None):
+        """Initializes the model
+
+        :param folder: The cookbook folder
+        :param suffix: The recipe suffix
+        :param folder_icon: The icon of folders
+        :param file_icon: The icon of recipes without thumbnail
+        """
+        super(RecipeTreeModel, self).__init__()
+
+        logging.debug('Initializing RecipeTreeModel')
+
+        self.suffix = suffix
+        self.folder_icon = folder_icon if folder_icon is not None else QIcon()
+        self.file_icon = file_icon if file_icon is not None else QIcon()
+
+        self._clear(folder)
+
+    def _clear(self, folder):
+        """Drops all nodes but the root
+
+        :param folder: The cookbook folder
+        """
+        self._folder = folder or ''
+        # Node -> parent node, row in the parent, folder flag, name (file name with suffix)
+        self._parents = array('i', [-1])
+        self._rows = array('i', [0])
+        self._folders = bytearray(b'\x01')
+        self._names = [self._folder]
+        # Node -> list of child nodes, None until listed
+        self._children = [None]
+        # Node -> (pixmap cache key, icon) of the loaded thumbnails
+        self._thumbnails = {}
+        self._nr_recipes = 0
+
+    def reset(self, folder):
+        """Shows another (or the re-listed) cookbook folder, only its top level is listed
+
+        :param folder: The cookbook folder
+        """
+        self.beginResetModel()
+        self._clear(folder)
+        self.endResetModel()
+        self._fetch(_ROOT)
+
+    def get_folder(self):
+        """Returns the cookbook folder"""
+        return self._folder
+
+    def get_nr_nodes(self):
+        """Returns the number of listed folders and recipes"""
+        return len(self._names) - 1
+
+    def get_nr_recipes(self):
+        """Returns the number of listed recipes"""
+        return self._nr_recipes
+
+    def is_fully_loaded(self):
+        """Returns whether all folders are listed"""
+        return all(children is not None for node, children in enumerate(self._children) if self._folders[node])
+
+    def fetch_all(self):
+        """Lists all folders, e.g. to filter the whole cookbook"""
+        node = 0
+        # Nodes are appended while listing, so the loop also visits the new folders
+        while node < len(self._names):
+            if self._folders[node] and self._children[node] is None:
+                self._fetch(node)
+            node += 1
+
+    def get_path(self, index):
+        """Returns the path of an index or the cookbook folder for an invalid index
+
+        :param index: The QModelIndex
+        """
+        return self._get_node_path(self._get_node(index))
+
+    def find_index(self, path, fetch=True):
+        """Returns the index of a path, invalid if not in the tree
+
+        :param path: The path of a folder or recipe
+        :param fetch: Whether to list the folders on the way
+        """
+        node = self._find_node(path, fetch)
+        if node is None or node == _ROOT:
+            return QModelIndex()
+        return self.createIndex(self._rows[node], 0, node)
+
+    def set_thumbnail(self, path, pixmap):
+        """Shows a thumbnail as icon of a listed recipe
+
+        :param path: The recipe path
+        :param pixmap: The thumbnail QPixmap, None to show the recipe icon
+        """
+        node = self._find_node(path, fetch=False)
+        if node is None or self._folders[node]:
+            return
+        if pixmap is None:
+            if self._thumbnails.pop(node, None) is None:
+                return
+        else:
+            thumbnail = self._thumbnails.get(node)
+            if thumbnail is not None and thumbnail[0] == pixmap.cacheKey():
+                return
+            self._thumbnails[node] = (pixmap.cacheKey(), QIcon(pixmap))
+        index = self.createIndex(self._rows[node], 0, node)
+        self.dataChanged.emit(index, index, [Qt.DecorationRole])
+
+    # @override
+    def index(self, row, column, parent=QModelIndex()):
+        """Returns the index of a child
+
+        :param row: The row
+        :param column: The column
+        :param parent: The parent index
+        """
+        children = self._children[self._get_node(parent)]
+        if column != 0 or children is None or not 0 <= row < len(children):
+            return QModelIndex()
+        return self.createIndex(row, column, children[row])
+
+    # @override
+    def parent(self, index):
+        """Returns the parent index
+
+        :param index: The index
+        """
+        if not index.isValid():
+            return QModelIndex()
+        parent = self._parents[index.internalId()]
+        if parent <= _ROOT:
+            return QModelIndex()
+        return self.createIndex(self._rows[parent], 0, parent)
+
+    # @override
+    def rowCount(self, parent=QModelIndex()):
+        """Returns the number of listed children
+
+        :param parent: The parent index
+        """
+        if parent.column() > 0:
+            return 0
+        children = self._children[self._get_node(parent)]
+        return len(children) if children is not None else 0
+
+    # @override
+    def columnCount(self, _parent=QModelIndex()):
+        """Returns the number of columns"""
+        return 1
+
+    # @override
+    def hasChildren(self, parent=QModelIndex()):
+        """Returns whether a node has or may have children, folders are expandable before being listed
+
+        :param parent: The parent index
+        """
+        node = self._get_node(parent)
+        if not self._folders[node]:
+            return False
+        children = self._children[node]
+        return children is None or len(children) > 0
+
+    # @override
+    def canFetchMore(self, parent):
+        """Returns whether a folder is not listed yet
+
+        :param parent: The parent index
+        """
+        node = self._get_node(parent)
+        return bool(self._folders[node]) and self._children[node] is None
+
+    # @override
+    def fetchMore(self, parent):
+        """Lists a folder
+
+        :param parent: The parent index
+        """
+        node = self._get_node(parent)
+        if self._folders[node] and self._children[node] is None:
+            self._fetch(node)
+
+    # @override
+    def data(self, index, role=Qt.DisplayRole):
+        """Returns the data of an index
+
+        :param index: The index
+        :param role: The role
+        """
+        if not index.isValid():
+            return None
+        node = index.internalId()
+        if role == Qt.DisplayRole:
+            name = self._names[node]
+            return name if self._folders[node] else name[:-len(self.suffix)]
+        if role == Qt.DecorationRole:
+            if self._folders[node]:
+                return self.folder_icon
+            thumbnail = self._thumbnails.get(node)
+            return thumbnail[1] if thumbnail is not None else self.file_icon
+        if role == PATH_ROLE:
+            return self._get_node_path(node)
+        if role == FOLDER_ROLE:
+            return bool(self._folders[node])
+        return None
+
+    # @override
+    def flags(self, index):
+        """Returns the flags of an index, folders and the empty area accept drops
+
+        :param index: The index
+        """
+        if not index.isValid():
+            return Qt.ItemIsDropEnabled
+        flags = Qt.ItemIsEnabled | Qt.ItemIsSelectable | Qt.ItemIsDragEnabled
+        if self._folders[index.internalId()]:
+            flags |= Qt.ItemIsDropEnabled
+        return flags
+
+    # @override
+    def supportedDropActions(self):
+        """Returns the supported drop actions"""
+        return Qt.MoveAction | Qt.CopyAction
+
+    def _get_node(self, index):
+        """Returns the node of an index, the root for an invalid index
+
+        :param index: The index
+        """
+        return index.internalId() if index.isValid() else _ROOT
+
+    def _get_node_path(self, node):
+        """Builds the path of a node from its segments
+
+        :param node: The node
+        """
+        segments = []
+        while node > _ROOT:
+            segments.append(self._names[node])
+            node = self._parents[node]
+        segments.append(self._folder)
+        return os.path.join(*reversed(segments))
+
+    def _find_node(self, path, fetch):
+        """Returns the node of a path or None
+
+        :param path: The path
+        :param fetch: Whether to list the folders on the way
+        """
+        if not path or not self._folder:
+            return None
+        path = os.path.normpath(path)
+        folder = os.path.normpath(self._folder)
+        if path == folder:
+            return _ROOT
+        if not path.startswith(folder.rstrip(os.sep) + os.sep):
+            return None
+        node = _ROOT
+        for segment in path[len(folder.rstrip(os.sep)) + 1:].split(os.sep):
+            if self._children[node] is None:
+                if not fetch or not self._folders[node]:
+                    return None
+                self._fetch(node)
+            node = next((child for child in self._children[node] if self._names[child] == segment), None)
+            if node is None:
+                return None
+        return node
+
+    def _fetch(self, node):
+        """Lists a folder, subfolders first, then the recipes, each sorted by name
+
+        :param node: The folder node
+        """
+        path = self._get_node_path(node)
+        try:
+            with os.scandir(path) as entries:
+                entries = [(entry.is_dir(), entry.name) for entry in entries]
+        except OSError as ex:
+            logging.error('Could not list directory "%s": %s', path, ex)
+            entries = []
+        entries = sorted(((not is_dir, name.casefold(), name) for is_dir, name in entries if is_dir or name.endswith(self.suffix)))
+        parent = self.createIndex(self._rows[node], 0, node) if node != _ROOT else QModelIndex()
+        first = len(self._names)
+        if entries:
+            self.beginInsertRows(parent, 0, len(entries) - 1)
+        for row, (is_file, _key, name) in enumerate(entries):
+            self._parents.append(node)
+            self._rows.append(row)
+            self._folders.append(0 if is_file else 1)
+            self._names.append(sys.intern(name))
+            self._children.append(None if not is_file else [])
+            if is_file:
+                self._nr_recipes += 1
+        self._children[node] = list(range(first, len(self._names)))
+        if entries:
+            self.endInsertRows()
+
+class RecipeTreeFilterModel(QSortFilterProxyModel):
+    """Shows the recipes whose names contain a text, with the folders leading to them"""
+
+    def __init__(self):
+        """Initializes the model"""
+        super(RecipeTreeFilterModel, self).__init__()
+
+        logging.debug('Initializing RecipeTreeFilterModel')
+
+        self._text = ''
+        # Folders are shown if any recipe in them is shown
+        self.setRecursiveFilteringEnabled(True)
+
+    def get_filter_text(self):
+        """Returns the filter text"""
+        return self._text
+
+    def set_filter_text(self, text):
+        """Shows only the recipes whose names contain a text, case insensitive
+
+        :param text: The text, empty to show all
+        """
+        text = text.strip().casefold()
+        if text != self._text:
+            self._text = text
+            self.invalidateFilter()
+
+    # @override
+    def filterAcceptsRow(self, source_row, source_parent):
+        """Returns whether a row is shown
+
+        :param source_row: The row in the source model
+        :param source_parent: The parent index in the source model
+        """
+        if not self._text:
+            return True
+        index = self.sourceModel().index(source_row, 0, source_parent)
+        if index.data(FOLDER_ROLE):
+            return False
+        return self._text in index.data(Qt.DisplayRole).casefold()
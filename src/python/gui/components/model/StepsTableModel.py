@@ -14,6 +14,7 @@ from PyQt5.QtCore import Qt, QVariant, QModelIndex, QAbstractTableModel
 from PyQt5.QtGui import QColor
 
 from lib.Colors import COLOR_GRAY_LIGHT
+from lib.Tracing import traced
 
 class StepsTableModel(QAbstractTableModel):
     """StepsTableModel"""
@@ -56,6 +57,7 @@ class StepsTableModel(QAbstractTableModel):
             return QVariant()
 
     # @override
+    @traced('StepsTableModel.setData')
     def setData(self, index, value, _role):
         """setData
 
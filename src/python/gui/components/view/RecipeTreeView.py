@@ -0,0 +1,54 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+#
+# Copyright 2022 Denis Meyer
+#
+# This file is part of Rezepte.
+#
+
+"""RecipeTreeView"""
+
+import logging
+
+from PyQt5.QtWidgets import QTreeView
+
+from gui.components.model.RecipeTreeModel import PATH_ROLE
+
+class RecipeTreeView(QTreeView):
+    """RecipeTreeView"""
+
+    def __init__(self, cb_dropped=None):
+        """Initializes the tree view
+        :param cb_dropped: Dropped event callback with (source path, destination path or None)
+        """
+        super(RecipeTreeView, self).__init__()
+
+        self.cb_dropped = cb_dropped
+
+        self.setHeaderHidden(True)
+        self.setUniformRowHeights(True)
+
+    # @override
+    def dropEvent(self, event):
+        """dropEvent
+
+        :param event: event
+        """
+        logging.debug('Drop Event')
+
+        source_path = None
+        destination_path = None
+
+        source = event.source()
+        if source is self and self.currentIndex().isValid():
+            source_path = self.currentIndex().data(PATH_ROLE)
+
+        destination = self.indexAt(event.pos())
+        if destination.isValid():
+            destination_path = destination.data(PATH_ROLE)
+
+        if source_path:
+            logging.info('Dropped an item')
+            event.accept()
+            if self.cb_dropped:
+                self.cb_dropped(source_path, destination_path)
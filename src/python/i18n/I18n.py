@@ -9,7 +9,9 @@
 """The I18n"""
 
 import logging
+from types import MappingProxyType
 
+from lib.Metrics import metrics_count
 from lib.Utils import load_languages, load_i18n
 
 class I18n():
@@ -25,7 +27,9 @@ class I18n():
 
         self.languages = load_languages(self.basedir)
         self.language_main = lang
-        self._translations = {}
+        self._tables = {}
+        self._translations = MappingProxyType({})
+        self._listeners = []
 
         self._init()
 
@@ -34,32 +38,60 @@ class I18n():
         if not self.language_main in self.languages:
             logging.warning('Language "%s" not found, falling back to "%s"', self.language_main, self.languages[0])
             self.language_main = self.languages[0]
-        lang = self.languages[self.languages.index(self.language_main)]
-        self._load_language(lang)
+        self._translations = self._get_table(self.language_main)
 
-    def _load_language(self, lang):
-        """Loads a language"""
-        translations = load_i18n(self.basedir, lang)
-        for key, val in translations.items():
-            self._translations[key] = val
+    def _get_table(self, lang):
+        """Returns the (read-only) translation table of a language, loading it on first use
+
+        :param lang: The language
+        """
+        table = self._tables.get(lang)
+        if table is None:
+            table = MappingProxyType(dict(load_i18n(self.basedir, lang)))
+            self._tables[lang] = table
+        return table
+
+    def add_language_changed_listener(self, listener):
+        """Registers a callback that is called with the new language after the language changed
+
+        :param listener: The callback
+        """
+        if listener not in self._listeners:
+            self._listeners.append(listener)
+
+    def remove_language_changed_listener(self, listener):
+        """Unregisters a language changed callback
+
+        :param listener: The callback
+        """
+        if listener in self._listeners:
+            self._listeners.remove(listener)
 
     def change_language(self, lang):
         """Changes the language
-        
+
         :param lang: The language
         """
+        if lang == self.language_main:
+            return
+
         logging.info('Changing language to %s', lang)
         self.language_main = lang
         self._init()
 
+        for listener in list(self._listeners):
+            listener(self.language_main)
+
     def translate(self, key, default=''):
         """Returns the value for the given key or - if not found - a default value
 
         :param key: The key to be translated
         :param default: The default if no value could be found for the key
         """
+        metrics_count('i18n.translate')
         try:
             return self._translations[key]
         except KeyError as exception:
+            metrics_count('i18n.translate.missing')
             logging.error('Returning default for key "%s": "%s"', key, exception)
             return default
@@ -30,26 +30,69 @@ _app_config = {
     'info.length.max': 80,
     'window.recipe.width': 600,
     'window.recipe.height': 800,
+    'window.recipe.recycle': 2,
+    'window.recipe.tabs': True,
+    'quickopen.results': 50,
+    'quickopen.candidates': 200,
+    'table.resize.precision': 0,
+    'servings.max': 999,
+    'servings.scale.max_factor': 4,
+    'startup.profile': False,
+    'metrics.enabled': False,
+    'tracing.enabled': False,
+    'tracing.file': str(Path.home()) + '/Recipes/traces/trace-' + time.strftime('%d-%m-%Y-%H-%M-%S') + '.json',
+    'tracing.max_events': 1000000,
+    'stalls.detect': False,
+    'stalls.threshold': 150,
+    'stalls.interval': 100,
+    'resources.bundle': True,
+    'index.persist': True,
+    'index.file': str(Path.home()) + '/Recipes/index/recipes.json',
+    'duplicates.threshold': 0.8,
+    'similar.enabled': True,
+    'similar.count': 10,
+    'similar.delay': 300,
+    'tree.filter.delay': 200,
+    'cache.pixmap.size': 64,
+    'cache.icon.size': 64,
+    'cache.thumbnail.size': 512,
+    'cache.recipe.size': 32,
+    'preload.enabled': True,
+    'preload.delay': 100,
+    'preload.workers': 2,
+    'preload.warm': 10,
+    'recent.size': 20,
+    'recent.file': str(Path.home()) + '/Recipes/index/recent.json',
+    'thumbnails.folder': str(Path.home()) + '/Recipes/thumbnails',
+    'thumbnails.workers': 4,
+    'thumbnails.tree': True,
+    'thumbnails.tree.size': 24,
+    'thumbnails.recipe.size': 240,
     'logging.log_to_file': False,
     'logging.loglevel': 'INFO',
+    'logging.max_bytes': 5 * 1024 * 1024,
+    'logging.backup_count': 5,
     'logging.format': '[%(asctime)s] [%(levelname)-5s] [%(module)-20s:%(lineno)-4s] %(message)s',
     'logging.datefmt': '%d-%m-%Y %H:%M:%S',
     'logging.logfile': str(Path.home()) + '/Recipes/logs/application-' + time.strftime('%d-%m-%Y-%H-%M-%S') + '.log'
 }
 
-def get_loglevel():
+_loglevels = {
+    'DEBUG': logging.DEBUG,
+    'INFO': logging.INFO,
+    'WARNING': logging.WARNING,
+    'ERROR': logging.ERROR,
+    'CRITICAL': logging.CRITICAL
+}
+
+def get_loglevel(loglevel=None):
     """Returns the log level
 
+    :param loglevel: The level name, defaults to the configured one
     :return: The log level
     """
-    _loglvl = app_conf_get('logging.loglevel')
-    _lvl = logging.INFO
-    if _loglvl == 'DEBUG':
-        _lvl = logging.DEBUG
-    elif _loglvl == 'ERROR':
-        _lvl = logging.DEBUG
-
-    return _lvl
+    _loglvl = loglevel or app_conf_get('logging.loglevel')
+    return _loglevels.get(str(_loglvl).upper(), logging.INFO)
 
 def get_public_values():
     """Returns a dict with public values to write to a config file"""
@@ -60,6 +103,7 @@ def get_public_values():
             'label.text.font.size',
             'language.main',
             'recipes.folder',
+            'thumbnails.tree',
             'logging.log_to_file',
             'logging.loglevel'
             ]
@@ -0,0 +1,202 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+#
+# Copyright 2022 Denis Meyer
+#
+# This file is part of Rezepte.
+#
+
+"""Duplicates
+
+Finds near-duplicate recipes without comparing every pair. Every recipe is reduced to a set of shingles
+(its normalized ingredient names and every run of three words of its steps) and a MinHash signature of
+the set: the minimum of several random hash functions over the shingles. Two signatures agree in a
+position with the probability of the Jaccard similarity of the sets.
+
+Signatures are split into bands, recipes with an identical band land in the same bucket (locality-
+sensitive hashing). Only recipes sharing a bucket are compared, so the cost grows with the number of
+recipes and not with the number of pairs. numpy is slow to import, so this module is imported on first
+use.
+"""
+
+import logging
+import re
+import zlib
+
+import numpy as np
+
+from classes.DuplicateCluster import DuplicateCluster
+from lib.Metrics import timed
+from lib.Tracing import traced
+
+# Odd 64 bit constants combining the word hashes of a shingle
+_SHINGLE_FACTORS = (0x9e3779b97f4a7c15, 0xbf58476d1ce4e5b9, 0x94d049bb133111eb, 0xd6e8feb86659fd93)
+
+# Shingles per signature computation, bounds the size of the shingle x hash function matrix
+_CHUNK_SHINGLES = 8192
+
+# Candidate pairs per similarity computation
+_CHUNK_PAIRS = 65536
+
+_RE_WORD = re.compile(r'\w+')
+
+class _WordHashes(dict):
+    """Hashes of words, computed on first lookup"""
+
+    def __missing__(self, word):
+        """Hashes a new word, 0 is reserved for padding
+
+        :param word: The word
+        """
+        value = self[word] = zlib.crc32(word.encode('utf-8')) + 1
+        return value
+
+def get_shingles(entries, size=3):
+    """Returns the shingle hashes of recipes
+
+    Every normalized ingredient name is a shingle, as is every run of size words of a step (steps with
+    fewer words are one shingle). A recipe contains a shingle more than once if it repeats, which does not
+    change its MinHash signature.
+
+    :param entries: The RecipeIndexEntry objects
+    :param size: The number of words of a step shingle, at most 4
+    :return: (uint64 array of the shingle hashes of all recipes, start offset of every recipe in it),
+             recipes without shingles have an empty range
+    """
+    word_hashes = _WordHashes()
+    padding = [0] * (size - 1)
+    tokens = []
+    # Every ingredient and every step is a segment, shingles do not span segments
+    segment_lengths = []
+    segment_recipes = []
+    for recipe, entry in enumerate(entries):
+        for _quantity, _name, key in entry.ingredients:
+            if key:
+                tokens.append(word_hashes['i:' + key])
+                tokens.extend(padding)
+                segment_lengths.append(size)
+                segment_recipes.append(recipe)
+        for step in entry.steps:
+            words = _RE_WORD.findall(step.casefold())
+            if words:
+                tokens.extend(map(word_hashes.__getitem__, words))
+                if len(words) < size:
+                    tokens.extend(padding[:size - len(words)])
+                segment_lengths.append(max(len(words), size))
+                segment_recipes.append(recipe)
+
+    tokens = np.array(tokens, dtype=np.uint64)
+    segments = np.repeat(np.arange(len(segment_lengths)), segment_lengths)
+    recipes = np.repeat(np.array(segment_recipes, dtype=np.int64), segment_lengths)
+    nr_windows = max(len(tokens) - size + 1, 0)
+    hashes = np.zeros(nr_windows, dtype=np.uint64)
+    for i in range(size):
+        hashes += tokens[i:i + nr_windows] * np.uint64(_SHINGLE_FACTORS[i])
+    valid = segments[:nr_windows] == segments[size - 1:size - 1 + nr_windows]
+    offsets = np.searchsorted(recipes[:nr_windows][valid], np.arange(len(entries)))
+    return hashes[valid], offsets
+
+def compute_signatures(hashes, offsets, num_perm=64, seed=1):
+    """Returns the MinHash signatures of recipes
+
+    The hash functions are multiply-shift functions (a * x + b) >> 32 of the shingle hash folded to 32 bit.
+
+    :param hashes: The shingle hashes of all recipes
+    :param offsets: The start offset of every recipe in the hashes, every recipe needs at least one shingle
+    :param num_perm: The number of hash functions
+    :param seed: The seed of the hash functions, signatures are only comparable with the same seed
+    :return: uint32 array of shape (number of recipes, num_perm)
+    """
+    rng = np.random.default_rng(seed)
+    a = rng.integers(0, 1 << 63, size=num_perm, dtype=np.uint64) * np.uint64(2) + np.uint64(1)
+    b = rng.integers(0, 1 << 63, size=num_perm, dtype=np.uint64)
+    folded = (hashes ^ (hashes >> np.uint64(32))) & np.uint64(0xffffffff)
+    nr_recipes = len(offsets)
+    ends = np.append(offsets[1:], len(folded))
+    signatures = np.empty((nr_recipes, num_perm), dtype=np.uint32)
+    start = 0
+    while start < nr_recipes:
+        # Recipes of one chunk, at least one
+        end = max(int(np.searchsorted(ends, offsets[start] + _CHUNK_SHINGLES, side='right')), start + 1)
+        values = np.multiply(folded[offsets[start]:ends[end - 1], None], a[None, :])
+        np.add(values, b[None, :], out=values)
+        np.right_shift(values, np.uint64(32), out=values)
+        signatures[start:end] = np.minimum.reduceat(values, offsets[start:end] - offsets[start], axis=0)
+        start = end
+    return signatures
+
+def _get_candidate_pairs(signatures, bands):
+    """Returns the pairs of recipes sharing at least one band bucket, each member paired with the first one of the bucket
+
+    :param signatures: The signatures
+    :param bands: The number of bands
+    :return: int64 array of shape (number of pairs, 2)
+    """
+    nr_sets, num_perm = signatures.shape
+    rows = num_perm // bands
+    pairs = []
+    for band in range(bands):
+        band_signatures = np.ascontiguousarray(signatures[:, band * rows:(band + 1) * rows])
+        keys = band_signatures.view(np.dtype((np.void, band_signatures.itemsize * rows))).ravel()
+        _keys, first, inverse = np.unique(keys, return_index=True, return_inverse=True)
+        members = np.flatnonzero(first[inverse] != np.arange(nr_sets))
+        if len(members):
+            pairs.append(np.stack((first[inverse[members]], members), axis=1))
+    if not pairs:
+        return np.empty((0, 2), dtype=np.int64)
+    return np.unique(np.concatenate(pairs), axis=0)
+
+def _find(parents, i):
+    """Returns the root of a union-find set, halving the path
+
+    :param parents: The parent of every element
+    :param i: The element
+    """
+    while parents[i] != i:
+        parents[i] = parents[parents[i]]
+        i = parents[i]
+    return i
+
+@traced('find_duplicates')
+@timed('duplicates.find')
+def find_duplicates(entries, threshold=0.8, num_perm=64, bands=16):
+    """Finds clusters of near-duplicate recipes
+
+    :param entries: The RecipeIndexEntry objects
+    :param threshold: The minimum estimated Jaccard similarity of two recipes
+    :param num_perm: The number of hash functions of the signatures
+    :param bands: The number of LSH bands, more bands find pairs of lower similarity (and more candidates)
+    :return: List of DuplicateCluster, the largest first
+    """
+    entries = list(entries)
+    hashes, offsets = get_shingles(entries)
+    # Recipes without shingles are no duplicates of anything
+    has_shingles = np.diff(np.append(offsets, len(hashes))) > 0
+    entries = [entry for entry, keep in zip(entries, has_shingles) if keep]
+    if len(entries) < 2:
+        return []
+
+    signatures = compute_signatures(hashes, offsets[has_shingles], num_perm)
+    pairs = _get_candidate_pairs(signatures, bands)
+    parents = list(range(len(entries)))
+    for start in range(0, len(pairs), _CHUNK_PAIRS):
+        chunk = pairs[start:start + _CHUNK_PAIRS]
+        similarities = (signatures[chunk[:, 0]] == signatures[chunk[:, 1]]).mean(axis=1)
+        for i, j in chunk[similarities >= threshold].tolist():
+            root_i, root_j = _find(parents, i), _find(parents, j)
+            if root_i != root_j:
+                parents[max(root_i, root_j)] = min(root_i, root_j)
+    logging.debug('Compared %d candidate pairs of %d recipes', len(pairs), len(entries))
+
+    groups = {}
+    for i in range(len(entries)):
+        groups.setdefault(_find(parents, i), []).append(i)
+    clusters = []
+    for members in groups.values():
+        if len(members) < 2:
+            continue
+        members.sort(key=lambda i: entries[i].path)
+        similarity = float((signatures[members[1:]] == signatures[members[0]]).mean(axis=1).min())
+        clusters.append(DuplicateCluster([entries[i] for i in members], similarity))
+    clusters.sort(key=lambda cluster: (-len(cluster.entries), cluster.entries[0].path))
+    return clusters
@@ -0,0 +1,199 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+#
+# Copyright 2022 Denis Meyer
+#
+# This file is part of Rezepte.
+#
+
+"""FuzzyMatcher
+
+Finds the keys containing the characters of a query in order (e.g. "knbr" in "brote/knoblauchbrot"),
+fast enough to search 100k keys on every keystroke.
+
+The keys are joined into one array of character codes and, for every character, the positions it occurs
+at are kept sorted. A match is the position of the last matched character per key: typing another
+character looks up, for all matching keys at once, its next position after that one. The matches of
+every prefix of the query are kept, so typing a character only narrows the previous matches and
+deleting one goes back to them. Keys are matched in their name (after the last "/") and, only if
+there are not enough of those, in the whole key. Matching the whole keys can be done ahead while idle
+(advance), so it does not add to a keystroke.
+"""
+
+import numpy as np
+
+# Character codes are 16 bit, the few characters above (emoji) share the last code
+_MAX_CODE = 0xFFFF
+
+# Characters a word starts after
+_WORD_SEPARATORS = frozenset(' /-_.,(&+')
+
+def _code(char):
+    """Returns the code of a character"""
+    return min(ord(char), _MAX_CODE)
+
+class _Matches():
+    """The keys matching a query prefix"""
+
+    def __init__(self, keys, first, last):
+        """Initializes the matches
+
+        :param keys: The indices of the matching keys, ascending
+        :param first: The positions of the first matched character, None before the first character
+        :param last: The positions of the last matched character (or before the start)
+        """
+        self.keys = keys
+        self.first = first
+        self.last = last
+
+class FuzzyMatcher():
+    """Subsequence matching of a query against many keys"""
+
+    def __init__(self, keys):
+        """Initializes the matcher, the keys must not contain newlines
+
+        :param keys: The case folded keys, in the order of preference for equally good matches
+        """
+        self.keys = keys
+
+        text = '\n'.join(keys) + '\n'
+        codes = np.minimum(np.frombuffer(text.encode('utf-32-le'), dtype=np.uint32), _MAX_CODE).astype(np.uint16)
+        # Positions of all characters, grouped by character, ascending per character
+        self._positions = np.argsort(codes, kind='stable').astype(np.int32)
+        self._offsets = np.zeros(_MAX_CODE + 2, dtype=np.int64)
+        np.cumsum(np.bincount(codes, minlength=_MAX_CODE + 1), out=self._offsets[1:])
+
+        lengths = np.fromiter((len(key) + 1 for key in keys), dtype=np.int32, count=len(keys))
+        # Position of the newline after each key
+        self._ends = (np.cumsum(lengths, dtype=np.int64) - 1).astype(np.int32)
+        starts = self._ends - lengths + 1
+        names = starts + np.fromiter((key.rfind('/') + 1 for key in keys), dtype=np.int32, count=len(keys))
+
+        all_keys = np.arange(len(keys), dtype=np.int32)
+        # Matches per query prefix, the empty prefix matches all keys, the path matches only as far as needed
+        self._query = ''
+        self._name_matches = [_Matches(all_keys, None, names - 1)]
+        self._path_matches = [_Matches(all_keys, None, starts - 1)]
+
+    def __len__(self):
+        """Returns the number of keys"""
+        return len(self.keys)
+
+    def match(self, query, limit):
+        """Returns the best candidates among the keys containing the characters of a query in order
+
+        Keys matching in their name come first, those whose matched characters are closest together
+        before others. Then the keys matching only across folders, in key order.
+
+        :param query: The case folded query
+        :param limit: The maximum number of candidates
+        :return: The indices of the keys, numpy array
+        """
+        common = 0
+        while common < min(len(query), len(self._query)) and query[common] == self._query[common]:
+            common += 1
+        del self._name_matches[common + 1:]
+        del self._path_matches[common + 1:]
+        for char in query[common:]:
+            self._name_matches.append(self._step(self._name_matches[-1], char))
+        self._query = query
+
+        names = self._name_matches[-1]
+        if not query:
+            return names.keys[:limit]
+        # Contiguous matches first, then by the space between the characters, then in key order
+        order = (names.last - names.first).astype(np.int64) * len(self.keys) + names.keys
+        if len(order) > limit:
+            order = order[np.argpartition(order, limit)[:limit]]
+        candidates = np.sort(order) % len(self.keys)
+        if len(candidates) < limit:
+            for char in query[len(self._path_matches) - 1:]:
+                self._path_matches.append(self._step(self._path_matches[-1], char))
+            paths = self._path_matches[-1]
+            if len(paths.keys) > len(names.keys):
+                others = paths.keys
+                if len(names.keys):
+                    # Both ascending, a path match is also a name match where it is found among them
+                    others = others[np.take(names.keys, np.searchsorted(names.keys, others), mode='clip') != others]
+                candidates = np.concatenate((candidates, others[:limit - len(candidates)]))
+        return candidates
+
+    def advance(self):
+        """Matches the whole keys against one more character of the last query, e.g. while idle
+
+        :return: True if there are more characters to match, False else
+        """
+        done = len(self._path_matches) - 1
+        if done < len(self._query):
+            self._path_matches.append(self._step(self._path_matches[-1], self._query[done]))
+        return len(self._path_matches) - 1 < len(self._query)
+
+    def _step(self, matches, char):
+        """Narrows matches to the keys containing another character after the last matched one
+
+        :param matches: The _Matches of the query without the character
+        :param char: The character
+        """
+        code = _code(char)
+        positions = self._positions[self._offsets[code]:self._offsets[code + 1]]
+        if not len(positions) or not len(matches.keys):
+            empty = matches.keys[:0]
+            return _Matches(empty, empty, empty)
+        # Next position of the character, clipped to the last one if there is none (then <= last)
+        following = np.take(positions, np.searchsorted(positions, matches.last + 1), mode='clip')
+        found = (following > matches.last) & (following < self._ends[matches.keys])
+        last = following[found]
+        return _Matches(matches.keys[found], last if matches.first is None else matches.first[found], last)
+
+def fuzzy_score(query, key):
+    """Returns how well a key matches a query or None if it does not contain the characters in order
+
+    Characters in the name (after the last "/"), at the start of words and next to each other score
+    higher, spread out characters and long keys lower.
+
+    :param query: The case folded query
+    :param key: The case folded key
+    """
+    if not query:
+        return 0.0
+    name_start = key.rfind('/') + 1
+    # The query as a whole in the name or anywhere, else the first characters in the name or anywhere
+    start = key.find(query, name_start)
+    if start < 0:
+        start = key.find(query)
+    if start >= 0:
+        positions = range(start, start + len(query))
+    else:
+        positions = _find_chars(query, key, name_start) or _find_chars(query, key, 0)
+    if positions is None:
+        return None
+    score = 0.0
+    previous = -2
+    for pos in positions:
+        score += 1.0
+        if pos == 0 or key[pos - 1] in _WORD_SEPARATORS:
+            score += 2.0
+        if pos == previous + 1:
+            score += 1.5
+        if pos >= name_start:
+            score += 1.0
+        previous = pos
+    score -= 0.1 * (positions[-1] - positions[0] + 1 - len(query))
+    score -= 0.02 * len(key)
+    return score
+
+def _find_chars(query, key, start):
+    """Returns the first positions of the characters of the query in order or None
+
+    :param query: The case folded query
+    :param key: The case folded key
+    :param start: The position to search from
+    """
+    positions = []
+    for char in query:
+        start = key.find(char, start)
+        if start < 0:
+            return None
+        positions.append(start)
+        start += 1
+    return positions
@@ -10,42 +10,34 @@
 
 import logging
 
-from lib.Utils import load_pixmap, load_icon
+from lib.AppConfig import app_conf_get
+from lib.LRUCache import LRUCache
+from lib.Metrics import metrics_count, metrics_timer
+from lib.Tracing import traced
+from lib.ThumbnailLoader import ThumbnailLoader
+from lib.ImageUtils import load_pixmap, load_icon
 
 class ImageCache():
     """ImageCache"""
 
-    _cache_pixmap = {
-        'img.logo_app': None,
-        'img.logo_app-de': None,
-        'img.logo_app-en': None
-    }
-
-    _cache_icon = {
-        'img.flag.en': None,
-        'img.flag.de': None,
-        'img.icon.folder-regular': None,
-        'img.icon.file-solid': None,
-        'img.icon.select-recipe': None,
-        'img.icon.delete': None,
-        'img.icon.move': None,
-        'img.icon.create_folder': None,
-        'img.icon.create_recipe': None,
-        'img.icon.open': None,
-        'img.icon.edit': None,
-        'img.icon.about': None,
-        'img.icon.quit': None
-    }
-
-    def __init__(self, basedir):
+    def __init__(self, basedir, max_pixmaps=None, max_icons=None, max_thumbnails=None):
         """Initializes the image cache
-        
+
         :param basedir: The base path
+        :param max_pixmaps: The maximum number of cached pixmaps
+        :param max_icons: The maximum number of cached icons
+        :param max_thumbnails: The maximum number of cached recipe photo thumbnails
         """
         logging.debug('Initializing ImageCache')
 
         self.basedir = basedir
 
+        self._cache_pixmap = LRUCache('pixmap', max_pixmaps if max_pixmaps is not None else app_conf_get('cache.pixmap.size', 64))
+        self._cache_icon = LRUCache('icon', max_icons if max_icons is not None else app_conf_get('cache.icon.size', 64))
+        self._cache_thumbnail = LRUCache('thumbnail', max_thumbnails if max_thumbnails is not None else app_conf_get('cache.thumbnail.size', 512))
+
+        self._thumbnail_loader = None
+
     def get_or_load_pixmap(self, key, name, path=None):
         """Gets or, if not present, loads the image
 
@@ -53,12 +45,18 @@ class ImageCache():
         :param name: The name
         :param path: The path
         """
-        val = self.get_pixmap(key)
-        if not val:
-            self.set_pixmap(key, load_pixmap(self.basedir, name, path))
-            val = self.get_pixmap(key)
+        metrics_count('image_cache.pixmap.get')
+        return self._cache_pixmap.get_or_load(key, lambda: self._load_pixmap(name, path))
+
+    @traced('ImageCache._load_pixmap')
+    def _load_pixmap(self, name, path=None):
+        """Loads an image on a cache miss
 
-        return val
+        :param name: The name
+        :param path: The path
+        """
+        with metrics_timer('image_cache.pixmap.load'):
+            return load_pixmap(self.basedir, name, path)
 
     def _get_or_load_icon(self, key, name, path=None):
         """Gets or, if not present, loads the image
@@ -67,12 +65,18 @@ class ImageCache():
         :param name: The name
         :param path: The path
         """
-        val = self.get_icon(key)
-        if not val:
-            self.set_icon(key, load_icon(self.basedir, name, path))
-            val = self.get_icon(key)
+        metrics_count('image_cache.icon.get')
+        return self._cache_icon.get_or_load(key, lambda: self._load_icon(name, path))
+
+    @traced('ImageCache._load_icon')
+    def _load_icon(self, name, path=None):
+        """Loads an icon on a cache miss
 
-        return val
+        :param name: The name
+        :param path: The path
+        """
+        with metrics_timer('image_cache.icon.load'):
+            return load_icon(self.basedir, name, path)
 
     def get_or_load_icon(self, icdef):
         """Gets or, if not present, loads the image via IconDefinition class
@@ -88,8 +92,8 @@ class ImageCache():
         :param value: The value
         :param override: Whether to force override
         """
-        if override or not key in self._cache_pixmap or not self.get_pixmap(key):
-            self._cache_pixmap[key] = value
+        if override or not self._cache_pixmap.peek(key):
+            self._cache_pixmap.put(key, value)
 
     def set_icon(self, key, value, override=False):
         """Sets the value for the given key
@@ -98,8 +102,8 @@ class ImageCache():
         :param value: The value
         :param override: Whether to force override
         """
-        if override or not key in self._cache_icon or not self.get_icon(key):
-            self._cache_icon[key] = value
+        if override or not self._cache_icon.peek(key):
+            self._cache_icon.put(key, value)
 
     def get_pixmap(self, key, default=None):
         """Returns the value for the given key or - if not found - a default value
@@ -107,11 +111,7 @@ class ImageCache():
         :param key: The key
         :param default: The default if no value could be found for the key
         """
-        try:
-            return self._cache_pixmap[key]
-        except KeyError as exception:
-            logging.warning('Returning default for key "%s": "%s"', key, exception)
-            return default
+        return self._cache_pixmap.get(key, default)
 
     def get_icon(self, key, default=None):
         """Returns the value for the given key or - if not found - a default value
@@ -119,8 +119,37 @@ class ImageCache():
         :param key: The key
         :param default: The default if no value could be found for the key
         """
-        try:
-            return self._cache_icon[key]
-        except KeyError as exception:
-            logging.warning('Returning default for key "%s": "%s"', key, exception)
-            return default
+        return self._cache_icon.get(key, default)
+
+    def get_thumbnail_loader(self):
+        """Returns the recipe photo thumbnail loader, creating it on first use"""
+        if not self._thumbnail_loader:
+            self._thumbnail_loader = ThumbnailLoader(self._cache_thumbnail)
+        return self._thumbnail_loader
+
+    def invalidate(self, key):
+        """Removes the pixmap and icon for the given key
+
+        :param key: The key
+        """
+        self._cache_pixmap.invalidate(key)
+        self._cache_icon.invalidate(key)
+
+    def get_stats(self):
+        """Returns the statistics of all caches as list of dicts"""
+        return [self._cache_pixmap.get_stats(), self._cache_icon.get_stats(), self._cache_thumbnail.get_stats()]
+
+    def get_metrics(self):
+        """Returns the current cache values as flat dict (metrics provider)"""
+        values = {}
+        for stats in self.get_stats():
+            for key in ['size', 'max_size', 'hits', 'misses', 'hit_rate', 'evictions', 'load_time_ms']:
+                values[f'{stats["name"]}.{key}'] = stats[key]
+        return values
+
+    def log_stats(self):
+        """Logs the statistics of all caches"""
+        for stats in self.get_stats():
+            logging.info('Image cache "%s": %d/%d entries, %d hits, %d misses (%.1f %%), %d evictions, %.1f ms loading',
+                         stats['name'], stats['size'], stats['max_size'], stats['hits'], stats['misses'],
+                         stats['hit_rate'] * 100.0, stats['evictions'], stats['load_time_ms'])
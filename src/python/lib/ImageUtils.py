@@ -0,0 +1,91 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+#
+# Copyright 2022 Denis Meyer
+#
+# This file is part of Rezepte.
+#
+
+"""ImageUtils"""
+
+import os
+import logging
+
+from PyQt5.QtCore import QFile
+from PyQt5.QtGui import QPixmap, QIcon
+
+_resources_registered = False
+
+def register_resources():
+    """
+    Registers the compiled Qt resource bundle (resources_rc, generated by pyrcc5), if available
+
+    :return: True if the bundle has been registered, False else
+    """
+    global _resources_registered
+    if _resources_registered:
+        return True
+    try:
+        # Importing the generated module registers its resources
+        import resources_rc
+        _resources_registered = True
+        logging.info('Registered Qt resource bundle')
+    except ImportError:
+        logging.info('Qt resource bundle not available, loading resources from files')
+    return _resources_registered
+
+def _get_resource_path(file, base_path=None):
+    """
+    Returns the path of a file in the Qt resource bundle or None if not contained
+
+    :param file: The file
+    :param base_path: The base path
+    """
+    resource_path = f':/{base_path}/{file}' if base_path else f':/{file}'
+    return resource_path if QFile.exists(resource_path) else None
+
+def load_pixmap(basedir, file, base_path=None):
+    """
+    Loads an image, prepares it for play
+
+    :param basedir: The base path
+    :param file: The file to load from
+    :param base_path: The base path
+    """
+    if _resources_registered:
+        resource_path = _get_resource_path(file, base_path)
+        if resource_path:
+            logging.debug('Loading image "%s" from resource bundle', resource_path)
+            return QPixmap(resource_path)
+    if not base_path:
+        file_path = os.path.join(basedir, 'resources', file)
+    else:
+        file_path = os.path.join(basedir, 'resources', base_path, file)
+    logging.debug('Loading image "%s" from directory "%s"', file, file_path)
+    try:
+        return QPixmap(file_path) if os.path.exists(file_path) else None
+    except Exception as ex:
+        raise FileNotFoundError(f'Could not load image "{file_path}"') from ex
+
+def load_icon(basedir, file, base_path=None):
+    """
+    Loads an image, prepares it for play
+
+    :param basedir: The base path
+    :param file: The file to load from
+    :param base_path: The base path
+    """
+    if _resources_registered:
+        resource_path = _get_resource_path(file, base_path)
+        if resource_path:
+            logging.debug('Loading image "%s" from resource bundle', resource_path)
+            return QIcon(resource_path)
+    if not base_path:
+        file_path = os.path.join(basedir, 'resources', file)
+    else:
+        file_path = os.path.join(basedir, 'resources', base_path, file)
+    logging.debug('Loading image "%s" from directory "%s"', file, file_path)
+    try:
+        return QIcon(file_path) if os.path.exists(file_path) else None
+    except Exception as ex:
+        raise FileNotFoundError(f'Could not load image "{file_path}"') from ex
@@ -0,0 +1,215 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+#
+# Copyright 2022 Denis Meyer
+#
+# This file is part of Rezepte.
+#
+
+"""IngredientNames
+
+Normalizes ingredient names, so that the same ingredient written differently ("Mehl", " mehl ", "Eier",
+"eggs", "Äpfel", "Aepfel") maps to the same key.
+
+Names are case folded, umlauts are transliterated and plural endings of every word are stripped. The
+result is looked up in the ingredient dictionary (resources/data/ingredients.json, canonical name ->
+other spellings and translations), first as a whole, then word by word. Names not in the dictionary are
+matched through a trigram index, so small typos ("Zwibeln") still find their entry: the spellings sharing
+the most trigrams are candidates, the first one within a small edit distance is the match.
+"""
+
+import functools
+import json
+import logging
+import os
+import re
+import zlib
+from collections import Counter
+
+_BASEDIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# Minimum trigram similarity (Jaccard) of a candidate spelling
+_FUZZY_THRESHOLD = 0.3
+
+# Candidate spellings checked by edit distance
+_FUZZY_CANDIDATES = 5
+
+# Characters per allowed edit of a fuzzy match, at least one edit is allowed
+_FUZZY_CHARS_PER_EDIT = 5
+
+# Names shorter than this are only matched exactly, one edit turns too many short words into others ("Salat", "salt")
+_FUZZY_MIN_LENGTH = 6
+
+_TRANSLITERATION = str.maketrans({'ä': 'ae', 'ö': 'oe', 'ü': 'ue', 'ß': 'ss'})
+
+_RE_SEPARATORS = re.compile(r'[\s\-_/,.;:()"\']+')
+
+def fold_name(name):
+    """Returns the name case folded, with transliterated umlauts and single spaces between the words
+
+    :param name: The ingredient name
+    """
+    if not name:
+        return ''
+    return ' '.join(_RE_SEPARATORS.split(name.casefold().translate(_TRANSLITERATION))).strip()
+
+def strip_plural(word):
+    """Returns a folded word without a German or English plural ending
+
+    Only regular endings are stripped ("Tomaten", "Zwiebeln", "apples", "berries"), irregular plurals
+    ("Eier", "Äpfel") are spellings in the ingredient dictionary.
+
+    :param word: The folded word
+    """
+    if len(word) <= 3:
+        return word
+    if word.endswith(('en', 'eln', 'ern')) and len(word) > 4:
+        return word[:-1]
+    if word.endswith('ies') and len(word) > 5:
+        return word[:-3] + 'y'
+    if word.endswith(('oes', 'ches', 'shes', 'sses', 'xes')):
+        return word[:-2]
+    if word.endswith('s') and not word.endswith(('ss', 'us', 'is', 'ys')):
+        return word[:-1]
+    return word
+
+def _get_key(name):
+    """Returns the dictionary key of a name: folded, every word without plural ending
+
+    :param name: The ingredient name
+    """
+    return ' '.join(strip_plural(word) for word in fold_name(name).split())
+
+def _get_trigrams(key):
+    """Returns the trigrams of a key, padded so that the start and the end of words count
+
+    :param key: The key
+    """
+    padded = f'  {key} '
+    return {padded[i:i + 3] for i in range(len(padded) - 2)}
+
+def _get_edit_distance(a, b, limit):
+    """Returns the Levenshtein distance of two strings or limit + 1 if it is larger than limit
+
+    :param a: The first string
+    :param b: The second string
+    :param limit: The largest distance of interest
+    """
+    if abs(len(a) - len(b)) > limit:
+        return limit + 1
+    previous = list(range(len(b) + 1))
+    for i, char_a in enumerate(a, 1):
+        current = [i]
+        for j, char_b in enumerate(b, 1):
+            current.append(min(previous[j] + 1, current[j - 1] + 1, previous[j - 1] + (char_a != char_b)))
+        if min(current) > limit:
+            return limit + 1
+        previous = current
+    return previous[-1]
+
+class IngredientDictionary():
+    """Canonical ingredient names with their spellings and a trigram index of all spellings"""
+
+    def __init__(self, entries, version=''):
+        """Initializes the dictionary
+
+        :param entries: Dict canonical name -> list of other spellings
+        :param version: The version of the dictionary, keys computed with another version are outdated
+        """
+        logging.debug('Initializing IngredientDictionary')
+
+        self.version = version
+        # Key of a spelling -> key of its canonical name
+        self._canonical = {}
+        # Key of a canonical name -> canonical name
+        self._names = {}
+        for name, spellings in entries.items():
+            canonical = _get_key(name)
+            self._names.setdefault(canonical, name)
+            for spelling in [name] + list(spellings):
+                self._canonical.setdefault(_get_key(spelling), canonical)
+        self._spellings = list(self._canonical)
+        self._spelling_trigrams = [len(_get_trigrams(key)) for key in self._spellings]
+        self._index = {}
+        for i, key in enumerate(self._spellings):
+            for trigram in _get_trigrams(key):
+                self._index.setdefault(trigram, []).append(i)
+
+    def __len__(self):
+        """Returns the number of canonical names"""
+        return len(self._names)
+
+    def get_name(self, key):
+        """Returns the canonical name of a normalized name or None if not in the dictionary
+
+        :param key: The normalized name
+        """
+        return self._names.get(key)
+
+    def match(self, key):
+        """Returns the key of the canonical name of a key or None
+
+        :param key: The key (folded, without plural endings)
+        """
+        canonical = self._canonical.get(key)
+        if canonical is not None or len(key) < _FUZZY_MIN_LENGTH:
+            return canonical
+        trigrams = _get_trigrams(key)
+        counts = Counter(i for trigram in trigrams for i in self._index.get(trigram, ()))
+        candidates = sorted(((shared / (len(trigrams) + self._spelling_trigrams[i] - shared), i) for i, shared in counts.items()), reverse=True)
+        limit = max(1, len(key) // _FUZZY_CHARS_PER_EDIT)
+        for similarity, i in candidates[:_FUZZY_CANDIDATES]:
+            if similarity < _FUZZY_THRESHOLD:
+                break
+            if _get_edit_distance(key, self._spellings[i], limit) <= limit:
+                return self._canonical[self._spellings[i]]
+        return None
+
+    def normalize(self, name):
+        """Returns the normalized name: the key of the canonical name of the whole name, else the words
+        replaced by their canonical keys
+
+        :param name: The ingredient name
+        """
+        key = _get_key(name)
+        if not key:
+            return ''
+        canonical = self.match(key)
+        if canonical is not None:
+            return canonical
+        words = key.split()
+        if len(words) < 2:
+            return key
+        return ' '.join(self.match(word) or word for word in words)
+
+@functools.lru_cache(maxsize=4)
+def load_ingredient_dictionary(basedir=_BASEDIR):
+    """Loads the ingredient dictionary
+
+    :param basedir: The base path
+    """
+    file_path = os.path.join(basedir, 'resources', 'data', 'ingredients.json')
+    try:
+        with open(file_path, 'rb') as jsonfile:
+            data = jsonfile.read()
+        return IngredientDictionary(json.loads(data), version=f'{zlib.crc32(data):08x}')
+    except (OSError, ValueError) as ex:
+        logging.error('Failed loading the ingredient dictionary from "%s": %s', file_path, ex)
+        return IngredientDictionary({})
+
+@functools.lru_cache(maxsize=65536)
+def normalize_name(name):
+    """Returns the normalized name, the same for all spellings of an ingredient
+
+    :param name: The ingredient name
+    """
+    if not name:
+        return ''
+    return load_ingredient_dictionary().normalize(name)
+
+def get_canonical_name(name):
+    """Returns the canonical name of an ingredient or None if it is not in the dictionary
+
+    :param name: The ingredient name
+    """
+    return load_ingredient_dictionary().get_name(normalize_name(name))
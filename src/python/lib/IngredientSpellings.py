@@ -0,0 +1,93 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+#
+# Copyright 2022 Denis Meyer
+#
+# This file is part of Rezepte.
+#
+
+"""IngredientSpellings
+
+Finds the different spellings of the same ingredient in the cookbook ("Ei", "Eier", "eggs") and merges
+them into one by rewriting the ingredient names in the recipe files. Only the names are changed, the
+other fields of the files stay untouched.
+"""
+
+import json
+import logging
+
+from classes.SpellingGroup import SpellingGroup
+from lib.IngredientNames import get_canonical_name
+from lib.Tracing import traced
+from lib.Utils import write_json_atomic
+
+def _clean(name):
+    """Returns the name with single spaces
+
+    :param name: The ingredient name
+    """
+    return ' '.join(name.split()) if name else ''
+
+def get_spelling_groups(entries):
+    """Returns the ingredients written in more than one way
+
+    :param entries: The RecipeIndexEntry objects
+    :return: List of SpellingGroup, the most used ingredient first
+    """
+    groups = {}
+    for entry in entries:
+        for _quantity, name, key in entry.ingredients:
+            name = _clean(name)
+            if not key or not name:
+                continue
+            group = groups.get(key)
+            if group is None:
+                group = groups[key] = SpellingGroup(key, get_canonical_name(name))
+            group.spellings.setdefault(name, set()).add(entry.path)
+    groups = [group for group in groups.values() if len(group.spellings) > 1]
+    for group in groups:
+        group.spellings = {spelling: sorted(paths) for spelling, paths in sorted(group.spellings.items(), key=lambda item: (-len(item[1]), item[0]))}
+    groups.sort(key=lambda group: (-len(group.get_paths()), group.key))
+    logging.debug('Found %d ingredients with several spellings', len(groups))
+    return groups
+
+def rename_ingredients(dict_json, spellings, target):
+    """Renames the ingredients of a parsed recipe file in place
+
+    :param dict_json: The parsed JSON
+    :param spellings: The names to replace
+    :param target: The new name
+    :return: The number of renamed ingredients
+    """
+    spellings = {_clean(spelling) for spelling in spellings}
+    nr_renamed = 0
+    for ingredient in dict_json.get('ingredients', []):
+        if isinstance(ingredient, dict) and isinstance(ingredient.get('name'), str):
+            name = ingredient['name']
+            if name != target and _clean(name) in spellings:
+                ingredient['name'] = target
+                nr_renamed += 1
+    return nr_renamed
+
+@traced('merge_spellings')
+def merge_spellings(paths, spellings, target, dry_run=False):
+    """Renames the ingredients written in one of the spellings in recipe files
+
+    :param paths: The recipe paths, e.g. SpellingGroup.get_paths(spellings)
+    :param spellings: The names to replace
+    :param target: The new name
+    :param dry_run: Whether to only count the renamed ingredients
+    :return: Iterator of (path, number of renamed ingredients, error message or None)
+    """
+    target = _clean(target)
+    for path in paths:
+        try:
+            with open(path, 'r', encoding='utf-8') as jsonfile:
+                dict_json = json.load(jsonfile)
+            nr_renamed = rename_ingredients(dict_json, spellings, target)
+            if nr_renamed and not dry_run:
+                write_json_atomic(path, dict_json)
+            yield path, nr_renamed, None
+        except (OSError, ValueError, AttributeError) as ex:
+            logging.error('Could not merge ingredient spellings in "%s": %s', path, ex)
+            yield path, 0, str(ex)
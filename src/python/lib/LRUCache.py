@@ -0,0 +1,133 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+#
+# Copyright 2022 Denis Meyer
+#
+# This file is part of Rezepte.
+#
+
+"""LRUCache"""
+
+import time
+from collections import OrderedDict
+
+class LRUCache():
+    """Bounded least-recently-used cache with negative caching and hit metrics
+
+    A stored value of None marks a key as known to be missing, so the loader is not called again for it.
+    """
+
+    def __init__(self, name, max_size=128):
+        """Initializes the cache
+
+        :param name: The name (used in the stats)
+        :param max_size: The maximum number of entries, 0 or less for unbounded
+        """
+        self.name = name
+        self.max_size = max_size
+
+        self._entries = OrderedDict()
+
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.load_time = 0.0
+
+    def __len__(self):
+        """Returns the number of entries"""
+        return len(self._entries)
+
+    def __contains__(self, key):
+        """Checks whether an entry (positive or negative) for the given key exists
+
+        :param key: The key
+        """
+        return key in self._entries
+
+    def get(self, key, default=None):
+        """Returns the value for the given key or - if not found - a default value
+
+        :param key: The key
+        :param default: The default if no entry exists for the key
+        """
+        try:
+            value = self._entries[key]
+        except KeyError:
+            self.misses += 1
+            return default
+        self._entries.move_to_end(key)
+        self.hits += 1
+        return value
+
+    def peek(self, key, default=None):
+        """Returns the value for the given key without updating the recency or the statistics
+
+        :param key: The key
+        :param default: The default if no entry exists for the key
+        """
+        return self._entries.get(key, default)
+
+    def get_or_load(self, key, loader):
+        """Returns the value for the given key, loading and storing it if not present
+
+        :param key: The key
+        :param loader: Callable without arguments returning the value (or None if missing)
+        """
+        try:
+            value = self._entries[key]
+        except KeyError:
+            self.misses += 1
+            start = time.perf_counter()
+            value = loader()
+            self.load_time += time.perf_counter() - start
+            self.put(key, value)
+            return value
+        self._entries.move_to_end(key)
+        self.hits += 1
+        return value
+
+    def put(self, key, value):
+        """Stores the value for the given key, evicting the least recently used entries if full
+
+        :param key: The key
+        :param value: The value (None for a negative entry)
+        """
+        self._entries[key] = value
+        self._entries.move_to_end(key)
+        if self.max_size > 0:
+            while len(self._entries) > self.max_size:
+                self._entries.popitem(last=False)
+                self.evictions += 1
+
+    def invalidate(self, key):
+        """Removes the entry for the given key
+
+        :param key: The key
+        """
+        self._entries.pop(key, None)
+
+    def invalidate_where(self, predicate):
+        """Removes all entries whose key matches the predicate
+
+        :param predicate: Callable taking a key and returning True if the entry is to be removed
+        """
+        for key in [key for key in self._entries if predicate(key)]:
+            del self._entries[key]
+
+    def clear(self):
+        """Removes all entries"""
+        self._entries.clear()
+
+    def get_stats(self):
+        """Returns the cache statistics as dict"""
+        lookups = self.hits + self.misses
+        return {
+            'name': self.name,
+            'size': len(self._entries),
+            'max_size': self.max_size,
+            'hits': self.hits,
+            'misses': self.misses,
+            'hit_rate': (self.hits / lookups) if lookups else 0.0,
+            'evictions': self.evictions,
+            'load_time_ms': self.load_time * 1000.0
+        }
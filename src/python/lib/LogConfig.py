@@ -0,0 +1,107 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+#
+# Copyright 2022 Denis Meyer
+#
+# This file is part of Rezepte.
+#
+
+"""LogConfig
+
+The root logger only puts records into a queue, a listener thread writes them to the console and the
+(rotating) log file, so logging never blocks the GUI thread on disk writes.
+"""
+
+import atexit
+import logging
+import logging.handlers
+import os
+import queue
+
+from lib.AppConfig import app_conf_get, get_loglevel
+
+_queue = None
+_queue_handler = None
+_listener = None
+
+def _create_handlers(level, logtofile):
+    """Creates the handlers the listener thread writes to
+
+    :param level: The log level
+    :param logtofile: Flag whether to log to file
+    """
+    formatter = logging.Formatter(fmt=app_conf_get('logging.format'), datefmt=app_conf_get('logging.datefmt'))
+
+    handler_console = logging.StreamHandler()
+    handler_console.setLevel(level)
+    handler_console.setFormatter(formatter)
+    handlers = [handler_console]
+
+    if logtofile:
+        logfile = app_conf_get('logging.logfile')
+        basedir = os.path.dirname(logfile)
+        try:
+            if not os.path.exists(basedir):
+                os.makedirs(basedir)
+            handler_file = logging.handlers.RotatingFileHandler(logfile,
+                                                                maxBytes=app_conf_get('logging.max_bytes', 5 * 1024 * 1024),
+                                                                backupCount=app_conf_get('logging.backup_count', 5),
+                                                                encoding='utf-8')
+            handler_file.setLevel(level)
+            handler_file.setFormatter(formatter)
+            handlers.append(handler_file)
+        except Exception as ex:
+            logging.error('Failed creating log file "%s": %s', logfile, ex)
+
+    return handlers
+
+def init_logging(loglevel=None, logtofile=None):
+    """Sets up (or re-configures) queued logging
+
+    :param loglevel: DEBUG, INFO, WARNING, ERROR or CRITICAL, defaults to the configured level
+    :param logtofile: Flag whether to log to file, defaults to the configured flag
+    """
+    global _queue, _queue_handler, _listener
+
+    level = get_loglevel(loglevel)
+    if logtofile is None:
+        logtofile = app_conf_get('logging.log_to_file', False)
+
+    # Handlers are only touched by the listener thread, stop it before replacing them
+    stop_logging()
+
+    if not _queue:
+        _queue = queue.SimpleQueue()
+        _queue_handler = logging.handlers.QueueHandler(_queue)
+        atexit.register(stop_logging)
+
+    root = logging.getLogger()
+    for handler in list(root.handlers):
+        if handler is not _queue_handler:
+            root.removeHandler(handler)
+            handler.close()
+    if _queue_handler not in root.handlers:
+        root.addHandler(_queue_handler)
+    root.setLevel(level)
+
+    _listener = logging.handlers.QueueListener(_queue, *_create_handlers(level, logtofile), respect_handler_level=True)
+    _listener.start()
+
+    logging.info('Log level "%s"%s', logging.getLevelName(level), ', logging to file' if logtofile else '')
+
+def update_logging(loglevel, logtofile=False):
+    """Updates the logging, e.g. after the configuration has been loaded
+
+    :param loglevel: DEBUG, INFO, WARNING, ERROR or CRITICAL
+    :param logtofile: Flag whether to log to file
+    """
+    init_logging(loglevel, logtofile)
+
+def stop_logging():
+    """Writes all queued records and stops the listener thread"""
+    global _listener
+    if _listener:
+        _listener.stop()
+        for handler in _listener.handlers:
+            handler.close()
+        _listener = None
@@ -0,0 +1,224 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+#
+# Copyright 2022 Denis Meyer
+#
+# This file is part of Rezepte.
+#
+
+"""Metrics
+
+Counters, timers and histograms for the hot paths. While disabled, every instrumented call only checks a
+module flag, so the instrumentation stays in production builds.
+"""
+
+import bisect
+import functools
+import json
+import logging
+import threading
+import time
+from contextlib import contextmanager
+
+# Upper bounds of the histogram buckets (1-2-5 series), values above the last bound go into an overflow bucket
+_DEFAULT_BOUNDS = tuple(base * 10 ** exp for exp in range(-3, 5) for base in (1, 2, 5))
+
+_enabled = False
+_lock = threading.Lock()
+_counters = {}
+_histograms = {}
+_providers = {}
+
+class Histogram():
+    """Histogram with fixed buckets, count, sum, minimum and maximum"""
+
+    def __init__(self, name, unit='', bounds=_DEFAULT_BOUNDS):
+        """Initializes the histogram
+
+        :param name: The name
+        :param unit: The unit of the values, e.g. "ms"
+        :param bounds: The ascending upper bounds of the buckets
+        """
+        self.name = name
+        self.unit = unit
+        self.bounds = bounds
+        self.buckets = [0] * (len(bounds) + 1)
+        self.count = 0
+        self.sum = 0.0
+        self.min = None
+        self.max = None
+
+    def add(self, value):
+        """Adds a value
+
+        :param value: The value
+        """
+        with _lock:
+            self.buckets[bisect.bisect_left(self.bounds, value)] += 1
+            self.count += 1
+            self.sum += value
+            if self.min is None or value < self.min:
+                self.min = value
+            if self.max is None or value > self.max:
+                self.max = value
+
+    def percentile(self, percent):
+        """Returns an estimate of a percentile: the upper bound of the bucket it falls into (capped at the maximum)
+
+        :param percent: The percentile, 0 - 100
+        """
+        if not self.count:
+            return None
+        rank = percent / 100.0 * self.count
+        seen = 0
+        for i, nr_values in enumerate(self.buckets):
+            seen += nr_values
+            if seen >= rank and nr_values:
+                return min(self.bounds[i], self.max) if i < len(self.bounds) else self.max
+        return self.max
+
+    def as_obj(self):
+        """Returns the histogram as dict"""
+        return {
+            'unit': self.unit,
+            'count': self.count,
+            'sum': self.sum,
+            'mean': self.sum / self.count if self.count else None,
+            'min': self.min,
+            'max': self.max,
+            'p50': self.percentile(50),
+            'p90': self.percentile(90),
+            'p99': self.percentile(99),
+            'buckets': [[bound, nr_values] for bound, nr_values in zip(list(self.bounds) + ['inf'], self.buckets) if nr_values]
+        }
+
+def enable_metrics(enabled=True):
+    """Enables or disables recording
+
+    :param enabled: Whether to record metrics
+    """
+    global _enabled
+    _enabled = enabled
+    logging.info('Metrics %s', 'enabled' if enabled else 'disabled')
+
+def is_metrics_enabled():
+    """Returns whether metrics are recorded"""
+    return _enabled
+
+def get_histogram(name, unit='', bounds=_DEFAULT_BOUNDS):
+    """Returns the histogram with the given name, creating it if not present
+
+    :param name: The name
+    :param unit: The unit of the values
+    :param bounds: The ascending upper bounds of the buckets
+    """
+    histogram = _histograms.get(name)
+    if histogram is None:
+        with _lock:
+            histogram = _histograms.setdefault(name, Histogram(name, unit, bounds))
+    return histogram
+
+def metrics_count(name, value=1):
+    """Increments a counter
+
+    :param name: The name
+    :param value: The increment
+    """
+    if not _enabled:
+        return
+    with _lock:
+        _counters[name] = _counters.get(name, 0) + value
+
+def metrics_observe(name, value, unit=''):
+    """Adds a value to a histogram
+
+    :param name: The name
+    :param value: The value
+    :param unit: The unit of the value
+    """
+    if not _enabled:
+        return
+    get_histogram(name, unit).add(value)
+
+@contextmanager
+def metrics_timer(name):
+    """Records the duration of the block in the timer (histogram in ms) with the given name
+
+    :param name: The name
+    """
+    if not _enabled:
+        yield
+        return
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        get_histogram(name, 'ms').add((time.perf_counter() - start) * 1000.0)
+
+def timed(name):
+    """Decorator recording the duration of every call in the timer with the given name
+
+    :param name: The name
+    """
+    def decorator(func):
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            if not _enabled:
+                return func(*args, **kwargs)
+            start = time.perf_counter()
+            try:
+                return func(*args, **kwargs)
+            finally:
+                get_histogram(name, 'ms').add((time.perf_counter() - start) * 1000.0)
+        return wrapper
+    return decorator
+
+def register_metrics_provider(name, provider):
+    """Registers a callable returning a dict of current values (gauges), e.g. cache sizes
+
+    :param name: The name, used as prefix of the values
+    :param provider: Callable without arguments returning a flat dict
+    """
+    _providers[name] = provider
+
+def unregister_metrics_provider(name):
+    """Unregisters a provider
+
+    :param name: The name
+    """
+    _providers.pop(name, None)
+
+def get_metrics():
+    """Returns a snapshot of all metrics as dict"""
+    gauges = {}
+    for name, provider in list(_providers.items()):
+        try:
+            for key, value in provider().items():
+                gauges[f'{name}.{key}'] = value
+        except Exception as ex:
+            logging.error('Failed to get metrics from provider "%s": %s', name, ex)
+    with _lock:
+        counters = dict(_counters)
+        histograms = list(_histograms.values())
+    return {
+        'enabled': _enabled,
+        'timestamp': time.strftime('%Y-%m-%dT%H:%M:%S'),
+        'counters': counters,
+        'histograms': {histogram.name: histogram.as_obj() for histogram in histograms},
+        'gauges': gauges
+    }
+
+def reset_metrics():
+    """Removes all recorded counters and histograms"""
+    with _lock:
+        _counters.clear()
+        _histograms.clear()
+
+def export_metrics(path):
+    """Writes a snapshot of all metrics as JSON
+
+    :param path: The file path
+    """
+    logging.info('Exporting metrics to "%s"', path)
+    with open(path, 'w', encoding='utf-8') as jsonfile:
+        json.dump(get_metrics(), jsonfile, indent=4)
@@ -0,0 +1,185 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+#
+# Copyright 2022 Denis Meyer
+#
+# This file is part of Rezepte.
+#
+
+"""Nutrition
+
+Computes the nutrition values of recipes from the nutrient table (resources/data/nutrients.json, values
+per 100 g, "piece" is the weight of one piece in g). Ingredient names are matched to table entries by
+their normalized name, then by their words, last word first ("kalte Milch" -> "milch").
+
+The amounts (g) of a batch of recipes form a recipe x table entry matrix, multiplied with the
+table entry x nutrient matrix in one product. numpy is slow to import, so this module is imported on
+first use.
+"""
+
+import functools
+import json
+import logging
+import os
+import zlib
+
+import numpy as np
+
+from classes.Nutrition import Nutrition
+from lib.IngredientNames import load_ingredient_dictionary, normalize_name
+from lib.Tracing import traced
+from lib.Metrics import timed
+from lib.UnitConversion import UNIT_FACTORS, get_density
+
+NUTRIENTS = ('kcal', 'protein', 'fat', 'carbs')
+
+# Density (g/ml) of volumes of ingredients without a known density
+_DEFAULT_DENSITY = 1.0
+
+# Weight (g) of small units that do not depend on the ingredient
+_UNIT_GRAMS = {
+    'pinch': 0.4,
+    'knife tip': 0.5,
+    'dash': 5.0,
+    'drop': 0.05
+}
+
+# Units measured in pieces of the ingredient
+_PIECE_UNITS = {None, 'piece', 'clove'}
+
+# Recipes per matrix product, bounds the size of the amount matrix
+_BATCH_SIZE = 4096
+
+class NutrientTable():
+    """Nutrient table"""
+
+    def __init__(self, entries, version=''):
+        """Initializes the table
+
+        :param entries: Dict normalized name -> {"kcal", "protein", "fat", "carbs" per 100 g, optional "piece" in g}
+        :param version: The version of the table, cached values computed with another version are outdated
+        """
+        logging.debug('Initializing NutrientTable')
+
+        self.version = version
+        self.names = list(entries)
+        # Spellings of the same ingredient share the first entry
+        self._indices = {}
+        for i, name in enumerate(self.names):
+            self._indices.setdefault(normalize_name(name), i)
+        # Values per g
+        self.matrix = np.array([[entries[name].get(nutrient, 0.0) / 100.0 for nutrient in NUTRIENTS] for name in self.names],
+                               dtype=np.float64).reshape(len(self.names), len(NUTRIENTS))
+        self.piece_grams = [entries[name].get('piece') for name in self.names]
+        self._matches = {}
+
+    def __len__(self):
+        """Returns the number of entries"""
+        return len(self.names)
+
+    def match(self, key):
+        """Returns the index of the table entry of an ingredient or None
+
+        :param key: The normalized ingredient name
+        """
+        index = self._matches.get(key, -1)
+        if index != -1:
+            return index
+        index = self._indices.get(key)
+        if index is None:
+            for word in reversed(key.split()):
+                index = self._indices.get(word)
+                if index is not None:
+                    break
+        self._matches[key] = index
+        return index
+
+@functools.lru_cache(maxsize=4)
+def load_nutrient_table(basedir):
+    """Loads the nutrient table
+
+    :param basedir: The base path
+    """
+    file_path = os.path.join(basedir, 'resources', 'data', 'nutrients.json')
+    try:
+        with open(file_path, 'rb') as jsonfile:
+            data = jsonfile.read()
+        # Ingredients are matched by normalized name, another dictionary can match them differently
+        return NutrientTable(json.loads(data), version=f'{zlib.crc32(data):08x}-{load_ingredient_dictionary().version}')
+    except (OSError, ValueError) as ex:
+        logging.error('Failed loading nutrients from "%s": %s', file_path, ex)
+        return NutrientTable({})
+
+def _get_grams(quantity, key, index, table, densities):
+    """Returns the amount of an ingredient in g or None if unknown
+
+    :param quantity: The parsed Quantity
+    :param key: The normalized name
+    :param index: The index of the table entry
+    :param table: The NutrientTable
+    :param densities: The density table or None
+    """
+    if quantity.value is None:
+        return None
+    value = quantity.value if quantity.value_max is None else (quantity.value + quantity.value_max) / 2
+    unit = quantity.unit
+    if unit in _PIECE_UNITS:
+        grams = table.piece_grams[index]
+        return value * grams if grams else None
+    if unit in _UNIT_GRAMS:
+        return value * _UNIT_GRAMS[unit]
+    factor = UNIT_FACTORS.get(unit)
+    if factor is None:
+        return None
+    dimension, factor = factor
+    if dimension == 'volume':
+        density = get_density(key, densities) if densities else None
+        factor *= density['density'] if density else _DEFAULT_DENSITY
+    return value * factor
+
+@traced('compute_nutrition')
+@timed('nutrition.compute')
+def compute_nutrition(ingredient_lists, table, densities=None):
+    """Computes the nutrition values of several recipes in one batch
+
+    :param ingredient_lists: Per recipe the list of (parsed Quantity, name, normalized name), e.g. RecipeIndexEntry.ingredients
+    :param table: The NutrientTable
+    :param densities: The density table, volumes of unknown density are taken as water
+    :return: List of Nutrition, one per recipe
+    """
+    rows = []
+    cols = []
+    grams = []
+    nr_ingredients = []
+    nr_missing = []
+    for row, ingredients in enumerate(ingredient_lists):
+        missing = 0
+        for quantity, _name, key in ingredients:
+            index = table.match(key) if key else None
+            amount = _get_grams(quantity, key, index, table, densities) if index is not None else None
+            if amount is None:
+                missing += 1
+                continue
+            rows.append(row)
+            cols.append(index)
+            grams.append(amount)
+        nr_ingredients.append(len(ingredients))
+        nr_missing.append(missing)
+
+    nr_recipes = len(nr_ingredients)
+    nr_entries = len(table)
+    totals = np.zeros((nr_recipes, len(NUTRIENTS)))
+    if rows:
+        rows = np.array(rows, dtype=np.int64)
+        cols = np.array(cols, dtype=np.int64)
+        grams = np.array(grams, dtype=np.float64)
+        for start in range(0, nr_recipes, _BATCH_SIZE):
+            end = min(start + _BATCH_SIZE, nr_recipes)
+            lo, hi = np.searchsorted(rows, (start, end))
+            # Recipe x table entry amounts, the same entry in several ingredients is summed up
+            amounts = np.bincount((rows[lo:hi] - start) * nr_entries + cols[lo:hi], weights=grams[lo:hi],
+                                  minlength=(end - start) * nr_entries).reshape(end - start, nr_entries)
+            totals[start:end] = amounts @ table.matrix
+
+    return [Nutrition(*(float(value) for value in values), nr_ingredients=nr_ingredients[i], nr_missing=nr_missing[i])
+            for i, values in enumerate(totals)]
@@ -0,0 +1,191 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+#
+# Copyright 2022 Denis Meyer
+#
+# This file is part of Rezepte.
+#
+
+"""QuantityParser
+
+Parses free text ingredient quantities like "125 g", "1 1/2 kg", "0,5 l", "1.000 g", "2-3 EL", "ca. 200 g"
+or "½ Packung" into prefix, value, unit and remainder. The regular expressions are compiled once and
+results are cached per text, most quantities of a cookbook repeat.
+"""
+
+import functools
+import re
+
+from classes.Quantity import Quantity
+
+# Canonical unit -> aliases (lower case, German and English, singular and plural)
+UNITS = {
+    'mg': ['mg', 'milligramm', 'milligram', 'milligrams'],
+    'g': ['g', 'gr', 'gramm', 'gram', 'grams', 'gramme', 'grammes'],
+    'kg': ['kg', 'kilo', 'kilos', 'kilogramm', 'kilogram', 'kilograms'],
+    'oz': ['oz', 'ounce', 'ounces', 'unze', 'unzen'],
+    'lb': ['lb', 'lbs', 'pound', 'pounds', 'pfund'],
+    'ml': ['ml', 'milliliter', 'millilitre', 'milliliters', 'millilitres'],
+    'cl': ['cl', 'zentiliter', 'centiliter', 'centilitre'],
+    'dl': ['dl', 'deziliter', 'deciliter', 'decilitre'],
+    'l': ['l', 'ltr', 'liter', 'litre', 'liters', 'litres'],
+    'fl oz': ['fl oz', 'fl. oz', 'fluid ounce', 'fluid ounces'],
+    'tsp': ['tl', 'teelöffel', 'tsp', 'tsps', 'teaspoon', 'teaspoons'],
+    'tbsp': ['el', 'esslöffel', 'eßlöffel', 'tbsp', 'tbsps', 'tbs', 'tablespoon', 'tablespoons'],
+    'cup': ['cup', 'cups', 'tasse', 'tassen'],
+    'pinch': ['prise', 'prisen', 'pinch', 'pinches'],
+    'knife tip': ['msp', 'messerspitze', 'messerspitzen'],
+    'dash': ['schuss', 'spritzer', 'dash', 'dashes'],
+    'piece': ['stück', 'stk', 'stck', 'st', 'piece', 'pieces', 'pc', 'pcs'],
+    'pack': ['packung', 'packungen', 'päckchen', 'pck', 'pkg', 'pack', 'packs', 'package', 'packages', 'packet', 'packets'],
+    'can': ['dose', 'dosen', 'can', 'cans', 'tin', 'tins'],
+    'jar': ['glas', 'gläser', 'jar', 'jars'],
+    'tub': ['becher', 'tub', 'tubs'],
+    'clove': ['zehe', 'zehen', 'clove', 'cloves'],
+    'bunch': ['bund', 'bunch', 'bunches'],
+    'slice': ['scheibe', 'scheiben', 'slice', 'slices'],
+    'handful': ['handvoll', 'hand voll', 'handful', 'handfuls'],
+    'sprig': ['zweig', 'zweige', 'sprig', 'sprigs'],
+    'leaf': ['blatt', 'blätter', 'leaf', 'leaves'],
+    'drop': ['tropfen', 'drop', 'drops']
+}
+
+_UNIT_ALIASES = {alias: unit for unit, aliases in UNITS.items() for alias in aliases}
+
+_VULGAR_FRACTIONS = {
+    '½': 1 / 2, '⅓': 1 / 3, '⅔': 2 / 3, '¼': 1 / 4, '¾': 3 / 4,
+    '⅕': 1 / 5, '⅖': 2 / 5, '⅗': 3 / 5, '⅘': 4 / 5, '⅙': 1 / 6, '⅚': 5 / 6, '⅛': 1 / 8, '⅜': 3 / 8, '⅝': 5 / 8, '⅞': 7 / 8
+}
+
+_VULGAR = '[' + ''.join(_VULGAR_FRACTIONS.keys()) + ']'
+# Mixed fraction ("1 1/2", "1½"), fraction ("1/2", "½"), German grouped integer ("1.000", "1.000,5")
+# or decimal ("1", "1.5", "1,5")
+_NUMBER = (r'(?:\d+\s+\d+\s*/\s*\d+'
+           r'|\d+\s*/\s*\d+'
+           r'|\d*\s*' + _VULGAR +
+           r'|[1-9]\d{0,2}(?:\.\d{3})+(?:,\d+)?(?![.\d])'
+           r'|\d+(?:[.,]\d+)?)')
+_RANGE = r'(?:-|–|bis|to)'
+# The unit may be repeated before the upper bound of a range ("1 g bis 2 g")
+_QUANTITY_RE = re.compile(r'^\s*(?:(?P<prefix>ca\.?|circa|etwa|approx\.?|about)\s*)?'
+                          r'(?P<value>' + _NUMBER + r')'
+                          r'(?:(?:\s*(?P<unit_min>[^\W\d_]+\.?)(?=\s*' + _RANGE + r'\s*\d))?'
+                          r'\s*' + _RANGE + r'\s*(?P<value_max>' + _NUMBER + r'))?'
+                          r'\s*(?P<rest>.*?)\s*$', re.IGNORECASE | re.DOTALL)
+_NUMBER_GROUPED_RE = re.compile(r'^[1-9]\d{0,2}(?:\.\d{3})+(?:,\d+)?$')
+_NUMBER_MIXED_RE = re.compile(r'^(\d+)\s+(\d+)\s*/\s*(\d+)$')
+_NUMBER_FRACTION_RE = re.compile(r'^(\d+)\s*/\s*(\d+)$')
+# One or two words (e.g. "fl oz"), each optionally followed by a dot
+_UNIT_RE = re.compile(r'^([^\W\d_]+\.?)(?:\s+([^\W\d_]+\.?))?(?=[\s,;(]|$)')
+
+_EMPTY = Quantity('')
+
+# Remainders starting with these follow the unit without a space
+_PUNCTUATION = ',;.:)'
+
+def _parse_number(text):
+    """Converts a matched number to float
+
+    :param text: The number text
+    """
+    if text[-1] in _VULGAR_FRACTIONS:
+        whole = text[:-1].strip()
+        return (int(whole) if whole else 0) + _VULGAR_FRACTIONS[text[-1]]
+    match = _NUMBER_MIXED_RE.match(text)
+    if match:
+        denominator = int(match.group(3))
+        return int(match.group(1)) + int(match.group(2)) / denominator if denominator else None
+    match = _NUMBER_FRACTION_RE.match(text)
+    if match:
+        denominator = int(match.group(2))
+        return int(match.group(1)) / denominator if denominator else None
+    if _NUMBER_GROUPED_RE.match(text):
+        text = text.replace('.', '')
+    return float(text.replace(',', '.'))
+
+def _parse_unit(rest):
+    """Splits the rest into canonical unit, unit as written and remainder
+
+    :param rest: The text following the value
+    """
+    match = _UNIT_RE.match(rest)
+    if not match:
+        return None, '', rest
+    if match.group(2):
+        unit_text = match.group(0)
+        unit = _UNIT_ALIASES.get(' '.join(unit_text.lower().split()).rstrip('.'))
+        if unit:
+            return unit, unit_text, rest[match.end():].strip()
+    unit_text = match.group(1)
+    unit = _UNIT_ALIASES.get(unit_text.lower().rstrip('.'))
+    if unit:
+        return unit, unit_text, rest[len(unit_text):].strip()
+    return None, '', rest
+
+@functools.lru_cache(maxsize=65536)
+def parse_quantity(text):
+    """Parses a quantity text, the result is cached and shared
+
+    :param text: The quantity text, e.g. "1 1/2 kg"
+    """
+    if not text or not isinstance(text, str):
+        return _EMPTY
+    match = _QUANTITY_RE.match(text)
+    if not match:
+        return Quantity(text, remainder=text.strip())
+    value = _parse_number(match.group('value'))
+    value_max = _parse_number(match.group('value_max')) if match.group('value_max') else None
+    if value is None:
+        return Quantity(text, remainder=text.strip())
+    prefix = match.group('prefix') or ''
+    unit, unit_text, remainder = _parse_unit(match.group('rest'))
+    unit_min = match.group('unit_min')
+    if unit_min and (unit is None or _UNIT_ALIASES.get(unit_min.lower().rstrip('.')) != unit):
+        # Not the same unit twice, no range ("1 Dose bis 2 g" is a value with a remainder)
+        value_max = None
+        unit, unit_text, remainder = _parse_unit(text[match.end('value'):].strip())
+    return Quantity(text, value, value_max, unit, unit_text, remainder, prefix)
+
+def get_parser_stats():
+    """Returns the cache statistics of the parser"""
+    info = parse_quantity.cache_info()
+    return {'hits': info.hits, 'misses': info.misses, 'size': info.currsize, 'max_size': info.maxsize}
+
+def format_value(value, decimal_separator='.'):
+    """Formats a numeric value with at most two decimals, large values are rounded to integers
+
+    :param value: The value
+    :param decimal_separator: The decimal separator
+    """
+    if abs(value) >= 100:
+        return str(int(round(value)))
+    text = f'{value:.2f}'.rstrip('0').rstrip('.')
+    return text.replace('.', decimal_separator)
+
+def scale_quantity(quantity, factor, decimal_separator='.'):
+    """Returns the quantity text with the value scaled by the factor, quantities without value are returned unchanged
+
+    :param quantity: The parsed Quantity
+    :param factor: The factor
+    :param decimal_separator: The decimal separator
+    """
+    if factor == 1 or quantity.value is None:
+        return quantity.text
+    value = format_value(quantity.value * factor, decimal_separator)
+    if quantity.value_max is not None:
+        value += '-' + format_value(quantity.value_max * factor, decimal_separator)
+    return format_quantity(quantity, value, quantity.unit_text)
+
+def format_quantity(quantity, value, unit_text):
+    """Returns the text of a quantity with another value and unit, keeping its prefix and remainder as written
+
+    :param quantity: The parsed Quantity
+    :param value: The formatted value
+    :param unit_text: The unit text, may be empty
+    """
+    parts = [quantity.prefix, value, unit_text]
+    text = ' '.join(part for part in parts if part)
+    if quantity.remainder:
+        # "1 TL, gehäuft"
+        text += quantity.remainder if quantity.remainder[0] in _PUNCTUATION else ' ' + quantity.remainder
+    return text
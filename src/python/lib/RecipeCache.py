@@ -0,0 +1,212 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+#
+# Copyright 2022 Denis Meyer
+#
+# This file is part of Rezepte.
+#
+
+"""RecipeCache
+
+Parsed recipes, read in a worker pool before they are opened: when a recipe is selected or hovered in the
+tree and, at startup, the most recently opened recipes. Opening a recipe then only compares the file's
+modification time and size with the cached ones instead of reading the file (e.g. from a network share).
+"""
+
+import copy
+import json
+import logging
+import os
+
+from PyQt5.QtCore import QObject, QRunnable, QThreadPool, pyqtSignal
+
+from classes.Exceptions import JsonProcessingError
+from lib.AppConfig import app_conf_get
+from lib.LRUCache import LRUCache
+from lib.Metrics import metrics_count
+from lib.Utils import load_json_recipe, write_json_atomic
+
+class _ParseSignals(QObject):
+    """Signals of a parse task"""
+
+    done = pyqtSignal(str, object)
+
+class _ParseTask(QRunnable):
+    """Reads and parses a recipe in a worker thread"""
+
+    def __init__(self, signals, path):
+        """Initializes the task
+
+        :param signals: The signals to report the result with
+        :param path: The recipe path
+        """
+        super(_ParseTask, self).__init__()
+
+        self.signals = signals
+        self.path = path
+
+    def run(self):
+        """Runs the task"""
+        result = None
+        try:
+            # Stat first, a change while reading makes the entry outdated rather than wrongly current
+            stat = os.stat(self.path)
+            result = (stat.st_mtime_ns, stat.st_size, load_json_recipe(self.path))
+        except (OSError, JsonProcessingError) as ex:
+            logging.warning('Could not preload recipe "%s": %s', self.path, ex)
+        self.signals.done.emit(self.path, result)
+
+class RecipeCache(QObject):
+    """LRU cache of parsed recipes, filled in the background, and the list of recently opened recipes"""
+
+    def __init__(self, max_size=None, recent_file=None):
+        """Initializes the cache
+
+        :param max_size: The maximum number of cached recipes, defaults to cache.recipe.size
+        :param recent_file: The file the recently opened recipes are stored in, None to not store them
+        """
+        super(RecipeCache, self).__init__()
+
+        logging.debug('Initializing RecipeCache')
+
+        self.recent_file = recent_file
+
+        # Path -> (mtime_ns, size, Recipe)
+        self._cache = LRUCache('recipe', max_size if max_size is not None else app_conf_get('cache.recipe.size', 32))
+        self._pending = set()
+        self._recent = self._load_recent()
+        self._preloads = 0
+        self._hits = 0
+        self._misses = 0
+
+        self._pool = QThreadPool()
+        self._pool.setMaxThreadCount(max(1, app_conf_get('preload.workers', 2)))
+
+        self._signals = _ParseSignals()
+        self._signals.done.connect(self._on_done)
+
+    def request(self, path):
+        """Schedules parsing a recipe unless it is cached or already scheduled
+
+        :param path: The recipe path
+        """
+        if path in self._pending or path in self._cache:
+            return
+        self._pending.add(path)
+        self._preloads += 1
+        self._pool.start(_ParseTask(self._signals, path))
+
+    def get(self, path):
+        """Returns a copy of the cached recipe or None if not cached or the file has changed
+
+        :param path: The recipe path
+        """
+        entry = self._cache.get(path)
+        if entry is None:
+            return None
+        try:
+            stat = os.stat(path)
+        except OSError:
+            self._cache.invalidate(path)
+            return None
+        mtime_ns, size, recipe = entry
+        if mtime_ns != stat.st_mtime_ns or size != stat.st_size:
+            self._cache.invalidate(path)
+            return None
+        # The caller may edit the recipe, the cached one stays as read
+        return copy.deepcopy(recipe)
+
+    def load(self, path):
+        """Returns the cached recipe or reads it
+
+        :param path: The recipe path
+        :raises OSError: If the file does not exist
+        :raises JsonProcessingError: If the file could not be parsed
+        """
+        recipe = self.get(path)
+        if recipe is not None:
+            self._hits += 1
+            metrics_count('recipe_cache.hit')
+            return recipe
+        self._misses += 1
+        metrics_count('recipe_cache.miss')
+        stat = os.stat(path)
+        recipe = load_json_recipe(path)
+        self._cache.put(path, (stat.st_mtime_ns, stat.st_size, recipe))
+        return copy.deepcopy(recipe)
+
+    def invalidate(self, path):
+        """Removes a recipe from the cache
+
+        :param path: The recipe path
+        """
+        self._cache.invalidate(path)
+
+    def add_recent(self, path):
+        """Moves a recipe to the front of the recently opened recipes
+
+        :param path: The recipe path
+        """
+        if path in self._recent:
+            self._recent.remove(path)
+        self._recent.insert(0, path)
+        del self._recent[app_conf_get('recent.size', 20):]
+
+    def get_recent(self):
+        """Returns the paths of the recently opened recipes, the most recent first"""
+        return list(self._recent)
+
+    def warm(self, nr_recipes=None):
+        """Parses the most recently opened recipes in the background
+
+        :param nr_recipes: The number of recipes, defaults to preload.warm
+        """
+        nr_recipes = nr_recipes if nr_recipes is not None else app_conf_get('preload.warm', 10)
+        paths = [path for path in self._recent[:nr_recipes] if os.path.isfile(path)]
+        logging.info('Preloading %d recently opened recipes', len(paths))
+        for path in paths:
+            self.request(path)
+
+    def save_recent(self):
+        """Writes the recently opened recipes"""
+        if not self.recent_file:
+            return
+        dirname = os.path.dirname(self.recent_file)
+        if dirname and not os.path.exists(dirname):
+            os.makedirs(dirname)
+        write_json_atomic(self.recent_file, {'recent': self._recent})
+
+    def get_metrics(self):
+        """Returns the cache statistics as flat dict"""
+        stats = self._cache.get_stats()
+        return {
+            'size': stats['size'],
+            'max_size': stats['max_size'],
+            'pending': len(self._pending),
+            'preloads': self._preloads,
+            'hits': self._hits,
+            'misses': self._misses,
+            'evictions': stats['evictions'],
+            'recent': len(self._recent)
+        }
+
+    def _load_recent(self):
+        """Reads the recently opened recipes"""
+        if not self.recent_file or not os.path.exists(self.recent_file):
+            return []
+        try:
+            with open(self.recent_file, 'r', encoding='utf-8') as jsonfile:
+                return [path for path in json.load(jsonfile)['recent'] if isinstance(path, str)]
+        except (OSError, ValueError, KeyError, TypeError) as ex:
+            logging.error('Could not load recently opened recipes from "%s": %s', self.recent_file, ex)
+            return []
+
+    def _on_done(self, path, result):
+        """Stores a parsed recipe (on the GUI thread)
+
+        :param path: The recipe path
+        :param result: (mtime_ns, size, Recipe) or None if it could not be read
+        """
+        self._pending.discard(path)
+        if result is not None:
+            self._cache.put(path, result)
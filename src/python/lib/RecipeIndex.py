@@ -0,0 +1,331 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+#
+# Copyright 2022 Denis Meyer
+#
+# This file is part of Rezepte.
+#
+
+"""RecipeIndex
+
+Keeps the parsed ingredients and the steps of every recipe that has been looked at, keyed by path and validated by
+modification time and size, so cookbook-wide features don't re-read every JSON file. The index is
+written to disk on quit and read again on first use.
+
+Nutrition values are cached with the entries and computed for all entries without them in one batch.
+They are dropped when the recipe changes or the nutrient table has another version.
+"""
+
+import json
+import logging
+import os
+import threading
+import time
+
+from classes.Exceptions import JsonProcessingError
+from classes.Nutrition import Nutrition
+from lib.IngredientNames import normalize_name
+from lib.QuantityParser import parse_quantity
+from lib.Utils import load_json_recipe
+
+_INDEX_VERSION = 3
+
+class RecipeIndexEntry():
+    """Indexed recipe"""
+
+    def __init__(self, path, mtime_ns, size, name, servings, ingredients, steps, nutrition=None):
+        """Initializes the entry
+
+        :param path: The recipe path
+        :param mtime_ns: The modification time of the file in ns
+        :param size: The file size
+        :param name: The recipe name
+        :param servings: The servings
+        :param ingredients: List of (parsed Quantity, name, normalized name)
+        :param steps: The steps
+        :param nutrition: The Nutrition of the whole recipe or None if not computed yet
+        """
+        self.path = path
+        self.mtime_ns = mtime_ns
+        self.size = size
+        self.name = name
+        self.servings = servings
+        self.ingredients = ingredients
+        self.steps = steps
+        self.nutrition = nutrition
+
+    @classmethod
+    def from_recipe(cls, path, stat, recipe):
+        """Creates the entry from a loaded recipe
+
+        :param path: The recipe path
+        :param stat: The os.stat result of the file
+        :param recipe: The Recipe
+        """
+        ingredients = [(ingredient.get_parsed_quantity(), ingredient.name or '', normalize_name(ingredient.name))
+                       for ingredient in recipe.ingredients]
+        return cls(path, stat.st_mtime_ns, stat.st_size, recipe.name, recipe.servings, ingredients, list(recipe.steps))
+
+    @classmethod
+    def from_obj(cls, path, obj):
+        """Creates the entry from its stored form
+
+        :param path: The recipe path
+        :param obj: The stored object
+        """
+        ingredients = [(parse_quantity(quantity), name, normalize_name(name)) for quantity, name in obj['ingredients']]
+        nutrition = Nutrition.from_obj(obj['nutrition']) if obj.get('nutrition') else None
+        return cls(path, obj['mtime_ns'], obj['size'], obj['name'], obj['servings'], ingredients, obj['steps'], nutrition)
+
+    def as_obj(self):
+        """Returns the entry as object"""
+        return {
+            'mtime_ns': self.mtime_ns,
+            'size': self.size,
+            'name': self.name,
+            'servings': self.servings,
+            'ingredients': [[quantity.text, name] for quantity, name, _key in self.ingredients],
+            'steps': self.steps,
+            'nutrition': self.nutrition.as_obj() if self.nutrition else None
+        }
+
+class RecipeIndex():
+    """RecipeIndex"""
+
+    def __init__(self, index_file=None):
+        """Initializes the index
+
+        :param index_file: The file the index is stored in, None to keep it in memory only
+        """
+        logging.debug('Initializing RecipeIndex')
+
+        self.index_file = index_file
+
+        self._entries = {}
+        self._lock = threading.Lock()
+        self._loaded = index_file is None
+        self._dirty = False
+        self._nutrients_version = None
+        self._listeners = []
+        self._hits = 0
+        self._misses = 0
+
+    def get(self, path):
+        """Returns the entry of the recipe, (re-)reading the recipe if it is not indexed or has changed
+
+        :param path: The recipe path
+        :return: The RecipeIndexEntry or None if the recipe could not be loaded
+        """
+        self._ensure_loaded()
+        try:
+            stat = os.stat(path)
+        except OSError:
+            self.remove(path)
+            return None
+        entry = self._entries.get(path)
+        if entry is not None and entry.mtime_ns == stat.st_mtime_ns and entry.size == stat.st_size:
+            self._hits += 1
+            return entry
+        self._misses += 1
+        try:
+            recipe = load_json_recipe(path)
+        except (FileNotFoundError, JsonProcessingError) as ex:
+            logging.error('Could not index recipe "%s": %s', path, ex)
+            self.remove(path)
+            return None
+        return self.update(path, recipe, stat)
+
+    def get_all(self, paths):
+        """Returns the entries of all recipes that could be loaded
+
+        :param paths: The recipe paths
+        """
+        entries = []
+        for path in paths:
+            entry = self.get(path)
+            if entry is not None:
+                entries.append(entry)
+        return entries
+
+    def get_nutrition(self, paths, table, densities=None):
+        """Returns the entries of all recipes that could be loaded, with their nutrition values
+
+        Missing nutrition values are computed in one batch.
+
+        :param paths: The recipe paths
+        :param table: The NutrientTable
+        :param densities: The density table
+        """
+        # Imported on first use, numpy is slow to import
+        from lib.Nutrition import compute_nutrition
+
+        entries = self.get_all(paths)
+        with self._lock:
+            if self._nutrients_version != table.version:
+                logging.info('Nutrient table changed, dropping the cached nutrition values')
+                for entry in self._entries.values():
+                    entry.nutrition = None
+                self._nutrients_version = table.version
+                self._dirty = True
+        missing = [entry for entry in entries if entry.nutrition is None]
+        if missing:
+            logging.debug('Computing nutrition values of %d recipes', len(missing))
+            for entry, nutrition in zip(missing, compute_nutrition([entry.ingredients for entry in missing], table, densities)):
+                entry.nutrition = nutrition
+            with self._lock:
+                self._dirty = True
+        return entries
+
+    def update(self, path, recipe, stat=None):
+        """Indexes an already loaded recipe, e.g. after saving it
+
+        :param path: The recipe path
+        :param recipe: The Recipe
+        :param stat: The os.stat result of the file, read if not given
+        :return: The RecipeIndexEntry
+        """
+        entry = RecipeIndexEntry.from_recipe(path, stat or os.stat(path), recipe)
+        with self._lock:
+            self._entries[path] = entry
+            self._dirty = True
+        for listener in self._listeners:
+            listener(path, entry)
+        return entry
+
+    def remove(self, path):
+        """Removes a recipe from the index
+
+        :param path: The recipe path
+        """
+        with self._lock:
+            if self._entries.pop(path, None) is None:
+                return
+            self._dirty = True
+        for listener in self._listeners:
+            listener(path, None)
+
+    def remove_all(self, path):
+        """Removes a recipe or all recipes in a folder from the index, e.g. after deleting them
+
+        :param path: The path of the recipe or folder
+        """
+        self._ensure_loaded()
+        for removed in self._get_paths_below(path):
+            self.remove(removed)
+
+    def move(self, source, destination):
+        """Indexes a moved recipe or all recipes in a moved folder under their new paths without reading them
+
+        Recipes changed while moving are read again on their next get.
+
+        :param source: The old path of the recipe or folder
+        :param destination: The new path
+        """
+        self._ensure_loaded()
+        for old_path in self._get_paths_below(source):
+            with self._lock:
+                entry = self._entries.pop(old_path, None)
+                if entry is None:
+                    continue
+                new_path = destination + old_path[len(source):]
+                entry = RecipeIndexEntry(new_path, entry.mtime_ns, entry.size, entry.name, entry.servings,
+                                         entry.ingredients, entry.steps, entry.nutrition)
+                self._entries[new_path] = entry
+                self._dirty = True
+            for listener in self._listeners:
+                listener(old_path, None)
+                listener(new_path, entry)
+
+    def add_update_listener(self, listener):
+        """Adds a listener called with (path, RecipeIndexEntry) when a recipe has been (re-)indexed and with
+        (path, None) when it has been removed, in the thread that changed the index
+
+        :param listener: The listener
+        """
+        if listener not in self._listeners:
+            self._listeners.append(listener)
+
+    def remove_update_listener(self, listener):
+        """Removes a listener
+
+        :param listener: The listener
+        """
+        if listener in self._listeners:
+            self._listeners.remove(listener)
+
+    def clear(self):
+        """Removes all entries"""
+        with self._lock:
+            self._entries.clear()
+            self._dirty = True
+
+    def __len__(self):
+        """Returns the number of indexed recipes"""
+        return len(self._entries)
+
+    def _get_paths_below(self, path):
+        """Returns the indexed recipes of a path, the recipe itself or all recipes in a folder
+
+        :param path: The path of a recipe or folder
+        """
+        prefix = path.rstrip(os.sep) + os.sep
+        with self._lock:
+            return [other for other in self._entries if other == path or other.startswith(prefix)]
+
+    def _ensure_loaded(self):
+        """Reads the stored index on first use"""
+        if self._loaded:
+            return
+        with self._lock:
+            if self._loaded:
+                return
+            self._loaded = True
+            if not os.path.exists(self.index_file):
+                return
+            start = time.perf_counter()
+            try:
+                with open(self.index_file, 'r', encoding='utf-8') as jsonfile:
+                    obj = json.load(jsonfile)
+                if obj.get('version') != _INDEX_VERSION:
+                    logging.info('Ignoring recipe index "%s" of version %s', self.index_file, obj.get('version'))
+                    return
+                self._nutrients_version = obj.get('nutrients_version')
+                for path, entry in obj['entries'].items():
+                    self._entries.setdefault(path, RecipeIndexEntry.from_obj(path, entry))
+                logging.info('Loaded %d recipes from index "%s" in %.1f ms', len(self._entries), self.index_file, (time.perf_counter() - start) * 1000.0)
+            except (OSError, ValueError, KeyError, TypeError) as ex:
+                logging.error('Could not load recipe index "%s": %s', self.index_file, ex)
+
+    def save(self):
+        """Writes the index if it has changed, without the recipes that have been moved or deleted since"""
+        if not self.index_file or not self._dirty:
+            return
+        with self._lock:
+            paths = list(self._entries)
+        missing = [path for path in paths if not os.path.isfile(path)]
+        if missing:
+            logging.info('Dropping %d moved or deleted recipes from the index', len(missing))
+            for path in missing:
+                self.remove(path)
+        with self._lock:
+            obj = {'version': _INDEX_VERSION, 'nutrients_version': self._nutrients_version, 'entries': {path: entry.as_obj() for path, entry in self._entries.items()}}
+            self._dirty = False
+        logging.info('Saving %d recipes to index "%s"', len(obj['entries']), self.index_file)
+        dirname = os.path.dirname(self.index_file)
+        if dirname and not os.path.exists(dirname):
+            os.makedirs(dirname)
+        tmp_file = self.index_file + '.tmp'
+        with open(tmp_file, 'w', encoding='utf-8') as jsonfile:
+            json.dump(obj, jsonfile, ensure_ascii=False)
+        os.replace(tmp_file, self.index_file)
+
+    def get_metrics(self):
+        """Returns the index statistics as flat dict"""
+        nr_lookups = self._hits + self._misses
+        return {
+            'size': len(self._entries),
+            'nutrition': sum(1 for entry in list(self._entries.values()) if entry.nutrition is not None),
+            'hits': self._hits,
+            'misses': self._misses,
+            'hit_rate': self._hits / nr_lookups if nr_lookups else 0.0
+        }
@@ -1,5 +1,23 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+#
+# Copyright 2022 Denis Meyer
+#
+# This file is part of Rezepte.
+#
+
+"""RecipePDF"""
+
+import logging
+import os
+import re
+
 from fpdf import FPDF
 
+from lib.Metrics import timed
+from lib.ShoppingList import format_item_quantity
+from lib.Tracing import traced
+
 class RecipePDF(FPDF):
     """RecipePDF"""
 
@@ -8,13 +26,19 @@ class RecipePDF(FPDF):
         """
         super(RecipePDF, self).__init__(*args, **kwargs)
         self.recipe = None
+        self.ingredients = []
+        self.servings = None
 
-    def set_recipe(self, recipe):
+    def set_recipe(self, recipe, servings=None, decimal_separator='.'):
         """Sets the recipe
 
         :param recipe: The recipe
+        :param servings: The number of servings to scale the ingredients to, None for the servings of the recipe
+        :param decimal_separator: The decimal separator of scaled quantities
         """
         self.recipe = recipe
+        self.servings = servings or recipe.servings
+        self.ingredients = recipe.get_scaled_ingredients(recipe.get_scale_factor(servings), decimal_separator)
 
     def header(self):
         # Setting font: helvetica bold 15
@@ -33,3 +57,196 @@ class RecipePDF(FPDF):
         self.set_font('helvetica', size=8)
         # Printing page number:
         self.cell(0, 10, f"{self.page_no()}/{{nb}}", align='C')
+
+    def restore(self):
+        """Restores color and font"""
+        self.set_fill_color(224, 235, 255)
+        self.set_text_color(0)
+        self.set_font()
+
+    def add_ingredients(self, i18n, col_widths=(30, 100, 60)):
+        """Adds the ingredients
+
+        :param i18n: The i18n
+        :param col_widths: The column widths
+        """
+        logging.info('Adding ingredients')
+        self.set_font('helvetica', size=14)
+        self.cell(txt=i18n.translate('GUI.RECIPE.VIEW.HEADERS.INGREDIENTS', 'Zutaten'))
+        if self.servings:
+            self.set_font('helvetica', size=12)
+            self.cell(txt=f"  ({i18n.translate('GUI.RECIPE.VIEW.SERVINGS', 'Servings')}: {self.servings})")
+        self.restore()
+        line_height_base = self.font_size * 2.5
+        self.ln(line_height_base)
+        self.set_font('helvetica', size=12)
+        self.set_fill_color(211,211,211)
+        self.set_line_width(0.3)
+        headings = [i18n.translate('GUI.RECIPE.HEADERS.INGREDIENTS.QUANTITY', 'Quantity'), i18n.translate('GUI.RECIPE.HEADERS.INGREDIENTS.NAME', 'Name'), i18n.translate('GUI.RECIPE.HEADERS.INGREDIENTS.ADDITION', 'Addition')]
+        for col_width, heading in zip(col_widths, headings):
+            self.cell(col_width, 7, heading, border=1, align="C")
+        self.ln()
+        fill = False
+        for _i, ingredient in enumerate(self.ingredients):
+            ingredient_quantity = _get_none_safe(ingredient.quantity)
+            ingredient_name = _get_none_safe(ingredient.name)
+            ingredient_addition = _get_none_safe(ingredient.addition)
+            test_split_1 = self.multi_cell(col_widths[0], line_height_base, ingredient_quantity, border='LR', new_x='RIGHT', new_y='TOP', max_line_height=self.font_size, split_only=True)
+            test_split_2 = self.multi_cell(col_widths[1], line_height_base, ingredient_name, border='LR', new_x='RIGHT', new_y='TOP', max_line_height=self.font_size, split_only=True)
+            test_split_3 = self.multi_cell(col_widths[2], line_height_base, ingredient_addition, border='LR', new_x='RIGHT', new_y='TOP', max_line_height=self.font_size, split_only=True)
+            test_split_max = max(len(test_split_1), len(test_split_2), len(test_split_3))
+            line_height = self.font_size + self.font_size * test_split_max
+            self.multi_cell(col_widths[0], line_height, ingredient_quantity, border='LR', new_x='RIGHT', new_y='TOP', max_line_height=self.font_size, fill=fill)
+            self.multi_cell(col_widths[1], line_height, ingredient_name, border='LR', new_x='RIGHT', new_y='TOP', max_line_height=self.font_size, fill=fill)
+            self.multi_cell(col_widths[2], line_height, ingredient_addition, border='LR', new_x='RIGHT', new_y='TOP', max_line_height=self.font_size, fill=fill)
+            self.ln(line_height)
+            fill = not fill
+        self.cell(sum(col_widths), 0, '', border='T')
+
+    def add_steps(self, i18n, col_widths=(10, 180)):
+        """Adds the steps
+
+        :param i18n: The i18n
+        :param col_widths: The column widths
+        """
+        logging.info('Adding steps')
+        self.set_font('helvetica', size=14)
+        self.cell(txt=i18n.translate('GUI.RECIPE.VIEW.HEADERS.STEPS', 'Schritte'))
+        line_height_base = self.font_size * 2
+        self.restore()
+        self.ln(line_height_base)
+        self.set_font('helvetica', size=12)
+        self.set_fill_color(211,211,211)
+        self.set_line_width(0.3)
+        headings = ['#', '']
+        for col_width, heading in zip(col_widths, headings):
+            self.cell(col_width, 7, heading, border=1, align="C")
+        self.ln()
+        fill = False
+        for i, step in enumerate(self.recipe.steps):
+            step_text = _get_none_safe(step)
+            test_split = self.multi_cell(col_widths[1], line_height_base, step_text, border='LR', new_x='RIGHT', new_y='TOP', max_line_height=self.font_size, split_only=True)
+            line_height = self.font_size + self.font_size * len(test_split)
+            self.multi_cell(col_widths[0], line_height, f'{i + 1}', border='LR', new_x='RIGHT', new_y='TOP', max_line_height=self.font_size, fill=fill)
+            self.multi_cell(col_widths[1], line_height, step_text, border='LR', new_x='RIGHT', new_y='TOP', max_line_height=self.font_size, fill=fill)
+            self.ln(line_height)
+            fill = not fill
+        self.cell(sum(col_widths), 0, '', border='T')
+
+    def add_information(self, i18n):
+        """Adds the information
+
+        :param i18n: The i18n
+        """
+        logging.info('Adding information')
+        self.set_font('helvetica', size=14)
+        self.cell(txt=i18n.translate('GUI.RECIPE.VIEW.HEADERS.INFO', 'Information'))
+        line_height_base = self.font_size * 2
+        self.restore()
+        self.ln(line_height_base)
+        self.set_font('helvetica', size=12)
+        text = _get_none_safe(self.recipe.information)
+        test_split = self.multi_cell(190, line_height_base, text, border='LR', new_x='RIGHT', new_y='TOP', max_line_height=self.font_size, split_only=True)
+        line_height = self.font_size + self.font_size * len(test_split)
+        self.multi_cell(190, line_height, text, border=0, new_x='RIGHT', new_y='TOP', max_line_height=self.font_size)
+        self.ln(line_height)
+
+class ShoppingListPDF(FPDF):
+    """ShoppingListPDF"""
+
+    def __init__(self, title, *args, **kwargs):
+        """Initializes the ShoppingListPDF
+
+        :param title: The title
+        """
+        super(ShoppingListPDF, self).__init__(*args, **kwargs)
+        self.title = title
+
+    def header(self):
+        self.set_font('helvetica', 'B', size=16)
+        self.cell(0, 10, self.title, border=0, align='C')
+        self.ln(15)
+
+    def footer(self):
+        self.set_y(-15)
+        self.set_font('helvetica', size=8)
+        self.cell(0, 10, f"{self.page_no()}/{{nb}}", align='C')
+
+    def add_items(self, items, decimal_separator='.', col_widths=(10, 50, 130)):
+        """Adds the items with a check box each
+
+        :param items: The ShoppingListItem objects
+        :param decimal_separator: The decimal separator
+        :param col_widths: The column widths
+        """
+        logging.info('Adding %d shopping list items', len(items))
+        self.set_font('helvetica', size=12)
+        line_height = self.font_size * 2
+        for item in items:
+            self.cell(col_widths[0], line_height, '', border=0)
+            self.rect(self.get_x() - col_widths[0] + 2, self.get_y() + (line_height - 4) / 2, 4, 4)
+            self.cell(col_widths[1], line_height, format_item_quantity(item, decimal_separator), border='B')
+            self.multi_cell(col_widths[2], line_height, item.name, border='B', new_x='LMARGIN', new_y='NEXT', max_line_height=self.font_size)
+
+def _get_none_safe(obj):
+    """Returns an empty string if none
+
+    :param obj: The object
+    """
+    return obj if obj else ''
+
+def clean_recipe_name(rname):
+    """Returns the recipe name usable as file name
+
+    :param rname: The recipe name
+    """
+    return re.sub(r'\W+', '-', rname)
+
+@traced('export_recipe_pdf')
+@timed('pdf.export')
+def export_recipe_pdf(recipe, i18n, dirname, filename=None, servings=None):
+    """Exports a recipe as PDF
+
+    :param recipe: The recipe
+    :param i18n: The i18n
+    :param dirname: The export directory
+    :param filename: The file name without suffix, defaults to the cleaned recipe name
+    :param servings: The number of servings to scale the ingredients to, None for the servings of the recipe
+    :return: The path of the PDF
+    """
+    pdf = RecipePDF(orientation='P', unit='mm', format='A4')
+    pdf.set_recipe(recipe, servings, i18n.translate('GUI.NUMBER.DECIMAL_SEPARATOR', '.'))
+    line_height_base = pdf.font_size * 2.5
+    pdf.add_page()
+    pdf.add_ingredients(i18n)
+    pdf.add_page()
+    pdf.restore()
+    pdf.ln(line_height_base)
+    pdf.add_steps(i18n)
+    pdf.restore()
+    pdf.ln(line_height_base)
+    pdf.add_information(i18n)
+    pdf.restore()
+    pdf.ln(line_height_base)
+    outputname = os.path.join(dirname, '{}.pdf'.format(filename or clean_recipe_name(recipe.name)))
+    logging.info('Saving pdf to "%s"', outputname)
+    pdf.output(outputname)
+    return outputname
+
+@traced('export_shopping_list_pdf')
+@timed('pdf.export.shopping_list')
+def export_shopping_list_pdf(items, i18n, path, title=None):
+    """Exports a shopping list as PDF
+
+    :param items: The ShoppingListItem objects
+    :param i18n: The i18n
+    :param path: The file path
+    :param title: The title, defaults to "Shopping list"
+    :return: The path of the PDF
+    """
+    pdf = ShoppingListPDF(title or i18n.translate('GUI.SHOPPING_LIST.TITLE', 'Shopping list'), orientation='P', unit='mm', format='A4')
+    pdf.add_page()
+    pdf.add_items(items, i18n.translate('GUI.NUMBER.DECIMAL_SEPARATOR', '.'))
+    logging.info('Saving pdf to "%s"', path)
+    pdf.output(path)
+    return path
@@ -0,0 +1,321 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+#
+# Copyright 2022 Denis Meyer
+#
+# This file is part of Rezepte.
+#
+
+"""RecipePaths
+
+The paths of all recipes of the cookbook for the quick-open dialog. The cookbook is listed once in the
+background, then the file operations of the tree add, remove and move paths, so the dialog never walks
+the cookbook. The FuzzyMatcher over the paths is built on the first search after a change.
+"""
+
+import logging
+import os
+import re
+import unicodedata
+from bisect import bisect_left, insort
+
+from PyQt5.QtCore import QObject, QRunnable, QThreadPool, pyqtSignal
+
+from lib.AppConfig import app_conf_get
+from lib.Metrics import metrics_timer
+from lib.Tracing import trace_span
+from lib.Utils import iter_recipe_paths
+
+# Accents, split off by NFKD
+_COMBINING = re.compile('[\u0300-\u036f]')
+
+def _fold(text):
+    """Returns a text case folded and without accents, "Schüttelbrot" and "schuttelbrot" are found the same way
+
+    :param text: The text
+    """
+    return _COMBINING.sub('', unicodedata.normalize('NFKD', text.casefold()))
+
+def _get_key(prefix, suffix, path):
+    """Returns the search key of a recipe, its folded path below the cookbook without suffix, or None
+
+    :param prefix: The cookbook folder with a trailing separator
+    :param suffix: The recipe suffix
+    :param path: The recipe path
+    """
+    if not path.startswith(prefix) or not path.endswith(suffix):
+        return None
+    return _fold(path[len(prefix):-len(suffix)].replace(os.sep, '/').replace('\n', ' '))
+
+def _get_entry(key, path):
+    """Returns the sort entry of a recipe, shorter names first
+
+    :param key: The search key
+    :param path: The recipe path
+    """
+    return (len(key) - key.rfind('/') - 1, key, path)
+
+def _list_recipes(folder, suffix, paths=None):
+    """Returns the keys and the sorted entries of the recipes of a cookbook
+
+    :param folder: The cookbook folder
+    :param suffix: The recipe suffix
+    :param paths: The recipe paths, None to list the folder
+    :return: (dict path -> key, sorted list of entries)
+    """
+    prefix = folder.rstrip(os.sep) + os.sep
+    keys = {}
+    for path in (paths if paths is not None else iter_recipe_paths(folder, suffix)):
+        key = _get_key(prefix, suffix, path)
+        if key is not None:
+            keys[path] = key
+    return keys, sorted(_get_entry(key, path) for path, key in keys.items())
+
+class _ScanSignals(QObject):
+    """Signals of a scan task"""
+
+    done = pyqtSignal(int, str, object)
+
+class _ScanTask(QRunnable):
+    """Lists the recipes of the cookbook in a worker thread"""
+
+    def __init__(self, signals, scan_id, folder, suffix):
+        """Initializes the task
+
+        :param signals: The signals to report the result with
+        :param scan_id: The number of the scan
+        :param folder: The cookbook folder
+        :param suffix: The recipe suffix
+        """
+        super(_ScanTask, self).__init__()
+
+        self.signals = signals
+        self.scan_id = scan_id
+        self.folder = folder
+        self.suffix = suffix
+
+    def run(self):
+        """Runs the task"""
+        self.signals.done.emit(self.scan_id, self.folder, _list_recipes(self.folder, self.suffix))
+
+class RecipePaths(QObject):
+    """The paths of all recipes of the cookbook, fuzzy searchable by folder and name"""
+
+    # The cookbook has been listed
+    scanned = pyqtSignal()
+
+    def __init__(self, suffix=None):
+        """Initializes the paths
+
+        :param suffix: The recipe suffix, defaults to suffix.recipe
+        """
+        super(RecipePaths, self).__init__()
+
+        logging.debug('Initializing RecipePaths')
+
+        self.suffix = suffix or app_conf_get('suffix.recipe', '.json')
+
+        self._folder = ''
+        # Path -> search key, and the sorted (name length, key, path) of all recipes
+        self._keys = {}
+        self._entries = []
+        # Built on the next search after a change
+        self._matcher = None
+        # Changes while a scan is running, applied to its result
+        self._scanning = False
+        self._changes = []
+        self._scan_id = 0
+        self._nr_scans = 0
+        self._nr_searches = 0
+        self._nr_builds = 0
+
+        self._pool = QThreadPool()
+        self._pool.setMaxThreadCount(1)
+
+        self._signals = _ScanSignals()
+        self._signals.done.connect(self._on_scanned)
+
+    def __len__(self):
+        """Returns the number of recipes"""
+        return len(self._entries)
+
+    def __contains__(self, path):
+        """Returns whether a recipe is listed
+
+        :param path: The recipe path
+        """
+        return path in self._keys
+
+    def get_folder(self):
+        """Returns the cookbook folder"""
+        return self._folder
+
+    def is_scanning(self):
+        """Returns whether the cookbook is being listed"""
+        return self._scanning
+
+    def scan(self, folder, background=True):
+        """Lists all recipes of a cookbook folder
+
+        :param folder: The cookbook folder
+        :param background: Whether to list them in a worker thread, the paths are replaced when done
+        """
+        logging.info('Listing recipes of "%s"', folder)
+        if folder != self._folder:
+            self.set_paths(folder, [])
+        self._changes = []
+        # A running scan is outdated
+        self._scan_id += 1
+        if background:
+            self._scanning = True
+            self._pool.start(_ScanTask(self._signals, self._scan_id, folder, self.suffix))
+        else:
+            self._scanning = False
+            with metrics_timer('recipe_paths.scan'):
+                self._set(folder, _list_recipes(folder, self.suffix))
+            self._nr_scans += 1
+            self.scanned.emit()
+
+    def set_paths(self, folder, paths):
+        """Replaces all recipes
+
+        :param folder: The cookbook folder
+        :param paths: The recipe paths
+        """
+        self._set(folder, _list_recipes(folder, self.suffix, paths))
+
+    def add(self, path):
+        """Adds a recipe
+
+        :param path: The recipe path
+        """
+        if self._scanning:
+            self._changes.append((self.add, path))
+        key = _get_key(self._folder.rstrip(os.sep) + os.sep, self.suffix, path) if self._folder else None
+        if key is None or path in self._keys:
+            return
+        self._keys[path] = key
+        insort(self._entries, _get_entry(key, path))
+        self._matcher = None
+
+    def remove(self, path):
+        """Removes a recipe or all recipes in a folder
+
+        :param path: The path of a recipe or folder
+        """
+        if self._scanning:
+            self._changes.append((self.remove, path))
+        for removed in self._get_paths_below(path):
+            entry = _get_entry(self._keys.pop(removed), removed)
+            del self._entries[bisect_left(self._entries, entry)]
+            self._matcher = None
+
+    def move(self, source, destination):
+        """Moves a recipe or all recipes in a folder
+
+        :param source: The old path of the recipe or folder
+        :param destination: The new path
+        """
+        paths = self._get_paths_below(source)
+        self.remove(source)
+        for path in paths:
+            self.add(destination + path[len(source):])
+
+    def prepare(self):
+        """Builds the matcher if the recipes have changed, e.g. before showing the quick-open dialog"""
+        if self._matcher is not None:
+            return
+        # Imported on first use, numpy is slow to import
+        from lib.FuzzyMatcher import FuzzyMatcher
+        with metrics_timer('recipe_paths.build'), trace_span('recipe_paths.build', recipes=len(self._entries)):
+            self._matcher = FuzzyMatcher([key for _length, key, _path in self._entries])
+        self._nr_builds += 1
+
+    def search(self, query, recent=None, limit=None):
+        """Returns the recipes whose paths contain the characters of a query in order, best matches first
+
+        Matches in the recipe name, at the start of words, of adjacent characters, in shorter paths and of
+        recently opened recipes are better.
+
+        :param query: The query, whitespace, case and accents are ignored
+        :param recent: The recently opened recipe paths, the most recent first
+        :param limit: The maximum number of results, defaults to quickopen.results
+        :return: List of recipe paths
+        """
+        limit = limit if limit is not None else app_conf_get('quickopen.results', 50)
+        recent = [path for path in (recent or []) if path in self._keys]
+        query = ''.join(_fold(query).split()).replace(os.sep, '/')
+        self._nr_searches += 1
+        if not query:
+            return (recent + [path for _length, _key, path in self._entries[:limit] if path not in recent])[:limit]
+        self.prepare()
+        with metrics_timer('recipe_paths.search'):
+            # Imported with the matcher
+            from lib.FuzzyMatcher import fuzzy_score
+            candidates = [self._entries[i][2] for i in self._matcher.match(query, app_conf_get('quickopen.candidates', 200)).tolist()]
+            # Recently opened recipes score up to 3 more, the most recent one the most
+            recency = {path: 3.0 * (len(recent) - i) / len(recent) for i, path in enumerate(recent)}
+            scored = []
+            for path in set(candidates).union(recent):
+                key = self._keys[path]
+                score = fuzzy_score(query, key)
+                if score is not None:
+                    scored.append((-score - recency.get(path, 0.0), key, path))
+            scored.sort()
+            return [path for _score, _key, path in scored[:limit]]
+
+    def advance(self):
+        """Continues matching the last query against the whole paths, one step, e.g. while idle
+
+        :return: True if there are more steps, False else
+        """
+        return self._matcher.advance() if self._matcher is not None else False
+
+    def get_metrics(self):
+        """Returns the statistics as flat dict"""
+        return {
+            'recipes': len(self._entries),
+            'scanning': int(self._scanning),
+            'scans': self._nr_scans,
+            'builds': self._nr_builds,
+            'searches': self._nr_searches
+        }
+
+    def _set(self, folder, recipes):
+        """Replaces all recipes
+
+        :param folder: The cookbook folder
+        :param recipes: (dict path -> key, sorted list of entries)
+        """
+        self._folder = folder
+        self._keys, self._entries = recipes
+        self._matcher = None
+
+    def _get_paths_below(self, path):
+        """Returns the listed recipes of a path, the recipe itself or all recipes in a folder
+
+        :param path: The path of a recipe or folder
+        """
+        if path in self._keys:
+            return [path]
+        prefix = path.rstrip(os.sep) + os.sep
+        return [other for other in self._keys if other.startswith(prefix)]
+
+    def _on_scanned(self, scan_id, folder, recipes):
+        """Replaces the recipes with the listed ones (on the GUI thread)
+
+        :param scan_id: The number of the scan
+        :param folder: The cookbook folder
+        :param recipes: (dict path -> key, sorted list of entries)
+        """
+        if scan_id != self._scan_id:
+            logging.debug('Dropping the outdated recipes of "%s"', folder)
+            return
+        logging.info('Listed %d recipes of "%s"', len(recipes[1]), folder)
+        self._scanning = False
+        self._set(folder, recipes)
+        changes, self._changes = self._changes, []
+        for change, path in changes:
+            change(path)
+        self._nr_scans += 1
+        self.scanned.emit()
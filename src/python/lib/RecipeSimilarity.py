@@ -0,0 +1,269 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+#
+# Copyright 2022 Denis Meyer
+#
+# This file is part of Rezepte.
+#
+
+"""RecipeSimilarity
+
+TF-IDF vectors of the ingredients and step words of all recipes, ranked by cosine similarity. The
+vectors are kept in a sparse matrix in coordinate format (row, term, weight), sorted by term, with the
+norm of every row.
+The IDF weights are computed when the matrix is built (in the background) and then kept: adding or
+changing a recipe only appends the weighted row and its norm, new terms get their IDF when they first
+appear, removing a recipe only marks its row. Appended rows are merged and removed rows are dropped once
+they make up a larger part of the matrix, so a query never rebuilds it.
+
+A query only adds up the values of its own terms. numpy is slow to import, so this module is
+imported on first use.
+"""
+
+import logging
+import re
+import threading
+from collections import Counter
+
+import numpy as np
+
+_RE_WORD = re.compile(r'\w{3,}')
+
+def get_terms(keys, steps):
+    """Returns the term counts of a recipe: its normalized ingredient names and the words of its steps
+
+    :param keys: The normalized ingredient names
+    :param steps: The steps
+    """
+    counts = Counter(_RE_WORD.findall('\n'.join(steps).casefold()))
+    counts.update('i:' + key for key in keys if key)
+    return counts
+
+class RecipeSimilarity():
+    """Sparse TF-IDF matrix of recipes"""
+
+    def __init__(self):
+        """Initializes the matrix"""
+        logging.debug('Initializing RecipeSimilarity')
+
+        self._term_ids = {}
+        self._df = np.zeros(1024, dtype=np.int64)
+        self._idf = np.zeros(0, dtype=np.float64)
+        # Row -> path, name and term ids, None if removed
+        self._rows_by_path = {}
+        self._paths = []
+        self._names = []
+        self._row_terms = []
+        self._removed_rows = []
+        # Merged coordinates with term frequencies (1 + log tf) and TF-IDF weights sorted by term, the start of
+        # every term, and the chunks appended since
+        self._rows = np.empty(0, dtype=np.int64)
+        self._cols = np.empty(0, dtype=np.int64)
+        self._tfs = np.empty(0, dtype=np.float64)
+        self._weights = np.empty(0, dtype=np.float64)
+        self._term_starts = np.zeros(1, dtype=np.int64)
+        self._appended = []
+        # Norm of every row
+        self._norms = np.empty(0, dtype=np.float64)
+        self._lock = threading.Lock()
+
+    def __len__(self):
+        """Returns the number of recipes"""
+        return len(self._rows_by_path)
+
+    def update(self, path, name, keys, steps):
+        """Adds a recipe or replaces its vector
+
+        :param path: The recipe path
+        :param name: The recipe name
+        :param keys: The normalized ingredient names
+        :param steps: The steps
+        """
+        self.update_all([(path, name, keys, steps)])
+
+    def update_entries(self, entries):
+        """Adds or replaces the vectors of several recipes
+
+        :param entries: The RecipeIndexEntry objects
+        """
+        self.update_all([(entry.path, entry.name, [key for _quantity, _name, key in entry.ingredients], entry.steps) for entry in entries])
+
+    def update_all(self, recipes):
+        """Adds or replaces the vectors of several recipes in one batch
+
+        A batch of more than half of the recipes (e.g. building the matrix) recomputes the IDF weights of all terms.
+
+        :param recipes: List of (path, name, normalized ingredient names, steps)
+        """
+        # The last version of a recipe wins
+        recipes = list({recipe[0]: recipe for recipe in recipes}.values())
+        term_counts = [get_terms(keys, steps) for _path, _name, keys, steps in recipes]
+        with self._lock:
+            for path, _name, _keys, _steps in recipes:
+                self._remove(path)
+            lengths = [len(counts) for counts in term_counts]
+            get_term_id = self._get_term_id
+            cols = np.fromiter((get_term_id(term) for counts in term_counts for term in counts), dtype=np.int64, count=sum(lengths))
+            tfs = 1.0 + np.log(np.fromiter((count for counts in term_counts for count in counts.values()), dtype=np.float64, count=len(cols)))
+            if len(self._term_ids) > len(self._df):
+                self._df = np.concatenate((self._df, np.zeros(max(len(self._df), len(self._term_ids) - len(self._df)), dtype=np.int64)))
+            self._df += np.bincount(cols, minlength=len(self._df))
+            first_row = len(self._paths)
+            rows = np.repeat(np.arange(first_row, first_row + len(recipes)), lengths)
+            offsets = np.cumsum([0] + lengths)
+            for i, (path, name, _keys, _steps) in enumerate(recipes):
+                self._rows_by_path[path] = first_row + i
+                self._paths.append(path)
+                self._names.append(name)
+                self._row_terms.append(cols[offsets[i]:offsets[i + 1]])
+            if len(recipes) * 2 > len(self._rows_by_path):
+                self._appended.append((rows, cols, tfs, None))
+                self._merge()
+                self._reweight()
+            else:
+                # Only the new terms get their IDF, the weights of the other rows stay valid
+                nr_terms = len(self._term_ids)
+                if nr_terms > len(self._idf):
+                    new_terms = np.arange(len(self._idf), nr_terms)
+                    self._idf = np.concatenate((self._idf, self._get_idf(new_terms)))
+                weights = tfs * self._idf[cols]
+                norms = np.sqrt(np.bincount(rows - first_row, weights=weights ** 2, minlength=len(recipes)))
+                self._norms = np.concatenate((self._norms, norms))
+                self._appended.append((rows, cols, tfs, weights))
+                self._compact()
+
+    def remove(self, path):
+        """Removes a recipe
+
+        :param path: The recipe path
+        """
+        with self._lock:
+            self._remove(path)
+            self._compact()
+
+    def most_similar(self, keys, steps, nr_results=10, exclude=None):
+        """Returns the recipes most similar to the given ingredients and steps
+
+        :param keys: The normalized ingredient names
+        :param steps: The steps
+        :param nr_results: The maximum number of results
+        :param exclude: The path of a recipe not to return, e.g. the queried one
+        :return: List of (path, name, cosine similarity), the most similar first
+        """
+        counts = get_terms(keys, steps)
+        with self._lock:
+            nr_rows = len(self._paths)
+            if not counts or not nr_rows:
+                return []
+            query = np.zeros(len(self._idf))
+            unknown_idf = np.log(len(self._rows_by_path) + 1) + 1.0
+            query_norm = 0.0
+            dots = np.zeros(nr_rows)
+            nr_merged_terms = len(self._term_starts) - 1
+            for term, count in counts.items():
+                weight = 1.0 + np.log(count)
+                term_id = self._term_ids.get(term)
+                if term_id is None:
+                    query_norm += (weight * unknown_idf) ** 2
+                    continue
+                query[term_id] = weight * self._idf[term_id]
+                query_norm += query[term_id] ** 2
+                if term_id < nr_merged_terms:
+                    # A row has a term at most once
+                    start, end = self._term_starts[term_id], self._term_starts[term_id + 1]
+                    dots[self._rows[start:end]] += self._weights[start:end] * query[term_id]
+            for rows, cols, _tfs, weights in self._appended:
+                dots += np.bincount(rows, weights=weights * query[cols], minlength=nr_rows)
+            scores = dots / np.maximum(self._norms * np.sqrt(query_norm), 1e-12)
+            scores[self._removed_rows] = 0.0
+            if exclude in self._rows_by_path:
+                scores[self._rows_by_path[exclude]] = 0.0
+            nr_results = min(nr_results, nr_rows)
+            best = np.argpartition(-scores, nr_results - 1)[:nr_results]
+            best = best[np.argsort(-scores[best], kind='stable')]
+            return [(self._paths[row], self._names[row], float(scores[row])) for row in best.tolist() if scores[row] > 0]
+
+    def get_metrics(self):
+        """Returns the matrix statistics as flat dict"""
+        return {
+            'recipes': len(self._rows_by_path),
+            'terms': len(self._term_ids),
+            'values': len(self._tfs) + sum(len(cols) for _rows, cols, _tfs, _weights in list(self._appended))
+        }
+
+    def _get_term_id(self, term):
+        """Returns the id of a term, adding it if new
+
+        :param term: The term
+        """
+        term_id = self._term_ids.get(term)
+        if term_id is None:
+            term_id = self._term_ids[term] = len(self._term_ids)
+        return term_id
+
+    def _get_idf(self, term_ids):
+        """Returns the IDF weights of terms by their current document frequencies, with the lock held
+
+        :param term_ids: The term ids, numpy array
+        """
+        return np.log((len(self._rows_by_path) + 1) / (self._df[term_ids] + 1)) + 1.0
+
+    def _reweight(self):
+        """Computes the IDF weights of all terms, the weights and the row norms of the merged matrix, with the lock held"""
+        self._idf = self._get_idf(np.arange(len(self._term_ids)))
+        self._weights = self._tfs * self._idf[self._cols]
+        self._norms = np.sqrt(np.bincount(self._rows, weights=self._weights ** 2, minlength=len(self._paths)))
+
+    def _remove(self, path):
+        """Marks the row of a recipe as removed, with the lock held
+
+        :param path: The recipe path
+        """
+        row = self._rows_by_path.pop(path, None)
+        if row is None:
+            return
+        self._df[self._row_terms[row]] -= 1
+        self._paths[row] = None
+        self._names[row] = None
+        self._row_terms[row] = None
+        self._removed_rows.append(row)
+
+    def _compact(self):
+        """Merges the appended rows once they are an eighth of the matrix and drops removed rows once they are
+        half of it, with the lock held"""
+        nr_appended = sum(len(rows) for rows, _cols, _tfs, _weights in self._appended)
+        if nr_appended * 8 >= len(self._rows) or len(self._appended) >= 64 or len(self._removed_rows) * 2 >= len(self._paths):
+            self._merge()
+
+    def _merge(self):
+        """Merges the appended rows and drops removed rows once they are half of the matrix, with the lock held"""
+        if self._appended:
+            self._rows = np.concatenate([self._rows] + [rows for rows, _cols, _tfs, _weights in self._appended])
+            self._cols = np.concatenate([self._cols] + [cols for _rows, cols, _tfs, _weights in self._appended])
+            self._tfs = np.concatenate([self._tfs] + [tfs for _rows, _cols, tfs, _weights in self._appended])
+            # Not weighted yet when building, then reweighted
+            self._weights = np.concatenate([self._weights] + [weights if weights is not None else np.zeros(len(rows)) for rows, _cols, _tfs, weights in self._appended])
+            self._appended = []
+            order = np.argsort(self._cols, kind='stable')
+            self._rows = self._rows[order]
+            self._cols = self._cols[order]
+            self._tfs = self._tfs[order]
+            self._weights = self._weights[order]
+        if self._removed_rows and len(self._removed_rows) * 2 >= len(self._paths):
+            alive = np.ones(len(self._paths), dtype=bool)
+            alive[self._removed_rows] = False
+            new_rows = np.cumsum(alive) - 1
+            keep = alive[self._rows]
+            self._rows = new_rows[self._rows[keep]]
+            self._cols = self._cols[keep]
+            self._tfs = self._tfs[keep]
+            self._weights = self._weights[keep]
+            rows = np.flatnonzero(alive)
+            self._norms = self._norms[rows] if len(self._norms) == len(self._paths) else self._norms
+            rows = rows.tolist()
+            self._paths = [self._paths[row] for row in rows]
+            self._names = [self._names[row] for row in rows]
+            self._row_terms = [self._row_terms[row] for row in rows]
+            self._rows_by_path = {path: row for row, path in enumerate(self._paths)}
+            self._removed_rows = []
+        self._term_starts = np.searchsorted(self._cols, np.arange(len(self._term_ids) + 1))
@@ -0,0 +1,116 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+#
+# Copyright 2022 Denis Meyer
+#
+# This file is part of Rezepte.
+#
+
+"""ShoppingList
+
+Sums up the ingredients of several recipes from their RecipeIndex entries. Ingredients are merged by
+normalized name and by dimension (mass, volume, count), quantities in other units are only merged with
+the same unit.
+"""
+
+import logging
+
+from classes.ShoppingListItem import ShoppingListItem
+from lib.Metrics import timed
+from lib.QuantityParser import format_value
+from lib.Tracing import traced
+from lib.UnitConversion import UNIT_FACTORS, from_base, get_display_unit, to_base
+
+@traced('aggregate_shopping_list')
+@timed('shopping_list.aggregate')
+def aggregate_shopping_list(entries, factors=None):
+    """Sums up the ingredients of the recipes
+
+    :param entries: The RecipeIndexEntry objects
+    :param factors: Optional dict path -> scale factor of the recipe
+    :return: List of ShoppingListItem, sorted by name
+    """
+    items = {}
+    for entry in entries:
+        factor = factors.get(entry.path, 1.0) if factors else 1.0
+        for quantity, name, key in entry.ingredients:
+            if not key:
+                continue
+            value = quantity.value
+            unit = quantity.unit
+            if value is None:
+                group = None
+            elif unit in UNIT_FACTORS:
+                group = UNIT_FACTORS[unit][0]
+            else:
+                group = unit
+            item = items.get((key, group))
+            if item is None:
+                item = items[(key, group)] = ShoppingListItem(name, key, group)
+            item.recipes.add(entry.name)
+            if value is None:
+                if quantity.text and quantity.text not in item.texts:
+                    item.texts.append(quantity.text)
+                continue
+            value_max = quantity.value_max if quantity.value_max is not None else value
+            if unit in UNIT_FACTORS:
+                value = to_base(value, unit)
+                value_max = to_base(value_max, unit)
+            item.value += value * factor
+            item.value_max += value_max * factor
+            item.is_range = item.is_range or quantity.value_max is not None
+            item.units.add(unit)
+            item.unit_text = item.unit_text or quantity.unit_text
+            item.prefix = item.prefix or quantity.prefix
+    logging.debug('Aggregated %d recipes to %d shopping list items', len(entries), len(items))
+    return sorted(items.values(), key=lambda item: (item.key, item.group or ''))
+
+def format_item_quantity(item, decimal_separator='.'):
+    """Returns the summed quantity as text, in the unit of the recipes if they all use the same one
+
+    :param item: The ShoppingListItem
+    :param decimal_separator: The decimal separator
+    """
+    if item.group is None:
+        return ', '.join(item.texts)
+    value, value_max = item.value, item.value_max
+    if len(item.units) == 1:
+        unit = next(iter(item.units))
+        unit_text = item.unit_text
+    else:
+        unit = get_display_unit(value, item.group)
+        unit_text = unit or ''
+    if unit in UNIT_FACTORS:
+        value, value_max = from_base(value, unit), from_base(value_max, unit)
+    text = format_value(value, decimal_separator)
+    if item.is_range:
+        text += '-' + format_value(value_max, decimal_separator)
+    if item.prefix:
+        # The sum is approximate if any quantity is
+        text = f'{item.prefix} {text}'
+    return f'{text} {unit_text}' if unit_text else text
+
+def shopping_list_to_text(items, title='', decimal_separator='.'):
+    """Returns the shopping list as plain text, one ingredient per line
+
+    :param items: The ShoppingListItem objects
+    :param title: The title
+    :param decimal_separator: The decimal separator
+    """
+    lines = [title, ''] if title else []
+    for item in items:
+        quantity = format_item_quantity(item, decimal_separator)
+        lines.append(f'- {quantity} {item.name}' if quantity else f'- {item.name}')
+    return '\n'.join(lines) + '\n'
+
+def write_shopping_list_text(items, path, title='', decimal_separator='.'):
+    """Writes the shopping list as text file
+
+    :param items: The ShoppingListItem objects
+    :param path: The file path
+    :param title: The title
+    :param decimal_separator: The decimal separator
+    """
+    logging.info('Writing shopping list with %d items to "%s"', len(items), path)
+    with open(path, 'w', encoding='utf-8') as textfile:
+        textfile.write(shopping_list_to_text(items, title, decimal_separator))
@@ -0,0 +1,204 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+#
+# Copyright 2022 Denis Meyer
+#
+# This file is part of Rezepte.
+#
+
+"""SimilarRecipes
+
+Finds the recipes of the cookbook most similar to a recipe. The TF-IDF matrix (lib.RecipeSimilarity)
+is built from the RecipeIndex in a worker thread on first use and then follows the changes of the index,
+so saving a recipe only replaces its row.
+"""
+
+import logging
+import threading
+
+from PyQt5.QtCore import QObject, QRunnable, QThreadPool, pyqtSignal
+
+from lib.AppConfig import app_conf_get
+from lib.IngredientNames import normalize_name
+from lib.Metrics import metrics_timer
+from lib.Tracing import trace_span
+from lib.Utils import iter_recipe_paths
+
+class _BuildSignals(QObject):
+    """Signals of a build task"""
+
+    done = pyqtSignal(int, object)
+
+class _BuildTask(QRunnable):
+    """Builds the similarity matrix of all recipes in a worker thread"""
+
+    def __init__(self, signals, owner, generation, folder, suffix):
+        """Initializes the task
+
+        :param signals: The signals to report the matrix (None on failure) with
+        :param owner: The SimilarRecipes
+        :param generation: The generation of the matrix, outdated once the cookbook folder changes
+        :param folder: The cookbook folder
+        :param suffix: The recipe suffix
+        """
+        super(_BuildTask, self).__init__()
+
+        self.signals = signals
+        self.owner = owner
+        self.generation = generation
+        self.folder = folder
+        self.suffix = suffix
+
+    def run(self):
+        """Runs the task"""
+        model = None
+        try:
+            # Changes of the index made by this thread are part of the build
+            self.owner._build_thread = threading.get_ident()
+            # Imported on first use, numpy is slow to import
+            from lib.RecipeSimilarity import RecipeSimilarity
+            with trace_span('similar recipes build'), metrics_timer('similar_recipes.build'):
+                entries = self.owner.recipe_index.get_all(iter_recipe_paths(self.folder, self.suffix))
+                model = RecipeSimilarity()
+                model.update_entries(entries)
+            logging.info('Built the similarity matrix of %d recipes', len(model))
+        except Exception as ex:
+            logging.error('Failed to build the similarity matrix of "%s": %s', self.folder, ex)
+        self.signals.done.emit(self.generation, model)
+
+class SimilarRecipes(QObject):
+    """Finds similar recipes, kept up to date with the RecipeIndex"""
+
+    ready = pyqtSignal()
+
+    def __init__(self, recipe_index):
+        """Initializes the service
+
+        :param recipe_index: The RecipeIndex
+        """
+        super(SimilarRecipes, self).__init__()
+
+        logging.debug('Initializing SimilarRecipes')
+
+        self.recipe_index = recipe_index
+
+        self._model = None
+        self._building = False
+        self._build_thread = None
+        self._generation = 0
+        # Changes of the index while building, path -> RecipeIndexEntry or None if removed
+        self._pending = {}
+        self._lock = threading.Lock()
+
+        self._pool = QThreadPool()
+        self._pool.setMaxThreadCount(1)
+
+        self._signals = _BuildSignals()
+        self._signals.done.connect(self._on_built)
+
+        self.recipe_index.add_update_listener(self._on_index_updated)
+
+    def find(self, path, recipe, nr_results=None):
+        """Returns the recipes most similar to a recipe
+
+        The first call starts building the matrix, ready is emitted once it is available.
+
+        :param path: The recipe path, never part of the result
+        :param recipe: The Recipe, possibly with unsaved changes
+        :param nr_results: The maximum number of results, defaults to similar.count
+        :return: List of (path, name, cosine similarity), the most similar first, None while building
+        """
+        if self._model is None:
+            self._start_build()
+            return None
+        keys = [normalize_name(ingredient.name) for ingredient in recipe.ingredients]
+        with trace_span('similar recipes query'), metrics_timer('similar_recipes.query'):
+            return self._model.most_similar(keys, recipe.steps, nr_results or app_conf_get('similar.count', 10), exclude=path)
+
+    def recipe_saved(self, path, recipe):
+        """Re-indexes a saved recipe, which replaces its row in the matrix
+
+        :param path: The recipe path
+        :param recipe: The Recipe
+        """
+        try:
+            self.recipe_index.update(path, recipe)
+        except OSError as ex:
+            logging.error('Could not index recipe "%s": %s', path, ex)
+
+    def reset(self):
+        """Drops the matrix, e.g. when the cookbook folder changed, it is rebuilt on the next query"""
+        with self._lock:
+            self._model = None
+            self._building = False
+            self._build_thread = None
+            self._pending = {}
+            self._generation += 1
+
+    def get_metrics(self):
+        """Returns the matrix statistics as flat dict"""
+        model = self._model
+        metrics = {'ready': model is not None, 'building': self._building, 'pending': len(self._pending)}
+        if model is not None:
+            metrics.update(model.get_metrics())
+        return metrics
+
+    def _start_build(self):
+        """Starts building the matrix unless already building"""
+        with self._lock:
+            if self._building:
+                return
+            self._building = True
+            generation = self._generation
+        logging.info('Building the similarity matrix')
+        self._pool.start(_BuildTask(self._signals, self, generation, app_conf_get('recipes.folder'), app_conf_get('suffix.recipe', '.json')))
+
+    def _on_built(self, generation, model):
+        """Applies the changes made while building and announces the matrix (on the GUI thread)
+
+        :param generation: The generation of the matrix
+        :param model: The RecipeSimilarity, None if building failed
+        """
+        with self._lock:
+            if generation != self._generation:
+                logging.debug('Dropping the similarity matrix of the previous cookbook folder')
+                return
+            self._building = False
+            self._build_thread = None
+            pending = self._pending
+            self._pending = {}
+            if model is None:
+                return
+            self._model = model
+        for path, entry in pending.items():
+            self._apply(model, path, entry)
+        self.ready.emit()
+
+    def _on_index_updated(self, path, entry):
+        """Follows a change of the RecipeIndex, in the thread that changed it
+
+        :param path: The recipe path
+        :param entry: The RecipeIndexEntry or None if removed
+        """
+        if threading.get_ident() == self._build_thread:
+            return
+        with self._lock:
+            model = self._model
+            if model is None:
+                if self._building:
+                    self._pending[path] = entry
+                return
+        self._apply(model, path, entry)
+
+    @staticmethod
+    def _apply(model, path, entry):
+        """Updates or removes the row of a recipe
+
+        :param model: The RecipeSimilarity
+        :param path: The recipe path
+        :param entry: The RecipeIndexEntry or None if removed
+        """
+        if entry is None:
+            model.remove(path)
+        else:
+            model.update_entries([entry])
@@ -0,0 +1,142 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+#
+# Copyright 2022 Denis Meyer
+#
+# This file is part of Rezepte.
+#
+
+"""StallDetector"""
+
+import logging
+import os
+import sys
+import threading
+import time
+import traceback
+
+from PyQt5.QtCore import Qt, QObject, pyqtSignal
+
+class StallDetector(QObject):
+    """Watchdog that pings the Qt event loop from a background thread and logs the GUI thread's stack when it does not answer in time"""
+
+    _ping = pyqtSignal()
+
+    def __init__(self, basedir, threshold_ms=150, interval_ms=100):
+        """Initializes the stall detector, must be created in the GUI thread
+
+        :param basedir: The base path, stalls are attributed to the innermost frame below it
+        :param threshold_ms: Time without answer after which the GUI thread counts as stalled
+        :param interval_ms: Time between two pings
+        """
+        super(StallDetector, self).__init__()
+
+        self.basedir = os.path.abspath(basedir)
+        self.threshold_ms = threshold_ms
+        self.interval_ms = interval_ms
+
+        self._gui_thread_id = threading.get_ident()
+        self._pong = threading.Event()
+        self._stopped = threading.Event()
+        self._thread = None
+        self._lock = threading.Lock()
+        self._stalls = {}
+
+        self._ping.connect(self._on_ping, Qt.QueuedConnection)
+
+    def start(self):
+        """Starts the watchdog thread"""
+        if self._thread:
+            return
+        logging.info('Starting stall detector (threshold %d ms)', self.threshold_ms)
+        self._stopped.clear()
+        self._thread = threading.Thread(target=self._run, name='StallDetector', daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        """Stops the watchdog thread"""
+        if not self._thread:
+            return
+        self._stopped.set()
+        self._pong.set()
+        self._thread.join(timeout=1.0)
+        self._thread = None
+
+    def _on_ping(self):
+        """Answers a ping, runs in the GUI thread"""
+        self._pong.set()
+
+    def _run(self):
+        """Pings the event loop until stopped, runs in the watchdog thread"""
+        threshold_s = self.threshold_ms / 1000.0
+        while not self._stopped.is_set():
+            self._pong.clear()
+            sent = time.perf_counter()
+            self._ping.emit()
+            if not self._pong.wait(threshold_s):
+                stack = self._capture_stack()
+                # Wait for the event loop to recover to measure the whole stall
+                self._pong.wait()
+                if self._stopped.is_set():
+                    return
+                if stack:
+                    self._record(stack, (time.perf_counter() - sent) * 1000.0)
+            self._stopped.wait(self.interval_ms / 1000.0)
+
+    def _capture_stack(self):
+        """Returns the current stack of the GUI thread as traceback.StackSummary"""
+        frame = sys._current_frames().get(self._gui_thread_id)
+        if frame is None:
+            return None
+        stack = traceback.extract_stack(frame)
+        logging.warning('GUI thread blocked for more than %d ms at %s, stack:\n%s',
+                        self.threshold_ms, self._get_call_site(stack), ''.join(traceback.format_list(stack)).rstrip())
+        return stack
+
+    def _get_call_site(self, stack):
+        """Returns the innermost frame of the application code as "file:line (function)"
+
+        :param stack: The traceback.StackSummary
+        """
+        own_file = os.path.abspath(__file__)
+        for frame in reversed(stack):
+            filename = os.path.abspath(frame.filename)
+            if filename != own_file and filename.startswith(self.basedir + os.sep):
+                return f'{os.path.relpath(filename, self.basedir)}:{frame.lineno} ({frame.name})'
+        frame = stack[-1]
+        return f'{frame.filename}:{frame.lineno} ({frame.name})'
+
+    def _record(self, stack, duration_ms):
+        """Adds a stall to the statistics
+
+        :param stack: The traceback.StackSummary captured during the stall
+        :param duration_ms: The duration of the stall
+        """
+        call_site = self._get_call_site(stack)
+        logging.warning('GUI thread was blocked for %.1f ms at %s', duration_ms, call_site)
+        with self._lock:
+            stall = self._stalls.get(call_site)
+            if not stall:
+                stall = {'call_site': call_site, 'count': 0, 'total_ms': 0.0, 'max_ms': 0.0, 'stack': ''}
+                self._stalls[call_site] = stall
+            stall['count'] += 1
+            stall['total_ms'] += duration_ms
+            if duration_ms >= stall['max_ms']:
+                stall['max_ms'] = duration_ms
+                stall['stack'] = ''.join(traceback.format_list(stack))
+
+    def get_stats(self):
+        """Returns the stalls aggregated by call site as list of dicts, longest total duration first"""
+        with self._lock:
+            stalls = [dict(stall) for stall in self._stalls.values()]
+        return sorted(stalls, key=lambda stall: stall['total_ms'], reverse=True)
+
+    def log_stats(self):
+        """Logs the stalls aggregated by call site"""
+        stalls = self.get_stats()
+        if not stalls:
+            logging.info('No GUI thread stalls detected')
+            return
+        logging.info('GUI thread stalls by call site (total, count, max):')
+        for stall in stalls:
+            logging.info('  %8.1f ms  %4dx  max %8.1f ms  %s', stall['total_ms'], stall['count'], stall['max_ms'], stall['call_site'])
@@ -0,0 +1,76 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+#
+# Copyright 2022 Denis Meyer
+#
+# This file is part of Rezepte.
+#
+
+"""StartupProfiler"""
+
+import logging
+import time
+from contextlib import contextmanager
+
+_start = time.perf_counter()
+_enabled = False
+_reported = False
+_depth = 0
+_entries = []
+
+def enable_startup_profiling():
+    """Enables the startup profiling"""
+    global _enabled
+    _enabled = True
+
+def is_startup_profiling():
+    """Returns whether startup phases are currently recorded"""
+    return _enabled and not _reported
+
+@contextmanager
+def startup_phase(name):
+    """Records the duration of a startup phase, phases may be nested
+
+    :param name: The phase name
+    """
+    global _depth
+    if not _enabled or _reported:
+        yield
+        return
+    entry = [name, _depth, time.perf_counter(), None]
+    _entries.append(entry)
+    _depth += 1
+    try:
+        yield
+    finally:
+        _depth -= 1
+        entry[3] = time.perf_counter()
+
+def startup_value(name, duration_ms):
+    """Records a duration that has been measured elsewhere, e.g. accumulated load times
+
+    :param name: The name
+    :param duration_ms: The duration in milliseconds
+    """
+    if not _enabled or _reported:
+        return
+    now = time.perf_counter()
+    _entries.append([name, _depth, now - duration_ms / 1000.0, now])
+
+def startup_report(name='first window'):
+    """Logs the startup report, phases recorded afterwards are ignored
+
+    :param name: The name of the final mark
+    """
+    global _reported
+    if not _enabled or _reported:
+        return
+    _reported = True
+
+    total = time.perf_counter() - _start
+    logging.info('Startup profile (duration, phase, offset since start):')
+    for entry_name, depth, start, end in _entries:
+        if end is None:
+            continue
+        logging.info('  %8.1f ms  %s%s (at %.1f ms)', (end - start) * 1000.0, '  ' * depth, entry_name, (start - _start) * 1000.0)
+    logging.info('  %8.1f ms  %s', total * 1000.0, name)
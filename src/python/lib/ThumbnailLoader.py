@@ -0,0 +1,173 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+#
+# Copyright 2022 Denis Meyer
+#
+# This file is part of Rezepte.
+#
+
+"""ThumbnailLoader"""
+
+import hashlib
+import json
+import logging
+import os
+
+from PyQt5.QtCore import Qt, QObject, QRunnable, QSize, QThreadPool, pyqtSignal
+from PyQt5.QtGui import QImage, QImageReader, QPixmap
+
+from lib.AppConfig import app_conf_get
+from lib.Utils import get_recipe_image_path
+
+class _ThumbnailSignals(QObject):
+    """Signals of a thumbnail task"""
+
+    done = pyqtSignal(str, int, QImage)
+
+class _ThumbnailTask(QRunnable):
+    """Decodes and downscales a recipe photo in a worker thread"""
+
+    def __init__(self, signals, recipe_path, size, image_path, cache_dir):
+        """Initializes the task
+
+        :param signals: The signals to report the result with
+        :param recipe_path: The recipe path
+        :param size: The maximum edge length of the thumbnail
+        :param image_path: The photo path or None to read it from the recipe file
+        :param cache_dir: The on-disk thumbnail cache directory
+        """
+        super(_ThumbnailTask, self).__init__()
+
+        self.signals = signals
+        self.recipe_path = recipe_path
+        self.size = size
+        self.image_path = image_path
+        self.cache_dir = cache_dir
+
+    def run(self):
+        """Runs the task"""
+        image = QImage()
+        try:
+            image_path = self.image_path
+            if image_path is None:
+                image_path = self._read_image_path()
+            if image_path and os.path.isfile(image_path):
+                image = self._load(image_path)
+        except Exception as ex:
+            logging.error('Failed to load thumbnail for "%s": %s', self.recipe_path, ex)
+        self.signals.done.emit(self.recipe_path, self.size, image)
+
+    def _read_image_path(self):
+        """Reads the photo path from the recipe file"""
+        with open(self.recipe_path, 'r', encoding='utf-8') as file_json:
+            image = json.load(file_json).get('image', '')
+        return get_recipe_image_path(image, self.recipe_path)
+
+    def _load(self, image_path):
+        """Loads the thumbnail from the disk cache or decodes and caches it
+
+        :param image_path: The photo path
+        """
+        mtime = os.stat(image_path).st_mtime_ns
+        cache_key = hashlib.sha1(f'{os.path.abspath(image_path)}|{mtime}|{self.size}'.encode('utf-8')).hexdigest()
+        cache_file = os.path.join(self.cache_dir, f'{cache_key}.png') if self.cache_dir else None
+
+        if cache_file and os.path.isfile(cache_file):
+            image = QImage(cache_file)
+            if not image.isNull():
+                return image
+
+        reader = QImageReader(image_path)
+        reader.setAutoTransform(True)
+        source_size = reader.size()
+        if source_size.isValid() and max(source_size.width(), source_size.height()) > self.size:
+            # Let the decoder downscale (much cheaper than decoding at full size for JPEG)
+            reader.setScaledSize(source_size.scaled(QSize(self.size, self.size), Qt.KeepAspectRatio))
+        image = reader.read()
+        if image.isNull():
+            logging.error('Could not decode photo "%s": %s', image_path, reader.errorString())
+            return image
+
+        if cache_file:
+            try:
+                os.makedirs(self.cache_dir, exist_ok=True)
+                tmp_file = f'{cache_file}.{os.getpid()}.tmp'
+                if image.save(tmp_file, 'PNG'):
+                    os.replace(tmp_file, cache_file)
+            except OSError as ex:
+                logging.error('Could not write thumbnail cache file "%s": %s', cache_file, ex)
+
+        return image
+
+class ThumbnailLoader(QObject):
+    """Loads recipe photo thumbnails in a worker pool, backed by an in-memory and an on-disk cache"""
+
+    thumbnail_loaded = pyqtSignal(str, int)
+
+    def __init__(self, cache):
+        """Initializes the loader
+
+        :param cache: The LRUCache for the decoded thumbnails
+        """
+        super(ThumbnailLoader, self).__init__()
+
+        logging.debug('Initializing ThumbnailLoader')
+
+        self._cache = cache
+        self._pending = set()
+        self._cache_dir = app_conf_get('thumbnails.folder', '')
+
+        self._pool = QThreadPool()
+        self._pool.setMaxThreadCount(max(1, app_conf_get('thumbnails.workers', min(4, QThreadPool.globalInstance().maxThreadCount()))))
+
+        self._signals = _ThumbnailSignals()
+        self._signals.done.connect(self._on_done)
+
+    def get(self, recipe_path, size):
+        """Returns the cached thumbnail pixmap or None
+
+        :param recipe_path: The recipe path
+        :param size: The maximum edge length
+        """
+        return self._cache.peek((recipe_path, size))
+
+    def request(self, recipe_path, size, image_path=None):
+        """Returns the cached thumbnail pixmap or schedules loading it
+
+        thumbnail_loaded is emitted once a scheduled thumbnail is available.
+
+        :param recipe_path: The recipe path
+        :param size: The maximum edge length
+        :param image_path: The photo path or None to read it from the recipe file
+        """
+        key = (recipe_path, size)
+        if key in self._cache:
+            return self._cache.get(key)
+        if key not in self._pending:
+            self._pending.add(key)
+            self._pool.start(_ThumbnailTask(self._signals, recipe_path, size, image_path, self._cache_dir))
+        return None
+
+    def invalidate(self, recipe_path):
+        """Removes all cached thumbnails of a recipe
+
+        :param recipe_path: The recipe path
+        """
+        self._cache.invalidate_where(lambda key: key[0] == recipe_path)
+
+    def cancel_pending(self):
+        """Drops all scheduled tasks that have not been started"""
+        self._pool.clear()
+        self._pending.clear()
+
+    def _on_done(self, recipe_path, size, image):
+        """Stores a decoded thumbnail (on the GUI thread)
+
+        :param recipe_path: The recipe path
+        :param size: The maximum edge length
+        :param image: The decoded image, null if not available
+        """
+        key = (recipe_path, size)
+        self._pending.discard(key)
+        self._cache.put(key, None if image.isNull() else QPixmap.fromImage(image))
+        self.thumbnail_loaded.emit(recipe_path, size)
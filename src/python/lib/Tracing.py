@@ -0,0 +1,132 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+#
+# Copyright 2022 Denis Meyer
+#
+# This file is part of Rezepte.
+#
+
+"""Tracing
+
+Records nested spans and writes them in the Chrome trace-event JSON format, which can be opened in
+chrome://tracing or https://ui.perfetto.dev. While disabled, every span only checks a module flag.
+"""
+
+import functools
+import json
+import logging
+import os
+import threading
+import time
+from contextlib import contextmanager
+
+_enabled = False
+_max_events = 0
+_dropped = 0
+_events = []
+_thread_names = {}
+
+def enable_tracing(max_events=1000000):
+    """Enables recording of spans
+
+    :param max_events: The maximum number of recorded events, further events are dropped
+    """
+    global _enabled, _max_events
+    _enabled = True
+    _max_events = max_events
+    logging.info('Tracing enabled')
+
+def is_tracing():
+    """Returns whether spans are recorded"""
+    return _enabled
+
+def _now_us():
+    """Returns the current timestamp in microseconds"""
+    return time.perf_counter_ns() // 1000
+
+def _add_event(event):
+    """Adds an event, dropping it if the buffer is full
+
+    :param event: The event dict
+    """
+    global _dropped
+    if len(_events) >= _max_events:
+        _dropped += 1
+        return
+    tid = threading.get_ident()
+    if tid not in _thread_names:
+        _thread_names[tid] = threading.current_thread().name
+    event['tid'] = tid
+    _events.append(event)
+
+@contextmanager
+def trace_span(name, category='app', **args):
+    """Records the block as span, spans in the same thread nest by time
+
+    :param name: The span name
+    :param category: The category
+    :param args: Additional values shown with the span
+    """
+    if not _enabled:
+        yield
+        return
+    start = _now_us()
+    try:
+        yield
+    finally:
+        event = {'name': name, 'cat': category, 'ph': 'X', 'ts': start, 'dur': _now_us() - start}
+        if args:
+            event['args'] = args
+        _add_event(event)
+
+def traced(name, category='app'):
+    """Decorator recording every call as span
+
+    :param name: The span name
+    :param category: The category
+    """
+    def decorator(func):
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            if not _enabled:
+                return func(*args, **kwargs)
+            start = _now_us()
+            try:
+                return func(*args, **kwargs)
+            finally:
+                _add_event({'name': name, 'cat': category, 'ph': 'X', 'ts': start, 'dur': _now_us() - start})
+        return wrapper
+    return decorator
+
+def trace_instant(name, category='app', **args):
+    """Records an instant event, e.g. a user action
+
+    :param name: The event name
+    :param category: The category
+    :param args: Additional values shown with the event
+    """
+    if not _enabled:
+        return
+    event = {'name': name, 'cat': category, 'ph': 'i', 's': 't', 'ts': _now_us()}
+    if args:
+        event['args'] = args
+    _add_event(event)
+
+def write_trace(path):
+    """Writes the recorded events as Chrome trace-event JSON
+
+    :param path: The file path
+    """
+    pid = os.getpid()
+    events = [{'name': 'process_name', 'ph': 'M', 'pid': pid, 'tid': 0, 'args': {'name': 'Recipes'}}]
+    for tid, thread_name in list(_thread_names.items()):
+        events.append({'name': 'thread_name', 'ph': 'M', 'pid': pid, 'tid': tid, 'args': {'name': thread_name}})
+    for event in list(_events):
+        events.append(dict(event, pid=pid))
+
+    logging.info('Writing %d trace events to "%s" (%d dropped)', len(events), path, _dropped)
+    dirname = os.path.dirname(path)
+    if dirname and not os.path.exists(dirname):
+        os.makedirs(dirname)
+    with open(path, 'w', encoding='utf-8') as jsonfile:
+        json.dump({'traceEvents': events, 'displayTimeUnit': 'ms', 'otherData': {'dropped_events': _dropped}}, jsonfile)
@@ -0,0 +1,288 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+#
+# Copyright 2022 Denis Meyer
+#
+# This file is part of Rezepte.
+#
+
+"""UnitConversion
+
+Converts between the canonical units of lib.QuantityParser. Every convertible unit has a dimension and
+the factor to the base unit of the dimension (g, ml, piece). Volumes of ingredients with a known density
+(resources/data/densities.json, g/ml) are converted to masses and back, e.g. cups of flour to grams,
+liquids stay volumes in metric recipes.
+
+The values of all ingredients of a recipe are converted at once with numpy, folders with a pool of worker processes, every
+changed file is replaced atomically.
+"""
+
+import functools
+import json
+import logging
+import math
+import os
+from concurrent.futures import ProcessPoolExecutor
+
+from lib.IngredientNames import normalize_name
+from lib.QuantityParser import format_quantity, format_value, parse_quantity
+from lib.Utils import write_json_atomic
+
+# Canonical unit -> (dimension, factor to the base unit of the dimension)
+UNIT_FACTORS = {
+    'mg': ('mass', 0.001),
+    'g': ('mass', 1.0),
+    'kg': ('mass', 1000.0),
+    'oz': ('mass', 28.349523125),
+    'lb': ('mass', 453.59237),
+    'ml': ('volume', 1.0),
+    'cl': ('volume', 10.0),
+    'dl': ('volume', 100.0),
+    'l': ('volume', 1000.0),
+    'fl oz': ('volume', 29.5735295625),
+    'tsp': ('volume', 5.0),
+    'tbsp': ('volume', 15.0),
+    'cup': ('volume', 240.0),
+    None: ('count', 1.0),
+    'piece': ('count', 1.0)
+}
+
+def get_dimension(unit):
+    """Returns the dimension of the unit ("mass", "volume", "count") or None if not convertible
+
+    :param unit: The canonical unit
+    """
+    factor = UNIT_FACTORS.get(unit)
+    return factor[0] if factor else None
+
+def to_base(value, unit):
+    """Converts a value to the base unit of its dimension
+
+    :param value: The value
+    :param unit: The canonical unit
+    """
+    return value * UNIT_FACTORS[unit][1]
+
+def from_base(value, unit):
+    """Converts a value from the base unit of the dimension of the unit
+
+    :param value: The value in the base unit
+    :param unit: The target unit
+    """
+    return value / UNIT_FACTORS[unit][1]
+
+def get_display_unit(value, dimension):
+    """Returns a readable metric unit for a value in the base unit, e.g. "kg" from 1000 g on
+
+    :param value: The value in the base unit
+    :param dimension: The dimension
+    """
+    if dimension == 'mass':
+        return 'kg' if value >= 1000 else 'g'
+    if dimension == 'volume':
+        return 'l' if value >= 1000 else 'ml'
+    return None
+
+SYSTEMS = ('metric', 'us')
+
+# Units replaced when converting to the system
+_CONVERTED_UNITS = {
+    'metric': {'oz', 'lb', 'fl oz', 'cup'},
+    'us': {'mg', 'g', 'kg', 'ml', 'cl', 'dl', 'l'}
+}
+
+# Plural labels of units shown in the converted text
+_UNIT_LABELS_PLURAL = {'cup': 'cups'}
+
+@functools.lru_cache(maxsize=4)
+def load_densities(basedir):
+    """Loads the density table (normalized ingredient name -> {"density": g/ml, "liquid": bool})
+
+    :param basedir: The base path
+    """
+    file_path = os.path.join(basedir, 'resources', 'data', 'densities.json')
+    try:
+        with open(file_path, 'r', encoding='utf-8') as jsonfile:
+            densities = {}
+            # Spellings of the same ingredient share the first entry
+            for name, entry in json.load(jsonfile).items():
+                densities.setdefault(normalize_name(name), entry)
+            return densities
+    except (OSError, ValueError) as ex:
+        logging.error('Failed loading densities from "%s": %s', file_path, ex)
+        return {}
+
+def get_density(key, densities):
+    """Returns the density entry of an ingredient, trying the whole name first and then its words
+
+    :param key: The normalized ingredient name
+    :param densities: The density table
+    """
+    entry = densities.get(key)
+    if entry is None:
+        for word in reversed(key.split()):
+            entry = densities.get(word)
+            if entry is not None:
+                break
+    return entry
+
+# Units converted values are shown in, in the order of _get_target_units
+_TARGET_UNITS = ('g', 'kg', 'ml', 'l', 'oz', 'lb', 'tsp', 'tbsp', 'cup')
+_TARGET_FACTORS = tuple(UNIT_FACTORS[unit][1] for unit in _TARGET_UNITS)
+
+def _get_target_units(values, is_mass, system):
+    """Returns the indices in _TARGET_UNITS of the units values in the base unit are shown in
+
+    :param values: The values in the base unit, numpy array
+    :param is_mass: Whether the values are masses (else volumes), numpy array
+    :param system: "metric" or "us"
+    """
+    import numpy as np
+
+    if system == 'metric':
+        return np.where(is_mass, 0, 2) + (values >= 1000)
+    return np.where(is_mass, 4 + (values >= UNIT_FACTORS['lb'][1]),
+                    6 + (values >= UNIT_FACTORS['tbsp'][1]) + (values >= UNIT_FACTORS['cup'][1] / 4))
+
+def _round(values, units):
+    """Rounds converted values to what is measurable in the kitchen
+
+    :param values: The values, numpy array
+    :param units: The indices of their units in _TARGET_UNITS, numpy array
+    :return: The rounded values, NaN if less than a quarter of a US unit (e.g. 2 g yeast), then it is not converted
+    """
+    import numpy as np
+
+    metric = np.where(units % 2 == 1, np.round(values, 2), np.where(values >= 10, np.rint(values), np.round(values, 1)))
+    us = np.where(values < 0.25, np.nan, np.rint(values * 4) / 4)
+    return np.where(units >= 4, us, metric)
+
+def convert_quantities(ingredients, system, densities=None, decimal_separator='.'):
+    """Converts the quantities of all ingredients of a recipe, the values at once
+
+    :param ingredients: List of (parsed Quantity, normalized name)
+    :param system: "metric" or "us"
+    :param densities: The density table, volumes are only converted to masses (and back) if given
+    :param decimal_separator: The decimal separator
+    :return: List with the converted quantity text per ingredient, None if not converted
+    """
+    # Imported on first use, numpy is slow to import
+    import numpy as np
+
+    converted_units = _CONVERTED_UNITS[system]
+    results = [None] * len(ingredients)
+    converted, values, values_max, factors, is_mass = [], [], [], [], []
+    for i, (quantity, key) in enumerate(ingredients):
+        unit = quantity.unit
+        if quantity.value is None or unit not in converted_units:
+            continue
+        dimension, factor = UNIT_FACTORS[unit]
+        density = get_density(key, densities) if densities else None
+        if density:
+            if system == 'metric' and dimension == 'volume' and not density.get('liquid'):
+                dimension, factor = 'mass', factor * density['density']
+            elif system == 'us' and dimension == 'mass':
+                dimension, factor = 'volume', factor / density['density']
+        converted.append(i)
+        values.append(quantity.value)
+        values_max.append(quantity.value if quantity.value_max is None else quantity.value_max)
+        factors.append(factor)
+        is_mass.append(dimension == 'mass')
+    if not converted:
+        return results
+    factors = np.array(factors)
+    base_values = np.array(values) * factors
+    units = _get_target_units(base_values, np.array(is_mass), system)
+    target_factors = np.take(_TARGET_FACTORS, units)
+    target_values = _round(base_values / target_factors, units)
+    target_values_max = _round(np.array(values_max) * factors / target_factors, units)
+    for i, unit, target_value, target_value_max in zip(converted, units.tolist(), target_values.tolist(), target_values_max.tolist()):
+        if math.isnan(target_value):
+            continue
+        quantity = ingredients[i][0]
+        text = format_value(target_value, decimal_separator)
+        if quantity.value_max is not None:
+            target_value = target_value_max
+            text += '-' + format_value(target_value, decimal_separator)
+        target_unit = _TARGET_UNITS[unit]
+        results[i] = format_quantity(quantity, text, _UNIT_LABELS_PLURAL.get(target_unit, target_unit) if target_value > 1 else target_unit)
+    return results
+
+def convert_recipe(recipe, system, densities=None, decimal_separator='.'):
+    """Converts the ingredient quantities of a recipe in place
+
+    :param recipe: The Recipe
+    :param system: "metric" or "us"
+    :param densities: The density table
+    :param decimal_separator: The decimal separator
+    :return: The number of converted ingredients
+    """
+    converted = convert_quantities([(ingredient.get_parsed_quantity(), normalize_name(ingredient.name)) for ingredient in recipe.ingredients],
+                                   system, densities, decimal_separator)
+    nr_converted = 0
+    for ingredient, text in zip(recipe.ingredients, converted):
+        if text is not None and text != ingredient.quantity:
+            ingredient.quantity = text
+            nr_converted += 1
+    return nr_converted
+
+def convert_recipe_obj(dict_json, system, densities=None, decimal_separator='.'):
+    """Converts the ingredient quantities of a parsed recipe file in place, other fields stay untouched
+
+    :param dict_json: The parsed JSON
+    :param system: "metric" or "us"
+    :param densities: The density table
+    :param decimal_separator: The decimal separator
+    :return: The number of converted ingredients
+    """
+    ingredients = [ingredient for ingredient in dict_json.get('ingredients', []) if isinstance(ingredient, dict)]
+    converted = convert_quantities([(parse_quantity(ingredient.get('quantity')), normalize_name(ingredient.get('name'))) for ingredient in ingredients],
+                                   system, densities, decimal_separator)
+    nr_converted = 0
+    for ingredient, text in zip(ingredients, converted):
+        if text is not None and text != ingredient.get('quantity'):
+            ingredient['quantity'] = text
+            nr_converted += 1
+    return nr_converted
+
+def _convert_file(path, system, densities, decimal_separator, dry_run):
+    """Converts a recipe file, runs in a worker process
+
+    :param path: The recipe path
+    :param system: "metric" or "us"
+    :param densities: The density table
+    :param decimal_separator: The decimal separator
+    :param dry_run: Whether to only count the conversions
+    :return: (path, number of converted ingredients, error message or None)
+    """
+    try:
+        with open(path, 'r', encoding='utf-8') as jsonfile:
+            dict_json = json.load(jsonfile)
+        nr_converted = convert_recipe_obj(dict_json, system, densities, decimal_separator)
+        if nr_converted and not dry_run:
+            write_json_atomic(path, dict_json)
+        return path, nr_converted, None
+    except (OSError, ValueError, AttributeError) as ex:
+        return path, 0, str(ex)
+
+def convert_files(paths, system, densities=None, decimal_separator='.', workers=None, dry_run=False):
+    """Converts recipe files in place with a pool of worker processes
+
+    :param paths: The recipe paths
+    :param system: "metric" or "us"
+    :param densities: The density table
+    :param decimal_separator: The decimal separator
+    :param workers: The number of worker processes, defaults to the number of CPUs
+    :param dry_run: Whether to only count the conversions
+    :return: Iterator of (path, number of converted ingredients, error message or None) in the order of the paths
+    """
+    paths = list(paths)
+    if workers == 1 or len(paths) < 2:
+        for path in paths:
+            yield _convert_file(path, system, densities, decimal_separator, dry_run)
+        return
+    with ProcessPoolExecutor(max_workers=workers) as executor:
+        nr_paths = len(paths)
+        chunksize = max(1, min(64, nr_paths // ((workers or os.cpu_count() or 1) * 4)))
+        yield from executor.map(_convert_file, paths, [system] * nr_paths, [densities] * nr_paths,
+                                [decimal_separator] * nr_paths, [dry_run] * nr_paths, chunksize=chunksize)
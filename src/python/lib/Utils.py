@@ -12,14 +12,16 @@ import os
 import logging
 import json
 import platform
+import stat
+import tempfile
 from pathlib import Path
 
 from classes.Recipe import Recipe
 from classes.Exceptions import JsonProcessingError
 
-from lib.AppConfig import app_conf_get, get_loglevel
-
-from PyQt5.QtGui import QPixmap, QIcon
+from lib.AppConfig import app_conf_get, app_conf_set, get_public_values
+from lib.Metrics import timed
+from lib.Tracing import traced
 
 def is_macos():
     """Check whether OS is macOS
@@ -33,6 +35,24 @@ def is_macos():
         logging.debug('Platform is not Mac OS')
         return False
 
+def get_memory_usage():
+    """Returns the resident memory of the process in bytes or None if not available
+
+    Reads the current value on Linux, elsewhere the peak value.
+    """
+    try:
+        with open('/proc/self/statm', 'r', encoding='utf-8') as statm:
+            return int(statm.read().split()[1]) * os.sysconf('SC_PAGE_SIZE')
+    except (OSError, ValueError, IndexError, AttributeError):
+        pass
+    try:
+        import resource
+    except ImportError:
+        return None
+    # Bytes on macOS, kilobytes elsewhere
+    maxrss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return maxrss if platform.uname().system.startswith('Darw') else maxrss * 1024
+
 def verify_recipes_dir():
     """Verifies the recipe dir is present"""
     _dir = app_conf_get('recipes.folder')
@@ -43,31 +63,6 @@ def verify_recipes_dir():
         logging.error('Failed creating recipe directory in home directory "%s": %s', _dir, ex)
         raise FileNotFoundError(f'Failed creating recipe directory in home directory "{_dir}"') from ex
 
-def update_logging(loglevel, logtofile=False):
-    """Updates the logging
-
-    :param loglevel: DEBUG, INFO, ERROR
-    :param logtofile: Flag whether to log to file
-    """
-    logging.info('Setting log level to "%s"', loglevel)
-    _lvl = get_loglevel()
-    logging.getLogger().setLevel(_lvl)
-
-    if logtofile:
-        logging.info('Logging to file')
-        basedir = os.path.dirname(app_conf_get('logging.logfile'))
-        try:
-            if not os.path.exists(basedir):
-                os.makedirs(basedir)
-        except Exception as ex:
-            logging.error('Failed creating a new directory "%s": %s', basedir, ex)
-        handler_file = logging.FileHandler(app_conf_get('logging.logfile'), mode='w', encoding='utf-8', delay=False)
-        handler_file.setLevel(_lvl)
-        handler_file.setFormatter(logging.Formatter(fmt=app_conf_get('logging.format'), datefmt=app_conf_get('logging.datefmt')))
-        logging.getLogger().addHandler(handler_file)
-    else:
-        logging.info('Not logging to file')
-
 def _load_conf(file_path):
     """Loads the configuration
 
@@ -97,6 +92,22 @@ def _load_conf_from_home_folder():
 
     return _load_conf(file_path)
 
+def init_conf(save_defaults=True):
+    """Loads the configuration from the home folder into the app config
+
+    :param save_defaults: Whether to write the default configuration if none is present
+    """
+    conf_loaded, conf = _load_conf_from_home_folder()
+
+    if conf_loaded:
+        for key, val in conf.items():
+            logging.debug('Overwriting config entry "%s": "%s"', key, val)
+            app_conf_set(key, val)
+    elif save_defaults:
+        save_conf(get_public_values())
+
+    return conf_loaded
+
 def save_conf(config):
     """Saves the configuration to the home directory
 
@@ -156,41 +167,98 @@ def load_i18n(basedir, lang):
 
     return translations
 
-def load_pixmap(basedir, file, base_path=None):
+def get_recipe_image_path(image, recipe_path):
     """
-    Loads an image, prepares it for play
+    Resolves the photo path of a recipe, relative paths are relative to the recipe file
 
-    :param basedir: The base path
-    :param file: The file to load from
-    :param base_path: The base path
+    :param image: The photo path as stored in the recipe
+    :param recipe_path: The recipe path
     """
-    if not base_path:
-        file_path = os.path.join(basedir, 'resources', file)
-    else:
-        file_path = os.path.join(basedir, 'resources', base_path, file)
-    logging.debug('Loading image "%s" from directory "%s"', file, file_path)
-    try:
-        return QPixmap(file_path) if os.path.exists(file_path) else None
-    except Exception as ex:
-        raise FileNotFoundError(f'Could not load image "{file_path}"') from ex
+    if not image:
+        return ''
+    if os.path.isabs(image):
+        return image
+    return os.path.normpath(os.path.join(os.path.dirname(recipe_path), image))
 
-def load_icon(basedir, file, base_path=None):
+def get_recipe_image_obj(image_path, recipe_path):
     """
-    Loads an image, prepares it for play
+    Returns the photo path to store in a recipe, relative to the recipe file if inside the recipe folder
 
-    :param basedir: The base path
-    :param file: The file to load from
-    :param base_path: The base path
+    :param image_path: The absolute photo path
+    :param recipe_path: The recipe path
     """
-    if not base_path:
-        file_path = os.path.join(basedir, 'resources', file)
-    else:
-        file_path = os.path.join(basedir, 'resources', base_path, file)
-    logging.debug('Loading image "%s" from directory "%s"', file, file_path)
+    recipes_folder = os.path.abspath(app_conf_get('recipes.folder'))
+    image_path = os.path.abspath(image_path)
     try:
-        return QIcon(file_path) if os.path.exists(file_path) else None
-    except Exception as ex:
-        raise FileNotFoundError(f'Could not load image "{file_path}"') from ex
+        if os.path.commonpath([recipes_folder, image_path]) == recipes_folder:
+            return os.path.relpath(image_path, os.path.dirname(os.path.abspath(recipe_path)))
+    except ValueError:
+        # Different drives
+        pass
+    return image_path
+
+def rebase_recipe_images(source, destination, suffix=None):
+    """
+    Rewrites the relative photo paths of moved recipes, so they still point to the same photos
+
+    Photos inside a moved folder have been moved along.
+
+    :param source: The old path of the moved recipe or folder
+    :param destination: The new path of the recipe or folder
+    :param suffix: The recipe suffix, defaults to the configured one
+    :return: List of (old recipe path, new recipe path) of the moved recipes
+    """
+    source = source.rstrip(os.sep)
+    destination = destination.rstrip(os.sep)
+    paths = list(iter_recipe_paths(destination, suffix)) if os.path.isdir(destination) else [destination]
+    moved = []
+    for path in paths:
+        old_path = source + path[len(destination):]
+        moved.append((old_path, path))
+        try:
+            with open(path, 'r', encoding='utf-8') as file_json:
+                dict_json = json.load(file_json)
+            image = dict_json.get('image') if isinstance(dict_json, dict) else None
+            if not image or not isinstance(image, str) or os.path.isabs(image):
+                continue
+            image_path = get_recipe_image_path(image, old_path)
+            moved_folder = os.path.normpath(source)
+            if image_path.startswith(moved_folder + os.sep):
+                image_path = os.path.normpath(destination) + image_path[len(moved_folder):]
+            new_image = os.path.relpath(image_path, os.path.dirname(path))
+            if new_image != image:
+                logging.info('Rewriting photo path of "%s" to "%s"', path, new_image)
+                dict_json['image'] = new_image
+                write_json_atomic(path, dict_json)
+        except (OSError, ValueError) as ex:
+            logging.error('Could not rewrite photo path of "%s": %s', path, ex)
+    return moved
+
+def iter_recipe_paths(folder, suffix=None):
+    """
+    Yields the paths of all recipes below a folder, one directory at a time (sorted per directory)
+
+    :param folder: The folder
+    :param suffix: The recipe suffix, defaults to the configured one
+    """
+    if not suffix:
+        suffix = app_conf_get('suffix.recipe', '.json')
+    stack = [folder]
+    while stack:
+        current = stack.pop()
+        try:
+            with os.scandir(current) as entries:
+                entries = sorted(entries, key=lambda entry: entry.name)
+        except OSError as ex:
+            logging.error('Could not list directory "%s": %s', current, ex)
+            continue
+        subdirs = []
+        for entry in entries:
+            if entry.is_dir():
+                subdirs.append(entry.path)
+            elif entry.name.endswith(suffix):
+                yield entry.path
+        stack.extend(reversed(subdirs))
 
 def load_json(basedir, file, base_path=None):
     """
@@ -211,15 +279,17 @@ def load_json(basedir, file, base_path=None):
         with open(file_path, 'r', encoding='utf-8') as file_json:
             return json.load(file_json)
     except Exception as ex:
-        raise JsonProcessingError(f'Could not process JSON file "{file_path}": {e}') from ex
+        raise JsonProcessingError(f'Could not process JSON file "{file_path}": {ex}') from ex
 
+@traced('load_json_recipe')
+@timed('recipe.load')
 def load_json_recipe(filename):
     """
     Loads a JSON file
 
     :param filename: The file name
     """
-    logging.debug('Loading JSON file "{%s}"', filename)
+    logging.debug('Loading JSON file "%s"', filename)
     if not os.path.exists(filename):
         raise FileNotFoundError(f'Could not load JSON file "{filename}"')
     try:
@@ -227,8 +297,64 @@ def load_json_recipe(filename):
             dict_json = json.load(file_json)
         return Recipe(**dict_json)
     except Exception as ex:
-        raise JsonProcessingError(f'Could not process JSON file "{filename}": {e}') from ex
+        raise JsonProcessingError(f'Could not process JSON file "{filename}": {ex}') from ex
 
+def validate_recipe_json(dict_json):
+    """
+    Validates the structure of a parsed recipe file
+
+    :param dict_json: The parsed JSON
+    :return: List of error messages, empty if valid
+    """
+    if not isinstance(dict_json, dict):
+        return ['Recipe is not a JSON object']
+    errors = []
+    for key in ['name', 'information', 'image']:
+        if key in dict_json and not isinstance(dict_json[key], str):
+            errors.append(f'"{key}" is not a string')
+    if 'servings' in dict_json and (not isinstance(dict_json['servings'], int) or isinstance(dict_json['servings'], bool) or dict_json['servings'] < 0):
+        errors.append('"servings" is not a non-negative integer')
+    if 'ingredients' in dict_json:
+        if not isinstance(dict_json['ingredients'], list):
+            errors.append('"ingredients" is not a list')
+        else:
+            for i, ingredient in enumerate(dict_json['ingredients']):
+                if not isinstance(ingredient, dict):
+                    errors.append(f'Ingredient #{i + 1} is not a JSON object')
+                    continue
+                for key in ['quantity', 'name', 'addition']:
+                    if key in ingredient and ingredient[key] is not None and not isinstance(ingredient[key], str):
+                        errors.append(f'"{key}" of ingredient #{i + 1} is not a string')
+    if 'steps' in dict_json:
+        if not isinstance(dict_json['steps'], list):
+            errors.append('"steps" is not a list')
+        else:
+            for i, step in enumerate(dict_json['steps']):
+                if not isinstance(step, str):
+                    errors.append(f'Step #{i + 1} is not a string')
+    return errors
+
+def write_json_atomic(path, obj):
+    """Writes JSON to a temporary file next to the target and replaces the target with it
+
+    :param path: The file path
+    :param obj: The object
+    """
+    fd, tmp_path = tempfile.mkstemp(prefix='.' + os.path.basename(path) + '.', suffix='.tmp', dir=os.path.dirname(path) or '.')
+    try:
+        with os.fdopen(fd, 'w', encoding='utf-8') as jsonfile:
+            json.dump(obj, jsonfile)
+            jsonfile.flush()
+            os.fsync(jsonfile.fileno())
+        if os.path.exists(path):
+            os.chmod(tmp_path, stat.S_IMODE(os.stat(path).st_mode))
+        os.replace(tmp_path, path)
+    except BaseException:
+        os.remove(tmp_path)
+        raise
+
+@traced('save_recipe')
+@timed('recipe.save')
 def save_recipe(recipe, path):
     """
     Tries to save the recipe to an existing file
@@ -248,12 +374,7 @@ def save_recipe(recipe, path):
 
     logging.info('Creating and writing recipe file "%s"', path)
 
-    data = {
-        'name': recipe.name,
-        'ingredients': recipe.get_ingredients_obj(),
-        'steps': recipe.get_steps_obj(),
-        'information': recipe.get_information_obj()
-    }
+    data = recipe.as_obj()
 
     try:
         with open(path, 'w', encoding='utf-8') as f: